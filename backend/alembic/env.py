@@ -18,6 +18,11 @@ if config.config_file_name is not None:
 try:
     from app.core.database import Base
     from app.models.user import User
+    from app.models.pdf_processed_chunk import PdfProcessedChunk
+    from app.models.pdf_page_checkpoint import PdfPageCheckpoint
+    from app.models.document_chunk import DocumentChunk
+    from app.models.llm_cache_entry import LlmCacheEntry
+    from app.models.app_setting import AppSetting
     from app.models.enums import UserRole
 
     target_metadata = Base.metadata
@@ -0,0 +1,38 @@
+"""Create pdf_processed_chunks table
+
+Revision ID: 4a7116e699e9
+Revises: 9d1910135b7c
+Create Date: 2026-10-18 09:12:41.203518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a7116e699e9'
+down_revision: Union[str, None] = '9d1910135b7c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('pdf_processed_chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_hash', sa.String(length=64), nullable=False),
+    sa.Column('extractor_version', sa.String(length=64), nullable=False),
+    sa.Column('chunk_index', sa.Integer(), nullable=False),
+    sa.Column('page_number', sa.Integer(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('file_hash', 'extractor_version', 'chunk_index', name='uq_pdf_processed_chunks_hash_version_index')
+    )
+    op.create_index(op.f('ix_pdf_processed_chunks_file_hash'), 'pdf_processed_chunks', ['file_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_pdf_processed_chunks_file_hash'), table_name='pdf_processed_chunks')
+    op.drop_table('pdf_processed_chunks')
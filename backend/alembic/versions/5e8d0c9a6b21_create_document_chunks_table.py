@@ -0,0 +1,42 @@
+"""Create document_chunks table
+
+Revision ID: 5e8d0c9a6b21
+Revises: b3c5e2f17a40
+Create Date: 2026-10-18 13:20:44.907163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8d0c9a6b21'
+down_revision: Union[str, None] = 'b3c5e2f17a40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('document_chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_hash', sa.String(length=64), nullable=False),
+    sa.Column('extractor_version', sa.String(length=64), nullable=False),
+    sa.Column('chunker', sa.String(length=64), nullable=False),
+    sa.Column('chunk_index', sa.Integer(), nullable=False),
+    sa.Column('page_number', sa.Integer(), nullable=True),
+    sa.Column('char_start', sa.Integer(), nullable=False),
+    sa.Column('char_end', sa.Integer(), nullable=False),
+    sa.Column('token_count', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('file_hash', 'extractor_version', 'chunker', 'chunk_index', name='uq_document_chunks_hash_version_chunker_index')
+    )
+    op.create_index(op.f('ix_document_chunks_file_hash'), 'document_chunks', ['file_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_document_chunks_file_hash'), table_name='document_chunks')
+    op.drop_table('document_chunks')
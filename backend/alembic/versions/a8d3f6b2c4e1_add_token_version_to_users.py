@@ -0,0 +1,26 @@
+"""Add token_version to users
+
+Revision ID: a8d3f6b2c4e1
+Revises: f2c9d7e1a3b5
+Create Date: 2026-10-18 21:04:37.218305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d3f6b2c4e1'
+down_revision: Union[str, None] = 'f2c9d7e1a3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,40 @@
+"""Create pdf_page_checkpoints table
+
+Revision ID: b3c5e2f17a40
+Revises: 4a7116e699e9
+Create Date: 2026-10-18 11:47:05.318842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c5e2f17a40'
+down_revision: Union[str, None] = '4a7116e699e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('pdf_page_checkpoints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_hash', sa.String(length=64), nullable=False),
+    sa.Column('extractor_version', sa.String(length=64), nullable=False),
+    sa.Column('page_number', sa.Integer(), nullable=False),
+    sa.Column('page_count', sa.Integer(), nullable=False),
+    sa.Column('method', sa.String(length=16), nullable=False),
+    sa.Column('sections', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('file_hash', 'extractor_version', 'page_number', name='uq_pdf_page_checkpoints_hash_version_page')
+    )
+    op.create_index(op.f('ix_pdf_page_checkpoints_file_hash'), 'pdf_page_checkpoints', ['file_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_pdf_page_checkpoints_file_hash'), table_name='pdf_page_checkpoints')
+    op.drop_table('pdf_page_checkpoints')
@@ -0,0 +1,37 @@
+"""Add embeddings with an HNSW index to document_chunks
+
+Revision ID: c71f4a2d9e03
+Revises: 5e8d0c9a6b21
+Create Date: 2026-10-18 14:36:12.551207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71f4a2d9e03'
+down_revision: Union[str, None] = '5e8d0c9a6b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS vector')
+    op.add_column('document_chunks', sa.Column('embedding', pgvector.sqlalchemy.Vector(dim=768), nullable=True))
+    op.add_column('document_chunks', sa.Column('embedder', sa.String(length=64), nullable=True))
+    op.create_index(
+        'ix_document_chunks_embedding_hnsw', 'document_chunks', ['embedding'], unique=False,
+        postgresql_using='hnsw',
+        postgresql_with={'m': 16, 'ef_construction': 64},
+        postgresql_ops={'embedding': 'vector_cosine_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_document_chunks_embedding_hnsw', table_name='document_chunks')
+    op.drop_column('document_chunks', 'embedder')
+    op.drop_column('document_chunks', 'embedding')
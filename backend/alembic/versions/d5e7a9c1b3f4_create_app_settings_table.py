@@ -0,0 +1,31 @@
+"""Create app_settings table
+
+Revision ID: d5e7a9c1b3f4
+Revises: a8d3f6b2c4e1
+Create Date: 2026-10-18 21:04:37.218406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e7a9c1b3f4'
+down_revision: Union[str, None] = 'a8d3f6b2c4e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('app_settings',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.Text(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('app_settings')
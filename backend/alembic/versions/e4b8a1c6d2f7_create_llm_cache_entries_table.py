@@ -0,0 +1,35 @@
+"""Create llm_cache_entries table
+
+Revision ID: e4b8a1c6d2f7
+Revises: c71f4a2d9e03
+Create Date: 2026-10-18 16:02:41.207318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b8a1c6d2f7'
+down_revision: Union[str, None] = 'c71f4a2d9e03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('llm_cache_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('namespace', sa.String(length=64), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('model', sa.String(length=128), nullable=False),
+    sa.Column('response', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('namespace', 'cache_key', name='uq_llm_cache_entries_namespace_key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('llm_cache_entries')
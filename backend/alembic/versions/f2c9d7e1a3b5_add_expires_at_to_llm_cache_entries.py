@@ -0,0 +1,28 @@
+"""Add expires_at to llm_cache_entries
+
+Revision ID: f2c9d7e1a3b5
+Revises: e4b8a1c6d2f7
+Create Date: 2026-10-18 17:21:09.643127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c9d7e1a3b5'
+down_revision: Union[str, None] = 'e4b8a1c6d2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('llm_cache_entries', sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_llm_cache_entries_expires_at'), 'llm_cache_entries', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_llm_cache_entries_expires_at'), table_name='llm_cache_entries')
+    op.drop_column('llm_cache_entries', 'expires_at')
@@ -0,0 +1,87 @@
+"""
+Benchmark: rows/s when writing document chunks through the ORM (one
+`AsyncSession.add` per row), multi-row INSERT batches and asyncpg COPY.
+
+Needs the database from docker-compose with the migrations applied:
+
+    docker compose exec api python -m app.benchmark_chunk_insert --rows 20000
+
+Every run writes under a throwaway file hash and deletes its rows afterwards.
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.core.config import settings
+from app.core.database import get_db_contextmanager
+from app.models.document_chunk import DocumentChunk
+from app.utils.chunk_store import CHUNK_COLUMNS, chunk_records, copy_chunk_rows, insert_chunk_rows
+from app.utils.chunking import TextChunk
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+SAMPLE_TEXT = (
+    "O periciando relata dor lombar há cinco anos, com irradiação para o membro inferior esquerdo, "
+    "e apresenta laudos de ressonância magnética compatíveis com protrusão discal em L4-L5. "
+) * 8
+
+
+def make_records(n_rows: int):
+    file_hash = uuid.uuid4().hex + uuid.uuid4().hex
+    chunks = [
+        TextChunk(index, index // 4 + 1, index * len(SAMPLE_TEXT), (index + 1) * len(SAMPLE_TEXT), 512, SAMPLE_TEXT)
+        for index in range(n_rows)
+    ]
+    return file_hash, chunk_records(file_hash, "benchmark", "benchmark", chunks)
+
+
+async def write_orm(records, batch_size):
+    async with get_db_contextmanager() as db:
+        for record in records:
+            db.add(DocumentChunk(**dict(zip(CHUNK_COLUMNS, record))))
+        await db.commit()
+
+
+async def write_multi_row_insert(records, batch_size):
+    async with get_db_contextmanager() as db:
+        await insert_chunk_rows(db, records, batch_size)
+        await db.commit()
+
+
+async def write_copy(records, batch_size):
+    async with get_db_contextmanager() as db:
+        if not await copy_chunk_rows(db, records, batch_size):
+            logger.warning("The database driver is not asyncpg: COPY fell back to multi-row INSERT.")
+        await db.commit()
+
+
+async def cleanup(file_hash):
+    async with get_db_contextmanager() as db:
+        await db.execute(delete(DocumentChunk).where(DocumentChunk.file_hash == file_hash))
+        await db.commit()
+
+
+async def main(n_rows: int, batch_size: int):
+    print(f"Writing {n_rows} chunk rows per method (batch size {batch_size})")
+    for name, writer in (("ORM add", write_orm), ("multi-row INSERT", write_multi_row_insert), ("COPY", write_copy)):
+        file_hash, records = make_records(n_rows)
+        start = time.perf_counter()
+        try:
+            await writer(records, batch_size)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>18}: {elapsed:8.3f} s  {n_rows / elapsed:12,.0f} rows/s")
+        finally:
+            await cleanup(file_hash)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Rows written by each method")
+    parser.add_argument("--batch-size", type=int, default=settings.CHUNK_INSERT_BATCH_SIZE)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.batch_size))
@@ -17,6 +17,28 @@ class Settings(BaseSettings):
     # Gemini Model Name
     GEMINI_MODEL_NAME: str = "gemini-2.0-flash-exp"
 
+    # Chat client registry (see app/core/llm_clients.py)
+    LLM_CLIENT_CACHE_SIZE: int = 8 # Initialised clients kept, least recently used evicted first
+    LLM_CLIENT_WARMUP_MODELS: List[str] = [] # Created at startup, besides GEMINI_MODEL_NAME
+
+    # Provider-side context caching of long prompt prefixes (see app/core/context_cache.py)
+    LLM_CONTEXT_CACHE_PROVIDER: str = "google" # google, local (in-memory stub) or none
+    LLM_CONTEXT_CACHE_TTL_SECONDS: int = 3600 # Lifetime of a cached prefix at the provider
+    LLM_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS: int = 300 # TTL is extended when less than this remains
+    LLM_CONTEXT_CACHE_MIN_TOKENS: int = 4096 # Shorter prefixes are sent uncached (provider minimum)
+    LLM_CONTEXT_CACHE_FAILURE_BACKOFF_SECONDS: float = 600.0 # After a failed creation, that model/prefix is sent uncached for this long
+
+    # Outbound limiter for LLM calls, per model (see app/core/llm_limiter.py)
+    LLM_RATE_LIMIT_RPM: int = 2000 # Requests per minute; 0 disables the request bucket
+    LLM_RATE_LIMIT_TPM: int = 4_000_000 # Prompt tokens per minute; 0 disables the token bucket
+    LLM_RATE_LIMIT_BURST_SECONDS: float = 10.0 # Bucket capacity, in seconds of quota
+    LLM_LIMITER_INITIAL_CONCURRENCY: int = 8 # Calls in flight before any feedback
+    LLM_LIMITER_MAX_CONCURRENCY: int = 64 # Upper bound of the adaptive limit
+    LLM_LIMITER_LATENCY_TARGET_SECONDS: float = 60.0 # Slower calls shrink the limit
+    LLM_LIMITER_DECREASE_COOLDOWN_SECONDS: float = 5.0 # Min interval between two decreases
+    LLM_LIMITER_MAX_WAIT_SECONDS: float = 120.0 # Queue deadline before HTTP 503
+    LLM_LIMITER_RETRY_AFTER_SECONDS: int = 30 # Retry-After sent with that 503
+
     # Database URLs
     DATABASE_URL: Optional[str] = None # Sync URL (primarily for Alembic reflection)
     ASYNC_DATABASE_URL: Optional[str] = None # Async URL (for application) - ADDED
@@ -34,6 +56,78 @@ class Settings(BaseSettings):
     # Application Port
     APP_PORT: int = 8000
 
+    # PDF Upload Ingest (streamed to disk in fixed-size chunks)
+    PDF_UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024 # 1 MiB per read/write
+    PDF_UPLOAD_MAX_FILE_BYTES: int = 256 * 1024 * 1024 # Per-file limit
+    PDF_UPLOAD_MAX_REQUEST_BYTES: int = 1024 * 1024 * 1024 # Limit for all files of one request
+    PDF_UPLOAD_TMP_DIR: Optional[str] = None # None uses the system temp dir
+
+    # PDF Extraction Process Pool (Docling/OCR runs outside the event loop)
+    PDF_EXTRACTION_WORKERS: int = 2 # Worker processes
+    PDF_EXTRACTION_QUEUE_LIMIT: int = 8 # Jobs allowed to wait for a free worker before 503
+    PDF_EXTRACTION_TIMEOUT_SECONDS: float = 600.0 # Per-job timeout; the stuck worker is killed
+    PDF_EXTRACTION_RETRY_AFTER_SECONDS: int = 30 # Retry-After header sent when the queue is full
+    PDF_EXTRACTION_START_METHOD: str = "spawn" # multiprocessing start method for workers
+    PDF_EXTRACTION_FILE_CONCURRENCY: int = 4 # Files of one request extracted at the same time
+    PDF_EXTRACTION_SHARD_PAGES: int = 25 # Scanned pages OCRed per job; large PDFs are split across workers
+    PDF_EXTRACTION_MAX_SHARDS_PER_REQUEST: int = 4 # Extraction jobs one request may have queued/running at a time
+    PDF_TEXT_LAYER_MIN_CHARS: int = 32 # Letters/digits a page's embedded text needs to skip OCR
+
+    # Chunking of extracted text (defaults for modules without `chunking` in modules.yaml)
+    CHUNK_MAX_TOKENS: int = 512
+    CHUNK_OVERLAP_TOKENS: int = 64
+    CHUNK_INSERT_BATCH_SIZE: int = 1000 # Rows per COPY / multi-row INSERT batch
+
+    # Chunk Embeddings (pgvector)
+    EMBEDDING_PROVIDER: str = "hashing" # "hashing" (local, deterministic) or "gemini"
+    EMBEDDING_MODEL_NAME: str = "models/text-embedding-004" # Used when EMBEDDING_PROVIDER=gemini
+    EMBEDDING_BATCH_SIZE: int = 64 # Chunks per embedder call
+    EMBEDDING_HNSW_EF_SEARCH: int = 40 # HNSW candidate list size at query time (recall vs. latency)
+
+    # Gerador de Quesitos (retrieval mode)
+    GERADOR_QUESITOS_TOP_K: int = 32 # Chunks retrieved for the prompt
+    GERADOR_QUESITOS_CONTEXT_TOKEN_BUDGET: int = 16000 # Max tokens of document text in the prompt
+
+    # Gerador de Quesitos (map-reduce mode)
+    GERADOR_QUESITOS_MAP_CHUNK_TOKENS: int = 6000 # Tokens of document text per map call
+    GERADOR_QUESITOS_MAP_CONCURRENCY: int = 8 # Simultaneous summary calls per request
+    GERADOR_QUESITOS_REDUCE_FAN_IN: int = 6 # Summaries consolidated per reduce call
+
+    # Gerador de Quesitos (result cache)
+    GERADOR_QUESITOS_RESULT_CACHE_TTL_SECONDS: int = 7 * 24 * 3600 # 0 disables the cache
+
+    # Gerador de Quesitos (prompt token budget)
+    GERADOR_QUESITOS_MAX_INPUT_TOKENS: int = 1_000_000 # Input limit of the model
+    GERADOR_QUESITOS_OUTPUT_RESERVE_TOKENS: int = 8192 # Kept free for the generated quesitos
+
+    # Gerador de Quesitos (batch generation)
+    GERADOR_QUESITOS_BATCH_CONCURRENCY: int = 4 # Cases of a batch generated at the same time
+    GERADOR_QUESITOS_BATCH_MAX_CASES: int = 100 # Cases accepted per batch request
+
+    # Password hashing pool (bcrypt off the event loop, see app/core/password_executor.py)
+    PASSWORD_HASH_WORKERS: int = 2 # Threads hashing/verifying at the same time
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32 # Calls allowed to wait for a free thread before 503
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 5 # Retry-After header sent when the queue is full
+    BCRYPT_ROUNDS: Optional[int] = None # Fixed bcrypt cost; None uses the cost calibrated once and shared in app_settings
+    BCRYPT_TARGET_VERIFY_SECONDS: float = 0.25 # Calibration picks the highest cost under this verify time
+    BCRYPT_CALIBRATION_SAMPLES: int = 5 # Benchmark hashes timed per calibration; the median is used
+    BCRYPT_MIN_ROUNDS: int = 10 # Calibration bounds; stored hashes below the minimum are rehashed on login
+    BCRYPT_MAX_ROUNDS: int = 15
+
+    # Authenticated user cache (see app/core/principal_cache.py)
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0 # Max age of a cached user; 0 disables the cache
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000 # Users kept, least recently used evicted first
+    PRINCIPAL_CACHE_NOTIFY_CHANNEL: str = "principal_invalidation" # Postgres LISTEN/NOTIFY channel; empty disables it
+
+    # Authorization mode (see app/core/dependencies.py and app/core/token_revocation.py)
+    AUTH_MODE: str = "database" # database (load the user per request) or claims (trust signed token claims)
+    AUTH_REVOCATION_REFRESH_SECONDS: float = 15.0 # Reload interval of the token versions in claims mode
+    AUTH_REVOCATION_MAX_STALENESS_SECONDS: float = 60.0 # Older revocation data is not trusted (user loaded instead)
+
+    # Verified access token cache (see app/core/token_cache.py)
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000 # Tokens kept until their exp, least recently used evicted first; 0 disables the cache
+    TOKEN_CACHE_MAX_BYTES: int = 16 * 1024 * 1024 # Estimated memory cap of the cached claims
+
     class Config:
         env_file = ".env"
         env_file_encoding = 'utf-8'
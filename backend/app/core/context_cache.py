@@ -0,0 +1,223 @@
+# backend/app/core/context_cache.py
+"""
+Provider-side caching of long, stable prompt prefixes ("context caching").
+
+When every call of a prompt starts with the same long instructions, the prefix
+can be stored by the model provider once and referenced by name afterwards: the
+provider bills the cached tokens at a reduced rate and does not process them
+again, which also shortens the time to the first token.
+
+`ContextCache.handle(model, prefix)` returns the provider's name for the cached
+prefix. The cache entry is created on first use (per model and prefix content)
+and its TTL is extended once less than LLM_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS
+remain, so every request in the process reuses the same handle. Prefixes shorter
+than LLM_CONTEXT_CACHE_MIN_TOKENS (the provider's minimum) and provider errors
+yield None, and the caller sends the whole prompt as before. A failed creation
+is remembered for LLM_CONTEXT_CACHE_FAILURE_BACKOFF_SECONDS (per model and
+prefix), so a model without context caching does not cost a failed call on
+every request.
+
+LLM_CONTEXT_CACHE_PROVIDER selects "google" (Gemini API cachedContents),
+"local" (in-memory stub, for tests and offline development) or "none".
+"""
+import itertools
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from google.ai.generativelanguage_v1beta import CacheServiceAsyncClient, CachedContent, Content, Part
+from google.protobuf.duration_pb2 import Duration
+from google.protobuf.field_mask_pb2 import FieldMask
+
+from app.core.config import settings, logger
+from app.utils.llm_cache import llm_cache_key
+from app.utils.single_flight import SingleFlight
+from app.utils.tokenizer import count_tokens
+
+
+class CachedPrefix(NamedTuple):
+    """Provider name of a cached prefix and when it expires (epoch seconds)."""
+    name: str
+    expires_at: float
+
+
+class ContextCacheProvider(ABC):
+    """Creates and extends cached prompt prefixes at the model provider."""
+
+    @abstractmethod
+    async def create(self, model: str, prefix: str, ttl_seconds: int) -> CachedPrefix:
+        """Caches `prefix` for `model` for `ttl_seconds`."""
+
+    @abstractmethod
+    async def refresh(self, name: str, ttl_seconds: int) -> float:
+        """Extends the TTL of `name`; returns the new expiry time."""
+
+
+class GoogleContextCacheProvider(ContextCacheProvider):
+    """Gemini API cachedContents (google.ai.generativelanguage, v1beta)."""
+
+    def __init__(self, api_key: Optional[str] = None):
+        self._api_key = api_key or settings.GOOGLE_API_KEY
+        self._client = None
+
+    def _get_client(self):
+        # The async (grpc_asyncio) client must be created inside the running event loop
+        if self._client is None:
+            self._client = CacheServiceAsyncClient(client_options={"api_key": self._api_key})
+        return self._client
+
+    async def create(self, model: str, prefix: str, ttl_seconds: int) -> CachedPrefix:
+        expires_at = time.time() + ttl_seconds
+        cached = await self._get_client().create_cached_content(
+            cached_content=CachedContent(
+                model=model if model.startswith("models/") else f"models/{model}",
+                contents=[Content(role="user", parts=[Part(text=prefix)])],
+                ttl=Duration(seconds=ttl_seconds),
+            )
+        )
+        return CachedPrefix(cached.name, expires_at)
+
+    async def refresh(self, name: str, ttl_seconds: int) -> float:
+        expires_at = time.time() + ttl_seconds
+        await self._get_client().update_cached_content(
+            cached_content=CachedContent(name=name, ttl=Duration(seconds=ttl_seconds)),
+            update_mask=FieldMask(paths=["ttl"]),
+        )
+        return expires_at
+
+
+class LocalContextCacheProvider(ContextCacheProvider):
+    """In-memory stand-in for the provider's cache, for tests and offline development."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._ids = itertools.count(1)
+        # name -> (model, prefix, expires_at)
+        self.entries: Dict[str, Tuple[str, str, float]] = {}
+
+    async def create(self, model: str, prefix: str, ttl_seconds: int) -> CachedPrefix:
+        name = f"cachedContents/local-{next(self._ids)}"
+        expires_at = self._clock() + ttl_seconds
+        self.entries[name] = (model, prefix, expires_at)
+        return CachedPrefix(name, expires_at)
+
+    async def refresh(self, name: str, ttl_seconds: int) -> float:
+        self.resolve(name)
+        model, prefix, _ = self.entries[name]
+        expires_at = self._clock() + ttl_seconds
+        self.entries[name] = (model, prefix, expires_at)
+        return expires_at
+
+    def resolve(self, name: str) -> str:
+        """The prefix cached under `name`; LookupError if unknown or expired (like the provider)."""
+        entry = self.entries.get(name)
+        if entry is None or entry[2] <= self._clock():
+            self.entries.pop(name, None)
+            raise LookupError(f"Cached content '{name}' not found or expired.")
+        return entry[1]
+
+
+@lru_cache(maxsize=8)
+def _prefix_tokens(prefix: str) -> int:
+    return count_tokens(prefix)
+
+
+class ContextCache:
+    """Process-wide handles of cached prefixes, created lazily and refreshed before expiry."""
+
+    def __init__(
+        self,
+        provider: ContextCacheProvider,
+        ttl_seconds: Optional[int] = None,
+        refresh_margin_seconds: Optional[int] = None,
+        min_tokens: Optional[int] = None,
+        failure_backoff_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds or settings.LLM_CONTEXT_CACHE_TTL_SECONDS
+        self.refresh_margin_seconds = settings.LLM_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS if refresh_margin_seconds is None else refresh_margin_seconds
+        self.min_tokens = settings.LLM_CONTEXT_CACHE_MIN_TOKENS if min_tokens is None else min_tokens
+        self.failure_backoff_seconds = settings.LLM_CONTEXT_CACHE_FAILURE_BACKOFF_SECONDS if failure_backoff_seconds is None else failure_backoff_seconds
+        self._clock = clock
+        self._entries: Dict[Tuple[str, str], CachedPrefix] = {}
+        # (model, prefix hash) -> time until which creation is not retried
+        self._failed_until: Dict[Tuple[str, str], float] = {}
+        # Concurrent first requests for the same prefix create a single cache entry
+        self._flights = SingleFlight("context_cache")
+        self._counters = {"hits": 0, "misses": 0, "refreshes": 0, "errors": 0, "skipped": 0}
+
+    async def handle(self, model: str, prefix: str) -> Optional[str]:
+        """Provider name of the cached `prefix` for `model`, or None to send the prompt uncached."""
+        if not prefix or _prefix_tokens(prefix) < self.min_tokens:
+            return None
+        key = (model, llm_cache_key(prefix))
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at - self._clock() > self.refresh_margin_seconds:
+            self._counters["hits"] += 1
+            return entry.name
+        if self._failed_until.get(key, 0.0) > self._clock():
+            self._counters["skipped"] += 1
+            return None
+        try:
+            entry = await self._flights.do(key, lambda: self._renew(key, model, prefix))
+        except Exception as e:
+            self._counters["errors"] += 1
+            self._failed_until[key] = self._clock() + self.failure_backoff_seconds
+            logger.warning(
+                f"Context cache unavailable for model '{model}', sending the full prompt "
+                f"(not retried for {self.failure_backoff_seconds:g}s): {e}"
+            )
+            return None
+        self._failed_until.pop(key, None)
+        return entry.name
+
+    async def _renew(self, key: Tuple[str, str], model: str, prefix: str) -> CachedPrefix:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > self._clock():
+            try:
+                entry = CachedPrefix(entry.name, await self.provider.refresh(entry.name, self.ttl_seconds))
+                self._entries[key] = entry
+                self._counters["refreshes"] += 1
+                return entry
+            except Exception as e:
+                logger.info(f"Could not refresh cached context '{entry.name}', creating a new one: {e}")
+        self._counters["misses"] += 1
+        entry = await self.provider.create(model, prefix, self.ttl_seconds)
+        self._entries[key] = entry
+        logger.info(f"Cached a {_prefix_tokens(prefix)}-token prompt prefix for model '{model}' as '{entry.name}'.")
+        return entry
+
+    def invalidate(self, name: str) -> None:
+        """Forgets `name` (e.g. the provider rejected it); the next request creates a new entry."""
+        for key in [key for key, entry in self._entries.items() if entry.name == name]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._failed_until.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "provider": type(self.provider).__name__,
+            "entries": len(self._entries),
+            **self._counters,
+            "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+        }
+
+
+_context_cache: Optional[ContextCache] = None
+
+
+def get_context_cache() -> Optional[ContextCache]:
+    """The process-wide cache for LLM_CONTEXT_CACHE_PROVIDER, or None when context caching is off."""
+    global _context_cache
+    if _context_cache is None:
+        provider_name = settings.LLM_CONTEXT_CACHE_PROVIDER.lower()
+        if provider_name == "google" and settings.GOOGLE_API_KEY:
+            _context_cache = ContextCache(GoogleContextCacheProvider())
+        elif provider_name == "local":
+            _context_cache = ContextCache(LocalContextCacheProvider())
+    return _context_cache
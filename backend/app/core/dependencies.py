@@ -4,10 +4,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from jose import jwt, JWTError
 from pydantic import ValidationError
-from typing import Annotated
+from dataclasses import dataclass
+from typing import Annotated, Tuple
 
 from app.core import security
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.principal_cache import get_principal_cache
+from app.core.token_revocation import get_revocation_set
 from app.models import user as user_model
 from app.core_modules.auth.v1 import schemas as auth_schemas
 
@@ -19,13 +23,20 @@ credentials_exception = HTTPException(
     headers={"WWW-Authenticate": "Bearer"},
 )
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Annotated[AsyncSession, Depends(get_db)]
-) -> user_model.User:
-    """
-    Dependency to get the current user from the JWT token (Async).
-    """
+@dataclass(frozen=True)
+class Principal:
+    """Who is calling: what authorization decisions need, without the full User row."""
+    id: int
+    role: user_model.UserRole
+    is_active: bool
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user: user_model.User) -> "Principal":
+        return cls(id=user.id, role=user.role, is_active=user.is_active, token_version=user.token_version or 0)
+
+def _decode_claims(token: str) -> Tuple[int, dict]:
+    """User id and payload of a valid token. Raises credentials_exception otherwise."""
     try:
         payload = security.decode_token(token)
         if payload is None:
@@ -35,20 +46,68 @@ async def get_current_user(
         if subject is None:
             raise credentials_exception
 
-        user_id = int(subject)
+        return int(subject), payload
 
     except (JWTError, ValidationError, ValueError):
         raise credentials_exception
 
-    result = await db.execute(
-        select(user_model.User).where(user_model.User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
-
+async def _load_user(user_id: int, payload: dict, db: AsyncSession) -> user_model.User:
+    """The user of the token, checking its version. Raises credentials_exception if gone or revoked."""
+    # Served from the principal cache when possible: no query on a hit
+    cache = get_principal_cache()
+    # A change committed while the SELECT runs must not be overwritten by the row read
+    generation = cache.generation()
+    user = cache.get(user_id)
     if user is None:
+        result = await db.execute(
+            select(user_model.User).where(user_model.User.id == user_id)
+        )
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise credentials_exception
+        cache.put(user, generation)
+
+    token_version = user.token_version or 0
+    if not cache.changed_since(user.id, generation):
+        get_revocation_set().set_version(user.id, token_version)
+    if payload.get("ver", 0) != token_version:
         raise credentials_exception
     return user
 
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> user_model.User:
+    """
+    Dependency to get the current user from the JWT token (Async).
+    """
+    user_id, payload = _decode_claims(token)
+    return await _load_user(user_id, payload, db)
+
+async def get_current_principal(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+) -> Principal:
+    """
+    Dependency to get the caller's id, role and active flag from the JWT token.
+
+    With AUTH_MODE=claims the signed claims are trusted once the revocation set
+    confirms the token version is current; the user is only loaded when the set
+    cannot tell. With AUTH_MODE=database the user is always loaded.
+    """
+    user_id, payload = _decode_claims(token)
+    if settings.AUTH_MODE == "claims":
+        current = get_revocation_set().check(user_id, payload.get("ver", 0))
+        if current is False:
+            raise credentials_exception
+        if current and "role" in payload and "active" in payload:
+            try:
+                role = user_model.UserRole(payload["role"])
+            except ValueError:
+                raise credentials_exception
+            return Principal(id=user_id, role=role, is_active=bool(payload["active"]), token_version=payload.get("ver", 0))
+    return Principal.from_user(await _load_user(user_id, payload, db))
+
 async def get_current_active_user(
     current_user: Annotated[user_model.User, Depends(get_current_user)]
 ) -> user_model.User:
@@ -59,12 +118,22 @@ async def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_current_active_principal(
+    principal: Annotated[Principal, Depends(get_current_principal)]
+) -> Principal:
+    """
+    Dependency that gets the current principal and checks if they are active.
+    """
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
 async def require_admin_user(
-    current_user: Annotated[user_model.User, Depends(get_current_active_user)]
-) -> user_model.User:
+    principal: Annotated[Principal, Depends(get_current_active_principal)]
+) -> Principal:
     """
     Dependency that checks if the current user has admin role.
     """
-    if current_user.role != user_model.UserRole.ADMIN:
+    if principal.role != user_model.UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Admin access required")
-    return current_user
\ No newline at end of file
+    return principal
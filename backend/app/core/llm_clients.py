@@ -0,0 +1,128 @@
+# backend/app/core/llm_clients.py
+"""
+Process-wide registry of initialised chat-model clients.
+
+Building a ChatGoogleGenerativeAI client sets up credentials and a new
+connection to the API; the first request on it pays for the handshake. The
+registry keeps up to LLM_CLIENT_CACHE_SIZE clients, keyed by (model name,
+generation params), and evicts the least recently used one when full, so
+requests for the same model reuse a client whose connection is already open.
+The default model and LLM_CLIENT_WARMUP_MODELS are created at startup.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from fastapi import HTTPException, status
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from app.core.config import settings, logger
+
+ClientKey = Tuple[str, Tuple[Tuple[str, Hashable], ...]]
+
+
+def _google_client_factory(model: str, **params: Any) -> BaseChatModel:
+    if not settings.GOOGLE_API_KEY:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Serviço de IA não configurado (chave API ausente).")
+    return ChatGoogleGenerativeAI(model=model, google_api_key=settings.GOOGLE_API_KEY, **params)
+
+
+class ChatClientRegistry:
+    """LRU cache of chat clients with hit/miss/eviction counters."""
+
+    def __init__(self, max_size: Optional[int] = None, factory: Optional[Callable[..., BaseChatModel]] = None):
+        self.max_size = max(1, max_size or settings.LLM_CLIENT_CACHE_SIZE)
+        self._factory = factory or _google_client_factory
+        self._clients: "OrderedDict[ClientKey, BaseChatModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self._total_build_seconds = 0.0
+
+    @staticmethod
+    def _key(model: str, params: Dict[str, Any]) -> ClientKey:
+        return model, tuple(sorted((name, value if isinstance(value, Hashable) else repr(value)) for name, value in params.items()))
+
+    def get(self, model: str, **params: Any) -> BaseChatModel:
+        """The client for `model` with generation `params` (e.g. temperature), created on a miss."""
+        key = self._key(model, params)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+                self._counters["hits"] += 1
+                return client
+            self._counters["misses"] += 1
+
+        start = time.perf_counter()
+        client = self._factory(model, **params)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._total_build_seconds += elapsed
+            # Another request may have built the same client meanwhile: keep the first one
+            existing = self._clients.get(key)
+            if existing is not None:
+                self._clients.move_to_end(key)
+                return existing
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                evicted_key, _ = self._clients.popitem(last=False)
+                self._counters["evictions"] += 1
+                logger.info(f"Evicted chat client for model '{evicted_key[0]}' from the registry.")
+        logger.info(f"Created chat client for model '{model}' in {elapsed * 1000:.1f} ms.")
+        return client
+
+    def warm_up(self, models: Iterable[str]) -> int:
+        """Creates the clients for `models` ahead of the first request. Returns how many are ready."""
+        ready = 0
+        for model in dict.fromkeys(model for model in models if model):
+            try:
+                self.get(model)
+                ready += 1
+            except Exception as e:
+                logger.warning(f"Could not warm up chat client for model '{model}': {e}")
+        return ready
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Registry snapshot."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                "size": len(self._clients),
+                "max_size": self.max_size,
+                "models": sorted({model for model, _ in self._clients}),
+                **self._counters,
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+                "avg_build_seconds": self._total_build_seconds / self._counters["misses"] if self._counters["misses"] else 0.0,
+            }
+
+
+_registry: Optional[ChatClientRegistry] = None
+
+
+def get_chat_client_registry() -> ChatClientRegistry:
+    """The process-wide registry, created on first use."""
+    global _registry
+    if _registry is None:
+        _registry = ChatClientRegistry()
+    return _registry
+
+
+def get_chat_client(model: str, **params: Any) -> BaseChatModel:
+    """Shortcut for get_chat_client_registry().get(model, **params)."""
+    return get_chat_client_registry().get(model, **params)
+
+
+def warm_up_chat_clients() -> int:
+    """Creates the clients of the default model and LLM_CLIENT_WARMUP_MODELS (needs GOOGLE_API_KEY)."""
+    if not settings.GOOGLE_API_KEY:
+        return 0
+    ready = get_chat_client_registry().warm_up([settings.GEMINI_MODEL_NAME, *settings.LLM_CLIENT_WARMUP_MODELS])
+    logger.info(f"Warmed up {ready} chat client(s).")
+    return ready
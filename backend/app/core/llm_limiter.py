@@ -0,0 +1,301 @@
+# backend/app/core/llm_limiter.py
+"""
+Adaptive limiter for outbound LLM calls, shared by every module.
+
+Bursts of Gemini calls hit the provider's quotas (HTTP 429), and every caller
+retrying on its own makes the burst worse. Each call goes through the limiter
+of its model, which admits it when:
+
+- a request and enough prompt tokens are available in the token buckets,
+  refilled continuously at LLM_RATE_LIMIT_RPM requests/min and
+  LLM_RATE_LIMIT_TPM tokens/min (0 disables a bucket), holding at most
+  LLM_RATE_LIMIT_BURST_SECONDS worth of quota;
+- fewer than `limit` calls of the model are in flight. The limit adapts (AIMD):
+  each fast success adds 1/limit (about +1 per window of calls), a 429 halves
+  it and empties the request bucket, and a call slower than
+  LLM_LIMITER_LATENCY_TARGET_SECONDS shrinks it by 10%. Decreases happen at
+  most once per LLM_LIMITER_DECREASE_COOLDOWN_SECONDS, so the calls of one
+  burst that fail together count once;
+- every caller that arrived before it was admitted: callers wait in FIFO
+  order, so a large prompt is not starved by smaller ones behind it.
+
+A caller that waits longer than its deadline (LLM_LIMITER_MAX_WAIT_SECONDS by
+default) leaves the queue with LlmOverloadedError (HTTP 503 + Retry-After), the
+same error `limited_ainvoke`/`limited_astream` raise for a 429 from the provider.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from app.core.config import settings, logger
+from app.utils.tokenizer import count_tokens
+
+
+class LlmOverloadedError(HTTPException):
+    """Raised when a call waited past its deadline or was rate limited by the provider (HTTP 503 + Retry-After)."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de IA sobrecarregado. Tente novamente em instantes.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """True for the provider's "too many requests" errors (HTTP 429 / RESOURCE_EXHAUSTED)."""
+    if isinstance(error, (ResourceExhausted, TooManyRequests)):
+        return True
+    return 429 in (getattr(error, "code", None), getattr(error, "status_code", None))
+
+
+class _TokenBucket:
+    """Bucket refilled continuously at `per_minute`; 0 means unlimited."""
+
+    def __init__(self, per_minute: float, burst_seconds: float, clock: Callable[[], float]):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds) if per_minute > 0 else math.inf
+        self.available = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` (at most the capacity) is available; 0 if it is now."""
+        if not self.rate:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.available
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        if self.rate:
+            self.available -= min(amount, self.capacity)
+
+    def drain(self) -> None:
+        if self.rate:
+            self._refill()
+            self.available = min(self.available, 0.0)
+
+
+class _Waiter(NamedTuple):
+    future: asyncio.Future
+    tokens: int
+    queued_at: float
+
+
+class LlmLimiter:
+    """Token buckets, an AIMD concurrency limit and a FIFO wait queue for the calls to one model."""
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        initial_limit: Optional[int] = None,
+        max_limit: Optional[int] = None,
+        latency_target: Optional[float] = None,
+        max_wait: Optional[float] = None,
+        decrease_cooldown: Optional[float] = None,
+        burst_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.max_limit = max(1, max_limit or settings.LLM_LIMITER_MAX_CONCURRENCY)
+        self.limit = float(min(self.max_limit, max(1, initial_limit or settings.LLM_LIMITER_INITIAL_CONCURRENCY)))
+        self.latency_target = latency_target or settings.LLM_LIMITER_LATENCY_TARGET_SECONDS
+        self.max_wait = max_wait if max_wait is not None else settings.LLM_LIMITER_MAX_WAIT_SECONDS
+        self.decrease_cooldown = decrease_cooldown if decrease_cooldown is not None else settings.LLM_LIMITER_DECREASE_COOLDOWN_SECONDS
+        burst = burst_seconds if burst_seconds is not None else settings.LLM_RATE_LIMIT_BURST_SECONDS
+        self._clock = clock
+        self._requests = _TokenBucket(settings.LLM_RATE_LIMIT_RPM if rpm is None else rpm, burst, clock)
+        self._tokens = _TokenBucket(settings.LLM_RATE_LIMIT_TPM if tpm is None else tpm, burst, clock)
+        self._queue: Deque[_Waiter] = deque()
+        self._in_flight = 0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._last_decrease = -math.inf
+        self._counters = {"admitted": 0, "succeeded": 0, "failed": 0, "throttled": 0, "slow": 0, "timeouts": 0}
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._total_latency_seconds = 0.0
+        self._max_queue_depth = 0
+
+    # --- Admission ---
+
+    def _admit(self) -> None:
+        """Admits waiting callers in order while the limit and the buckets allow it."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        while self._queue:
+            waiter = self._queue[0]
+            if waiter.future.done():
+                self._queue.popleft()
+                continue
+            if self._in_flight >= int(self.limit):
+                return  # The next release admits it
+            delay = max(self._requests.wait_time(1), self._tokens.wait_time(waiter.tokens))
+            if delay > 0:
+                self._wakeup = asyncio.get_running_loop().call_later(delay, self._admit)
+                return
+            self._queue.popleft()
+            self._requests.take(1)
+            self._tokens.take(waiter.tokens)
+            self._in_flight += 1
+            waited = self._clock() - waiter.queued_at
+            self._counters["admitted"] += 1
+            self._total_wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+            waiter.future.set_result(None)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._admit()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        if waiter.future.done() and not waiter.future.cancelled():
+            # Admitted just as the caller gave up: hand the slot on
+            self._release()
+            return
+        waiter.future.cancel()
+        try:
+            self._queue.remove(waiter)
+        except ValueError:
+            pass
+        self._admit()
+
+    async def acquire(self, tokens: int = 0, max_wait: Optional[float] = None) -> None:
+        """Waits for a slot for a call of `tokens` prompt tokens; release it with `slot` (or `_release`)."""
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens, self._clock())
+        self._queue.append(waiter)
+        self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+        self._admit()
+        if waiter.future.done():
+            return
+        timeout = self.max_wait if max_wait is None else max_wait
+        try:
+            done, _ = await asyncio.wait({waiter.future}, timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not done:
+            self._abandon(waiter)
+            self._counters["timeouts"] += 1
+            logger.warning(f"LLM limiter '{self.name}': call gave up after waiting {timeout}s ({len(self._queue)} still queued).")
+            raise LlmOverloadedError(settings.LLM_LIMITER_RETRY_AFTER_SECONDS)
+
+    # --- Adaptation ---
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        now = self._clock()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self.limit = max(1.0, self.limit * factor)
+        logger.info(f"LLM limiter '{self.name}': concurrency limit {previous:.1f} -> {self.limit:.1f} ({reason}).")
+
+    def _record(self, latency: float, error: Optional[BaseException]) -> None:
+        if error is None:
+            self._counters["succeeded"] += 1
+            self._total_latency_seconds += latency
+            if latency > self.latency_target:
+                self._counters["slow"] += 1
+                self._decrease(0.9, f"call took {latency:.1f}s")
+            else:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+        elif is_rate_limit_error(error):
+            self._counters["throttled"] += 1
+            self._requests.drain()
+            self._decrease(0.5, "rate limited by the provider")
+        else:
+            self._counters["failed"] += 1
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0, max_wait: Optional[float] = None) -> AsyncIterator[None]:
+        """Holds a slot around one call and adapts the limit to its outcome."""
+        await self.acquire(tokens, max_wait)
+        started = self._clock()
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            self._release()
+            raise
+        except BaseException as e:
+            self._record(self._clock() - started, e)
+            self._release()
+            raise
+        else:
+            self._record(self._clock() - started, None)
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Limiter snapshot (queue depth, waits, current limit and outcomes)."""
+        admitted = self._counters["admitted"]
+        return {
+            "model": self.name,
+            "limit": round(self.limit, 2),
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self._max_queue_depth,
+            **self._counters,
+            "avg_wait_seconds": self._total_wait_seconds / admitted if admitted else 0.0,
+            "max_wait_seconds": self._max_wait_seconds,
+            "avg_latency_seconds": self._total_latency_seconds / self._counters["succeeded"] if self._counters["succeeded"] else 0.0,
+        }
+
+
+_limiters: Dict[str, LlmLimiter] = {}
+
+
+def get_llm_limiter(model: str) -> LlmLimiter:
+    """The process-wide limiter of `model`, created on first use."""
+    limiter = _limiters.get(model)
+    if limiter is None:
+        limiter = _limiters[model] = LlmLimiter(model)
+    return limiter
+
+
+def llm_limiter_stats() -> List[Dict[str, Any]]:
+    return [limiter.stats() for limiter in _limiters.values()]
+
+
+def _prompt_tokens(messages: Any) -> int:
+    if isinstance(messages, str):
+        return count_tokens(messages)
+    return sum(count_tokens(message.content) for message in messages if isinstance(getattr(message, "content", None), str))
+
+
+async def limited_ainvoke(llm: BaseChatModel, model: str, messages: Any, **kwargs: Any) -> Any:
+    """`llm.ainvoke(messages, **kwargs)` through the limiter of `model`."""
+    try:
+        async with get_llm_limiter(model).slot(_prompt_tokens(messages)):
+            return await llm.ainvoke(messages, **kwargs)
+    except Exception as e:
+        # A 429 that outlived the client's own retries reaches the caller as a 503
+        if is_rate_limit_error(e):
+            raise LlmOverloadedError(settings.LLM_LIMITER_RETRY_AFTER_SECONDS) from e
+        raise
+
+
+async def limited_astream(llm: BaseChatModel, model: str, messages: Any, **kwargs: Any) -> AsyncIterator[Any]:
+    """`llm.astream(messages, **kwargs)` through the limiter of `model`; the slot is held until the stream ends."""
+    try:
+        async with get_llm_limiter(model).slot(_prompt_tokens(messages)):
+            async for chunk in llm.astream(messages, **kwargs):
+                yield chunk
+    except Exception as e:
+        if is_rate_limit_error(e):
+            raise LlmOverloadedError(settings.LLM_LIMITER_RETRY_AFTER_SECONDS) from e
+        raise
@@ -0,0 +1,62 @@
+# backend/app/core/password_cost.py
+"""
+Bcrypt cost shared by every worker.
+
+Calibrating in each worker at startup gave each process its own cost, from a
+single noisy benchmark. Without a fixed BCRYPT_ROUNDS, the cost is now
+calibrated once and stored in `app_settings`. The first worker to start
+calibrates it while holding an advisory lock, and the others wait on the lock and
+read the stored value. The admin calibration endpoint replaces the stored cost;
+the other workers apply it when they restart.
+"""
+from typing import Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import security
+from app.core.config import logger
+from app.core.database import get_db_contextmanager
+from app.models.app_setting import AppSetting
+
+BCRYPT_ROUNDS_KEY = "bcrypt_rounds"
+# pg_advisory_xact_lock key serializing the first calibration across workers
+CALIBRATION_LOCK_ID = 0x62637279
+
+
+async def _load_rounds(db: AsyncSession) -> Optional[int]:
+    result = await db.execute(select(AppSetting.value).where(AppSetting.key == BCRYPT_ROUNDS_KEY))
+    value = result.scalar_one_or_none()
+    return int(value) if value is not None else None
+
+
+async def _store_rounds(db: AsyncSession, rounds: int) -> None:
+    statement = pg_insert(AppSetting).values(key=BCRYPT_ROUNDS_KEY, value=str(rounds))
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[AppSetting.key],
+        set_={"value": statement.excluded.value, "updated_at": statement.excluded.updated_at},
+    ))
+
+
+async def apply_shared_bcrypt_rounds() -> int:
+    """Applies the stored cost to this worker, calibrating and storing it first if there is none."""
+    async with get_db_contextmanager() as db:
+        await db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": CALIBRATION_LOCK_ID})
+        rounds = await _load_rounds(db)
+        if rounds is None:
+            rounds = (await security.calibrate_password_hashing()).rounds
+            await _store_rounds(db, rounds)
+        await db.commit()
+    security.set_bcrypt_rounds(rounds)
+    return rounds
+
+
+async def recalibrate_shared_bcrypt_rounds() -> security.BcryptCalibration:
+    """Calibrates on this host, applies the cost here and stores it for the other workers."""
+    calibration = await security.calibrate_password_hashing()
+    async with get_db_contextmanager() as db:
+        await _store_rounds(db, calibration.rounds)
+        await db.commit()
+    logger.info(f"Shared bcrypt cost set to {calibration.rounds}.")
+    return calibration
@@ -0,0 +1,184 @@
+# backend/app/core/password_executor.py
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings, logger
+
+
+class PasswordHashQueueFullError(HTTPException):
+    """Raised when every hashing thread is busy and the wait queue is at its limit (HTTP 503 + Retry-After)."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de autenticação sobrecarregado. Tente novamente em instantes.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+def _timed(fn: Callable[..., Any], *args: Any) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHashExecutor:
+    """
+    Bounded thread pool for bcrypt hashing and verification.
+
+    Each bcrypt call burns a few hundred milliseconds of CPU; run on the event
+    loop it stalls every other request of the worker. bcrypt releases the GIL
+    while hashing, so threads are enough to keep the loop free. At most
+    `max_workers` calls run at a time; callers wait in FIFO order for a free
+    thread and, once `max_queue` callers are already waiting, new calls are
+    rejected with PasswordHashQueueFullError instead of piling up behind a
+    login spike.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        retry_after: Optional[int] = None,
+    ):
+        self.max_workers = max(1, max_workers if max_workers is not None else settings.PASSWORD_HASH_WORKERS)
+        self.max_queue = max(0, max_queue if max_queue is not None else settings.PASSWORD_HASH_QUEUE_LIMIT)
+        self.retry_after = retry_after if retry_after is not None else settings.PASSWORD_HASH_RETRY_AFTER_SECONDS
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._busy = 0
+        self._closed = False
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self._total_wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._total_hash_seconds = 0.0
+        self._max_hash_seconds = 0.0
+
+    # --- Slot management ---
+
+    async def _acquire(self) -> None:
+        if self._busy < self.max_workers and not self._waiters:
+            self._busy += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The thread was handed over just as we were cancelled; pass it on
+                self._release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # The busy count passes to the waiter
+                return
+        self._busy -= 1
+
+    def _release_when_done(self, future: Future) -> None:
+        """A cancelled caller cannot stop its thread: the slot is freed when the hash finishes."""
+        loop = asyncio.get_running_loop()
+
+        def done(_: Future) -> None:
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:
+                pass  # Loop already closed
+        future.add_done_callback(done)
+
+    # --- Public API ---
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Runs `fn(*args)` in a hashing thread and awaits its result without blocking the loop."""
+        if self._closed:
+            raise RuntimeError("PasswordHashExecutor is shut down.")
+        if self._busy >= self.max_workers and len(self._waiters) >= self.max_queue:
+            self._counters["rejected"] += 1
+            logger.warning(f"Password hashing queue full ({self._busy} busy, {len(self._waiters)} waiting). Rejecting call.")
+            raise PasswordHashQueueFullError(self.retry_after)
+
+        self._counters["submitted"] += 1
+        queued_at = time.monotonic()
+        await self._acquire()
+        waited = time.monotonic() - queued_at
+        self._total_wait_seconds += waited
+        self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        future = self._pool.submit(_timed, fn, *args)
+        try:
+            result, seconds = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if future.done():
+                self._release()
+            else:
+                self._release_when_done(future)
+            raise
+        except Exception:
+            self._counters["failed"] += 1
+            self._release()
+            raise
+        self._release()
+        self._counters["completed"] += 1
+        self._total_hash_seconds += seconds
+        self._max_hash_seconds = max(self._max_hash_seconds, seconds)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilisation snapshot, with queue wait and hash time."""
+        submitted = self._counters["submitted"]
+        completed = self._counters["completed"]
+        return {
+            "max_workers": self.max_workers,
+            "busy_workers": self._busy,
+            "queued_calls": len(self._waiters),
+            "max_queue": self.max_queue,
+            **self._counters,
+            "avg_wait_seconds": self._total_wait_seconds / submitted if submitted else 0.0,
+            "max_wait_seconds": self._max_wait_seconds,
+            "avg_hash_seconds": self._total_hash_seconds / completed if completed else 0.0,
+            "max_hash_seconds": self._max_hash_seconds,
+        }
+
+    def shutdown(self) -> None:
+        """Stops the hashing threads once the running calls finish. Pending waiters are cancelled."""
+        self._closed = True
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.cancel()
+        self._waiters.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_password_executor: Optional[PasswordHashExecutor] = None
+
+
+def get_password_executor() -> PasswordHashExecutor:
+    """Returns the process-wide password hashing executor, creating it on first use."""
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = PasswordHashExecutor()
+        logger.info(
+            f"Password hashing executor created: {_password_executor.max_workers} thread(s), "
+            f"queue limit {_password_executor.max_queue}."
+        )
+    return _password_executor
+
+
+def shutdown_password_executor() -> None:
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown()
+        _password_executor = None
+        logger.info("Password hashing executor shut down.")
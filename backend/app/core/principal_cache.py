@@ -0,0 +1,210 @@
+# backend/app/core/principal_cache.py
+"""
+In-process cache of authenticated users (principals), keyed by user id.
+
+`get_current_user` used to run `SELECT ... FROM users WHERE id = ...` on every
+authenticated request. The columns of the user are now kept here for
+PRINCIPAL_CACHE_TTL_SECONDS, at most PRINCIPAL_CACHE_MAX_SIZE users, least
+recently used evicted first. Each hit returns a new detached User instance, so
+requests never share (or mutate) one object.
+
+Changes to a user row must call `invalidate_principal` (local worker) and
+`notify_principal_changed` (every worker): the latter runs pg_notify in the
+caller's transaction, so the notification is only delivered if the change
+commits. A lookup that read the row before an invalidation must not cache it
+afterwards: callers take `generation()` before the SELECT and pass it to `put`,
+which drops rows invalidated in between (see `changed_since`). Each worker listens on PRINCIPAL_CACHE_NOTIFY_CHANNEL with a dedicated
+asyncpg connection (`PrincipalInvalidationListener`); when that connection is
+lost the cache is cleared, and again once it is back, since notifications sent
+in between were missed. The TTL bounds staleness if the channel is disabled.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import asyncpg
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings, logger
+from app.core.token_revocation import get_revocation_set
+from app.models import user as user_model
+
+CLEAR_ALL = "*"
+
+
+class PrincipalCache:
+    """LRU cache of user column values with a TTL."""
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max(0, max_size if max_size is not None else settings.PRINCIPAL_CACHE_MAX_SIZE)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.PRINCIPAL_CACHE_TTL_SECONDS
+        self._clock = clock
+        self._entries: "OrderedDict[int, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # Invalidation sequence: per user (at most one entry per changed user) and for clear()
+        self._generation = 0
+        self._invalidated_at: Dict[int, int] = {}
+        self._cleared_at = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "stale_puts": 0}
+
+    def get(self, user_id: int) -> Optional[user_model.User]:
+        """A detached copy of the cached user, or None on a miss (absent or expired)."""
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] <= self._clock():
+            if entry is not None:
+                del self._entries[user_id]
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self._counters["hits"] += 1
+        user = user_model.User(**entry[0])
+        make_transient_to_detached(user)
+        return user
+
+    def generation(self) -> int:
+        """Taken before reading a user row; see `put` and `changed_since`."""
+        return self._generation
+
+    def changed_since(self, user_id: int, generation: int) -> bool:
+        """True if `user_id` was invalidated (or the cache cleared) after `generation` was taken."""
+        return max(self._invalidated_at.get(user_id, 0), self._cleared_at) > generation
+
+    def put(self, user: user_model.User, generation: Optional[int] = None) -> None:
+        """Caches `user`, unless it was invalidated after `generation` (the row read may be stale)."""
+        if self.max_size == 0 or self.ttl_seconds <= 0:
+            return
+        if generation is not None and self.changed_since(user.id, generation):
+            self._counters["stale_puts"] += 1
+            return
+        columns = {attr.key: getattr(user, attr.key) for attr in inspect(user_model.User).column_attrs}
+        self._entries[user.id] = (columns, self._clock() + self.ttl_seconds)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def invalidate(self, user_id: int) -> None:
+        self._generation += 1
+        self._invalidated_at[user_id] = self._generation
+        if self._entries.pop(user_id, None) is not None:
+            self._counters["invalidations"] += 1
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._cleared_at = self._generation
+        self._invalidated_at.clear()
+        self._counters["invalidations"] += len(self._entries)
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            **self._counters,
+            "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+        }
+
+
+_principal_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    """Returns the process-wide principal cache, creating it on first use."""
+    global _principal_cache
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache()
+    return _principal_cache
+
+
+def invalidate_principal(user_id: int) -> None:
+    get_principal_cache().invalidate(user_id)
+    get_revocation_set().forget(user_id)
+
+
+async def notify_principal_changed(db: AsyncSession, user_id: int) -> None:
+    """Tells every worker to drop `user_id`, once the caller's transaction commits."""
+    channel = settings.PRINCIPAL_CACHE_NOTIFY_CHANNEL
+    if channel:
+        await db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": str(user_id)})
+
+
+def handle_invalidation(payload: str) -> None:
+    """Applies one notification: a user id (also forgotten by the token revocation set), or CLEAR_ALL."""
+    if payload == CLEAR_ALL:
+        get_principal_cache().clear()
+        return
+    try:
+        invalidate_principal(int(payload))
+    except ValueError:
+        logger.warning(f"Ignoring malformed principal invalidation payload: {payload!r}")
+
+
+class PrincipalInvalidationListener:
+    """Keeps a LISTEN connection on the invalidation channel, reconnecting when it drops."""
+
+    def __init__(self, dsn: str, channel: str, retry_seconds: float = 5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        handle_invalidation(payload)
+
+    async def _listen_once(self) -> None:
+        lost = asyncio.Event()
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            connection.add_termination_listener(lambda _: lost.set())
+            await connection.add_listener(self.channel, self._on_notification)
+            # Changes made while no worker listened were missed
+            get_principal_cache().clear()
+            logger.info(f"Listening for principal invalidations on channel '{self.channel}'.")
+            await lost.wait()
+        finally:
+            if not connection.is_closed():
+                await connection.close()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen_once()
+                logger.warning("Principal invalidation connection lost; reconnecting.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Principal invalidation listener failed: {e}; retrying in {self.retry_seconds}s.")
+            get_principal_cache().clear()
+            await asyncio.sleep(self.retry_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def create_invalidation_listener() -> Optional[PrincipalInvalidationListener]:
+    """The listener for the configured channel, or None when there is no channel or database."""
+    if not settings.PRINCIPAL_CACHE_NOTIFY_CHANNEL or not settings.ASYNC_DATABASE_URL:
+        return None
+    # asyncpg takes a plain postgresql:// DSN, without the SQLAlchemy driver suffix
+    dsn = make_url(settings.ASYNC_DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+    return PrincipalInvalidationListener(dsn, settings.PRINCIPAL_CACHE_NOTIFY_CHANNEL)
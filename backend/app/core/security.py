@@ -1,10 +1,17 @@
+import math
 import os
+import statistics
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, NamedTuple, Optional, Union
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 import logging
 
+from app.core.config import settings
+from app.core.password_executor import get_password_executor
+from app.core.token_cache import get_token_cache
+
 logger = logging.getLogger(__name__)
 
 # --- Password Hashing ---
@@ -26,6 +33,92 @@ def hash_password(password: str) -> str:
     logger.info(f"Generated hash: {hashed[:10]}...")
     return hashed
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bounded hashing pool, off the event loop."""
+    return await get_password_executor().run(verify_password, plain_password, hashed_password)
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bounded hashing pool, off the event loop."""
+    return await get_password_executor().run(hash_password, password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when the stored hash uses a cost below the configured floor (or another scheme)."""
+    try:
+        return pwd_context.needs_update(hashed_password)
+    except Exception:
+        return False
+
+# --- Bcrypt Cost Calibration ---
+class BcryptCalibration(NamedTuple):
+    rounds: int
+    probe_rounds: int
+    probe_seconds: float
+    estimated_seconds: float
+    target_seconds: float
+    samples: int
+
+def bcrypt_rounds() -> int:
+    """Cost used for new hashes."""
+    return pwd_context.to_dict().get("bcrypt__default_rounds") or pwd_context.handler("bcrypt").default_rounds
+
+def bcrypt_min_rounds() -> int:
+    """Lowest cost accepted for stored hashes; weaker ones are rehashed on login."""
+    return pwd_context.to_dict().get("bcrypt__min_rounds") or pwd_context.handler("bcrypt").min_rounds
+
+def set_bcrypt_rounds(rounds: int, min_rounds: Optional[int] = None) -> None:
+    """
+    Hashes new passwords with `rounds`. Only stored hashes below `min_rounds`
+    (BCRYPT_MIN_ROUNDS by default) need a rehash: a stronger hash is never
+    rehashed down, and workers using different costs do not undo each other.
+    """
+    floor = min(rounds, min_rounds if min_rounds is not None else settings.BCRYPT_MIN_ROUNDS)
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=floor)
+    logger.info(f"Bcrypt cost set to {rounds} (rehash below {floor}).")
+
+def calibrate_bcrypt_rounds(
+    target_seconds: Optional[float] = None,
+    min_rounds: Optional[int] = None,
+    max_rounds: Optional[int] = None,
+    samples: Optional[int] = None,
+) -> BcryptCalibration:
+    """
+    Benchmarks bcrypt on this host and returns the highest cost whose verify time
+    fits `target_seconds`. `samples` hashes are timed at `min_rounds` and the
+    median is used, so one slow or fast run does not move the cost; each extra
+    round doubles the work, so the rest is extrapolated instead of measured.
+    """
+    target = target_seconds if target_seconds is not None else settings.BCRYPT_TARGET_VERIFY_SECONDS
+    lowest = min_rounds if min_rounds is not None else settings.BCRYPT_MIN_ROUNDS
+    highest = max(lowest, max_rounds if max_rounds is not None else settings.BCRYPT_MAX_ROUNDS)
+    samples = max(1, samples if samples is not None else settings.BCRYPT_CALIBRATION_SAMPLES)
+    handler = pwd_context.handler("bcrypt").using(rounds=lowest)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash("calibration")
+        timings.append(time.perf_counter() - started)
+    probe_seconds = max(statistics.median(timings), 1e-6)
+    doublings = math.floor(math.log2(target / probe_seconds)) if target > probe_seconds else 0
+    rounds = min(highest, lowest + doublings)
+    return BcryptCalibration(
+        rounds=rounds,
+        probe_rounds=lowest,
+        probe_seconds=probe_seconds,
+        estimated_seconds=probe_seconds * 2 ** (rounds - lowest),
+        target_seconds=target,
+        samples=samples,
+    )
+
+async def calibrate_password_hashing() -> BcryptCalibration:
+    """Calibrates the bcrypt cost on the hashing pool and applies it to new hashes of this worker."""
+    calibration = await get_password_executor().run(calibrate_bcrypt_rounds)
+    set_bcrypt_rounds(calibration.rounds)
+    logger.info(
+        f"Bcrypt calibrated: cost {calibration.rounds} (~{calibration.estimated_seconds * 1000:.0f} ms per verify, "
+        f"target {calibration.target_seconds * 1000:.0f} ms, median of {calibration.samples})."
+    )
+    return calibration
+
 # --- JWT Handling ---
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
@@ -60,11 +153,19 @@ def decode_token(token: str) -> dict | None:
     """
     Decodes a JWT token and returns its payload.
 
+    Tokens verified before are served from the verified token cache until
+    they expire (see app/core/token_cache.py).
+
     :param token: JWT token string.
     :return: Decoded payload as dict, or None if invalid.
     """
+    cache = get_token_cache()
+    payload = cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+    cache.put(token, payload)
+    return payload
\ No newline at end of file
@@ -0,0 +1,121 @@
+# backend/app/core/token_cache.py
+"""
+In-process cache of already verified access tokens.
+
+`security.decode_token` used to check the signature and parse the claims of
+every token it was given, although clients present the same token on each
+request until it expires. Verified claims are now kept here, keyed by the
+SHA-256 digest of the token (the token itself is not stored), until the token's
+`exp`. A hit returns a copy of the claims without any crypto work.
+
+The cache is bounded by TOKEN_CACHE_MAX_ENTRIES and by an estimate of its memory
+use (TOKEN_CACHE_MAX_BYTES), least recently used evicted first. Only valid
+tokens with an `exp` claim are cached; invalid tokens are verified (and
+rejected) every time. See app/benchmark_token_decode.py for the throughput of
+cold and cached decoding.
+"""
+import hashlib
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+# Digest key, entry tuple and OrderedDict node, besides the claims themselves
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def estimate_size(claims: Dict[str, Any]) -> int:
+    """Approximate bytes held by one cached entry."""
+    size = ENTRY_OVERHEAD_BYTES + sys.getsizeof(claims)
+    for key, value in claims.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+
+class VerifiedTokenCache:
+    """LRU cache of verified token claims, each entry expiring at the token's `exp`."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_entries = max(0, max_entries if max_entries is not None else settings.TOKEN_CACHE_MAX_ENTRIES)
+        self.max_bytes = max(0, max_bytes if max_bytes is not None else settings.TOKEN_CACHE_MAX_BYTES)
+        # Wall clock: `exp` is a Unix timestamp
+        self._clock = clock
+        self._entries: "OrderedDict[bytes, Tuple[Dict[str, Any], float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "expirations": 0, "evictions": 0}
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """A copy of the claims of a verified, unexpired token, or None on a miss."""
+        key = token_digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        claims, expires_at, _ = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return dict(claims)
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        """Caches the claims of a token whose signature was just verified."""
+        expires_at = claims.get("exp")
+        if self.max_entries == 0 or not isinstance(expires_at, (int, float)) or expires_at <= self._clock():
+            return
+        size = estimate_size(claims)
+        if size > self.max_bytes:
+            return
+        key = token_digest(token)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (dict(claims), float(expires_at), size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self._counters["evictions"] += 1
+
+    def _remove(self, key: bytes) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            **self._counters,
+            "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+        }
+
+
+_token_cache: Optional[VerifiedTokenCache] = None
+
+
+def get_token_cache() -> VerifiedTokenCache:
+    """Returns the process-wide verified token cache, creating it on first use."""
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = VerifiedTokenCache()
+    return _token_cache
@@ -0,0 +1,136 @@
+# backend/app/core/token_revocation.py
+"""
+Revocation state for the claims-only authorization mode (AUTH_MODE=claims).
+
+Access tokens carry the user's role, active flag and token version (`ver`).
+Changing a user's role, active flag or password bumps `users.token_version`,
+which revokes every token issued before. In claims mode the dependencies do not
+load the user: they compare the token's version with the current one, kept here
+as a compact user id -> version map. A background task reloads it from the
+database every AUTH_REVOCATION_REFRESH_SECONDS, so a revocation made by another
+worker takes effect within that interval (sooner when the principal cache's
+LISTEN/NOTIFY channel forwards it, see app/core/principal_cache.py).
+
+`check` answers None ("ask the database") for users missing from the map (e.g.
+created after the last reload, or just changed) and for every user once the map
+is older than AUTH_REVOCATION_MAX_STALENESS_SECONDS, so a stuck refresh cannot
+keep revoked tokens alive.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy import select
+
+from app.core.config import settings, logger
+from app.core.database import get_db_contextmanager
+from app.models import user as user_model
+
+
+class TokenRevocationSet:
+    """Current token version per user id, as of the last reload."""
+
+    def __init__(self, max_staleness_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_staleness_seconds = (
+            max_staleness_seconds if max_staleness_seconds is not None else settings.AUTH_REVOCATION_MAX_STALENESS_SECONDS
+        )
+        self._clock = clock
+        self._versions: Dict[int, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._forgotten_during_load: Optional[Set[int]] = None
+        self._counters = {"accepted": 0, "revoked": 0, "unknown": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def check(self, user_id: int, version: int) -> Optional[bool]:
+        """True if the token version is current, False if revoked, None if only the database can tell."""
+        current = self._versions.get(user_id)
+        if current is None or self._loaded_at is None or self._clock() - self._loaded_at > self.max_staleness_seconds:
+            self._counters["unknown"] += 1
+            return None
+        if version != current:
+            self._counters["revoked"] += 1
+            return False
+        self._counters["accepted"] += 1
+        return True
+
+    def set_version(self, user_id: int, version: int) -> None:
+        """Records a version read from the database (e.g. by the fallback lookup)."""
+        self._versions[user_id] = version
+
+    def forget(self, user_id: int) -> None:
+        """The user changed: ask the database until the next reload."""
+        self._versions.pop(user_id, None)
+        if self._forgotten_during_load is not None:
+            self._forgotten_during_load.add(user_id)
+
+    def replace(self, versions: Dict[int, int]) -> None:
+        self._versions = versions
+        self._loaded_at = self._clock()
+        self._counters["refreshes"] += 1
+
+    def refresh_failed(self) -> None:
+        self._counters["refresh_errors"] += 1
+
+    async def refresh(self) -> None:
+        """Reloads the versions of all users (two integers per row)."""
+        # A user changed while the query ran may come back with its old version
+        self._forgotten_during_load = set()
+        try:
+            async with get_db_contextmanager() as db:
+                result = await db.execute(select(user_model.User.id, user_model.User.token_version))
+                versions = dict(result.all())
+            for user_id in self._forgotten_during_load:
+                versions.pop(user_id, None)
+            self.replace(versions)
+        finally:
+            self._forgotten_during_load = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._versions),
+            "age_seconds": self._clock() - self._loaded_at if self._loaded_at is not None else None,
+            **self._counters,
+        }
+
+
+_revocation_set: Optional[TokenRevocationSet] = None
+
+
+def get_revocation_set() -> TokenRevocationSet:
+    """Returns the process-wide revocation set, creating it on first use."""
+    global _revocation_set
+    if _revocation_set is None:
+        _revocation_set = TokenRevocationSet()
+    return _revocation_set
+
+
+class TokenRevocationRefresher:
+    """Background task reloading the revocation set periodically."""
+
+    def __init__(self, revocations: TokenRevocationSet, interval_seconds: Optional[float] = None):
+        self.revocations = revocations
+        self.interval_seconds = interval_seconds if interval_seconds is not None else settings.AUTH_REVOCATION_REFRESH_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.revocations.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.revocations.refresh_failed()
+                logger.warning(f"Could not refresh the token revocation set: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,23 +1,48 @@
 # backend/app/core_modules/auth/v1/endpoints.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query # Added Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query # Added Query
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete, func
-from typing import Annotated, List
+from typing import Annotated, Dict, List
 import logging
+import re
 
 from . import schemas as auth_schemas
 from app.models import user as user_model
 from app.core import security
-from app.core.database import get_db
-from app.core.dependencies import get_current_active_user, require_admin_user
+from app.core.database import get_db, get_db_contextmanager
+from app.core.password_cost import recalibrate_shared_bcrypt_rounds
+from app.core.dependencies import Principal, get_current_active_user, require_admin_user
+from app.core.principal_cache import invalidate_principal, notify_principal_changed
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+BCRYPT_COST_PATTERN = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+async def rehash_password(user_id: int, old_hash: str, password: str) -> None:
+    """
+    Background task run after a login whose stored hash is below the bcrypt cost
+    floor: stores a hash with the current cost. The update only applies if the hash was
+    not changed meanwhile (e.g. a password reset).
+    """
+    try:
+        new_hash = await security.hash_password_async(password)
+        async with get_db_contextmanager() as db:
+            await db.execute(
+                update(user_model.User)
+                .where(user_model.User.id == user_id, user_model.User.hashed_password == old_hash)
+                .values(hashed_password=new_hash)
+            )
+            await db.commit()
+        logger.info(f"Password hash of user {user_id} upgraded to bcrypt cost {security.bcrypt_rounds()}.")
+    except Exception as e:
+        logger.warning(f"Could not rehash the password of user {user_id}: {e}")
+
 @router.post("/login", response_model=auth_schemas.Token, summary="User Login")
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -53,7 +78,7 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    if not security.verify_password(form_data.password, user.hashed_password):
+    if not await security.verify_password_async(form_data.password, user.hashed_password):
         logger.error(f"Password verification failed for {user.email}, input: {form_data.password[:3]}...")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -68,9 +93,15 @@ async def login_for_access_token(
             detail="Inactive user"
         )
 
+    # Stored below the bcrypt cost floor: rehash after the response, off the login path
+    if security.password_needs_rehash(user.hashed_password):
+        background_tasks.add_task(rehash_password, user.id, user.hashed_password, form_data.password)
+
     token_data = {
         "sub": str(user.id),
-        "role": user.role.value
+        "role": user.role.value,
+        "active": user.is_active,
+        "ver": user.token_version or 0 # Bumped to revoke the token (see app/core/token_revocation.py)
     }
     access_token = security.create_access_token(data=token_data)
     logger.info(f"Login successful for {user.email}, token issued")
@@ -84,13 +115,13 @@ def read_users_me(
     """Get current logged-in user's information. Requires authentication."""
     return current_user
 
-# Removed: from app.core.security import hash_password (use security.hash_password directly)
+# Removed: from app.core.security import hash_password (use security.hash_password_async directly)
 
 @router.post("/admin/users", response_model=auth_schemas.UserResponse, summary="Create New User (Admin)") # Changed UserRead to UserResponse
 async def create_user(
     user_in: auth_schemas.UserCreate,
     db: AsyncSession = Depends(get_db),
-    admin_user: user_model.User = Depends(require_admin_user)
+    admin_user: Principal = Depends(require_admin_user)
 ):
     """
     Create a new user. This endpoint is restricted to admin users.
@@ -106,7 +137,7 @@ async def create_user(
     if result.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = security.hash_password(user_in.password) # Use security.hash_password
+    hashed_password = await security.hash_password_async(user_in.password) # Hashed off the event loop
     db_user = user_model.User(
         email=user_in.email, # email is inherited via UserBase in UserCreate
         hashed_password=hashed_password,
@@ -121,7 +152,7 @@ async def create_user(
 @router.get("/admin/users", response_model=auth_schemas.UserListResponse, summary="List Users (Admin)") # Changed to UserListResponse
 async def list_users(
     db: AsyncSession = Depends(get_db),
-    admin_user: user_model.User = Depends(require_admin_user),
+    admin_user: Principal = Depends(require_admin_user),
     skip: int = Query(0, ge=0, description="Number of items to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of items to return per page")
 ):
@@ -149,7 +180,7 @@ async def list_users(
 async def get_user_by_id(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    admin_user: user_model.User = Depends(require_admin_user)
+    admin_user: Principal = Depends(require_admin_user)
 ):
     """Get a specific user by their ID (admin only)."""
     stmt = select(user_model.User).where(user_model.User.id == user_id)
@@ -164,7 +195,7 @@ async def update_user(
     user_id: int,
     user_in: auth_schemas.UserUpdate,
     db: AsyncSession = Depends(get_db),
-    admin_user: user_model.User = Depends(require_admin_user)
+    admin_user: Principal = Depends(require_admin_user)
 ):
     """
     Update an existing user's details. This endpoint is restricted to admin users.
@@ -191,17 +222,28 @@ async def update_user(
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered by another user")
         db_user.email = update_data['email']
 
+    # Tokens carry the role and active flag: changing them (or the password) revokes the issued tokens
+    revoke_tokens = False
+
     if 'password' in update_data and update_data['password'] is not None:
-        db_user.hashed_password = security.hash_password(update_data['password'])
+        db_user.hashed_password = await security.hash_password_async(update_data['password'])
+        revoke_tokens = True
     
     if 'role' in update_data and update_data['role'] is not None:
+        revoke_tokens = revoke_tokens or update_data['role'] != db_user.role
         db_user.role = update_data['role']
 
     if 'is_active' in update_data and update_data['is_active'] is not None:
+        revoke_tokens = revoke_tokens or update_data['is_active'] != db_user.is_active
         db_user.is_active = update_data['is_active']
 
+    if revoke_tokens:
+        db_user.token_version = (db_user.token_version or 0) + 1
+
     db.add(db_user) # Add the modified instance to the session
+    await notify_principal_changed(db, user_id) # Delivered to every worker on commit
     await db.commit()
+    invalidate_principal(user_id)
     await db.refresh(db_user) # Refresh to get any DB-side changes
     return db_user
 
@@ -209,7 +251,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    admin_user: user_model.User = Depends(require_admin_user)
+    admin_user: Principal = Depends(require_admin_user)
 ):
     """Delete a user (admin only)."""
     stmt = select(user_model.User).where(user_model.User.id == user_id)
@@ -219,4 +261,53 @@ async def delete_user(
         raise HTTPException(status_code=404, detail="User not found")
 
     await db.execute(delete(user_model.User).where(user_model.User.id == user_id))
-    await db.commit()
\ No newline at end of file
+    await notify_principal_changed(db, user_id)
+    await db.commit()
+    invalidate_principal(user_id)
+
+@router.get("/admin/password-hashing", response_model=auth_schemas.PasswordHashReport, summary="Password Hash Costs (Admin)")
+async def get_password_hash_report(
+    db: AsyncSession = Depends(get_db),
+    admin_user: Principal = Depends(require_admin_user)
+):
+    """
+    Distribution of the bcrypt costs of the stored password hashes (admin only).
+    Hashes below the cost floor (BCRYPT_MIN_ROUNDS) are rehashed on the user's next login.
+    """
+    prefix = func.substr(user_model.User.hashed_password, 1, 7)
+    stmt = select(prefix, func.count()).where(user_model.User.hashed_password.is_not(None)).group_by(prefix)
+    result = await db.execute(stmt)
+
+    counts: Dict[int, int] = {}
+    unknown = 0
+    for hash_prefix, users in result.all():
+        match = BCRYPT_COST_PATTERN.match(hash_prefix or "")
+        if match:
+            rounds = int(match.group(1))
+            counts[rounds] = counts.get(rounds, 0) + users
+        else:
+            unknown += users
+
+    current = security.bcrypt_rounds()
+    floor = security.bcrypt_min_rounds()
+    return auth_schemas.PasswordHashReport(
+        current_rounds=current,
+        min_rounds=floor,
+        total=sum(counts.values()) + unknown,
+        costs=[auth_schemas.PasswordHashCost(rounds=rounds, users=users) for rounds, users in sorted(counts.items())],
+        unknown=unknown,
+        needs_rehash=sum(users for rounds, users in counts.items() if rounds < floor) + unknown,
+    )
+
+@router.post("/admin/password-hashing/calibrate", response_model=auth_schemas.BcryptCalibrationResponse, summary="Calibrate Bcrypt Cost (Admin)")
+async def calibrate_password_hash_cost(
+    admin_user: Principal = Depends(require_admin_user)
+):
+    """
+    Benchmarks bcrypt on this host and sets the cost of new hashes to the highest one
+    within BCRYPT_TARGET_VERIFY_SECONDS (admin only). Applies to this worker and is stored
+    as the shared cost, which the other workers apply when they restart.
+    """
+    previous = security.bcrypt_rounds()
+    calibration = await recalibrate_shared_bcrypt_rounds()
+    return auth_schemas.BcryptCalibrationResponse(previous_rounds=previous, **calibration._asdict())
@@ -15,6 +15,8 @@ class Token(BaseModel):
 class TokenPayload(BaseModel):
     sub: Optional[str] = Field(default=None, description="Subject of the token (User ID).", example="1")
     role: Optional[str] = Field(default=None, description="User role embedded in the token.", example="admin")
+    active: Optional[bool] = Field(default=None, description="Whether the user was active when the token was issued.", example=True)
+    ver: Optional[int] = Field(default=None, description="Token version of the user; older versions are revoked.", example=0)
 
 class UserCreate(UserBase):
     password: str = Field(..., min_length=8, description="User's password (must be at least 8 characters).")
@@ -58,4 +60,25 @@ class UserListResponse(BaseModel):
     total: int = Field(..., description="Total number of users matching the query.", example=42)
     page: int = Field(..., description="The current page number (1-indexed).", example=1)
     size: int = Field(..., description="The number of items returned in this page.", example=10)
-    pages: int = Field(..., description="Total number of pages available.", example=5)
\ No newline at end of file
+    pages: int = Field(..., description="Total number of pages available.", example=5)
+
+class PasswordHashCost(BaseModel):
+    rounds: int = Field(..., description="Bcrypt cost (log2 of the key expansion rounds).", example=12)
+    users: int = Field(..., description="Users whose password hash uses this cost.", example=40)
+
+class PasswordHashReport(BaseModel):
+    current_rounds: int = Field(..., description="Cost used for new hashes.", example=12)
+    min_rounds: int = Field(..., description="Hashes below this cost are rehashed on the next login.", example=10)
+    total: int = Field(..., description="Users with a password hash.", example=42)
+    costs: List[PasswordHashCost] = Field(..., description="Users per bcrypt cost, lowest cost first.")
+    unknown: int = Field(..., description="Hashes that are not bcrypt (or not parseable).", example=0)
+    needs_rehash: int = Field(..., description="Hashes that will be rehashed on the next login.", example=2)
+
+class BcryptCalibrationResponse(BaseModel):
+    rounds: int = Field(..., description="Cost chosen for new hashes.", example=12)
+    previous_rounds: int = Field(..., description="Cost in use before the calibration.", example=12)
+    probe_rounds: int = Field(..., description="Cost of the timed benchmark hash.", example=10)
+    probe_seconds: float = Field(..., description="Median time of the benchmark hashes.", example=0.06)
+    estimated_seconds: float = Field(..., description="Estimated verify time at the chosen cost.", example=0.24)
+    target_seconds: float = Field(..., description="Configured target verify time.", example=0.25)
+    samples: int = Field(..., description="Benchmark hashes timed.", example=5)
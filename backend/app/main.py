@@ -1,11 +1,23 @@
 # backend/app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings, logger
 # from app.core.module_loader import load_modules_config, discover_module_routers # Old imports removed
 from app.core.module_loader import load_and_register_modules # New import
+from app.core.llm_clients import warm_up_chat_clients
 from app.api_router import api_router
+from app.utils.extraction_executor import shutdown_extraction_executor
+from app.core.password_executor import shutdown_password_executor
+from app.core.security import bcrypt_rounds, set_bcrypt_rounds
+from app.core.password_cost import apply_shared_bcrypt_rounds
+from app.core.principal_cache import create_invalidation_listener
+from app.core.token_revocation import TokenRevocationRefresher, get_revocation_set
+from app.utils.extraction_cache import purge_stale_extractions
+from app.utils.extraction_checkpoints import purge_stale_checkpoints
+from app.utils.llm_cache import purge_expired_llm_responses
+from app.utils.pdf_processor import EXTRACTOR_VERSION
 
 # --- FastAPI App Initialization ---
 openapi_url = f"{settings.API_PREFIX}/openapi.json" if settings.ENVIRONMENT == "development" else None
@@ -20,12 +32,55 @@ if not settings.API_PREFIX:
     settings.API_PREFIX = "/api" # Ensure it has a value
 
 
+# --- Application Lifespan (startup/shutdown hooks) ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Drop extraction cache entries and page checkpoints produced by older extractor versions
+    try:
+        await purge_stale_extractions(EXTRACTOR_VERSION)
+        await purge_stale_checkpoints(EXTRACTOR_VERSION)
+    except Exception as e:
+        logger.warning(f"Could not purge stale extraction cache entries: {e}")
+    # Drop LLM responses whose TTL has passed (e.g. cached quesitos)
+    try:
+        await purge_expired_llm_responses()
+    except Exception as e:
+        logger.warning(f"Could not purge expired LLM cache entries: {e}")
+    # Create the chat clients of the configured models before the first request
+    warm_up_chat_clients()
+    # Bcrypt cost for new hashes: fixed in the settings or calibrated once and shared by all workers
+    if settings.BCRYPT_ROUNDS:
+        set_bcrypt_rounds(settings.BCRYPT_ROUNDS)
+    else:
+        try:
+            await apply_shared_bcrypt_rounds()
+        except Exception as e:
+            logger.warning(f"Could not load or calibrate the shared bcrypt cost, keeping {bcrypt_rounds()}: {e}")
+    # Keep the principal cache consistent with changes made by other workers
+    invalidation_listener = create_invalidation_listener()
+    if invalidation_listener is not None:
+        invalidation_listener.start()
+    # Claims-only authorization checks token versions against a periodically reloaded set
+    revocation_refresher = TokenRevocationRefresher(get_revocation_set()) if settings.AUTH_MODE == "claims" else None
+    if revocation_refresher is not None:
+        revocation_refresher.start()
+    yield
+    if revocation_refresher is not None:
+        await revocation_refresher.stop()
+    if invalidation_listener is not None:
+        await invalidation_listener.stop()
+    # Stop the PDF extraction worker processes and the password hashing threads
+    shutdown_extraction_executor()
+    shutdown_password_executor()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=openapi_url,
     docs_url=docs_url,
     redoc_url=redoc_url,
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # --- CORS Middleware Setup ---
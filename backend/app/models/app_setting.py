@@ -0,0 +1,24 @@
+# backend/app/models/app_setting.py
+from sqlalchemy import String, Text, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+from app.core.database import Base
+
+class AppSetting(Base):
+    """
+    SQLAlchemy model for the 'app_settings' table.
+    Values decided at runtime that every worker must share (e.g. the calibrated
+    bcrypt cost, see app.core.password_cost), one row per key.
+    """
+    __tablename__ = "app_settings"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<AppSetting(key='{self.key}', value='{self.value}')>"
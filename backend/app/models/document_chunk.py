@@ -0,0 +1,46 @@
+# backend/app/models/document_chunk.py
+from sqlalchemy import Integer, String, Text, DateTime, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from pgvector.sqlalchemy import Vector
+from typing import List, Optional
+from datetime import datetime
+
+from app.core.database import Base
+
+class DocumentChunk(Base):
+    """
+    SQLAlchemy model for the 'document_chunks' table.
+    Stores the token-bounded chunks of an extracted PDF, per chunking config
+    (see app.utils.chunking), with their character span in the document text
+    and, once embedded, their vector (see app.utils.chunk_search).
+    """
+    __tablename__ = "document_chunks"
+    __table_args__ = (
+        UniqueConstraint("file_hash", "extractor_version", "chunker", "chunk_index", name="uq_document_chunks_hash_version_chunker_index"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Source document and how it was chunked
+    file_hash: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    extractor_version: Mapped[str] = mapped_column(String(64), nullable=False)
+    chunker: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    # Position and content
+    chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    page_number: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    char_start: Mapped[int] = mapped_column(Integer, nullable=False)
+    char_end: Mapped[int] = mapped_column(Integer, nullable=False)
+    token_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # Embedding (HNSW index, cosine distance) and the embedder that produced it
+    embedding: Mapped[Optional[List[float]]] = mapped_column(Vector(768), nullable=True)
+    embedder: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<DocumentChunk(file_hash='{self.file_hash[:12]}', chunker='{self.chunker}', chunk_index={self.chunk_index})>"
@@ -0,0 +1,37 @@
+# backend/app/models/llm_cache_entry.py
+from sqlalchemy import Integer, String, Text, DateTime, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional
+from datetime import datetime
+
+from app.core.database import Base
+
+class LlmCacheEntry(Base):
+    """
+    SQLAlchemy model for the 'llm_cache_entries' table.
+    Stores LLM responses keyed by a hash of everything that determines them
+    (model, prompt, inputs), grouped in namespaces (see app.utils.llm_cache).
+    Entries with an `expires_at` in the past are misses.
+    """
+    __tablename__ = "llm_cache_entries"
+    __table_args__ = (
+        UniqueConstraint("namespace", "cache_key", name="uq_llm_cache_entries_namespace_key"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Who uses the entry (e.g. 'gerador_quesitos.mapa_reducao') and its content address
+    namespace: Mapped[str] = mapped_column(String(64), nullable=False)
+    cache_key: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    # Model that produced the response, and the response text
+    model: Mapped[str] = mapped_column(String(128), nullable=False)
+    response: Mapped[str] = mapped_column(Text, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), index=True, nullable=True)
+
+    def __repr__(self):
+        return f"<LlmCacheEntry(namespace='{self.namespace}', cache_key='{self.cache_key[:12]}', model='{self.model}')>"
@@ -0,0 +1,40 @@
+# backend/app/models/pdf_page_checkpoint.py
+from sqlalchemy import Integer, String, DateTime, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import List
+from datetime import datetime
+
+from app.core.database import Base
+
+class PdfPageCheckpoint(Base):
+    """
+    SQLAlchemy model for the 'pdf_page_checkpoints' table.
+    Records each page of a PDF as soon as it is extracted, so an interrupted
+    extraction resumes from the pages that are still missing.
+    """
+    __tablename__ = "pdf_page_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("file_hash", "extractor_version", "page_number", name="uq_pdf_page_checkpoints_hash_version_page"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Content address (same as pdf_processed_chunks)
+    file_hash: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    extractor_version: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    # Page and document size
+    page_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    page_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    # How the page was extracted ('text_layer' or 'ocr') and its text sections, in order
+    method: Mapped[str] = mapped_column(String(16), nullable=False)
+    sections: Mapped[List[str]] = mapped_column(JSONB, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<PdfPageCheckpoint(file_hash='{self.file_hash[:12]}', version='{self.extractor_version}', page={self.page_number}/{self.page_count})>"
@@ -0,0 +1,36 @@
+# backend/app/models/pdf_processed_chunk.py
+from sqlalchemy import Integer, String, Text, DateTime, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional
+from datetime import datetime
+
+from app.core.database import Base
+
+class PdfProcessedChunk(Base):
+    """
+    SQLAlchemy model for the 'pdf_processed_chunks' table.
+    Stores the text extracted from a PDF, addressed by the SHA-256 of the file
+    and the version of the extractor that produced it.
+    """
+    __tablename__ = "pdf_processed_chunks"
+    __table_args__ = (
+        UniqueConstraint("file_hash", "extractor_version", "chunk_index", name="uq_pdf_processed_chunks_hash_version_index"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    # Content address
+    file_hash: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    extractor_version: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    # Position and content
+    chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
+    page_number: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<PdfProcessedChunk(file_hash='{self.file_hash[:12]}', version='{self.extractor_version}', chunk_index={self.chunk_index})>"
@@ -34,6 +34,8 @@ class User(Base):
         index=True
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # Bumped when the role, active flag or password changes: tokens issued with an older version are revoked
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
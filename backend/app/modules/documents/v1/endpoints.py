@@ -0,0 +1,55 @@
+# backend/app/modules/documents/v1/endpoints.py
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+from typing import Annotated
+
+from app.core.dependencies import Principal, get_current_active_principal
+from app.utils.extraction_cache import has_extraction, lookup_extraction
+from app.utils.extraction_checkpoints import get_extraction_progress
+from app.utils.pdf_processor import EXTRACTOR_VERSION
+from .schemas import ExtractedDocumentResponse, ExtractedSection, ExtractionStatusResponse
+
+router = APIRouter()
+
+FileHash = Annotated[str, Path(pattern="^[0-9a-f]{64}$", description="SHA-256 of the PDF file (lowercase hex).")]
+
+@router.get("/{file_hash}", response_model=ExtractedDocumentResponse, summary="Get Extracted Text by File Hash")
+async def get_extracted_document(
+    file_hash: FileHash,
+    current_user: Annotated[Principal, Depends(get_current_active_principal)],
+):
+    """
+    Returns the text extracted from a previously uploaded PDF, looked up by the
+    SHA-256 of the file. Only extractions made by the current extractor version are returned.
+    (Will be accessible at /api/documents/v1/{file_hash})
+    """
+    sections = await lookup_extraction(file_hash, EXTRACTOR_VERSION)
+    if sections is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No extracted text stored for this file hash")
+    return ExtractedDocumentResponse(
+        file_hash=file_hash,
+        extractor_version=EXTRACTOR_VERSION,
+        sections=[ExtractedSection(page_number=page_number, text=text) for page_number, text in sections],
+    )
+
+@router.get("/{file_hash}/status", response_model=ExtractionStatusResponse, summary="Get Extraction Progress by File Hash")
+async def get_extraction_status(
+    file_hash: FileHash,
+    current_user: Annotated[Principal, Depends(get_current_active_principal)],
+):
+    """
+    Reports how many pages of a PDF have been extracted so far (pages done / total),
+    including extractions that were interrupted and can be resumed by uploading the file again.
+    (Will be accessible at /api/documents/v1/{file_hash}/status)
+    """
+    progress = await get_extraction_progress(file_hash, EXTRACTOR_VERSION)
+    complete = await has_extraction(file_hash, EXTRACTOR_VERSION)
+    if progress is None and not complete:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No extraction found for this file hash")
+    pages_done, pages_total = progress or (None, None)
+    return ExtractionStatusResponse(
+        file_hash=file_hash,
+        extractor_version=EXTRACTOR_VERSION,
+        complete=complete,
+        pages_done=pages_done,
+        pages_total=pages_total,
+    )
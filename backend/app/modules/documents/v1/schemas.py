@@ -0,0 +1,21 @@
+# backend/app/modules/documents/v1/schemas.py
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class ExtractedSection(BaseModel):
+    page_number: Optional[int] = Field(default=None, description="1-based page the section starts on, when known.")
+    text: str = Field(..., description="Extracted text of the section.")
+
+class ExtractedDocumentResponse(BaseModel):
+    """Text stored in the extraction cache for a PDF."""
+    file_hash: str = Field(..., description="SHA-256 of the PDF file.")
+    extractor_version: str = Field(..., description="Version of the extraction pipeline that produced the text.")
+    sections: List[ExtractedSection] = Field(..., description="Extracted text sections, in document order.")
+
+class ExtractionStatusResponse(BaseModel):
+    """Progress of the extraction of a PDF."""
+    file_hash: str = Field(..., description="SHA-256 of the PDF file.")
+    extractor_version: str = Field(..., description="Version of the extraction pipeline.")
+    complete: bool = Field(..., description="True once the extracted text is stored and can be fetched.")
+    pages_done: Optional[int] = Field(default=None, description="Pages extracted so far, when known.")
+    pages_total: Optional[int] = Field(default=None, description="Number of pages of the document, when known.")
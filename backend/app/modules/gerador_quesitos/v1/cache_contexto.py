@@ -0,0 +1,70 @@
+# backend/app/modules/gerador_quesitos/v1/cache_contexto.py
+"""
+Prefixo fixo do prompt do gerador de quesitos no cache de contexto do provedor
+(app.core.context_cache).
+
+O template é dividido no início da linha do primeiro campo ({beneficio},
+{profissao} ou {pdf_content}): tudo o que vem antes (descrição, contexto e
+exemplos de quesitos, quase todo o template) é idêntico em todas as requisições
+e fica em cache no provedor; o que vem depois (dados do caso, documentos e
+instruções de saída) é enviado a cada chamada, junto com o nome do prefixo em
+cache. Sem cache de contexto, o prompt completo é enviado como antes.
+"""
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from langchain_core.messages import HumanMessage
+
+from app.core.context_cache import get_context_cache
+from app.utils.tokenizer import count_tokens
+
+
+class MensagensLLM(NamedTuple):
+    """Mensagens e opções da chamada ao modelo, e o nome do prefixo em cache (se houver)."""
+    mensagens: List[HumanMessage]
+    opcoes: Dict[str, Any]
+    prefixo_em_cache: Optional[str] = None
+
+
+@lru_cache(maxsize=8)
+def prefixo_template(template: str) -> str:
+    """Texto fixo do template até a linha do primeiro campo (chaves escapadas já resolvidas)."""
+    literal = ""
+    for texto, campo, _, _ in Formatter().parse(template):
+        literal += texto
+        if campo is not None:
+            # Só o que está antes da linha do campo é fixo
+            return literal[:literal.rfind("\n") + 1]
+    return literal
+
+
+@lru_cache(maxsize=8)
+def tokens_prefixo(template: str) -> int:
+    return count_tokens(prefixo_template(template))
+
+
+def mensagens_completas(texto_prompt: str) -> MensagensLLM:
+    return MensagensLLM([HumanMessage(content=texto_prompt)], {})
+
+
+async def mensagens_llm(texto_prompt: str, template: str, modelo: str) -> MensagensLLM:
+    """
+    Mensagens para enviar `texto_prompt` (o template preenchido) a `modelo`: só a
+    parte variável e o nome do prefixo em cache, ou o prompt completo.
+    """
+    cache = get_context_cache()
+    prefixo = prefixo_template(template)
+    if cache is None or not prefixo or not texto_prompt.startswith(prefixo):
+        return mensagens_completas(texto_prompt)
+    nome = await cache.handle(modelo, prefixo)
+    if nome is None:
+        return mensagens_completas(texto_prompt)
+    return MensagensLLM([HumanMessage(content=texto_prompt[len(prefixo):])], {"cached_content": nome}, nome)
+
+
+def invalidar_prefixo(nome: str) -> None:
+    """Esquece um prefixo recusado pelo provedor (p. ex. removido antes de expirar)."""
+    cache = get_context_cache()
+    if cache is not None:
+        cache.invalidate(nome)
@@ -0,0 +1,162 @@
+# backend/app/modules/gerador_quesitos/v1/contexto.py
+"""
+Montagem do contexto (trecho {pdf_content} do prompt) do gerador de quesitos.
+
+No modo de recuperação, em vez de enviar o texto integral dos PDFs, são
+selecionados os chunks mais relevantes para o benefício e a profissão
+(busca vetorial em `document_chunks`, ver app.utils.chunk_search) até um
+orçamento de tokens; o texto integral só é usado quando pedido explicitamente.
+"""
+import math
+from typing import Dict, List, NamedTuple, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import logger
+from app.schemas.module_config import ModuleChunkingConfig
+from app.utils.chunk_search import ChunkFilters, ChunkMatch, count_embedded_chunks, search_similar_chunks
+from app.utils.chunking import chunk_document, chunker_key
+from app.utils.embeddings import get_embedder
+from app.utils.pdf_processor import EXTRACTOR_VERSION, ExtractedSection
+from app.utils.tokenizer import count_tokens
+
+
+class TrechoSelecionado(NamedTuple):
+    """Chunk escolhido para o prompt."""
+    arquivo: str
+    file_hash: str
+    chunk_index: int
+    pagina: Optional[int]
+    char_start: int
+    score: float
+    tokens: int
+    texto: str
+
+
+def blocos_documento_completo(secoes: List[ExtractedSection]) -> List[str]:
+    """Uma entrada por seção; a primeira seção de cada arquivo leva o cabeçalho do arquivo."""
+    blocos: List[str] = []
+    arquivo_atual = None
+    for secao in secoes:
+        arquivo = (secao.filename, secao.file_hash)
+        if arquivo != arquivo_atual:
+            blocos.append(f"--- CONTEÚDO DO ARQUIVO: {secao.filename} ---\n\n{secao.text}")
+            arquivo_atual = arquivo
+        else:
+            blocos.append(secao.text)
+    return blocos
+
+
+def consulta_recuperacao(beneficio: str, profissao: str) -> str:
+    """Consulta usada para buscar os trechos relevantes ao caso."""
+    return (
+        f"Benefício pretendido: {beneficio}. Profissão: {profissao}. "
+        "Doença, diagnóstico, CID, exames, tratamento, limitações funcionais, "
+        "incapacidade para o trabalho e data de início da incapacidade."
+    )
+
+
+def agrupar_por_arquivo(secoes: List[ExtractedSection]) -> Dict[str, List[ExtractedSection]]:
+    arquivos: Dict[str, List[ExtractedSection]] = {}
+    for secao in secoes:
+        arquivos.setdefault(secao.file_hash, []).append(secao)
+    return arquivos
+
+
+async def _ranquear_em_memoria(
+    secoes: List[ExtractedSection],
+    consulta: str,
+    chunking: ModuleChunkingConfig,
+    top_k: int,
+) -> List[ChunkMatch]:
+    """
+    Alternativa sem banco de dados: divide os documentos em chunks e os ordena
+    pela similaridade de cosseno com a consulta, usando o mesmo embedder.
+    """
+    embedder = get_embedder()
+    candidatos = []
+    for file_hash, secoes_arquivo in agrupar_por_arquivo(secoes).items():
+        chunks = await run_in_threadpool(chunk_document, [(s.page_no, s.text) for s in secoes_arquivo], chunking)
+        candidatos.extend((file_hash, chunk) for chunk in chunks)
+    if not candidatos:
+        return []
+    vetor_consulta = await embedder.embed_query(consulta)
+    vetores = await embedder.embed_documents([chunk.text for _, chunk in candidatos])
+
+    def cosseno(a: List[float], b: List[float]) -> float:
+        norma = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return sum(x * y for x, y in zip(a, b)) / norma if norma else 0.0
+
+    ranqueados = sorted(
+        (
+            ChunkMatch(file_hash, chunk.index, chunk.page_number, chunk.char_start, chunk.char_end, chunk.text, cosseno(vetor_consulta, vetor))
+            for (file_hash, chunk), vetor in zip(candidatos, vetores)
+        ),
+        key=lambda match: match.score,
+        reverse=True,
+    )
+    return ranqueados[:top_k]
+
+
+async def selecionar_trechos(
+    secoes: List[ExtractedSection],
+    beneficio: str,
+    profissao: str,
+    chunking: ModuleChunkingConfig,
+    top_k: int,
+    orcamento_tokens: int,
+) -> List[TrechoSelecionado]:
+    """
+    Seleciona até `top_k` chunks dos arquivos enviados, em ordem de relevância,
+    sem ultrapassar `orcamento_tokens`. Os arquivos com embeddings armazenados são
+    buscados no banco; só os arquivos sem embeddings (ainda não armazenados ou
+    não processados), ou todos se a busca falhar, são ranqueados em memória.
+    O resultado volta na ordem dos documentos, para o prompt seguir a leitura do processo.
+    """
+    nomes = {secao.file_hash: secao.filename for secao in secoes}
+    consulta = consulta_recuperacao(beneficio, profissao)
+    chunker = chunker_key(chunking)
+
+    matches: List[ChunkMatch] = []
+    sem_embeddings = list(nomes)
+    try:
+        contagens = await count_embedded_chunks(list(nomes), EXTRACTOR_VERSION, chunker)
+        armazenados = [file_hash for file_hash in nomes if contagens.get(file_hash)]
+        if armazenados:
+            filtros = ChunkFilters(file_hashes=armazenados, extractor_version=EXTRACTOR_VERSION, chunker=chunker)
+            matches = await search_similar_chunks(consulta, k=top_k, filters=filtros)
+        sem_embeddings = [file_hash for file_hash in nomes if not contagens.get(file_hash)]
+    except Exception as e:
+        matches = []
+        logger.warning(f"Stored chunk search failed, ranking chunks in memory: {e}")
+    if sem_embeddings:
+        pendentes = set(sem_embeddings)
+        logger.info(f"{len(pendentes)} of {len(nomes)} files have no stored embeddings; ranking their chunks in memory.")
+        complemento = await _ranquear_em_memoria([s for s in secoes if s.file_hash in pendentes], consulta, chunking, top_k)
+        # Mesmo embedder nos dois casos: as similaridades são comparáveis
+        matches = sorted(matches + complemento, key=lambda match: match.score, reverse=True)[:top_k]
+
+    selecionados: List[TrechoSelecionado] = []
+    tokens_usados = 0
+    for match in matches:
+        tokens = count_tokens(match.text)
+        if tokens_usados + tokens > orcamento_tokens:
+            continue
+        tokens_usados += tokens
+        selecionados.append(TrechoSelecionado(
+            nomes.get(match.file_hash, match.file_hash[:12]), match.file_hash, match.chunk_index,
+            match.page_number, match.char_start, match.score, tokens, match.text,
+        ))
+    ordem_arquivos = {file_hash: posicao for posicao, file_hash in enumerate(nomes)}
+    selecionados.sort(key=lambda trecho: (ordem_arquivos.get(trecho.file_hash, 0), trecho.char_start))
+    logger.info(f"Selected {len(selecionados)} of {len(matches)} retrieved chunks ({tokens_usados}/{orcamento_tokens} tokens).")
+    return selecionados
+
+
+def blocos_trechos(trechos: List[TrechoSelecionado]) -> List[str]:
+    """Texto de cada trecho selecionado, identificado por arquivo e página."""
+    blocos = []
+    for numero, trecho in enumerate(trechos, start=1):
+        pagina = trecho.pagina if trecho.pagina is not None else "?"
+        blocos.append(f"--- TRECHO {numero} | ARQUIVO: {trecho.arquivo} | PÁGINA: {pagina} ---\n\n{trecho.texto}")
+    return blocos
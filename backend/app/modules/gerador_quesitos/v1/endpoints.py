@@ -1,6 +1,11 @@
 # backend/app/modules/gerador_quesitos/v1/endpoints.py
+import asyncio
+import json
+import tempfile
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from fastapi import (
     APIRouter,
     HTTPException,
@@ -9,42 +14,42 @@ from fastapi import (
     UploadFile,
     Form,
 )
-# TODO: Funcionalidade desativada temporariamente (Fase 1 Roadmap - Refatoração Core).
-# Dependências removidas do container API. Será movida para um serviço dedicado na Fase 2.
-# Código original comentando abaixo:
-# from langchain_google_genai import ChatGoogleGenerativeAI
-# from langchain_core.messages import HumanMessage
-# from langchain_core.language_models.chat_models import BaseChatModel
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from langchain_core.language_models.chat_models import BaseChatModel
+from starlette.concurrency import run_in_threadpool
 
 # --- IMPORTS CORRIGIDOS ---
 from app.core.config import settings, logger
-# TODO: Funcionalidade desativada temporariamente (Fase 1 Roadmap - Refatoração Core).
-# Dependências removidas do container API (Docling/Tesseract). Será reimplementado via serviço dedicado na Fase 2.
-# Código original comentando abaixo:
-# from app.utils.pdf_processor import processar_pdfs_upload # Caminho absoluto
+from app.core.llm_clients import get_chat_client
+from app.core.llm_limiter import limited_ainvoke, limited_astream
+from app.utils.pdf_processor import iter_extracted_sections, ExtractedSection # Caminho absoluto
+from app.utils.chunking import get_module_chunking
+from app.utils.single_flight import SingleFlight
+from app.schemas.module_config import ModuleChunkingConfig
 # --- FIM IMPORTS CORRIGIDOS ---
-from .esquemas import RespostaQuesitos # Relativo ok
+from .esquemas import RespostaQuesitos, ModoContexto, TrechoUtilizado, EstatisticasMapaReducao, EstatisticasTokens, CasoLote # Relativo ok
+from .contexto import blocos_documento_completo, selecionar_trechos, blocos_trechos
+from .mapa_reducao import resumir_mapa_reducao
+from .resultado_cache import chave_resultado, buscar_resultado, guardar_resultado
+from .orcamento import BlocoPrompt, custo_template, compactar_conteudo, estimar_tokens_prompt, orcamento_conteudo
+from .lote import DocumentosLote, carregar_documentos
+from .cache_contexto import MensagensLLM, mensagens_llm, mensagens_completas, invalidar_prefixo, tokens_prefixo
 
 router = APIRouter()
 
 # --- Default LLM Initialization (from settings) ---
-# TODO: Funcionalidade desativada temporariamente (Fase 1 Roadmap - Refatoração Core).
-# Dependências removidas do container API. Será movida para um serviço dedicado na Fase 2.
-# Código original comentando abaixo:
-# default_llm: Optional[BaseChatModel] = None
-# default_model_name = settings.GEMINI_MODEL_NAME
-# if not settings.GOOGLE_API_KEY:
-#     logger.warning("GOOGLE_API_KEY not found. Default LLM for Gerador Quesitos will not function.")
-# else:
-#     try:
-#         default_llm = ChatGoogleGenerativeAI(
-#             model=default_model_name,
-#             google_api_key=settings.GOOGLE_API_KEY,
-#         )
-#         logger.info(f"Default LLM initialized successfully for gerador_quesitos with model: {default_model_name}")
-#     except Exception as e:
-#         logger.error(f"Failed to initialize default LLM for gerador_quesitos with model {default_model_name}: {e}", exc_info=True)
-#         # default_llm remains None
+default_llm: Optional[BaseChatModel] = None
+default_model_name = settings.GEMINI_MODEL_NAME
+if not settings.GOOGLE_API_KEY:
+    logger.warning("GOOGLE_API_KEY not found. Default LLM for Gerador Quesitos will not function.")
+else:
+    try:
+        default_llm = get_chat_client(default_model_name)
+        logger.info(f"Default LLM initialized successfully for gerador_quesitos with model: {default_model_name}")
+    except Exception as e:
+        logger.error(f"Failed to initialize default LLM for gerador_quesitos with model {default_model_name}: {e}", exc_info=True)
+        # default_llm remains None
 
 # --- Load Prompt Template ---
 prompt_template_string = ""
@@ -58,9 +63,356 @@ try:
 except Exception as e:
     logger.error(f"CRITICAL: Failed to load prompt template on startup: {e}", exc_info=True)
     prompt_template_string = ""
+if prompt_template_string:
+    # Static token cost of the template, counted once
+    custo_template(prompt_template_string)
 
 
-# --- API Endpoint ---
+# --- Pipeline (shared by /gerar and /gerar/stream) ---
+@dataclass
+class PromptMontado:
+    """Prompt final e o que foi usado para montá-lo."""
+    texto: str
+    chave_cache: str
+    trechos: List[Any] = field(default_factory=list)
+    estatisticas_mapa_reducao: Optional[EstatisticasMapaReducao] = None
+    estatisticas_tokens: Optional[EstatisticasTokens] = None
+
+
+def _selecionar_llm(modelo_nome: str) -> Tuple[BaseChatModel, str]:
+    """O LLM da requisição (padrão ou `modelo_nome`) e o nome a exibir. Levanta HTTPException se indisponível."""
+    if not prompt_template_string:
+          logger.error("Prompt template not loaded during startup.")
+          raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erro interno: Template de prompt não disponível.")
+
+    llm_to_use: Optional[BaseChatModel] = None
+    selected_model_display_name = ""
+
+    if modelo_nome == "<Modelo Padrão>" or not modelo_nome:
+        logger.info(f"Using default LLM model: {default_model_name}")
+        llm_to_use = default_llm
+        selected_model_display_name = default_model_name
+    else:
+        logger.info(f"Attempting to use specifically requested LLM model: {modelo_nome}")
+        if not settings.GOOGLE_API_KEY:
+             logger.error("Cannot initialize specific model: GOOGLE_API_KEY not found.")
+             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Serviço de IA não configurado (chave API ausente).")
+        try:
+            # Clients are reused across requests (see app.core.llm_clients)
+            llm_to_use = get_chat_client(modelo_nome)
+            selected_model_display_name = modelo_nome
+            logger.info(f"Using pooled LLM client for model: {modelo_nome}")
+        except Exception as e:
+            logger.error(f"Failed to initialize requested LLM model '{modelo_nome}': {e}", exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Não foi possível inicializar o modelo de IA solicitado: '{modelo_nome}'. Verifique se o nome está correto e disponível."
+            )
+
+    if not llm_to_use:
+        logger.error("LLM instance is unavailable (Default failed and no specific model requested/initialized).")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Serviço de IA indisponível.")
+    return llm_to_use, selected_model_display_name
+
+
+@dataclass
+class CasoExtraido:
+    """Seções extraídas dos PDFs e a chave do caso no cache de resultados."""
+    secoes: List[ExtractedSection]
+    chunking: ModuleChunkingConfig
+    chave_cache: str
+
+
+# Requisições simultâneas do mesmo caso (mesma chave de cache) aguardam uma única geração
+_geracoes_em_andamento = SingleFlight("gerador_quesitos")
+
+
+async def _extrair_caso(
+    files: List[UploadFile],
+    beneficio: str,
+    profissao: str,
+    modo_contexto: ModoContexto,
+    top_k: Optional[int],
+    modelo: str,
+    ignorar_cache: bool = False,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Extrai os PDFs e consulta o cache de resultados. Produz eventos ("progresso", dados)
+    e, por último, ("resposta_em_cache", RespostaQuesitos) ou ("caso", CasoExtraido).
+    """
+    logger.info(f"Calling shared PDF processor for {len(files)} file(s)...")
+    yield "progresso", {"etapa": "extracao", "arquivos": len(files)}
+    # The documents are also chunked and stored with this module's chunking config (modules.yaml)
+    chunking = get_module_chunking("gerador_quesitos")
+    secoes = []
+    async for secao in iter_extracted_sections(files, chunking=chunking):
+        if not secoes or secoes[-1].file_hash != secao.file_hash or secoes[-1].filename != secao.filename:
+            yield "progresso", {"etapa": "extracao", "arquivo": secao.filename}
+        secoes.append(secao)
+
+    caso, em_cache = await _consultar_caso(secoes, chunking, beneficio, profissao, modo_contexto, top_k, modelo, ignorar_cache)
+    if em_cache is not None:
+        yield "progresso", {"etapa": "cache"}
+        yield "resposta_em_cache", em_cache
+        return
+    yield "caso", caso
+
+
+async def _consultar_caso(
+    secoes: List[ExtractedSection],
+    chunking: ModuleChunkingConfig,
+    beneficio: str,
+    profissao: str,
+    modo_contexto: ModoContexto,
+    top_k: Optional[int],
+    modelo: str,
+    ignorar_cache: bool = False,
+) -> Tuple[CasoExtraido, Optional[RespostaQuesitos]]:
+    """Valida o texto extraído e consulta o cache de resultados: o caso e, se houver, a resposta em cache."""
+    if not any(secao.text.strip() for secao in secoes):
+         logger.warning("PDF processing utility returned no text.")
+         raise HTTPException(
+             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+             detail="Não foi possível extrair conteúdo válido dos PDFs fornecidos.",
+         )
+    logger.info(f"PDF processing complete. {len(secoes)} sections, total text length: {sum(len(secao.text) for secao in secoes)}")
+
+    # --- Result Cache ---
+    chave_cache = chave_resultado(
+        (secao.file_hash for secao in secoes if secao.file_hash), beneficio, profissao,
+        modelo, modo_contexto, top_k, chunking, prompt_template_string,
+    )
+    caso = CasoExtraido(secoes, chunking, chave_cache)
+    if not ignorar_cache:
+        em_cache = await buscar_resultado(chave_cache)
+        if em_cache is not None:
+            logger.info(f"Quesitos cache hit ({chave_cache[:12]}...).")
+            return caso, em_cache.model_copy(update={"em_cache": True})
+    return caso, None
+
+
+async def _montar_prompt(
+    caso: CasoExtraido,
+    beneficio: str,
+    profissao: str,
+    modo_contexto: ModoContexto,
+    top_k: Optional[int],
+    llm: BaseChatModel,
+    modelo: str,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Monta o prompt do caso conforme `modo_contexto`. Produz eventos ("progresso", dados)
+    e, por último, ("prompt", PromptMontado).
+    """
+    secoes, chunking = caso.secoes, caso.chunking
+    yield "progresso", {"etapa": "contexto", "modo": modo_contexto.value, "secoes": len(secoes)}
+    montado = PromptMontado(texto="", chave_cache=caso.chave_cache)
+    if modo_contexto == ModoContexto.DOCUMENTO_COMPLETO:
+        blocos = [BlocoPrompt(texto) for texto in blocos_documento_completo(secoes)]
+    elif modo_contexto == ModoContexto.MAPA_REDUCAO:
+        resultado = await resumir_mapa_reducao(secoes, beneficio, profissao, llm, modelo)
+        blocos = [BlocoPrompt(resultado.resumo)]
+        montado.estatisticas_mapa_reducao = EstatisticasMapaReducao(
+            chunks=resultado.chunks, niveis=resultado.niveis,
+            chamadas_llm=resultado.chamadas_llm, respostas_em_cache=resultado.respostas_em_cache,
+        )
+    else:
+        montado.trechos = await selecionar_trechos(
+            secoes, beneficio, profissao, chunking,
+            top_k=top_k or settings.GERADOR_QUESITOS_TOP_K,
+            orcamento_tokens=settings.GERADOR_QUESITOS_CONTEXT_TOKEN_BUDGET,
+        )
+        # The most relevant trechos are kept first if the content has to be cut
+        blocos = [BlocoPrompt(texto, trecho.score) for texto, trecho in zip(blocos_trechos(montado.trechos), montado.trechos)]
+    yield "progresso", {"etapa": "contexto_concluido", "modo": modo_contexto.value, "trechos": len(montado.trechos)}
+
+    # --- Fit the Content to the Model's Token Limit ---
+    limite = orcamento_conteudo(prompt_template_string, beneficio, profissao)
+    compactado = await run_in_threadpool(compactar_conteudo, blocos, limite)
+    fixos = estimar_tokens_prompt(prompt_template_string, beneficio=beneficio, profissao=profissao)
+    ocorrencias = custo_template(prompt_template_string).ocorrencias.get("pdf_content", 0)
+    montado.estatisticas_tokens = EstatisticasTokens(
+        template=custo_template(prompt_template_string).tokens_fixos,
+        limite_conteudo=limite,
+        conteudo_antes=compactado.tokens_antes,
+        conteudo_depois=compactado.tokens_depois,
+        prompt_antes=fixos + compactado.tokens_antes * ocorrencias,
+        prompt_depois=fixos + compactado.tokens_depois * ocorrencias,
+        blocos_removidos=compactado.blocos_removidos,
+        truncado=compactado.truncado,
+    )
+
+    # --- Format Prompt ---
+    montado.texto = prompt_template_string.format(
+        pdf_content=compactado.texto,
+        beneficio=beneficio,
+        profissao=profissao
+    )
+    yield "prompt", montado
+
+
+def _montar_resposta(texto_resposta: str, modo_contexto: ModoContexto, montado: PromptMontado) -> RespostaQuesitos:
+    return RespostaQuesitos(
+        quesitos_texto=texto_resposta,
+        modo_contexto=modo_contexto,
+        trechos_utilizados=[
+            TrechoUtilizado(
+                arquivo=trecho.arquivo, file_hash=trecho.file_hash, chunk_index=trecho.chunk_index,
+                pagina=trecho.pagina, score=trecho.score, tokens=trecho.tokens,
+            )
+            for trecho in montado.trechos
+        ],
+        mapa_reducao=montado.estatisticas_mapa_reducao,
+        tokens=montado.estatisticas_tokens,
+    )
+
+
+async def _preparar_chamada(montado: PromptMontado, modelo: str) -> MensagensLLM:
+    """Mensagens da chamada ao modelo, com o prefixo fixo do prompt no cache de contexto quando disponível."""
+    chamada = await mensagens_llm(montado.texto, prompt_template_string, modelo)
+    if montado.estatisticas_tokens is not None:
+        montado.estatisticas_tokens.prefixo_em_cache = tokens_prefixo(prompt_template_string) if chamada.prefixo_em_cache else 0
+    return chamada
+
+
+def _repetir_sem_cache(chamada: MensagensLLM, erro: Exception) -> bool:
+    """Falhas de cota ou do limitador (LlmOverloadedError) não são do prefixo em cache: repetir só aumentaria a carga."""
+    return chamada.prefixo_em_cache is not None and not isinstance(erro, HTTPException)
+
+
+def _sem_cache_de_contexto(montado: PromptMontado, chamada: MensagensLLM, erro: Exception) -> MensagensLLM:
+    """Após uma falha com o prefixo em cache (p. ex. removido no provedor), repete com o prompt completo."""
+    logger.warning(f"Call with cached prompt prefix '{chamada.prefixo_em_cache}' failed ({erro}); retrying with the full prompt.")
+    invalidar_prefixo(chamada.prefixo_em_cache)
+    if montado.estatisticas_tokens is not None:
+        montado.estatisticas_tokens.prefixo_em_cache = 0
+    return mensagens_completas(montado.texto)
+
+
+async def _invocar_llm(llm: BaseChatModel, montado: PromptMontado, modelo: str) -> str:
+    chamada = await _preparar_chamada(montado, modelo)
+    try:
+        ai_message = await limited_ainvoke(llm, modelo, chamada.mensagens, **chamada.opcoes)
+    except Exception as e:
+        if not _repetir_sem_cache(chamada, e):
+            raise
+        chamada = _sem_cache_de_contexto(montado, chamada, e)
+        ai_message = await limited_ainvoke(llm, modelo, chamada.mensagens)
+    return ai_message.content
+
+
+async def _transmitir_llm(llm: BaseChatModel, montado: PromptMontado, modelo: str) -> AsyncIterator[str]:
+    """Texto gerado pelo modelo, à medida que chega."""
+    chamada = await _preparar_chamada(montado, modelo)
+    recebido = False
+    try:
+        async for chunk in limited_astream(llm, modelo, chamada.mensagens, **chamada.opcoes):
+            if isinstance(chunk.content, str) and chunk.content:
+                recebido = True
+                yield chunk.content
+    except Exception as e:
+        # Once text was sent to the client the call cannot be repeated transparently
+        if recebido or not _repetir_sem_cache(chamada, e):
+            raise
+        chamada = _sem_cache_de_contexto(montado, chamada, e)
+        async for chunk in limited_astream(llm, modelo, chamada.mensagens):
+            if isinstance(chunk.content, str) and chunk.content:
+                yield chunk.content
+
+
+async def _gerar_resposta(
+    caso: CasoExtraido,
+    beneficio: str,
+    profissao: str,
+    modo_contexto: ModoContexto,
+    top_k: Optional[int],
+    llm: BaseChatModel,
+    modelo: str,
+) -> RespostaQuesitos:
+    """Monta o prompt, chama o modelo e guarda o resultado no cache."""
+    montado = None
+    async for evento, dados in _montar_prompt(caso, beneficio, profissao, modo_contexto, top_k, llm, modelo):
+        if evento == "prompt":
+            montado = dados
+
+    # --- Call LLM ---
+    logger.info(f"Sending request to Gemini model '{modelo}' via Langchain...")
+    texto_resposta = await _invocar_llm(llm, montado, modelo)
+    logger.info(f"Received AI response snippet: '{texto_resposta[:100]}...'")
+
+    resposta = _montar_resposta(texto_resposta, modo_contexto, montado)
+    await guardar_resultado(montado.chave_cache, modelo, resposta)
+    return resposta
+
+
+def _evento_sse(evento: str, dados: Dict[str, Any]) -> str:
+    return f"event: {evento}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+
+
+def _assumir_uploads(files: List[UploadFile]) -> List[UploadFile]:
+    """
+    FastAPI fecha os arquivos do formulário quando o endpoint retorna, antes do
+    corpo de um StreamingResponse ser enviado. Transfere os arquivos temporários
+    para novos UploadFile, que o stream fecha ao terminar; os originais ficam
+    com um arquivo vazio.
+    """
+    assumidos = []
+    for file in files:
+        assumidos.append(UploadFile(file=file.file, size=file.size, filename=file.filename, headers=file.headers))
+        file.file = tempfile.SpooledTemporaryFile()
+    return assumidos
+
+
+async def _gerar_caso_lote(
+    caso_lote: CasoLote,
+    documentos: DocumentosLote,
+    chunking: ModuleChunkingConfig,
+    llm: BaseChatModel,
+    modelo: str,
+    ignorar_cache: bool,
+) -> RespostaQuesitos:
+    """Gera os quesitos de um caso do lote a partir dos documentos já carregados."""
+    ausentes = documentos.ausentes(caso_lote)
+    if ausentes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Documentos não encontrados: {', '.join(ausentes)}. Envie os PDFs no lote ou em uma requisição anterior.",
+        )
+    orcamento_conteudo(prompt_template_string, caso_lote.beneficio, caso_lote.profissao)
+    caso, em_cache = await _consultar_caso(
+        documentos.secoes_do_caso(caso_lote), chunking, caso_lote.beneficio, caso_lote.profissao,
+        caso_lote.modo_contexto, caso_lote.top_k, modelo, ignorar_cache,
+    )
+    if em_cache is not None:
+        return em_cache
+    # Identical cases, in this batch or in other requests, share one generation
+    return await _geracoes_em_andamento.do(
+        caso.chave_cache,
+        lambda: _gerar_resposta(caso, caso_lote.beneficio, caso_lote.profissao, caso_lote.modo_contexto, caso_lote.top_k, llm, modelo),
+    )
+
+
+def _ler_casos_lote(casos: str) -> List[CasoLote]:
+    """Valida a lista JSON de casos do lote. Levanta HTTPException (422) se inválida."""
+    try:
+        lista = TypeAdapter(List[CasoLote]).validate_json(casos)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=json.loads(e.json(include_url=False)))
+    if not 1 <= len(lista) <= settings.GERADOR_QUESITOS_BATCH_MAX_CASES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"O lote deve ter de 1 a {settings.GERADOR_QUESITOS_BATCH_MAX_CASES} casos.",
+        )
+    if len({caso.id for caso in lista}) != len(lista):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Os ids dos casos do lote devem ser únicos.")
+    return lista
+
+
+MODO_CONTEXTO_DESCRICAO = "'recuperacao' (trechos relevantes, padrão), 'documento_completo' (texto integral) ou 'mapa_reducao' (resumo de evidências de todo o processo)."
+IGNORAR_CACHE_DESCRICAO = "Gera novamente mesmo que o caso esteja no cache de resultados (o novo resultado substitui o guardado)."
+
+
+# --- API Endpoints ---
 @router.post(
     "/gerar",
     response_model=RespostaQuesitos,
@@ -72,106 +424,235 @@ async def gerar_quesitos(
     beneficio: str = Form(..., description="Benefício previdenciário pretendido."),
     profissao: str = Form(..., description="Profissão do requerente."),
     modelo_nome: str = Form(..., description="Nome do modelo de IA a ser usado ou '<Modelo Padrão>."),
+    modo_contexto: ModoContexto = Form(ModoContexto.RECUPERACAO, description=MODO_CONTEXTO_DESCRICAO),
+    top_k: Optional[int] = Form(None, ge=1, le=200, description="Máximo de trechos recuperados (modo recuperação)."),
+    ignorar_cache: bool = Form(False, description=IGNORAR_CACHE_DESCRICAO),
 ):
     """
     Recebe PDFs e info, chama utilitário para extrair texto, formata prompt,
     chama o modelo Gemini selecionado (ou padrão) via Langchain, e retorna os quesitos gerados.
+
+    No modo 'recuperacao' (padrão) o prompt recebe apenas os trechos mais relevantes
+    para o benefício e a profissão, até GERADOR_QUESITOS_CONTEXT_TOKEN_BUDGET tokens,
+    e a resposta informa os trechos usados; 'documento_completo' envia o texto integral.
+    'mapa_reducao' resume todos os chunks em paralelo e consolida os resumos em um
+    único resumo de evidências, para processos maiores que o contexto do modelo.
+
+    Em todos os modos o conteúdo é compactado para caber em
+    GERADOR_QUESITOS_MAX_INPUT_TOKENS (ver orcamento.py), e a resposta informa os
+    tokens estimados antes e depois da compactação.
+
+    O resultado fica em cache (mesmos arquivos, benefício, profissão, modelo, modo e
+    template do prompt) por GERADOR_QUESITOS_RESULT_CACHE_TTL_SECONDS; `ignorar_cache`
+    força uma nova geração.
     """
-    if not prompt_template_string:
-          logger.error("Prompt template not loaded during startup.")
-          raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Erro interno: Template de prompt não disponível.")
     if not files:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum arquivo PDF enviado.")
 
     logger.info(f"Received request. Beneficio: {beneficio}, Profissao: {profissao}, Model: {modelo_nome}, Files: {[f.filename for f in files]}")
 
     # --- Select or Initialize LLM ---
-    llm_to_use: Optional[BaseChatModel] = None
-    selected_model_display_name = ""
+    llm_to_use, selected_model_display_name = _selecionar_llm(modelo_nome)
+    # Form fields that alone exceed the model's token limit fail here, before any extraction (413)
+    orcamento_conteudo(prompt_template_string, beneficio, profissao)
 
-    if modelo_nome == "<Modelo Padrão>" or not modelo_nome:
-        logger.info(f"Using default LLM model: {default_model_name}")
-        llm_to_use = default_llm
-        selected_model_display_name = default_model_name
-    else:
-        logger.info(f"Attempting to use specifically requested LLM model: {modelo_nome}")
-        if not settings.GOOGLE_API_KEY:
-             logger.error("Cannot initialize specific model: GOOGLE_API_KEY not found.")
-             raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Serviço de IA não configurado (chave API ausente).")
-        # TODO: Funcionalidade desativada temporariamente (Fase 1 Roadmap - Refatoração Core).
-        # Dependências removidas do container API. Será movida para um serviço dedicado na Fase 2.
-        # Código original comentando abaixo:
-        # try:
-        #     # TODO: Funcionalidade desativada temporariamente (Fase 1 Roadmap - Refatoração Core).
-        #     # Dependências removidas do container API. Será movida para um serviço dedicado na Fase 2.
-        #     # Código original comentando abaixo:
-        #     # llm_to_use = ChatGoogleGenerativeAI(
-        #     #     model=modelo_nome,
-        #     #     google_api_key=settings.GOOGLE_API_KEY,
-        #     # )
-        #     # selected_model_display_name = modelo_nome
-        #     # logger.info(f"Dynamically initialized LLM with model: {modelo_nome}")
-        # # TODO: Funcionalidade desativada temporariamente (Fase 1 Roadmap - Refatoração Core).
-        # # Dependências removidas do container API. Será movida para um serviço dedicado na Fase 2.
-        # # Código original comentando abaixo:
-        # # except Exception as e:
-        # #     logger.error(f"Failed to initialize requested LLM model '{modelo_nome}': {e}", exc_info=True)
-        # #     raise HTTPException(
-        # #         status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-        # #         detail=f"Não foi possível inicializar o modelo de IA solicitado: '{modelo_nome}'. Verifique se o nome está correto e disponível."
-        # #     )
-
-    # TODO: Funcionalidade desativada temporariamente (Fase 1 Roadmap - Refatoração Core).
-    # Dependências removidas do container API. Será movida para um serviço dedicado na Fase 2.
-    # Código original comentando abaixo:
-    # if not llm_to_use:
-    #     logger.error("LLM instance is unavailable (Default failed and no specific model requested/initialized).")
-    #     raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Serviço de IA indisponível.")
-
-    # --- Process Files ---
-    # TODO: Funcionalidade desativada temporariamente (Fase 1 Roadmap - Refatoração Core).
-    # Dependências removidas do container API (Docling/Tesseract). Será reimplementado via serviço dedicado na Fase 2.
-    # Código original comentando abaixo:
-    # try:
-    #     logger.info(f"Calling shared PDF processor for {len(files)} file(s)...")
-    #     texto_extraido_combinado = await processar_pdfs_upload(files)
-    #
-    #     if not texto_extraido_combinado:
-    #          logger.warning("PDF processing utility returned no text.")
-    #          raise HTTPException(
-    #              status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-    #              detail="Não foi possível extrair conteúdo válido dos PDFs fornecidos.",
-    #          )
-    #     logger.info(f"PDF processing complete. Total text length: {len(texto_extraido_combinado)}")
-    #
-    #     # --- Format Prompt ---
-    #     final_prompt_text = prompt_template_string.format(
-    #         pdf_content=texto_extraido_combinado,
-    #         beneficio=beneficio,
-    #         profissao=profissao
-    #     )
-    #
-    #     # --- Call LLM ---
-    #     message = HumanMessage(content=final_prompt_text)
-    #     logger.info(f"Sending request to Gemini model '{selected_model_display_name}' via Langchain...")
-    #     # TODO: Funcionalidade desativada temporariamente (Fase 1 Roadmap - Refatoração Core).
-    #     # Dependências removidas do container API. Será movida para um serviço dedicado na Fase 2.
-    #     # Código original comentando abaixo:
-    #     # ai_message = await llm_to_use.ainvoke([message])
-    #     # texto_resposta = ai_message.content
-    #     # logger.info(f"Received AI response snippet: '{texto_resposta[:100]}...'")
-    #     texto_resposta = "Funcionalidade de geração de quesitos via IA desativada temporariamente." # Placeholder response
-    #
-    #     # --- Return Response ---
-    #     return RespostaQuesitos(quesitos_texto=texto_resposta)
-    #
-    # except HTTPException:
-    #     raise
-    # except Exception as e:
-    #     logger.error(f"Unhandled error during quesitos generation: {e}", exc_info=True)
-    #     raise HTTPException(
-    #         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-    #         detail=f"Erro inesperado ao gerar quesitos: {str(e)}",
-    #     )
-    texto_resposta = "Funcionalidade de geração de quesitos via IA desativada temporariamente." # Placeholder response
-    return RespostaQuesitos(quesitos_texto=texto_resposta)
\ No newline at end of file
+    try:
+        # --- Process Files and Check the Result Cache ---
+        caso = None
+        async for evento, dados in _extrair_caso(files, beneficio, profissao, modo_contexto, top_k, selected_model_display_name, ignorar_cache):
+            if evento == "resposta_em_cache":
+                return dados
+            if evento == "caso":
+                caso = dados
+
+        # --- Assemble Prompt and Call LLM (shared with identical requests in flight) ---
+        return await _geracoes_em_andamento.do(
+            caso.chave_cache,
+            lambda: _gerar_resposta(caso, beneficio, profissao, modo_contexto, top_k, llm_to_use, selected_model_display_name),
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unhandled error during quesitos generation: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro inesperado ao gerar quesitos: {str(e)}",
+        )
+
+
+@router.post(
+    "/gerar/stream",
+    summary="Gera quesitos com resposta em streaming (Server-Sent Events).",
+    tags=["Gerador Quesitos"],
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Eventos 'progresso', 'token', 'resposta' e 'erro'."}},
+)
+async def gerar_quesitos_stream(
+    files: List[UploadFile] = File(..., description="Um ou mais documentos PDF para análise."),
+    beneficio: str = Form(..., description="Benefício previdenciário pretendido."),
+    profissao: str = Form(..., description="Profissão do requerente."),
+    modelo_nome: str = Form(..., description="Nome do modelo de IA a ser usado ou '<Modelo Padrão>."),
+    modo_contexto: ModoContexto = Form(ModoContexto.RECUPERACAO, description=MODO_CONTEXTO_DESCRICAO),
+    top_k: Optional[int] = Form(None, ge=1, le=200, description="Máximo de trechos recuperados (modo recuperação)."),
+    ignorar_cache: bool = Form(False, description=IGNORAR_CACHE_DESCRICAO),
+):
+    """
+    Mesma geração de /gerar, enviada como Server-Sent Events à medida que avança:
+
+    - `progresso`: etapas de extração e de montagem do contexto ({"etapa": ...});
+    - `token`: texto gerado pelo modelo, assim que chega ({"texto": ...});
+    - `resposta`: a RespostaQuesitos completa, ao final;
+    - `erro`: {"status": ..., "detail": ...} se a geração falhar depois de iniciado o stream.
+
+    Erros de validação, de modelo indisponível, de template ausente ou de campos
+    que excedem o limite de tokens são
+    respondidos antes do stream, com o status HTTP correspondente.
+    """
+    if not files:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum arquivo PDF enviado.")
+
+    logger.info(f"Received streaming request. Beneficio: {beneficio}, Profissao: {profissao}, Model: {modelo_nome}, Files: {[f.filename for f in files]}")
+    llm_to_use, selected_model_display_name = _selecionar_llm(modelo_nome)
+    orcamento_conteudo(prompt_template_string, beneficio, profissao)
+    files = _assumir_uploads(files)
+
+    async def eventos():
+        try:
+            caso = None
+            async for evento, dados in _extrair_caso(files, beneficio, profissao, modo_contexto, top_k, selected_model_display_name, ignorar_cache):
+                if evento == "resposta_em_cache":
+                    # The whole text as a single token, for clients that assemble the tokens
+                    yield _evento_sse("token", {"texto": dados.quesitos_texto})
+                    yield _evento_sse("resposta", dados.model_dump(mode="json"))
+                    return
+                if evento == "caso":
+                    caso = dados
+                else:
+                    yield _evento_sse(evento, dados)
+
+            montado = None
+            async for evento, dados in _montar_prompt(caso, beneficio, profissao, modo_contexto, top_k, llm_to_use, selected_model_display_name):
+                if evento == "prompt":
+                    montado = dados
+                else:
+                    yield _evento_sse(evento, dados)
+
+            yield _evento_sse("progresso", {"etapa": "geracao", "modelo": selected_model_display_name})
+            logger.info(f"Streaming request to Gemini model '{selected_model_display_name}' via Langchain...")
+            partes: List[str] = []
+            async for texto in _transmitir_llm(llm_to_use, montado, selected_model_display_name):
+                partes.append(texto)
+                yield _evento_sse("token", {"texto": texto})
+            texto_resposta = "".join(partes)
+            logger.info(f"Streamed AI response snippet: '{texto_resposta[:100]}...'")
+            resposta = _montar_resposta(texto_resposta, modo_contexto, montado)
+            await guardar_resultado(montado.chave_cache, selected_model_display_name, resposta)
+            yield _evento_sse("resposta", resposta.model_dump(mode="json"))
+        except HTTPException as e:
+            yield _evento_sse("erro", {"status": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.error(f"Unhandled error during streamed quesitos generation: {e}", exc_info=True)
+            yield _evento_sse("erro", {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "detail": f"Erro inesperado ao gerar quesitos: {str(e)}"})
+        finally:
+            for file in files:
+                await file.close()
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        # Proxies must pass every event through as soon as it is written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/gerar/lote",
+    summary="Gera quesitos para vários casos em uma requisição, com os resultados em streaming (Server-Sent Events).",
+    tags=["Gerador Quesitos"],
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Eventos 'documentos', 'resultado', 'erro' e 'fim'."}},
+)
+async def gerar_quesitos_lote(
+    casos: str = Form(..., description="Lista JSON de casos: [{id, file_hashes, beneficio, profissao, modo_contexto?, top_k?}]."),
+    modelo_nome: str = Form(..., description="Nome do modelo de IA a ser usado ou '<Modelo Padrão>."),
+    files: List[UploadFile] = File([], description="PDFs ainda não enviados, referenciados nos casos pelo SHA-256."),
+    ignorar_cache: bool = Form(False, description=IGNORAR_CACHE_DESCRICAO),
+    concorrencia: Optional[int] = Form(None, ge=1, le=32, description="Casos gerados simultaneamente (padrão: GERADOR_QUESITOS_BATCH_CONCURRENCY)."),
+):
+    """
+    Gera os quesitos de vários casos, cada um com seus documentos (SHA-256 dos PDFs),
+    benefício e profissão. Documentos compartilhados entre casos são extraídos ou
+    lidos do cache de extrações uma única vez, o cliente do modelo é o mesmo para
+    todo o lote, e até `concorrencia` casos são gerados ao mesmo tempo.
+
+    Os resultados são enviados como Server-Sent Events, na ordem em que ficam prontos:
+
+    - `documentos`: documentos distintos carregados ({"documentos", "enviados", "armazenados", "referencias"});
+    - `resultado`: {"id": ..., "resposta": RespostaQuesitos} de um caso concluído;
+    - `erro`: {"id": ..., "status": ..., "detail": ...} de um caso que falhou (sem "id" se o lote inteiro falhou);
+    - `fim`: {"casos", "concluidos", "falhas", "em_cache", "segundos"}.
+
+    Cada caso segue as mesmas regras de /gerar (cache de resultados, limite de tokens).
+    """
+    lista = _ler_casos_lote(casos)
+    logger.info(f"Received batch request. Cases: {len(lista)}, Model: {modelo_nome}, Files: {[f.filename for f in files or []]}")
+    llm_to_use, selected_model_display_name = _selecionar_llm(modelo_nome)
+    files = _assumir_uploads(files or [])
+
+    async def gerar_caso(caso_lote: CasoLote, documentos: DocumentosLote, chunking: ModuleChunkingConfig, limite: asyncio.Semaphore):
+        async with limite:
+            try:
+                return caso_lote, await _gerar_caso_lote(caso_lote, documentos, chunking, llm_to_use, selected_model_display_name, ignorar_cache), None
+            except HTTPException as e:
+                return caso_lote, None, e
+            except Exception as e:
+                logger.error(f"Unhandled error generating quesitos for batch case '{caso_lote.id}': {e}", exc_info=True)
+                return caso_lote, None, HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Erro inesperado ao gerar quesitos: {str(e)}")
+
+    async def eventos():
+        inicio = time.perf_counter()
+        tarefas: List[asyncio.Task] = []
+        try:
+            chunking = get_module_chunking("gerador_quesitos")
+            documentos = await carregar_documentos(lista, files, chunking)
+            yield _evento_sse("documentos", {
+                "documentos": len(documentos.secoes), "enviados": documentos.enviados,
+                "armazenados": documentos.armazenados, "referencias": documentos.referencias,
+            })
+
+            limite = asyncio.Semaphore(concorrencia or settings.GERADOR_QUESITOS_BATCH_CONCURRENCY)
+            tarefas = [asyncio.ensure_future(gerar_caso(caso_lote, documentos, chunking, limite)) for caso_lote in lista]
+            concluidos = em_cache = 0
+            for proxima in asyncio.as_completed(tarefas):
+                caso_lote, resposta, erro = await proxima
+                if erro is not None:
+                    yield _evento_sse("erro", {"id": caso_lote.id, "status": erro.status_code, "detail": erro.detail})
+                    continue
+                concluidos += 1
+                em_cache += resposta.em_cache
+                yield _evento_sse("resultado", {"id": caso_lote.id, "resposta": resposta.model_dump(mode="json")})
+
+            segundos = time.perf_counter() - inicio
+            logger.info(f"Batch of {len(lista)} cases finished in {segundos:.1f}s: {concluidos} generated, {em_cache} from cache.")
+            yield _evento_sse("fim", {
+                "casos": len(lista), "concluidos": concluidos, "falhas": len(lista) - concluidos,
+                "em_cache": em_cache, "segundos": round(segundos, 3),
+            })
+        except HTTPException as e:
+            yield _evento_sse("erro", {"status": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.error(f"Unhandled error during batch quesitos generation: {e}", exc_info=True)
+            yield _evento_sse("erro", {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "detail": f"Erro inesperado ao gerar quesitos: {str(e)}"})
+        finally:
+            # Client gone: cases not yet started are dropped (generations already shared with other requests go on)
+            for tarefa in tarefas:
+                tarefa.cancel()
+            for file in files:
+                await file.close()
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
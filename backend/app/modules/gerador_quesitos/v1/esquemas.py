@@ -1,8 +1,67 @@
 # backend/app/modules/gerador_quesitos/v1/esquemas.py
-from pydantic import BaseModel, Field
+from enum import Enum
+import re
+from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+
+_SHA256_RE = re.compile("[0-9a-f]{64}")
+
+class ModoContexto(str, Enum):
+    """Como o conteúdo dos PDFs é levado ao prompt."""
+    RECUPERACAO = "recuperacao" # Apenas os trechos mais relevantes, dentro de um orçamento de tokens
+    DOCUMENTO_COMPLETO = "documento_completo" # Texto integral (opt-in explícito)
+    MAPA_REDUCAO = "mapa_reducao" # Resumo de evidências de todos os chunks (processos maiores que o contexto do modelo)
+
+class TrechoUtilizado(BaseModel):
+    """Chunk de documento incluído no prompt."""
+    arquivo: str = Field(..., description="Nome do arquivo de origem.")
+    file_hash: str = Field(..., description="SHA-256 do arquivo de origem.")
+    chunk_index: int = Field(..., description="Posição do chunk no documento.")
+    pagina: Optional[int] = Field(default=None, description="Página onde o chunk começa, quando conhecida.")
+    score: float = Field(..., description="Similaridade com a consulta (1 = idêntico).")
+    tokens: int = Field(..., description="Tokens estimados do chunk.")
+
+class EstatisticasMapaReducao(BaseModel):
+    """Custo do resumo de evidências no modo mapa-redução."""
+    chunks: int = Field(..., description="Chunks resumidos na etapa de mapa.")
+    niveis: int = Field(..., description="Níveis de resumo, incluindo o mapa.")
+    chamadas_llm: int = Field(..., description="Resumos gerados pelo modelo nesta requisição.")
+    respostas_em_cache: int = Field(..., description="Resumos reaproveitados do cache.")
+
+class EstatisticasTokens(BaseModel):
+    """Tokens estimados (tokenizador local) do prompt, antes e depois da compactação do conteúdo."""
+    template: int = Field(..., description="Tokens fixos do template, sem os campos.")
+    limite_conteudo: int = Field(..., description="Tokens disponíveis para o conteúdo dos documentos.")
+    conteudo_antes: int = Field(..., description="Tokens do conteúdo antes da compactação.")
+    conteudo_depois: int = Field(..., description="Tokens do conteúdo enviado ao modelo.")
+    prompt_antes: int = Field(..., description="Tokens do prompt completo sem compactação.")
+    prompt_depois: int = Field(..., description="Tokens do prompt enviado ao modelo.")
+    blocos_removidos: int = Field(default=0, description="Seções ou trechos descartados por falta de espaço.")
+    truncado: bool = Field(default=False, description="True se algum bloco foi cortado para caber no limite.")
+    prefixo_em_cache: int = Field(default=0, description="Tokens do prefixo fixo do prompt lidos do cache de contexto do provedor.")
 
 class RespostaQuesitos(BaseModel):
     """Schema para a resposta contendo os quesitos gerados."""
     quesitos_texto: str = Field(..., description="O texto formatado contendo os quesitos gerados pela IA.")
+    modo_contexto: Optional[ModoContexto] = Field(default=None, description="Modo usado para montar o contexto do prompt.")
+    trechos_utilizados: List[TrechoUtilizado] = Field(default_factory=list, description="Chunks enviados ao modelo (modo recuperação).")
+    em_cache: bool = Field(default=False, description="True se o resultado veio do cache de quesitos gerados.")
+    mapa_reducao: Optional[EstatisticasMapaReducao] = Field(default=None, description="Custo do resumo de evidências (modo mapa-redução).")
+    tokens: Optional[EstatisticasTokens] = Field(default=None, description="Tokens do prompt antes e depois da compactação.")
+
+class CasoLote(BaseModel):
+    """Caso de uma geração em lote; os documentos são referenciados pelo SHA-256."""
+    id: str = Field(..., min_length=1, max_length=100, description="Identificador do caso no lote (devolvido com o resultado).")
+    file_hashes: List[str] = Field(..., min_length=1, description="SHA-256 dos PDFs do caso, enviados no lote ou em requisições anteriores.")
+    beneficio: str = Field(..., min_length=1, description="Benefício previdenciário pretendido.")
+    profissao: str = Field(..., min_length=1, description="Profissão do requerente.")
+    modo_contexto: ModoContexto = Field(default=ModoContexto.RECUPERACAO, description="Modo usado para montar o contexto do prompt.")
+    top_k: Optional[int] = Field(default=None, ge=1, le=200, description="Máximo de trechos recuperados (modo recuperação).")
 
-# Add other relevant schemas for this module later if needed
\ No newline at end of file
+    @field_validator("file_hashes")
+    @classmethod
+    def _hashes_validos(cls, file_hashes: List[str]) -> List[str]:
+        for file_hash in file_hashes:
+            if not _SHA256_RE.fullmatch(file_hash):
+                raise ValueError(f"SHA-256 inválido: '{file_hash}'")
+        return file_hashes
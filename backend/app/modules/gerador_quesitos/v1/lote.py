@@ -0,0 +1,69 @@
+# backend/app/modules/gerador_quesitos/v1/lote.py
+"""
+Documentos de uma geração em lote.
+
+Os casos de um lote referenciam os PDFs pelo SHA-256, e o mesmo processo
+costuma aparecer em vários casos. Cada documento é carregado uma única vez para
+o lote inteiro: os PDFs enviados junto com o lote são extraídos (e divididos em
+chunks) uma vez cada, descartadas as cópias repetidas, e os demais são lidos do
+cache de extrações (app.utils.extraction_cache), em paralelo.
+"""
+import asyncio
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from fastapi import UploadFile
+
+from app.core.config import logger
+from app.schemas.module_config import ModuleChunkingConfig
+from app.utils.extraction_cache import lookup_extraction
+from app.utils.pdf_processor import EXTRACTOR_VERSION, ExtractedSection, iter_extracted_sections
+from .esquemas import CasoLote
+
+
+class DocumentosLote(NamedTuple):
+    """Seções de cada documento do lote, por SHA-256, e de onde vieram."""
+    secoes: Dict[str, List[ExtractedSection]]
+    enviados: int
+    armazenados: int
+    referencias: int
+
+    def ausentes(self, caso: CasoLote) -> List[str]:
+        return [file_hash for file_hash in caso.file_hashes if file_hash not in self.secoes]
+
+    def secoes_do_caso(self, caso: CasoLote) -> List[ExtractedSection]:
+        return [secao for file_hash in dict.fromkeys(caso.file_hashes) for secao in self.secoes[file_hash]]
+
+
+async def carregar_documentos(
+    casos: Sequence[CasoLote],
+    files: Optional[List[UploadFile]],
+    chunking: ModuleChunkingConfig,
+) -> DocumentosLote:
+    """Extrai os PDFs enviados e lê do cache de extrações os demais documentos referenciados."""
+    secoes: Dict[str, List[ExtractedSection]] = {}
+    if files:
+        # Cópias do mesmo PDF (mesmo SHA-256, calculado ao gravar o upload em disco) entram uma vez
+        async for secao in iter_extracted_sections(files, chunking=chunking, distinct=True):
+            secoes.setdefault(secao.file_hash, []).append(secao)
+    enviados = len(secoes)
+
+    referenciados = dict.fromkeys(file_hash for caso in casos for file_hash in caso.file_hashes)
+    faltantes = [file_hash for file_hash in referenciados if file_hash not in secoes]
+    armazenados = await asyncio.gather(*(lookup_extraction(file_hash, EXTRACTOR_VERSION) for file_hash in faltantes))
+    for file_hash, paginas in zip(faltantes, armazenados):
+        if paginas is not None:
+            secoes[file_hash] = [
+                ExtractedSection(f"documento-{file_hash[:12]}.pdf", page_no, texto, file_hash) for page_no, texto in paginas
+            ]
+
+    documentos = DocumentosLote(
+        secoes=secoes,
+        enviados=enviados,
+        armazenados=len(secoes) - enviados,
+        referencias=sum(len(caso.file_hashes) for caso in casos),
+    )
+    logger.info(
+        f"Batch documents: {len(referenciados)} distinct of {documentos.referencias} references, "
+        f"{documentos.enviados} uploaded, {documentos.armazenados} from the extraction cache."
+    )
+    return documentos
@@ -0,0 +1,146 @@
+# backend/app/modules/gerador_quesitos/v1/mapa_reducao.py
+"""
+Modo mapa-redução do gerador de quesitos, para processos maiores que a janela
+de contexto do modelo.
+
+Os documentos são divididos em chunks de GERADOR_QUESITOS_MAP_CHUNK_TOKENS
+tokens e cada chunk é resumido em uma chamada ao LLM (mapa), com no máximo
+GERADOR_QUESITOS_MAP_CONCURRENCY chamadas simultâneas. Os resumos são então
+consolidados em grupos de GERADOR_QUESITOS_REDUCE_FAN_IN, nível a nível, até
+restar um único resumo de evidências, que entra no prompt final.
+
+Cada resumo intermediário é guardado no cache de respostas (app.utils.llm_cache)
+sob o hash do modelo, do nível e do prompt (que inclui o texto do chunk ou dos
+resumos consolidados): repetir um caso só paga pelos chunks que mudaram e pelos
+níveis acima deles.
+"""
+import asyncio
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings, logger
+from app.core.llm_limiter import limited_ainvoke
+from app.schemas.module_config import ModuleChunkingConfig
+from app.utils.chunking import chunk_document
+from app.utils.llm_cache import llm_cache_key, lookup_llm_responses, store_llm_responses
+from app.utils.pdf_processor import ExtractedSection
+from .contexto import agrupar_por_arquivo
+
+CACHE_NAMESPACE = "gerador_quesitos.mapa_reducao"
+PROMPTS_DIR = Path(__file__).parent / "prompts"
+
+
+class ResultadoMapaReducao(NamedTuple):
+    """Resumo final de evidências e o custo para produzi-lo."""
+    resumo: str
+    chunks: int
+    niveis: int
+    chamadas_llm: int
+    respostas_em_cache: int
+
+
+@lru_cache(maxsize=None)
+def _carregar_prompt(nome: str) -> str:
+    return (PROMPTS_DIR / nome).read_text(encoding="utf-8")
+
+
+def versao_prompts() -> str:
+    """Hash dos prompts de resumo e de consolidação (muda quando um deles é editado)."""
+    return llm_cache_key(_carregar_prompt("resumir_trecho_prompt.txt"), _carregar_prompt("consolidar_resumos_prompt.txt"))
+
+
+class _Resumidor:
+    """Executa os níveis do mapa-redução com um LLM, um limite de concorrência e o cache."""
+
+    def __init__(self, llm: BaseChatModel, modelo: str, concorrencia: int):
+        self.llm = llm
+        self.modelo = modelo
+        self.semaforo = asyncio.Semaphore(concorrencia)
+        self.chamadas_llm = 0
+        self.respostas_em_cache = 0
+
+    async def _chamar_llm(self, prompt: str) -> str:
+        async with self.semaforo:
+            self.chamadas_llm += 1
+            resposta = await limited_ainvoke(self.llm, self.modelo, [HumanMessage(content=prompt)])
+        return resposta.content
+
+    async def resumir_nivel(self, nivel: int, prompts: List[str]) -> List[str]:
+        """Resume cada prompt do nível, em paralelo, reaproveitando as respostas em cache."""
+        chaves = [llm_cache_key(self.modelo, f"nivel-{nivel}", prompt) for prompt in prompts]
+        respostas = await lookup_llm_responses(CACHE_NAMESPACE, chaves)
+        self.respostas_em_cache += sum(1 for chave in chaves if chave in respostas)
+
+        # Prompts repetidos no mesmo nível são resumidos uma única vez
+        pendentes: Dict[str, str] = {}
+        for chave, prompt in zip(chaves, prompts):
+            if chave not in respostas:
+                pendentes.setdefault(chave, prompt)
+        resultados = await asyncio.gather(*(self._chamar_llm(prompt) for prompt in pendentes.values()), return_exceptions=True)
+
+        # Os resumos concluídos são guardados mesmo que outros tenham falhado
+        novos = {chave: resultado for chave, resultado in zip(pendentes, resultados) if not isinstance(resultado, BaseException)}
+        await store_llm_responses(CACHE_NAMESPACE, self.modelo, novos)
+        falhas = [resultado for resultado in resultados if isinstance(resultado, BaseException)]
+        if falhas:
+            raise falhas[0]
+        respostas.update(novos)
+        logger.info(f"Map-reduce level {nivel}: {len(prompts)} summaries, {len(novos)} LLM calls.")
+        return [respostas[chave] for chave in chaves]
+
+
+async def resumir_mapa_reducao(
+    secoes: List[ExtractedSection],
+    beneficio: str,
+    profissao: str,
+    llm: BaseChatModel,
+    modelo: str,
+    tokens_por_chunk: Optional[int] = None,
+    concorrencia: Optional[int] = None,
+    fan_in: Optional[int] = None,
+) -> ResultadoMapaReducao:
+    """
+    Resume os documentos em um único texto de evidências: resume os chunks em
+    paralelo e consolida os resumos hierarquicamente, `fan_in` por vez.
+    """
+    config = ModuleChunkingConfig(max_tokens=tokens_por_chunk or settings.GERADOR_QUESITOS_MAP_CHUNK_TOKENS, overlap_tokens=0)
+    fan_in = max(2, fan_in or settings.GERADOR_QUESITOS_REDUCE_FAN_IN)
+    resumidor = _Resumidor(llm, modelo, concorrencia or settings.GERADOR_QUESITOS_MAP_CONCURRENCY)
+
+    trechos: List[str] = []
+    for secoes_arquivo in agrupar_por_arquivo(secoes).values():
+        arquivo = secoes_arquivo[0].filename
+        chunks = await run_in_threadpool(chunk_document, [(s.page_no, s.text) for s in secoes_arquivo], config)
+        trechos.extend(
+            f"[{arquivo}, página {chunk.page_number if chunk.page_number is not None else '?'}]\n{chunk.text}"
+            for chunk in chunks
+        )
+    if not trechos:
+        return ResultadoMapaReducao("", 0, 0, 0, 0)
+
+    # Mapa: um resumo por chunk
+    prompt_mapa = _carregar_prompt("resumir_trecho_prompt.txt")
+    resumos = await resumidor.resumir_nivel(
+        0, [prompt_mapa.format(beneficio=beneficio, profissao=profissao, trecho=trecho) for trecho in trechos]
+    )
+
+    # Redução: consolida grupos de resumos consecutivos até restar um
+    prompt_reducao = _carregar_prompt("consolidar_resumos_prompt.txt")
+    nivel = 0
+    while len(resumos) > 1:
+        nivel += 1
+        grupos = [resumos[inicio:inicio + fan_in] for inicio in range(0, len(resumos), fan_in)]
+        resumos = await resumidor.resumir_nivel(
+            nivel, [prompt_reducao.format(beneficio=beneficio, profissao=profissao, resumos="\n\n---\n\n".join(grupo)) for grupo in grupos]
+        )
+
+    logger.info(
+        f"Map-reduce summary of {len(trechos)} chunks in {nivel + 1} levels: "
+        f"{resumidor.chamadas_llm} LLM calls, {resumidor.respostas_em_cache} cached."
+    )
+    return ResultadoMapaReducao(resumos[0], len(trechos), nivel + 1, resumidor.chamadas_llm, resumidor.respostas_em_cache)
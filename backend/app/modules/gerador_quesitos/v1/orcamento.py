@@ -0,0 +1,218 @@
+# backend/app/modules/gerador_quesitos/v1/orcamento.py
+"""
+Orçamento de tokens do prompt do gerador de quesitos.
+
+O custo do template (as ~31 KB de instruções fixas) é contado uma vez, com o
+tokenizador local (app.utils.tokenizer), e guardado junto com quantas vezes
+cada campo ({beneficio}, {profissao}, {pdf_content}) aparece nele. Por
+requisição, o que sobra do limite do modelo (GERADOR_QUESITOS_MAX_INPUT_TOKENS,
+menos a reserva para a resposta) é o orçamento do conteúdo dos documentos.
+Conteúdo que cabe é usado como está; o que não cabe é compactado, etapa por
+etapa, parando assim que couber:
+
+1. espaços e linhas em branco repetidos são removidos;
+2. linhas de boilerplate são descartadas: rodapés de paginação ("Página 3 de 10",
+   ou só o número na última linha do bloco) e cabeçalhos/rodapés sem dados (sem
+   dígitos) que se repetem na primeira ou última linha de vários blocos. Linhas
+   do corpo do texto nunca são descartadas, mesmo repetidas;
+3. se ainda não couber, os blocos de menor prioridade (p. ex. trechos menos
+   relevantes) são descartados, e o último bloco que couber em parte é truncado.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, List, NamedTuple, Sequence
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings, logger
+from app.utils.tokenizer import count_tokens, token_spans
+
+# Blocos de prompt e separador usado entre eles (blocos_documento_completo e blocos_trechos, em contexto.py)
+SEPARADOR_BLOCOS = "\n\n"
+MARCA_TRUNCADO = " [...]"
+
+# Linhas curtas repetidas nas bordas de ao menos este número de blocos são tratadas como cabeçalho/rodapé
+MIN_REPETICOES_CABECALHO = 3
+MAX_CARACTERES_CABECALHO = 120
+# Abaixo disto, não vale a pena incluir um bloco truncado
+MIN_TOKENS_BLOCO_TRUNCADO = 32
+
+# "Página 3", "Pág. 3 de 10": rodapé de paginação em qualquer posição
+_PAGINACAO_RE = re.compile(r"^\s*[-–—]?\s*p[áa]g(?:ina)?\.?\s*\d{1,4}\s*(?:(?:de|/|of)\s*\d{1,4})?\s*[-–—]?\s*$", re.IGNORECASE)
+# "3", "- 3 -", "3/10", "3 de 10": só é paginação na última linha do bloco
+_NUMERO_PAGINA_RE = re.compile(r"^\s*[-–—]?\s*\d{1,4}\s*(?:(?:de|/|of)\s*\d{1,4})?\s*[-–—]?\s*$", re.IGNORECASE)
+_ESPACOS_RE = re.compile(r"[ \t\u00a0]+")
+_LINHAS_EM_BRANCO_RE = re.compile(r"\n{3,}")
+# Cabeçalhos que o próprio módulo insere (arquivo/trecho) nunca são descartados
+_CABECALHO_PROPRIO_RE = re.compile(r"^--- (?:TRECHO \d+|CONTEÚDO DO ARQUIVO)")
+
+
+class BlocoPrompt(NamedTuple):
+    """Parte do conteúdo dinâmico; blocos de maior prioridade são mantidos primeiro."""
+    texto: str
+    prioridade: float = 0.0
+
+
+class CustoTemplate(NamedTuple):
+    """Tokens do template sem os campos e quantas vezes cada campo aparece."""
+    tokens_fixos: int
+    ocorrencias: Dict[str, int]
+
+
+class ResultadoCompactacao(NamedTuple):
+    texto: str
+    tokens_antes: int
+    tokens_depois: int
+    blocos_removidos: int
+    truncado: bool
+
+
+@lru_cache(maxsize=8)
+def custo_template(template: str) -> CustoTemplate:
+    """Conta os tokens do template uma única vez (por conteúdo do template)."""
+    literais: List[str] = []
+    ocorrencias: Counter = Counter()
+    for literal, campo, _, _ in Formatter().parse(template):
+        literais.append(literal)
+        if campo is not None:
+            ocorrencias[campo] += 1
+    custo = CustoTemplate(count_tokens("".join(literais)), dict(ocorrencias))
+    logger.info(f"Prompt template: {custo.tokens_fixos} static tokens, fields {custo.ocorrencias}.")
+    return custo
+
+
+def estimar_tokens_prompt(template: str, **valores: str) -> int:
+    """Tokens estimados do template preenchido com `valores` (campos ausentes contam zero)."""
+    custo = custo_template(template)
+    return custo.tokens_fixos + sum(count_tokens(valores.get(campo, "")) * vezes for campo, vezes in custo.ocorrencias.items())
+
+
+def orcamento_conteudo(template: str, beneficio: str, profissao: str) -> int:
+    """
+    Tokens disponíveis para {pdf_content}, por ocorrência do campo. Levanta
+    HTTPException (413) se o template e os campos do formulário já excedem o limite,
+    antes de qualquer extração.
+    """
+    fixos = estimar_tokens_prompt(template, beneficio=beneficio, profissao=profissao)
+    disponivel = settings.GERADOR_QUESITOS_MAX_INPUT_TOKENS - settings.GERADOR_QUESITOS_OUTPUT_RESERVE_TOKENS - fixos
+    if disponivel <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Os campos informados excedem o limite de tokens do modelo.",
+        )
+    return disponivel // max(1, custo_template(template).ocorrencias.get("pdf_content", 1))
+
+
+def _normalizar_espacos(texto: str) -> str:
+    linhas = [_ESPACOS_RE.sub(" ", linha).strip() for linha in texto.splitlines()]
+    return _LINHAS_EM_BRANCO_RE.sub("\n\n", "\n".join(linhas)).strip()
+
+
+def _bordas(linhas: List[str]) -> List[int]:
+    """Índices da primeira e da última linha de texto (onde ficam cabeçalhos e rodapés), após os cabeçalhos do módulo."""
+    preenchidas = [indice for indice, linha in enumerate(linhas) if linha and not _CABECALHO_PROPRIO_RE.match(linha)]
+    return sorted({preenchidas[0], preenchidas[-1]}) if preenchidas else []
+
+
+def _pode_ser_cabecalho(linha: str) -> bool:
+    # Linhas com dígitos trazem dados (CID, datas, exames) e nunca são descartadas por repetição
+    return (
+        len(linha) <= MAX_CARACTERES_CABECALHO
+        and not any(caractere.isdigit() for caractere in linha)
+        and not _CABECALHO_PROPRIO_RE.match(linha)
+    )
+
+
+def _linhas_repetidas(blocos: Sequence[str]) -> set:
+    """Linhas sem dados que se repetem na borda de vários blocos (cabeçalhos e rodapés de página)."""
+    contagem: Counter = Counter()
+    for texto in blocos:
+        linhas = texto.splitlines()
+        contagem.update({linhas[indice] for indice in _bordas(linhas) if _pode_ser_cabecalho(linhas[indice])})
+    return {linha for linha, vezes in contagem.items() if vezes >= MIN_REPETICOES_CABECALHO}
+
+
+def _e_paginacao(linhas: List[str], indice: int, ultima: int) -> bool:
+    linha = linhas[indice]
+    if _CABECALHO_PROPRIO_RE.match(linha):
+        return False
+    if _PAGINACAO_RE.match(linha):
+        return True
+    if indice != ultima or not _NUMERO_PAGINA_RE.match(linha):
+        return False
+    # "Ano do diagnóstico:\n2019": o número é o valor do rótulo anterior, não a página
+    anteriores = [anterior for anterior in linhas[:indice] if anterior]
+    return not (anteriores and anteriores[-1].endswith(":"))
+
+
+def _remover_boilerplate(texto: str, repetidas: set, vistas: set) -> str:
+    """Remove rodapés de paginação e repetições de cabeçalhos/rodapés nas bordas (a primeira ocorrência é mantida)."""
+    linhas = texto.splitlines()
+    bordas = _bordas(linhas)
+    ultima = bordas[-1] if bordas else -1
+    mantidas = []
+    for indice, linha in enumerate(linhas):
+        if _e_paginacao(linhas, indice, ultima):
+            continue
+        if indice in bordas and linha in repetidas:
+            if linha in vistas:
+                continue
+            vistas.add(linha)
+        mantidas.append(linha)
+    return _LINHAS_EM_BRANCO_RE.sub("\n\n", "\n".join(mantidas)).strip()
+
+
+def _truncar(texto: str, limite_tokens: int) -> str:
+    spans = token_spans(texto)
+    if len(spans) <= limite_tokens:
+        return texto
+    return texto[:spans[max(0, limite_tokens - 1)][1]] + MARCA_TRUNCADO
+
+
+def compactar_conteudo(blocos: Sequence[BlocoPrompt], limite_tokens: int) -> ResultadoCompactacao:
+    """Compacta os blocos (na ordem dada) para caber em `limite_tokens`, conforme a docstring do módulo."""
+    original = SEPARADOR_BLOCOS.join(bloco.texto for bloco in blocos)
+    tokens_antes = count_tokens(original)
+    if tokens_antes <= limite_tokens:
+        return ResultadoCompactacao(original, tokens_antes, tokens_antes, 0, False)
+
+    textos = [_normalizar_espacos(bloco.texto) for bloco in blocos]
+    custos = [count_tokens(texto) for texto in textos]
+    if sum(custos) > limite_tokens:
+        repetidas = _linhas_repetidas(textos)
+        vistas: set = set()
+        textos = [_remover_boilerplate(texto, repetidas, vistas) for texto in textos]
+        custos = [count_tokens(texto) for texto in textos]
+
+    # Separadores não geram tokens (só espaço em branco), então o custo é a soma dos blocos
+    incluidos: Dict[int, str] = {}
+    if sum(custos) <= limite_tokens:
+        incluidos = {indice: texto for indice, texto in enumerate(textos) if texto}
+    else:
+        restante = limite_tokens
+        for indice in sorted(range(len(textos)), key=lambda i: -blocos[i].prioridade):
+            if not textos[indice]:
+                continue
+            if custos[indice] <= restante:
+                incluidos[indice] = textos[indice]
+                restante -= custos[indice]
+            elif restante >= MIN_TOKENS_BLOCO_TRUNCADO:
+                incluidos[indice] = _truncar(textos[indice], restante - count_tokens(MARCA_TRUNCADO))
+                restante = 0
+
+    texto = SEPARADOR_BLOCOS.join(incluidos[indice] for indice in sorted(incluidos))
+    resultado = ResultadoCompactacao(
+        texto=texto,
+        tokens_antes=tokens_antes,
+        tokens_depois=count_tokens(texto),
+        blocos_removidos=sum(1 for indice, t in enumerate(textos) if t and indice not in incluidos),
+        truncado=any(incluidos[indice] != textos[indice] for indice in incluidos),
+    )
+    if resultado.tokens_depois < resultado.tokens_antes:
+        logger.info(
+            f"Compacted prompt content from {resultado.tokens_antes} to {resultado.tokens_depois} tokens "
+            f"(limit {limite_tokens}, {resultado.blocos_removidos} blocks dropped, truncated: {resultado.truncado})."
+        )
+    return resultado
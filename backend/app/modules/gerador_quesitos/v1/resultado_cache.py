@@ -0,0 +1,90 @@
+# backend/app/modules/gerador_quesitos/v1/resultado_cache.py
+"""
+Cache persistente dos quesitos gerados (app.utils.llm_cache, namespace próprio).
+
+A chave reúne tudo o que determina o resultado: os hashes dos arquivos
+(ordenados), benefício e profissão normalizados, o modelo, o modo de contexto
+com seus parâmetros, o limite de tokens do prompt (que define quanto do
+conteúdo é compactado) e o hash do template do prompt. Editar
+gerar_quesitos_prompt.txt (ou os prompts do mapa-redução) muda a chave, e as
+entradas antigas simplesmente deixam de ser encontradas. As entradas expiram
+após GERADOR_QUESITOS_RESULT_CACHE_TTL_SECONDS; com 0, o cache fica desligado.
+"""
+import re
+from typing import Iterable, Optional
+
+from app.core.config import settings, logger
+from app.schemas.module_config import ModuleChunkingConfig
+from app.utils.chunking import chunker_key
+from app.utils.llm_cache import llm_cache_key, lookup_llm_responses, store_llm_responses
+from .esquemas import ModoContexto, RespostaQuesitos
+from .mapa_reducao import versao_prompts
+
+CACHE_NAMESPACE = "gerador_quesitos.resultado"
+
+
+def cache_ativo() -> bool:
+    return settings.GERADOR_QUESITOS_RESULT_CACHE_TTL_SECONDS > 0
+
+
+def normalizar_campo(valor: str) -> str:
+    """Ignora maiúsculas, espaços nas pontas e espaços repetidos."""
+    return re.sub(r"\s+", " ", valor).strip().casefold()
+
+
+def chave_resultado(
+    file_hashes: Iterable[str],
+    beneficio: str,
+    profissao: str,
+    modelo: str,
+    modo_contexto: ModoContexto,
+    top_k: Optional[int],
+    chunking: ModuleChunkingConfig,
+    template_prompt: str,
+) -> str:
+    """Chave do resultado de um caso (ver docstring do módulo)."""
+    if modo_contexto == ModoContexto.RECUPERACAO:
+        parametros = (
+            f"top_k={top_k or settings.GERADOR_QUESITOS_TOP_K};"
+            f"orcamento={settings.GERADOR_QUESITOS_CONTEXT_TOKEN_BUDGET};chunker={chunker_key(chunking)}"
+        )
+    elif modo_contexto == ModoContexto.MAPA_REDUCAO:
+        parametros = (
+            f"chunk={settings.GERADOR_QUESITOS_MAP_CHUNK_TOKENS};"
+            f"fan_in={settings.GERADOR_QUESITOS_REDUCE_FAN_IN};prompts={versao_prompts()}"
+        )
+    else:
+        parametros = ""
+    return llm_cache_key(
+        ",".join(sorted(set(file_hashes))),
+        normalizar_campo(beneficio),
+        normalizar_campo(profissao),
+        modelo,
+        modo_contexto.value,
+        parametros,
+        f"limite={settings.GERADOR_QUESITOS_MAX_INPUT_TOKENS - settings.GERADOR_QUESITOS_OUTPUT_RESERVE_TOKENS}",
+        llm_cache_key(template_prompt),
+    )
+
+
+async def buscar_resultado(chave: str) -> Optional[RespostaQuesitos]:
+    """O resultado guardado sob `chave`, se houver e não tiver expirado."""
+    if not cache_ativo():
+        return None
+    guardado = (await lookup_llm_responses(CACHE_NAMESPACE, [chave])).get(chave)
+    if guardado is None:
+        return None
+    try:
+        return RespostaQuesitos.model_validate_json(guardado)
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable cached quesitos {chave[:12]}...: {e}")
+        return None
+
+
+async def guardar_resultado(chave: str, modelo: str, resposta: RespostaQuesitos) -> None:
+    if not cache_ativo():
+        return
+    await store_llm_responses(
+        CACHE_NAMESPACE, modelo, {chave: resposta.model_dump_json()},
+        ttl_seconds=settings.GERADOR_QUESITOS_RESULT_CACHE_TTL_SECONDS,
+    )
@@ -3,7 +3,15 @@ from fastapi import APIRouter
 # --- IMPORT CORRIGIDO ---
 from app.core.config import settings # Import settings using absolute path from app package
 # --- FIM IMPORT CORRIGIDO ---
-from .schemas import SystemInfoResponse # Import the response schema (relative import is OK here)
+from app.core.llm_clients import get_chat_client_registry
+from app.core.context_cache import get_context_cache
+from app.core.llm_limiter import llm_limiter_stats
+from app.core.password_executor import get_password_executor
+from app.core.principal_cache import get_principal_cache
+from app.core.token_cache import get_token_cache
+from app.utils.extraction_executor import get_extraction_executor
+from app.utils.pdf_processor import get_page_path_stats
+from .schemas import SystemInfoResponse, ExtractionPoolStatusResponse, PasswordHashPoolStatusResponse, PrincipalCacheStatusResponse, TokenCacheStatusResponse, ChatClientRegistryStatusResponse, ContextCacheStatusResponse, LlmLimiterStatusResponse # Import the response schemas (relative import is OK here)
 import datetime
 
 # Define the router for this module (info) and version (v1)
@@ -25,4 +33,71 @@ async def get_system_status():
         project_name=settings.PROJECT_NAME,
         server_time_utc=datetime.datetime.now(datetime.timezone.utc),
         api_prefix=settings.API_PREFIX
-    )
\ No newline at end of file
+    )
+
+@router.get("/extraction-pool", response_model=ExtractionPoolStatusResponse, tags=["Info"])
+async def get_extraction_pool_status():
+    """
+    Returns utilisation statistics of the PDF extraction process pool, and how many
+    pages were read from the text layer vs. sent to OCR.
+    (Will be accessible at /api/info/v1/extraction-pool)
+    """
+    return ExtractionPoolStatusResponse(**get_extraction_executor().stats(), **get_page_path_stats())
+
+@router.get("/password-hashing", response_model=PasswordHashPoolStatusResponse, tags=["Info"])
+async def get_password_hashing_status():
+    """
+    Returns the bcrypt hashing pool statistics: busy threads, queued calls,
+    rejections, and the time spent waiting for a thread and hashing.
+    (Will be accessible at /api/info/v1/password-hashing)
+    """
+    return PasswordHashPoolStatusResponse(**get_password_executor().stats())
+
+@router.get("/principal-cache", response_model=PrincipalCacheStatusResponse, tags=["Info"])
+async def get_principal_cache_status():
+    """
+    Returns the authenticated user cache statistics: cached users, hits (requests
+    served without a users query), misses, evictions and invalidations.
+    (Will be accessible at /api/info/v1/principal-cache)
+    """
+    return PrincipalCacheStatusResponse(**get_principal_cache().stats())
+
+@router.get("/token-cache", response_model=TokenCacheStatusResponse, tags=["Info"])
+async def get_token_cache_status():
+    """
+    Returns the verified access token cache statistics: cached tokens, estimated
+    memory, hits (tokens decoded without signature verification), misses,
+    expirations and evictions.
+    (Will be accessible at /api/info/v1/token-cache)
+    """
+    return TokenCacheStatusResponse(**get_token_cache().stats())
+
+@router.get("/llm-clients", response_model=ChatClientRegistryStatusResponse, tags=["Info"])
+async def get_llm_clients_status():
+    """
+    Returns the chat client registry statistics: cached clients, hits, misses,
+    evictions and the average time spent creating a client on a miss.
+    (Will be accessible at /api/info/v1/llm-clients)
+    """
+    return ChatClientRegistryStatusResponse(**get_chat_client_registry().stats())
+
+@router.get("/context-cache", response_model=ContextCacheStatusResponse, tags=["Info"])
+async def get_context_cache_status():
+    """
+    Returns the provider-side context cache statistics: cached prompt prefixes,
+    hits, misses (prefixes created), TTL refreshes and provider errors.
+    (Will be accessible at /api/info/v1/context-cache)
+    """
+    cache = get_context_cache()
+    if cache is None:
+        return ContextCacheStatusResponse(enabled=False)
+    return ContextCacheStatusResponse(enabled=True, **cache.stats())
+
+@router.get("/llm-limiter", response_model=LlmLimiterStatusResponse, tags=["Info"])
+async def get_llm_limiter_status():
+    """
+    Returns the outbound LLM limiter statistics per model: adaptive concurrency
+    limit, calls in flight, queue depth, waits, 429s and calls that gave up waiting.
+    (Will be accessible at /api/info/v1/llm-limiter)
+    """
+    return LlmLimiterStatusResponse(limiters=llm_limiter_stats())
@@ -1,9 +1,103 @@
 # backend/app/modules/info/v1/schemas.py
 from pydantic import BaseModel
+from typing import List, Optional
 import datetime
 
 class SystemInfoResponse(BaseModel):
     environment: str
     project_name: str
     server_time_utc: datetime.datetime
-    api_prefix: str
\ No newline at end of file
+    api_prefix: str
+
+class ExtractionPoolStatusResponse(BaseModel):
+    max_workers: int
+    busy_workers: int
+    utilization: float
+    queued_jobs: int
+    max_queue: int
+    submitted: int
+    completed: int
+    failed: int
+    timed_out: int
+    rejected: int
+    workers_killed: int
+    avg_wait_seconds: float
+    avg_run_seconds: float
+    text_layer_pages: int
+    ocr_pages: int
+
+class PasswordHashPoolStatusResponse(BaseModel):
+    max_workers: int
+    busy_workers: int
+    queued_calls: int
+    max_queue: int
+    submitted: int
+    completed: int
+    failed: int
+    rejected: int
+    avg_wait_seconds: float
+    max_wait_seconds: float
+    avg_hash_seconds: float
+    max_hash_seconds: float
+
+class PrincipalCacheStatusResponse(BaseModel):
+    size: int
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    stale_puts: int
+    hit_rate: float
+
+class TokenCacheStatusResponse(BaseModel):
+    size: int
+    max_entries: int
+    bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    expirations: int
+    evictions: int
+    hit_rate: float
+
+class ChatClientRegistryStatusResponse(BaseModel):
+    size: int
+    max_size: int
+    models: List[str]
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+    avg_build_seconds: float
+
+class ContextCacheStatusResponse(BaseModel):
+    enabled: bool
+    provider: Optional[str] = None
+    entries: int = 0
+    hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    errors: int = 0
+    skipped: int = 0
+    hit_rate: float = 0.0
+
+class LlmLimiterStatus(BaseModel):
+    model: str
+    limit: float
+    in_flight: int
+    queue_depth: int
+    max_queue_depth: int
+    admitted: int
+    succeeded: int
+    failed: int
+    throttled: int
+    slow: int
+    timeouts: int
+    avg_wait_seconds: float
+    max_wait_seconds: float
+    avg_latency_seconds: float
+
+class LlmLimiterStatusResponse(BaseModel):
+    limiters: List[LlmLimiterStatus]
@@ -1,7 +1,21 @@
 # backend/app/core/schemas/module_config.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional
 
+class ModuleChunkingConfig(BaseModel):
+    """
+    How extracted text is split into chunks for a module (optional `chunking`
+    key in modules.yaml). Sizes are in tokens (see app.utils.tokenizer).
+    """
+    max_tokens: int = Field(..., gt=0)
+    overlap_tokens: int = Field(default=0, ge=0)
+
+    @model_validator(mode="after")
+    def check_overlap(self):
+        if self.overlap_tokens >= self.max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        return self
+
 class ModuleConfig(BaseModel):
     """
     Represents the configuration for a single module
@@ -15,6 +29,7 @@ class ModuleConfig(BaseModel):
     router_variable_name: str
     prefix: str
     tags: List[str]
+    chunking: Optional[ModuleChunkingConfig] = None
 
 class ModulesFile(BaseModel):
     """
@@ -0,0 +1,155 @@
+# backend/app/utils/chunk_search.py
+"""
+Embedding stage and similarity search over `document_chunks`.
+
+`embed_document_chunks` embeds the stored chunks of a document that have no
+vector yet (for the active embedder), EMBEDDING_BATCH_SIZE texts per embedder
+call, committing after each batch so an interrupted run resumes where it
+stopped. `search_similar_chunks` returns the k chunks closest to a query by
+cosine distance, served by the HNSW index on `document_chunks.embedding`, or by
+an exact scan when the search is restricted to a few files.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import Select, bindparam, func, select, text, update
+
+from app.core.config import settings, logger
+from app.core.database import get_db_contextmanager
+from app.models.document_chunk import DocumentChunk
+from app.utils.embeddings import Embedder, get_embedder
+
+
+@dataclass
+class ChunkFilters:
+    """Restricts a similarity search. Fields left as None do not filter."""
+    file_hashes: Optional[List[str]] = None
+    extractor_version: Optional[str] = None
+    chunker: Optional[str] = None
+
+
+class ChunkMatch(NamedTuple):
+    """A chunk returned by search_similar_chunks; `score` is the cosine similarity (1 = identical)."""
+    file_hash: str
+    chunk_index: int
+    page_number: Optional[int]
+    char_start: int
+    char_end: int
+    text: str
+    score: float
+
+
+async def embed_document_chunks(
+    file_hash: str,
+    extractor_version: str,
+    chunker: str,
+    embedder: Optional[Embedder] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """Embeds the chunks of a document that are not embedded by `embedder` yet. Returns how many were embedded."""
+    embedder = embedder or get_embedder()
+    batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+    embedded = 0
+    async with get_db_contextmanager() as db:
+        result = await db.execute(
+            select(DocumentChunk.id, DocumentChunk.content)
+            .where(
+                DocumentChunk.file_hash == file_hash,
+                DocumentChunk.extractor_version == extractor_version,
+                DocumentChunk.chunker == chunker,
+                (DocumentChunk.embedder.is_(None)) | (DocumentChunk.embedder != embedder.name),
+            )
+            .order_by(DocumentChunk.chunk_index)
+        )
+        pending = result.all()
+        chunks_table = DocumentChunk.__table__
+        update_stmt = (
+            update(chunks_table)
+            .where(chunks_table.c.id == bindparam("chunk_id"))
+            .values(embedding=bindparam("vector"), embedder=embedder.name)
+        )
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            vectors = await embedder.embed_documents([content for _, content in batch])
+            # Core executemany: one UPDATE per chunk of the batch
+            connection = await db.connection()
+            await connection.execute(update_stmt, [{"chunk_id": chunk_id, "vector": vector} for (chunk_id, _), vector in zip(batch, vectors)])
+            await db.commit()
+            embedded += len(batch)
+    if embedded:
+        logger.info(f"Embedded {embedded} chunks of {file_hash[:12]}... with {embedder.name}.")
+    return embedded
+
+
+async def count_embedded_chunks(
+    file_hashes: List[str],
+    extractor_version: str,
+    chunker: str,
+    embedder: Optional[Embedder] = None,
+) -> Dict[str, int]:
+    """Chunks embedded by `embedder` per file_hash; files without any are absent from the result."""
+    embedder = embedder or get_embedder()
+    async with get_db_contextmanager() as db:
+        result = await db.execute(
+            select(DocumentChunk.file_hash, func.count(DocumentChunk.id))
+            .where(
+                DocumentChunk.file_hash.in_(file_hashes),
+                DocumentChunk.extractor_version == extractor_version,
+                DocumentChunk.chunker == chunker,
+                DocumentChunk.embedder == embedder.name,
+            )
+            .group_by(DocumentChunk.file_hash)
+        )
+        return {file_hash: count for file_hash, count in result.all()}
+
+
+def similar_chunks_query(query_vector: List[float], k: int, embedder_name: str, filters: Optional[ChunkFilters] = None) -> Select:
+    """
+    The k-nearest-neighbour query behind search_similar_chunks (cosine distance, ascending).
+
+    Without a file filter the HNSW index serves the ordering. With one, the index
+    scan would filter its ef_search candidates afterwards, mostly chunks of other
+    files, and return fewer than k rows; the chunks of those files (found through
+    the file_hash index) are ranked exactly instead.
+    """
+    distance = DocumentChunk.embedding.cosine_distance(query_vector).label("distance")
+    query = (
+        select(
+            DocumentChunk.file_hash, DocumentChunk.chunk_index, DocumentChunk.page_number,
+            DocumentChunk.char_start, DocumentChunk.char_end, DocumentChunk.content, distance,
+        )
+        .where(DocumentChunk.embedder == embedder_name)
+    )
+    filters = filters or ChunkFilters()
+    if filters.extractor_version is not None:
+        query = query.where(DocumentChunk.extractor_version == filters.extractor_version)
+    if filters.chunker is not None:
+        query = query.where(DocumentChunk.chunker == filters.chunker)
+    if filters.file_hashes is None:
+        return query.order_by(distance).limit(k)
+
+    # MATERIALIZED keeps the planner from pushing the ORDER BY into the HNSW index
+    candidates = query.where(DocumentChunk.file_hash.in_(filters.file_hashes)).cte("candidates").prefix_with("MATERIALIZED")
+    return select(candidates).order_by(candidates.c.distance).limit(k)
+
+
+async def search_similar_chunks(
+    query: str,
+    k: int = 8,
+    filters: Optional[ChunkFilters] = None,
+    embedder: Optional[Embedder] = None,
+) -> List[ChunkMatch]:
+    """Returns the `k` stored chunks most similar to `query`, most similar first."""
+    embedder = embedder or get_embedder()
+    query_vector = await embedder.embed_query(query)
+    async with get_db_contextmanager() as db:
+        if filters is None or filters.file_hashes is None:
+            # The HNSW scan returns at most ef_search candidates
+            ef_search = max(int(settings.EMBEDDING_HNSW_EF_SEARCH), int(k))
+            await db.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+        result = await db.execute(similar_chunks_query(query_vector, k, embedder.name, filters))
+        rows = result.all()
+    return [
+        ChunkMatch(file_hash, chunk_index, page_number, char_start, char_end, content, 1.0 - float(distance))
+        for file_hash, chunk_index, page_number, char_start, char_end, content, distance in rows
+    ]
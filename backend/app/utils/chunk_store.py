@@ -0,0 +1,111 @@
+# backend/app/utils/chunk_store.py
+"""
+Bulk storage of document chunks (table `document_chunks`).
+
+Documents can have thousands of chunks, so rows are never added one ORM object
+at a time: they are streamed with asyncpg's binary COPY
+(`copy_records_to_table`) in batches of CHUNK_INSERT_BATCH_SIZE, falling back to
+multi-row INSERTs when the connection is not asyncpg. All the chunks of a
+document are replaced in one transaction, so readers never see a partial set.
+See app/benchmark_chunk_insert.py for the throughput of each path.
+"""
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import select, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings, logger
+from app.core.database import get_db_contextmanager
+from app.models.document_chunk import DocumentChunk
+from app.utils.chunking import TextChunk
+
+# Column order of the records written by COPY
+CHUNK_COLUMNS = (
+    "file_hash", "extractor_version", "chunker", "chunk_index", "page_number",
+    "char_start", "char_end", "token_count", "content",
+)
+
+ChunkRecord = Tuple
+
+
+def chunk_records(file_hash: str, extractor_version: str, chunker: str, chunks: Sequence[TextChunk]) -> List[ChunkRecord]:
+    """Converts chunks into row tuples in CHUNK_COLUMNS order."""
+    return [
+        (file_hash, extractor_version, chunker, chunk.index, chunk.page_number,
+         chunk.char_start, chunk.char_end, chunk.token_count, chunk.text)
+        for chunk in chunks
+    ]
+
+
+async def _driver_connection(session: AsyncSession):
+    """The DBAPI driver connection (e.g. asyncpg.Connection) behind the session's current transaction."""
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    return raw_connection.driver_connection
+
+
+async def insert_chunk_rows(session: AsyncSession, records: Sequence[ChunkRecord], batch_size: int) -> None:
+    """Writes `records` with one multi-row INSERT per batch, in the session's transaction."""
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        await session.execute(insert(DocumentChunk).values([dict(zip(CHUNK_COLUMNS, record)) for record in batch]))
+
+
+async def copy_chunk_rows(session: AsyncSession, records: Sequence[ChunkRecord], batch_size: int) -> bool:
+    """
+    Writes `records` with COPY, one batch at a time, in the session's transaction.
+    Falls back to multi-row INSERTs (and returns False) when the driver is not asyncpg.
+    """
+    driver_connection = await _driver_connection(session)
+    if not hasattr(driver_connection, "copy_records_to_table"):
+        await insert_chunk_rows(session, records, batch_size)
+        return False
+    for start in range(0, len(records), batch_size):
+        await driver_connection.copy_records_to_table(
+            DocumentChunk.__tablename__,
+            records=records[start:start + batch_size],
+            columns=CHUNK_COLUMNS,
+        )
+    return True
+
+
+async def has_document_chunks(file_hash: str, extractor_version: str, chunker: str) -> bool:
+    """True if the chunks of `file_hash` for this extractor version and chunker are stored."""
+    async with get_db_contextmanager() as db:
+        result = await db.execute(
+            select(DocumentChunk.id)
+            .where(
+                DocumentChunk.file_hash == file_hash,
+                DocumentChunk.extractor_version == extractor_version,
+                DocumentChunk.chunker == chunker,
+            )
+            .limit(1)
+        )
+        return result.first() is not None
+
+
+async def store_document_chunks(
+    file_hash: str,
+    extractor_version: str,
+    chunker: str,
+    chunks: Sequence[TextChunk],
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Replaces the stored chunks of `file_hash` (for this extractor version and
+    chunker) with `chunks`, in a single transaction. Returns the number of rows written.
+    """
+    batch_size = batch_size or settings.CHUNK_INSERT_BATCH_SIZE
+    records = chunk_records(file_hash, extractor_version, chunker, chunks)
+    async with get_db_contextmanager() as db:
+        await db.execute(
+            delete(DocumentChunk).where(
+                DocumentChunk.file_hash == file_hash,
+                DocumentChunk.extractor_version == extractor_version,
+                DocumentChunk.chunker == chunker,
+            )
+        )
+        used_copy = await copy_chunk_rows(db, records, batch_size)
+        await db.commit()
+    logger.info(f"Stored {len(records)} chunks for {file_hash[:12]}... ({chunker}, {'COPY' if used_copy else 'INSERT'}).")
+    return len(records)
@@ -0,0 +1,104 @@
+# backend/app/utils/chunking.py
+"""
+Splits extracted document text into overlapping, token-bounded chunks.
+
+The sections of a document are joined with blank lines into one text, and every
+chunk records its [char_start, char_end) span in that text, so the document can
+be reassembled (or a chunk highlighted) from the stored rows. Consecutive chunks
+share `overlap_tokens` tokens; a chunk ends at a paragraph or sentence boundary
+when one falls in the last quarter of its window.
+"""
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings, logger
+from app.core.module_loader import load_modules_config
+from app.schemas.module_config import ModuleChunkingConfig
+from app.utils.tokenizer import token_spans
+
+# Bump when the chunking algorithm (or the tokenizer) changes, so stored chunks are rebuilt
+CHUNKER_VERSION = "1"
+
+SECTION_SEPARATOR = "\n\n"
+
+_SENTENCE_END = ".!?;:"
+
+
+class TextChunk(NamedTuple):
+    """A chunk of a document's text and where it comes from."""
+    index: int
+    page_number: Optional[int]  # Page the chunk starts on, when known
+    char_start: int
+    char_end: int
+    token_count: int
+    text: str
+
+
+def chunker_key(config: ModuleChunkingConfig) -> str:
+    """Identifies the chunks produced by `config` in storage, e.g. 'v1-t512-o64'."""
+    return f"v{CHUNKER_VERSION}-t{config.max_tokens}-o{config.overlap_tokens}"
+
+
+@lru_cache(maxsize=None)
+def get_module_chunking(module_name: str) -> ModuleChunkingConfig:
+    """Chunking config of a module from modules.yaml, or the defaults from the settings."""
+    for module in load_modules_config().modules:
+        if module.name == module_name and module.chunking is not None:
+            return module.chunking
+    return ModuleChunkingConfig(max_tokens=settings.CHUNK_MAX_TOKENS, overlap_tokens=settings.CHUNK_OVERLAP_TOKENS)
+
+
+def _break_point(text: str, spans: List[Tuple[int, int]], start: int, end: int, min_end: int) -> int:
+    """
+    Picks where a chunk covering tokens [start, end) should stop: after the last
+    token in [min_end, end) followed by a blank line, else after the last one
+    ending a sentence, else at `end`.
+    """
+    sentence_end = None
+    for i in range(end - 1, min_end - 1, -1):
+        gap = text[spans[i][1]:spans[i + 1][0]] if i + 1 < len(spans) else ""
+        if "\n\n" in gap:
+            return i + 1
+        if sentence_end is None and text[spans[i][1] - 1] in _SENTENCE_END:
+            sentence_end = i + 1
+    return sentence_end or end
+
+
+def chunk_document(sections: Iterable[Tuple[Optional[int], str]], config: ModuleChunkingConfig) -> List[TextChunk]:
+    """
+    Chunks the (page number, text) sections of one document, in order.
+    Each chunk has at most `config.max_tokens` tokens.
+    """
+    parts: List[str] = []
+    section_starts: List[int] = []
+    section_pages: List[Optional[int]] = []
+    offset = 0
+    for page_number, text in sections:
+        if not text:
+            continue
+        if parts:
+            parts.append(SECTION_SEPARATOR)
+            offset += len(SECTION_SEPARATOR)
+        section_starts.append(offset)
+        section_pages.append(page_number)
+        parts.append(text)
+        offset += len(text)
+    document = "".join(parts)
+
+    spans = token_spans(document)
+    chunks: List[TextChunk] = []
+    start = 0
+    while start < len(spans):
+        end = min(start + config.max_tokens, len(spans))
+        if end < len(spans):
+            end = _break_point(document, spans, start, end, max(start + 1, end - config.max_tokens // 4))
+        char_start, char_end = spans[start][0], spans[end - 1][1]
+        page_number = section_pages[bisect_right(section_starts, char_start) - 1]
+        chunks.append(TextChunk(len(chunks), page_number, char_start, char_end, end - start, document[char_start:char_end]))
+        if end == len(spans):
+            break
+        start = max(end - config.overlap_tokens, start + 1)
+
+    logger.debug(f"Chunked {len(document)} chars ({len(spans)} tokens) into {len(chunks)} chunks ({chunker_key(config)}).")
+    return chunks
@@ -0,0 +1,101 @@
+# backend/app/utils/embeddings.py
+"""
+Pluggable text embedders for document chunks.
+
+`Embedder` is the interface used by the embedding stage and by similarity search
+(see app.utils.chunk_search). Two implementations ship with the app:
+
+- `HashingEmbedder`: deterministic feature hashing of tokens and token bigrams,
+  computed locally. No network, no model download; used in offline tests and
+  development (EMBEDDING_PROVIDER=hashing).
+- `GeminiEmbedder`: Google's embedding model through langchain_google_genai
+  (EMBEDDING_PROVIDER=gemini).
+
+Every vector has EMBEDDING_DIMENSIONS components, the size of the
+`document_chunks.embedding` column.
+"""
+import hashlib
+import math
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import List, Optional
+
+from app.core.config import settings, logger
+
+# The dimension of document_chunks.embedding (see its Alembic migration)
+EMBEDDING_DIMENSIONS = 768
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class Embedder(ABC):
+    """Turns texts into fixed-size vectors. `name` identifies the vector space in storage."""
+
+    name: str
+    dimensions: int = EMBEDDING_DIMENSIONS
+
+    @abstractmethod
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embeds texts to be stored and searched."""
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embeds a search query. Defaults to embedding it like a document."""
+        return (await self.embed_documents([text]))[0]
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic bag-of-words embedder: each lowercased token and token bigram is
+    hashed to a signed position of the vector, which is then L2-normalised.
+    Texts sharing vocabulary get a high cosine similarity.
+    """
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        words = _WORD_RE.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dimensions] += 1.0 if (value >> 63) & 1 else -1.0
+        norm = math.sqrt(sum(component * component for component in vector))
+        return [component / norm for component in vector] if norm else vector
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+
+class GeminiEmbedder(Embedder):
+    """Google embedding model (e.g. models/text-embedding-004) via langchain_google_genai."""
+
+    def __init__(self, model_name: Optional[str] = None, api_key: Optional[str] = None):
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        model_name = model_name or settings.EMBEDDING_MODEL_NAME
+        api_key = api_key or settings.GOOGLE_API_KEY
+        self.name = model_name.split("/")[-1]
+        self._documents = GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=api_key, task_type="retrieval_document")
+        self._queries = GoogleGenerativeAIEmbeddings(model=model_name, google_api_key=api_key, task_type="retrieval_query")
+
+    async def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await self._documents.aembed_documents(texts)
+
+    async def embed_query(self, text: str) -> List[float]:
+        return await self._queries.aembed_query(text)
+
+
+@lru_cache(maxsize=None)
+def get_embedder() -> Embedder:
+    """The embedder selected by EMBEDDING_PROVIDER ('hashing' or 'gemini'), created once."""
+    provider = settings.EMBEDDING_PROVIDER.lower()
+    if provider == "gemini":
+        logger.info(f"Using Gemini embeddings ({settings.EMBEDDING_MODEL_NAME}).")
+        return GeminiEmbedder()
+    if provider != "hashing":
+        logger.warning(f"Unknown EMBEDDING_PROVIDER '{settings.EMBEDDING_PROVIDER}', using the local hashing embedder.")
+    return HashingEmbedder()
@@ -0,0 +1,104 @@
+# backend/app/utils/extraction_cache.py
+"""
+Content-addressed store for extracted PDF text (table `pdf_processed_chunks`).
+
+Entries are keyed by (SHA-256 of the file, extractor version): re-uploading the
+same PDF returns the stored text without running Docling again, and bumping the
+extractor version makes every older entry a miss (stale rows are removed by
+`purge_stale_extractions`). The cache is best-effort: when the database is not
+available every lookup is a miss and stores are skipped.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import logger
+from app.core.database import get_db_contextmanager
+from app.models.pdf_processed_chunk import PdfProcessedChunk
+
+# 5 bind parameters per row: one INSERT per batch stays far below asyncpg's 32767
+STORE_BATCH_ROWS = 1000
+
+
+async def lookup_extraction(file_hash: str, extractor_version: str) -> Optional[List[Tuple[Optional[int], str]]]:
+    """
+    Returns the stored (page number, text) sections for `file_hash` produced by
+    `extractor_version`, in their original order, or None on a miss.
+    """
+    try:
+        async with get_db_contextmanager() as db:
+            result = await db.execute(
+                select(PdfProcessedChunk.page_number, PdfProcessedChunk.content)
+                .where(
+                    PdfProcessedChunk.file_hash == file_hash,
+                    PdfProcessedChunk.extractor_version == extractor_version,
+                )
+                .order_by(PdfProcessedChunk.chunk_index)
+            )
+            sections = [(page_number, content) for page_number, content in result.all()]
+    except Exception as e:
+        logger.warning(f"Extraction cache lookup failed for {file_hash[:12]}...: {e}")
+        return None
+
+    if not sections:
+        logger.debug(f"Extraction cache miss for {file_hash[:12]}... (version {extractor_version})")
+        return None
+    logger.info(f"Extraction cache hit for {file_hash[:12]}... ({len(sections)} sections, version {extractor_version})")
+    return sections
+
+
+async def has_extraction(file_hash: str, extractor_version: str) -> bool:
+    """True if text of `file_hash` produced by `extractor_version` is stored (without loading it)."""
+    try:
+        async with get_db_contextmanager() as db:
+            result = await db.execute(
+                select(PdfProcessedChunk.id)
+                .where(
+                    PdfProcessedChunk.file_hash == file_hash,
+                    PdfProcessedChunk.extractor_version == extractor_version,
+                )
+                .limit(1)
+            )
+            return result.first() is not None
+    except Exception as e:
+        logger.warning(f"Extraction cache check failed for {file_hash[:12]}...: {e}")
+        return False
+
+
+async def store_extraction(file_hash: str, extractor_version: str, sections: List[Tuple[Optional[int], str]]) -> None:
+    """
+    Stores the extracted (page number, text) sections of a file. Concurrent stores
+    of the same file are harmless: rows that already exist are left untouched.
+    """
+    rows = [
+        {"file_hash": file_hash, "extractor_version": extractor_version, "chunk_index": index, "page_number": page_number, "content": text}
+        for index, (page_number, text) in enumerate(sections)
+        if text
+    ]
+    if not rows:
+        return
+    try:
+        async with get_db_contextmanager() as db:
+            for start in range(0, len(rows), STORE_BATCH_ROWS):
+                await db.execute(
+                    pg_insert(PdfProcessedChunk)
+                    .values(rows[start:start + STORE_BATCH_ROWS])
+                    .on_conflict_do_nothing(constraint="uq_pdf_processed_chunks_hash_version_index")
+                )
+            await db.commit()
+        logger.info(f"Stored {len(rows)} extracted sections for {file_hash[:12]}... (version {extractor_version})")
+    except Exception as e:
+        logger.warning(f"Failed to store extraction for {file_hash[:12]}...: {e}")
+
+
+async def purge_stale_extractions(current_version: str) -> int:
+    """Deletes entries produced by any extractor version other than `current_version`."""
+    async with get_db_contextmanager() as db:
+        result = await db.execute(
+            delete(PdfProcessedChunk).where(PdfProcessedChunk.extractor_version != current_version)
+        )
+        await db.commit()
+    if result.rowcount:
+        logger.info(f"Purged {result.rowcount} stale extraction rows (current extractor version: {current_version}).")
+    return result.rowcount
@@ -0,0 +1,108 @@
+# backend/app/utils/extraction_checkpoints.py
+"""
+Per-page progress of PDF extractions (table `pdf_page_checkpoints`).
+
+Every page is recorded as soon as it is extracted (text layer) or its OCR shard
+finishes, keyed by (file SHA-256, extractor version, page number). When an
+extraction is retried after a timeout, a crash or a restart, the pages already
+recorded are reused and only the missing ones are OCRed again. Like the
+extraction cache, checkpoints are best-effort: database errors only cost the
+ability to resume.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import logger
+from app.core.database import get_db_contextmanager
+from app.models.pdf_page_checkpoint import PdfPageCheckpoint
+
+METHOD_TEXT_LAYER = "text_layer"
+METHOD_OCR = "ocr"
+
+# 6 bind parameters per row: one INSERT per batch stays far below asyncpg's 32767
+STORE_BATCH_ROWS = 1000
+
+
+async def load_page_checkpoints(file_hash: str, extractor_version: str) -> Dict[int, List[str]]:
+    """Returns {page number: text sections} for the pages of `file_hash` already extracted."""
+    try:
+        async with get_db_contextmanager() as db:
+            result = await db.execute(
+                select(PdfPageCheckpoint.page_number, PdfPageCheckpoint.sections)
+                .where(
+                    PdfPageCheckpoint.file_hash == file_hash,
+                    PdfPageCheckpoint.extractor_version == extractor_version,
+                )
+            )
+            pages = {page_number: list(sections) for page_number, sections in result.all()}
+    except Exception as e:
+        logger.warning(f"Could not load page checkpoints for {file_hash[:12]}...: {e}")
+        return {}
+    if pages:
+        logger.info(f"Resuming extraction of {file_hash[:12]}...: {len(pages)} page(s) already extracted.")
+    return pages
+
+
+async def store_page_checkpoints(
+    file_hash: str,
+    extractor_version: str,
+    page_count: int,
+    method: str,
+    pages: Dict[int, List[str]],
+) -> None:
+    """Records extracted pages ({page number: text sections}). Pages already recorded are left untouched."""
+    rows = [
+        {
+            "file_hash": file_hash,
+            "extractor_version": extractor_version,
+            "page_number": page_number,
+            "page_count": page_count,
+            "method": method,
+            "sections": sections,
+        }
+        for page_number, sections in pages.items()
+    ]
+    if not rows:
+        return
+    try:
+        async with get_db_contextmanager() as db:
+            for start in range(0, len(rows), STORE_BATCH_ROWS):
+                await db.execute(
+                    pg_insert(PdfPageCheckpoint)
+                    .values(rows[start:start + STORE_BATCH_ROWS])
+                    .on_conflict_do_nothing(constraint="uq_pdf_page_checkpoints_hash_version_page")
+                )
+            await db.commit()
+        logger.debug(f"Checkpointed {len(rows)} page(s) of {file_hash[:12]}... ({method})")
+    except Exception as e:
+        logger.warning(f"Failed to checkpoint pages of {file_hash[:12]}...: {e}")
+
+
+async def get_extraction_progress(file_hash: str, extractor_version: str) -> Optional[Tuple[int, int]]:
+    """Returns (pages done, total pages) for `file_hash`, or None if no page was recorded."""
+    async with get_db_contextmanager() as db:
+        result = await db.execute(
+            select(func.count(PdfPageCheckpoint.id), func.max(PdfPageCheckpoint.page_count))
+            .where(
+                PdfPageCheckpoint.file_hash == file_hash,
+                PdfPageCheckpoint.extractor_version == extractor_version,
+            )
+        )
+        pages_done, page_count = result.one()
+    if not pages_done:
+        return None
+    return pages_done, page_count
+
+
+async def purge_stale_checkpoints(current_version: str) -> int:
+    """Deletes checkpoints recorded by any extractor version other than `current_version`."""
+    async with get_db_contextmanager() as db:
+        result = await db.execute(
+            delete(PdfPageCheckpoint).where(PdfPageCheckpoint.extractor_version != current_version)
+        )
+        await db.commit()
+    if result.rowcount:
+        logger.info(f"Purged {result.rowcount} stale page checkpoints (current extractor version: {current_version}).")
+    return result.rowcount
@@ -0,0 +1,224 @@
+# backend/app/utils/extraction_executor.py
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings, logger
+
+
+class ExtractionQueueFullError(HTTPException):
+    """Raised when every worker is busy and the wait queue is at its limit (HTTP 503 + Retry-After)."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço de extração de PDFs sobrecarregado. Tente novamente em instantes.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class ExtractionTimeoutError(Exception):
+    """Raised when a job exceeds its timeout. The worker process running it is killed."""
+
+
+def _default_pool_factory() -> Executor:
+    mp_context = multiprocessing.get_context(settings.PDF_EXTRACTION_START_METHOD)
+    return ProcessPoolExecutor(max_workers=1, mp_context=mp_context)
+
+
+def _terminate_pool(pool: Executor) -> None:
+    """Kills the worker processes of `pool` (if any) and discards it without waiting."""
+    processes = getattr(pool, "_processes", None) or {}
+    for process in list(processes.values()):
+        try:
+            process.terminate()
+        except Exception as e:
+            logger.error(f"Error terminating extraction worker {process.pid}: {e}")
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ExtractionExecutor:
+    """
+    Bounded pool for CPU-heavy PDF extraction (Docling/OCR).
+
+    Each worker slot is a single-process ProcessPoolExecutor, so a job that times
+    out (or whose caller is cancelled) can be killed without affecting jobs running
+    in the other slots; the slot is recreated on its next use. Callers wait in FIFO
+    order for a free slot; once `max_queue` callers are already waiting, new jobs
+    are rejected with ExtractionQueueFullError.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        job_timeout: Optional[float] = None,
+        retry_after: Optional[int] = None,
+        pool_factory: Callable[[], Executor] = _default_pool_factory,
+    ):
+        self.max_workers = max(1, max_workers if max_workers is not None else settings.PDF_EXTRACTION_WORKERS)
+        self.max_queue = max(0, max_queue if max_queue is not None else settings.PDF_EXTRACTION_QUEUE_LIMIT)
+        self.job_timeout = job_timeout if job_timeout is not None else settings.PDF_EXTRACTION_TIMEOUT_SECONDS
+        self.retry_after = retry_after if retry_after is not None else settings.PDF_EXTRACTION_RETRY_AFTER_SECONDS
+        self._pool_factory = pool_factory
+        self._pools: List[Optional[Executor]] = [None] * self.max_workers
+        self._free_slots: Deque[int] = deque(range(self.max_workers))
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._busy = 0
+        self._closed = False
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "rejected": 0,
+            "workers_killed": 0,
+        }
+        self._total_wait_seconds = 0.0
+        self._total_run_seconds = 0.0
+
+    # --- Slot management ---
+
+    async def _acquire_slot(self) -> int:
+        if self._free_slots and not self._waiters:
+            return self._free_slots.popleft()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we were cancelled; pass it on
+                self._release_slot(waiter.result())
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def _release_slot(self, index: int) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(index)
+                return
+        self._free_slots.append(index)
+
+    def _get_pool(self, index: int) -> Executor:
+        pool = self._pools[index]
+        if pool is None:
+            pool = self._pool_factory()
+            self._pools[index] = pool
+        return pool
+
+    def _kill_slot(self, index: int) -> None:
+        pool = self._pools[index]
+        self._pools[index] = None
+        if pool is not None:
+            _terminate_pool(pool)
+            self._counters["workers_killed"] += 1
+
+    # --- Public API ---
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Runs `fn(*args)` in a worker process and awaits its result without blocking the loop.
+        `fn`, its arguments and its result must be picklable.
+        """
+        if self._closed:
+            raise RuntimeError("ExtractionExecutor is shut down.")
+        if not self._free_slots and len(self._waiters) >= self.max_queue:
+            self._counters["rejected"] += 1
+            logger.warning(f"Extraction queue full ({self._busy} busy, {len(self._waiters)} waiting). Rejecting job.")
+            raise ExtractionQueueFullError(self.retry_after)
+
+        self._counters["submitted"] += 1
+        queued_at = time.monotonic()
+        index = await self._acquire_slot()
+        started_at = time.monotonic()
+        self._total_wait_seconds += started_at - queued_at
+        self._busy += 1
+        job_timeout = timeout if timeout is not None else self.job_timeout
+        try:
+            future = self._get_pool(index).submit(fn, *args)
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=job_timeout)
+            self._counters["completed"] += 1
+            return result
+        except asyncio.TimeoutError:
+            self._counters["timed_out"] += 1
+            logger.error(f"Extraction job {getattr(fn, '__name__', fn)} timed out after {job_timeout}s; killing worker slot {index}.")
+            self._kill_slot(index)
+            raise ExtractionTimeoutError(f"Extraction exceeded {job_timeout} seconds.")
+        except asyncio.CancelledError:
+            # Nobody is waiting for the result anymore; free the worker instead of letting it run on
+            self._kill_slot(index)
+            raise
+        except BrokenProcessPool:
+            self._counters["failed"] += 1
+            logger.error(f"Extraction worker slot {index} died unexpectedly; it will be recreated.")
+            self._kill_slot(index)
+            raise
+        except Exception:
+            self._counters["failed"] += 1
+            raise
+        finally:
+            self._busy -= 1
+            self._total_run_seconds += time.monotonic() - started_at
+            self._release_slot(index)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilisation snapshot."""
+        finished = self._counters["completed"] + self._counters["failed"] + self._counters["timed_out"]
+        return {
+            "max_workers": self.max_workers,
+            "busy_workers": self._busy,
+            "utilization": self._busy / self.max_workers,
+            "queued_jobs": len(self._waiters),
+            "max_queue": self.max_queue,
+            **self._counters,
+            "avg_wait_seconds": self._total_wait_seconds / self._counters["submitted"] if self._counters["submitted"] else 0.0,
+            "avg_run_seconds": self._total_run_seconds / finished if finished else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """Stops all worker processes. Pending waiters are cancelled."""
+        self._closed = True
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.cancel()
+        self._waiters.clear()
+        for index in range(self.max_workers):
+            pool = self._pools[index]
+            self._pools[index] = None
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+
+_extraction_executor: Optional[ExtractionExecutor] = None
+
+
+def get_extraction_executor() -> ExtractionExecutor:
+    """Returns the process-wide extraction executor, creating it on first use."""
+    global _extraction_executor
+    if _extraction_executor is None:
+        _extraction_executor = ExtractionExecutor()
+        logger.info(
+            f"Extraction executor created: {_extraction_executor.max_workers} worker(s), "
+            f"queue limit {_extraction_executor.max_queue}, timeout {_extraction_executor.job_timeout}s."
+        )
+    return _extraction_executor
+
+
+def shutdown_extraction_executor() -> None:
+    global _extraction_executor
+    if _extraction_executor is not None:
+        _extraction_executor.shutdown()
+        _extraction_executor = None
+        logger.info("Extraction executor shut down.")
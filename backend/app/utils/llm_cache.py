@@ -0,0 +1,93 @@
+# backend/app/utils/llm_cache.py
+"""
+Persistent cache of LLM responses (table `llm_cache_entries`).
+
+Entries are content-addressed: the key is a SHA-256 of everything that
+determines the response (model, prompt text, ...), so a changed input is simply
+a miss and nothing has to be invalidated. Keys live in namespaces, one per use.
+Entries can be stored with a TTL; expired entries are misses and are deleted by
+`purge_expired_llm_responses`.
+Like the extraction cache, it is best-effort: when the database is not
+available every lookup is a miss and stores are skipped.
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import logger
+from app.core.database import get_db_contextmanager
+from app.models.llm_cache_entry import LlmCacheEntry
+
+
+def llm_cache_key(*parts: str) -> str:
+    """SHA-256 (hex) of `parts`, separated so that ('ab', 'c') and ('a', 'bc') differ."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+async def lookup_llm_responses(namespace: str, keys: Iterable[str]) -> Dict[str, str]:
+    """Returns {key: response} for the `keys` stored in `namespace`; missing keys are absent."""
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return {}
+    try:
+        async with get_db_contextmanager() as db:
+            result = await db.execute(
+                select(LlmCacheEntry.cache_key, LlmCacheEntry.response)
+                .where(
+                    LlmCacheEntry.namespace == namespace,
+                    LlmCacheEntry.cache_key.in_(keys),
+                    or_(LlmCacheEntry.expires_at.is_(None), LlmCacheEntry.expires_at > func.now()),
+                )
+            )
+            return {key: response for key, response in result.all()}
+    except Exception as e:
+        logger.warning(f"LLM cache lookup failed ({namespace}): {e}")
+        return {}
+
+
+async def store_llm_responses(namespace: str, model: str, responses: Dict[str, str], ttl_seconds: Optional[int] = None) -> None:
+    """
+    Stores {key: response} in `namespace`, replacing existing entries with the same
+    key. With `ttl_seconds` the entries expire after that long; otherwise they never do.
+    """
+    if not responses:
+        return
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds) if ttl_seconds else None
+    rows = [
+        {"namespace": namespace, "cache_key": key, "model": model, "response": response, "expires_at": expires_at}
+        for key, response in responses.items()
+    ]
+    try:
+        async with get_db_contextmanager() as db:
+            statement = pg_insert(LlmCacheEntry).values(rows)
+            await db.execute(
+                statement.on_conflict_do_update(
+                    constraint="uq_llm_cache_entries_namespace_key",
+                    set_={
+                        "model": statement.excluded.model,
+                        "response": statement.excluded.response,
+                        "created_at": statement.excluded.created_at,
+                        "expires_at": statement.excluded.expires_at,
+                    },
+                )
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning(f"Failed to store {len(rows)} LLM cache entries ({namespace}): {e}")
+
+
+async def purge_expired_llm_responses() -> int:
+    """Deletes the entries whose TTL has passed."""
+    async with get_db_contextmanager() as db:
+        result = await db.execute(delete(LlmCacheEntry).where(LlmCacheEntry.expires_at <= func.now()))
+        await db.commit()
+    if result.rowcount:
+        logger.info(f"Purged {result.rowcount} expired LLM cache entries.")
+    return result.rowcount
@@ -1,93 +1,429 @@
-# # backend/app/utils/pdf_processor.py
-# import os
-# import tempfile
-# from typing import List
-# from fastapi import UploadFile
-# from langchain_docling import DoclingLoader
-#
-# # --- IMPORT CORRIGIDO ---
-# from app.core.config import logger # Import logger using absolute path from app package
-# # --- FIM IMPORT CORRIGIDO ---
-#
-# async def processar_pdfs_upload(files: List[UploadFile]) -> str:
-#     """
-#     Processes a list of uploaded PDF files using DoclingLoader.
-#     Ensures all file handles are closed.
-#     """
-#     combined_pdf_text = ""
-#     temp_file_paths = []
-#
-#     logger.info(f"Starting processing for {len(files)} uploaded file(s).")
-#
-#     try:
-#         for file in files:
-#             try:
-#                 if file.content_type != "application/pdf":
-#                     logger.warning(f"Skipping non-PDF file: {file.filename} ({file.content_type})")
-#                     continue
-#
-#                 temp_pdf_path = None
-#                 try:
-#                     # Create a temporary file
-#                     # Ensure tempfile uses await if needed, check library specific reqs
-#                     # Using standard tempfile which is sync I/O, might block event loop slightly
-#                     # but often acceptable for temp file creation/writing compared to network I/O.
-#                     # Consider threads or async file libraries if this becomes a bottleneck.
-#                     with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-#                         content = await file.read()
-#                         if not content:
-#                             logger.warning(f"Skipping empty file: {file.filename}")
-#                             continue
-#
-#                         temp_pdf.write(content)
-#                         temp_pdf_path = temp_pdf.name
-#                         temp_file_paths.append(temp_pdf_path)
-#                         logger.debug(f"PDF saved temporarily to {temp_pdf_path} for file {file.filename}")
-#
-#                     # Use DoclingLoader on the temporary file path
-#                     logger.debug(f"Processing PDF with DoclingLoader: {temp_pdf_path}")
-#                     # Assuming DoclingLoader.load() is synchronous I/O bound
-#                     # Run potentially blocking I/O in a thread pool if it causes issues
-#                     # For now, calling directly. Consider asyncio.to_thread if needed.
-#                     loader = DoclingLoader(file_path=temp_pdf_path)
-#                     docs = loader.load() # This might block!
-#                     logger.debug(f"DoclingLoader finished. Found {len(docs)} sections for {file.filename}.")
-#
-#                     if docs:
-#                         extracted_text = "\n\n".join([doc.page_content for doc in docs if doc.page_content])
-#                         if extracted_text.strip():
-#                             combined_pdf_text += f"\n\n--- CONTEÚDO DO ARQUIVO: {file.filename} ---\n\n" + extracted_text
-#                             logger.debug(f"Added {len(extracted_text)} chars from {file.filename}")
-#                         else:
-#                             logger.warning(f"DoclingLoader extracted no text content from {file.filename}")
-#                     else:
-#                         logger.warning(f"DoclingLoader returned no document sections for {file.filename}")
-#
-#                 except Exception as load_err:
-#                     logger.error(f"Error processing file {file.filename} with DoclingLoader (Path: {temp_pdf_path}): {load_err}", exc_info=True)
-#                     # Continue to next file after logging error
-#
-#             finally:
-#                 # Ensure UploadFile is closed after processing attempt or skip
-#                 if file:
-#                     await file.close()
-#                     logger.debug(f"Closed UploadFile handle for: {file.filename}")
-#
-#         if combined_pdf_text.strip():
-#               logger.info(f"Texto completo extraído de {len(files)} arquivo(s) processados.")
-#               # logger.debug(f"Full text extracted:\n{combined_pdf_text}") # Optional full log
-#         else:
-#               logger.warning("Nenhum texto foi extraído dos arquivos PDF fornecidos.")
-#
-#         return combined_pdf_text.strip()
-#
-#     finally:
-#         # Clean up all temporary files created
-#         logger.debug(f"Cleaning up {len(temp_file_paths)} temporary file(s)...")
-#         for path in temp_file_paths:
-#             if path and os.path.exists(path):
-#                 try:
-#                     os.remove(path)
-#                     logger.debug(f"Deleted temporary file: {path}")
-#                 except Exception as e_del:
-#                     logger.error(f"Error deleting temporary file {path}: {e_del}")
\ No newline at end of file
+# backend/app/utils/pdf_processor.py
+import asyncio
+from contextlib import aclosing
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+# Docling is optional in the API container (Fase 1 Refactor Parcial); extraction
+# fails per file with a logged error when it is not installed.
+try:
+    from langchain_docling import DoclingLoader
+except ImportError:
+    DoclingLoader = None
+
+from app.core.config import settings, logger
+from app.utils.upload_ingest import UploadBudget, SpooledUpload, spool_upload_to_disk, discard_spooled_upload, link_spooled_upload
+from app.utils.extraction_executor import ExtractionExecutor, get_extraction_executor
+from app.utils.extraction_cache import lookup_extraction, store_extraction
+from app.utils.extraction_checkpoints import load_page_checkpoints, store_page_checkpoints, METHOD_OCR, METHOD_TEXT_LAYER
+from app.utils.pdf_text_layer import TextLayer, read_text_layer, plan_ocr_shards
+from app.utils.chunking import chunk_document, chunker_key
+from app.utils.chunk_store import has_document_chunks, store_document_chunks
+from app.utils.chunk_search import embed_document_chunks
+from app.utils.single_flight import SingleFlight
+from app.schemas.module_config import ModuleChunkingConfig
+
+# Identifies the extraction pipeline in the extraction cache. Bump it whenever the
+# extraction output changes, so text produced by the old pipeline is not reused.
+EXTRACTOR_VERSION = "docling-2.30.0/3"
+
+# A page (or section) of text as returned by the extraction workers and the cache
+PageText = Tuple[Optional[int], str]
+
+class ExtractedSection(NamedTuple):
+    """One record of the extraction stream produced by iter_extracted_sections."""
+    filename: str
+    page_no: Optional[int]
+    text: str
+    file_hash: Optional[str] = None  # SHA-256 of the uploaded file
+
+def _page_number(metadata: dict) -> Optional[int]:
+    """Reads the (1-based) page number of a Docling chunk from its metadata, if present."""
+    try:
+        return int(metadata["dl_meta"]["doc_items"][0]["prov"][0]["page_no"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+class PageExtraction(NamedTuple):
+    """The extracted sections of one PDF and how its pages were processed."""
+    sections: List[PageText]
+    text_layer_pages: int  # Pages read from the embedded text layer
+    ocr_pages: int  # Pages sent to Docling/OCR
+
+def _docling_sections(file_path: str, page_range: Optional[Tuple[int, int]] = None) -> List[PageText]:
+    """Runs DoclingLoader on a PDF (or on an inclusive 1-based page range of it) and returns its sections."""
+    if DoclingLoader is None:
+        raise RuntimeError("langchain_docling is not installed in this container.")
+    if page_range is None:
+        loader = DoclingLoader(file_path=file_path)
+    else:
+        loader = DoclingLoader(file_path=file_path, convert_kwargs={"page_range": page_range})
+    docs = loader.load()
+    default_page = page_range[0] if page_range else None
+    return [(_page_number(doc.metadata or {}) or default_page, doc.page_content) for doc in docs]
+
+def _classify_pages(file_path: str, min_text_chars: int) -> Optional[TextLayer]:
+    """
+    Reads the text layer of a PDF (see app.utils.pdf_text_layer), or returns None
+    if pdfium cannot read the file. Executed inside an extraction worker process.
+    """
+    try:
+        return read_text_layer(file_path, min_text_chars)
+    except Exception as e:
+        logger.warning(f"Could not read the text layer of {file_path}, using Docling for every page: {e}")
+        return None
+
+def _ocr_shard(file_path: str, runs: Optional[List[Tuple[int, int]]]) -> List[PageText]:
+    """
+    OCRs one shard of a PDF with Docling: each inclusive page run in `runs`, or the
+    whole document if `runs` is None. Executed inside an extraction worker process.
+    """
+    if runs is None:
+        return _docling_sections(file_path)
+    sections: List[PageText] = []
+    for page_range in runs:
+        sections.extend(_docling_sections(file_path, page_range))
+    return sections
+
+async def _run_job(executor: ExtractionExecutor, job_slots: asyncio.Semaphore, fn, *args):
+    """Runs one extraction job, holding one of the request's job slots while it is queued or running."""
+    async with job_slots:
+        return await executor.run(fn, *args)
+
+async def _run_shards(
+    executor: ExtractionExecutor,
+    job_slots: asyncio.Semaphore,
+    file_path: str,
+    shards: List[List[Tuple[int, int]]],
+    on_shard_done: Callable[[List[Tuple[int, int]], List[PageText]], Awaitable[None]],
+) -> List[PageText]:
+    """
+    OCRs the shards of a PDF in parallel and returns their sections concatenated in
+    shard order; `on_shard_done` is awaited as soon as each shard finishes. If a
+    shard fails, the others are cancelled and the error is raised.
+    """
+    async def run_shard(runs: List[Tuple[int, int]]) -> List[PageText]:
+        sections = await _run_job(executor, job_slots, _ocr_shard, file_path, runs)
+        await on_shard_done(runs, sections)
+        return sections
+
+    tasks = [asyncio.create_task(run_shard(runs)) for runs in shards]
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return [section for shard_sections in results for section in shard_sections]
+
+def _sections_by_page(runs: List[Tuple[int, int]], sections: List[PageText]) -> Dict[int, List[str]]:
+    """Groups the sections of an OCR shard by page; pages of the shard without text map to []."""
+    pages: Dict[int, List[str]] = {page_no: [] for first, last in runs for page_no in range(first, last + 1)}
+    for page_no, text in sections:
+        pages.setdefault(page_no or runs[0][0], []).append(text)
+    return pages
+
+async def _extract_document(
+    file_path: str,
+    file_hash: str,
+    executor: ExtractionExecutor,
+    job_slots: asyncio.Semaphore,
+) -> PageExtraction:
+    """
+    Extracts (page number, text) sections from a PDF, page by page: pages with a
+    usable embedded text layer are read directly, and only the image-only pages
+    are OCRed by Docling, split into shards of PDF_EXTRACTION_SHARD_PAGES pages
+    that run in parallel across the extraction pool. Sections come back in page order.
+
+    Each page is checkpointed as soon as it is extracted (see
+    app.utils.extraction_checkpoints); pages checkpointed by an earlier,
+    interrupted attempt on the same file are reused instead of being OCRed again.
+    """
+    layer = await _run_job(executor, job_slots, _classify_pages, file_path, settings.PDF_TEXT_LAYER_MIN_CHARS)
+    if layer is None:
+        # Unreadable for pdfium (or pdfium missing): let Docling handle the whole file
+        sections = await _run_job(executor, job_slots, _ocr_shard, file_path, None)
+        return PageExtraction(sections, text_layer_pages=0, ocr_pages=len({page_no for page_no, _ in sections if page_no}))
+
+    pages = await load_page_checkpoints(file_hash, EXTRACTOR_VERSION)
+    resumed_pages = len(pages)
+    text_layer_pages = {page_no: [text] for page_no, text in layer.pages.items() if page_no not in pages}
+    await store_page_checkpoints(file_hash, EXTRACTOR_VERSION, layer.page_count, METHOD_TEXT_LAYER, text_layer_pages)
+    pages.update(text_layer_pages)
+
+    ocr_pages = [page_no for page_no in layer.ocr_pages if page_no not in pages]
+    if ocr_pages and DoclingLoader is None and layer.pages:
+        # Keep the born-digital pages rather than failing the whole file
+        logger.warning(f"langchain_docling is not installed; pages {ocr_pages} of {file_path} have no text layer and were skipped.")
+        ocr_pages = []
+    if ocr_pages:
+        async def checkpoint_shard(runs: List[Tuple[int, int]], shard_sections: List[PageText]) -> None:
+            shard_pages = _sections_by_page(runs, shard_sections)
+            await store_page_checkpoints(file_hash, EXTRACTOR_VERSION, layer.page_count, METHOD_OCR, shard_pages)
+            pages.update(shard_pages)
+
+        shards = plan_ocr_shards(ocr_pages, settings.PDF_EXTRACTION_SHARD_PAGES)
+        logger.debug(f"OCR of {len(ocr_pages)} page(s) of {file_path} split into {len(shards)} shard(s).")
+        await _run_shards(executor, job_slots, file_path, shards, checkpoint_shard)
+
+    if resumed_pages:
+        logger.info(f"Reused {resumed_pages} checkpointed page(s) of {file_hash[:12]}...")
+    sections = [(page_no, text) for page_no in sorted(pages) for text in pages[page_no]]
+    return PageExtraction(sections, text_layer_pages=len(text_layer_pages), ocr_pages=len(ocr_pages))
+
+# Pages extracted by each path since startup (cache hits are not counted)
+_page_path_counts = {"text_layer_pages": 0, "ocr_pages": 0}
+
+def _record_page_paths(extraction: PageExtraction) -> None:
+    _page_path_counts["text_layer_pages"] += extraction.text_layer_pages
+    _page_path_counts["ocr_pages"] += extraction.ocr_pages
+
+def get_page_path_stats() -> dict:
+    """Returns how many pages were read from the text layer and how many needed OCR since startup."""
+    return dict(_page_path_counts)
+
+# Concurrent requests for the same file share one extraction and one chunking run
+_extraction_flights = SingleFlight("pdf-extraction")
+_chunking_flights = SingleFlight("pdf-chunking")
+
+
+async def _extract_and_store(spooled: SpooledUpload, executor: ExtractionExecutor, job_slots: asyncio.Semaphore) -> List[PageText]:
+    """Extracts a spooled PDF and stores the result in the extraction cache. Deletes `spooled` when done."""
+    try:
+        # Read the text layer / run DoclingLoader on the temporary file path, in worker processes
+        logger.debug(f"Processing PDF: {spooled.path}")
+        extraction = await _extract_document(spooled.path, spooled.sha256, executor, job_slots)
+        _record_page_paths(extraction)
+        logger.info(
+            f"Extracted {spooled.filename}: {extraction.text_layer_pages} page(s) from the text layer, "
+            f"{extraction.ocr_pages} page(s) with OCR, {len(extraction.sections)} sections."
+        )
+        await store_extraction(spooled.sha256, EXTRACTOR_VERSION, extraction.sections)
+        return extraction.sections
+    finally:
+        discard_spooled_upload(spooled)
+
+
+async def _extract_shared(spooled: SpooledUpload, executor: ExtractionExecutor, job_slots: asyncio.Semaphore) -> List[PageText]:
+    """
+    Extracts `spooled`, or joins the extraction of the same file already running
+    for another request. The shared extraction works on its own link to the temp
+    file, so it survives the request that started it being cancelled.
+    """
+    owned = link_spooled_upload(spooled)
+    started = False
+
+    def start():
+        nonlocal started
+        started = True
+        return _extract_and_store(owned, executor, job_slots)
+
+    try:
+        return await _extraction_flights.do((spooled.sha256, EXTRACTOR_VERSION), start)
+    finally:
+        if not started:
+            discard_spooled_upload(owned)
+
+
+async def _processar_arquivo(
+    file: UploadFile,
+    budget: UploadBudget,
+    executor: ExtractionExecutor,
+    semaphore: asyncio.Semaphore,
+    job_slots: asyncio.Semaphore,
+    chunking: Optional[ModuleChunkingConfig] = None,
+) -> Optional[Tuple[str, List[PageText]]]:
+    """
+    Spools, extracts (or fetches from the cache) and returns the SHA-256 and the
+    non-empty sections of one upload; with `chunking`, the sections are also chunked
+    and stored (see app.utils.chunk_store). Returns None if the file was skipped or
+    failed; only HTTP errors (upload limits, saturated extraction pool) propagate.
+    Always closes the upload and its temp file.
+    """
+    spooled: Optional[SpooledUpload] = None
+    try:
+        async with semaphore:
+            if file.content_type != "application/pdf":
+                logger.warning(f"Skipping non-PDF file: {file.filename} ({file.content_type})")
+                return None
+
+            try:
+                spooled = await spool_upload_to_disk(file, budget=budget)
+                if spooled is None:
+                    logger.warning(f"Skipping empty file: {file.filename}")
+                    return None
+
+                sections = await lookup_extraction(spooled.sha256, EXTRACTOR_VERSION)
+                if sections is None:
+                    sections = await _extract_shared(spooled, executor, job_slots)
+
+                if not sections:
+                    logger.warning(f"Extraction returned no document sections for {file.filename}")
+                    return None
+                sections = [(page_no, text) for page_no, text in sections if text]
+                if not any(text.strip() for _, text in sections):
+                    logger.warning(f"Extraction found no text content in {file.filename}")
+                    return None
+                logger.debug(f"Extracted {sum(len(text) for _, text in sections)} chars from {file.filename}")
+                if chunking is not None:
+                    await _chunking_flights.do(
+                        (spooled.sha256, EXTRACTOR_VERSION, chunker_key(chunking)),
+                        lambda: _chunk_and_store(spooled.sha256, sections, chunking),
+                    )
+                return spooled.sha256, sections
+
+            except HTTPException:
+                # Upload limits and a saturated extraction pool abort the whole request
+                raise
+            except Exception as load_err:
+                logger.error(f"Error processing file {file.filename} (Path: {spooled.path if spooled else None}): {load_err}", exc_info=True)
+                # The other files are still processed
+                return None
+    finally:
+        # Ensure UploadFile is closed and the temporary file removed after processing attempt or skip
+        discard_spooled_upload(spooled)
+        await file.close()
+        logger.debug(f"Closed UploadFile handle for: {file.filename}")
+
+
+async def _chunk_and_store(file_hash: str, sections: List[PageText], chunking: ModuleChunkingConfig) -> None:
+    """
+    Chunks a document and bulk-stores its chunks, unless they are already stored,
+    then embeds the chunks that have no vector yet (see app.utils.chunk_search).
+    Best-effort: a storage error is logged and does not fail the upload.
+    """
+    chunker = chunker_key(chunking)
+    try:
+        if await has_document_chunks(file_hash, EXTRACTOR_VERSION, chunker):
+            logger.debug(f"Chunks of {file_hash[:12]}... ({chunker}) already stored.")
+        else:
+            chunks = await run_in_threadpool(chunk_document, sections, chunking)
+            await store_document_chunks(file_hash, EXTRACTOR_VERSION, chunker, chunks)
+        await embed_document_chunks(file_hash, EXTRACTOR_VERSION, chunker)
+    except Exception as e:
+        logger.warning(f"Could not store chunks of {file_hash[:12]}... ({chunker}): {e}")
+
+
+async def _iter_sections_by_file(
+    files: List[UploadFile],
+    chunking: Optional[ModuleChunkingConfig] = None,
+) -> AsyncIterator[Tuple[int, ExtractedSection]]:
+    """
+    Yields (upload index, section) pairs in upload order. Files are extracted
+    concurrently, in a window of PDF_EXTRACTION_FILE_CONCURRENCY files: the next file
+    starts only once the consumer reaches the file at the front of the window, so at
+    most that many extracted files are held in memory waiting for a slow consumer.
+    The sections of a file are yielded as soon as that file and every file before
+    it are done. Remaining work is cancelled (and unstarted uploads closed) if the
+    consumer stops early or an HTTP error is raised.
+    """
+    budget = UploadBudget()
+    executor = get_extraction_executor()
+    window = max(1, settings.PDF_EXTRACTION_FILE_CONCURRENCY)
+    semaphore = asyncio.Semaphore(window)
+    # Caps the extraction jobs (page shards) one request keeps in the pool at a time
+    job_slots = asyncio.Semaphore(max(1, settings.PDF_EXTRACTION_MAX_SHARDS_PER_REQUEST))
+
+    logger.info(f"Starting processing for {len(files)} uploaded file(s).")
+
+    tasks: Dict[int, asyncio.Task] = {}
+    next_index = 0
+
+    def start_next() -> None:
+        nonlocal next_index
+        if next_index < len(files):
+            file = files[next_index]
+            tasks[next_index] = asyncio.create_task(_processar_arquivo(file, budget, executor, semaphore, job_slots, chunking))
+            next_index += 1
+
+    for _ in range(window):
+        start_next()
+    try:
+        for index, file in enumerate(files):
+            # Dropping the task releases the file's sections once they are yielded
+            result = await tasks.pop(index)
+            start_next()
+            if result is None:
+                continue
+            file_hash, sections = result
+            for page_no, text in sections:
+                yield index, ExtractedSection(file.filename, page_no, text, file_hash)
+    finally:
+        pending = [task for task in tasks.values() if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        # Uploads whose processing never started are still closed
+        for file in files[next_index:]:
+            await file.close()
+
+
+async def iter_extracted_sections(
+    files: List[UploadFile],
+    chunking: Optional[ModuleChunkingConfig] = None,
+    distinct: bool = False,
+) -> AsyncIterator[ExtractedSection]:
+    """
+    Streams the text extracted from uploaded PDFs as (filename, page_no, text, file_hash)
+    records, in upload order, while later files are still being extracted.
+    `page_no` is 1-based, or None when Docling does not report it. With `chunking`
+    (see app.utils.chunking.get_module_chunking), each document is also chunked and stored.
+
+    Lets downstream stages (chunking, storage, prompt assembly) start before the
+    last file is extracted. Sections are produced per file (the extraction cache
+    and the chunker need whole documents), and at most PDF_EXTRACTION_FILE_CONCURRENCY
+    extracted files are buffered ahead of the consumer, so memory is bounded by
+    that window rather than by the number of uploads. Raises
+    UploadTooLargeError (HTTP 413) or ExtractionQueueFullError (HTTP 503) like
+    processar_pdfs_upload.
+
+    With `distinct`, uploads with the same content (SHA-256 computed while
+    spooling) yield their sections once, under the first of them; copies are
+    extracted only once anyway (extraction cache and shared extractions).
+    """
+    first_upload: Dict[str, int] = {}
+    async with aclosing(_iter_sections_by_file(files, chunking)) as stream:
+        async for index, section in stream:
+            if distinct and first_upload.setdefault(section.file_hash, index) != index:
+                continue
+            yield section
+
+
+async def processar_pdfs_upload(files: List[UploadFile], chunking: Optional[ModuleChunkingConfig] = None) -> str:
+    """
+    Processes a list of uploaded PDF files using DoclingLoader and returns their combined text.
+    Uploads are streamed to disk in bounded chunks (see app.utils.upload_ingest),
+    so memory stays flat regardless of file size, and Docling runs in the
+    extraction process pool so the event loop stays responsive. Files whose SHA-256 is already
+    in the extraction cache are not extracted again. With `chunking`, each document
+    is also split into chunks stored in `document_chunks`.
+
+    Thin wrapper over the iter_extracted_sections stream: each file's sections are
+    joined under a "--- CONTEÚDO DO ARQUIVO: name ---" separator, in upload order.
+    A file that fails is skipped without affecting the others. Ensures all file handles are closed.
+    Raises UploadTooLargeError (HTTP 413) if the per-file or per-request limit is exceeded,
+    and ExtractionQueueFullError (HTTP 503) if the extraction pool is saturated; the
+    remaining files are then cancelled.
+    """
+    parts: List[str] = []
+    current_index = None
+    async with aclosing(_iter_sections_by_file(files, chunking)) as stream:
+        async for index, section in stream:
+            if index != current_index:
+                if current_index is not None:
+                    parts.append("\n\n")
+                parts.append(f"--- CONTEÚDO DO ARQUIVO: {section.filename} ---\n\n")
+                current_index = index
+            else:
+                parts.append("\n\n")
+            parts.append(section.text)
+
+    combined_pdf_text = "".join(parts).strip()
+
+    if combined_pdf_text:
+          logger.info(f"Texto completo extraído de {len(files)} arquivo(s) processados.")
+    else:
+          logger.warning("Nenhum texto foi extraído dos arquivos PDF fornecidos.")
+
+    return combined_pdf_text
@@ -0,0 +1,89 @@
+# backend/app/utils/pdf_text_layer.py
+"""
+Per-page text-layer classifier for PDFs.
+
+Born-digital pages carry an embedded text layer that can be read directly in a
+few milliseconds; only pages without usable text (scans, photos of documents)
+need OCR. `read_text_layer` reads every page with pdfium and returns the text of
+the pages whose layer is usable, so the caller sends just the remaining pages
+to Docling. Runs inside an extraction worker process.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+
+# pdfium ships with Docling; without it every page is sent to OCR.
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+
+class TextLayer(NamedTuple):
+    """Result of classifying the pages of a PDF."""
+    page_count: int
+    pages: Dict[int, str]  # 1-based page number -> embedded text, for usable pages only
+
+    @property
+    def ocr_pages(self) -> List[int]:
+        """Pages without a usable text layer, in order."""
+        return [page_no for page_no in range(1, self.page_count + 1) if page_no not in self.pages]
+
+
+def is_usable_text(text: str, min_chars: int) -> bool:
+    """
+    True if `text` looks like a real text layer: at least `min_chars` letters or
+    digits, and not dominated by replacement/control characters (which is what
+    fonts without a usable ToUnicode map produce).
+    """
+    stripped = text.strip()
+    alnum = sum(1 for char in stripped if char.isalnum())
+    if alnum < min_chars:
+        return False
+    garbage = sum(1 for char in stripped if char == "�" or (not char.isprintable() and not char.isspace()))
+    return garbage <= len(stripped) * 0.1
+
+
+def read_text_layer(file_path: str, min_chars: int) -> TextLayer:
+    """
+    Reads the embedded text of every page of `file_path`.
+    Raises RuntimeError if pdfium is not installed and pdfium.PdfiumError if the file cannot be parsed.
+    """
+    if pdfium is None:
+        raise RuntimeError("pypdfium2 is not installed in this container.")
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        pages: Dict[int, str] = {}
+        for index in range(len(pdf)):
+            page = pdf[index]
+            try:
+                text_page = page.get_textpage()
+                try:
+                    text = text_page.get_text_bounded()
+                finally:
+                    text_page.close()
+            finally:
+                page.close()
+            if is_usable_text(text, min_chars):
+                pages[index + 1] = text.strip()
+        return TextLayer(page_count=len(pdf), pages=pages)
+    finally:
+        pdf.close()
+
+
+def page_runs(page_numbers: List[int]) -> List[Tuple[int, int]]:
+    """Groups sorted page numbers into inclusive (first, last) runs of consecutive pages."""
+    runs: List[Tuple[int, int]] = []
+    for page_no in page_numbers:
+        if runs and runs[-1][1] == page_no - 1:
+            runs[-1] = (runs[-1][0], page_no)
+        else:
+            runs.append((page_no, page_no))
+    return runs
+
+
+def plan_ocr_shards(page_numbers: List[int], shard_pages: int) -> List[List[Tuple[int, int]]]:
+    """
+    Splits the sorted pages that need OCR into shards of at most `shard_pages`
+    pages, each described as its runs of consecutive pages.
+    """
+    shard_pages = max(1, shard_pages)
+    return [page_runs(page_numbers[start:start + shard_pages]) for start in range(0, len(page_numbers), shard_pages)]
@@ -0,0 +1,56 @@
+# backend/app/utils/single_flight.py
+"""
+Coalescing of identical concurrent work ("single flight").
+
+`SingleFlight.do(key, start)` runs `start()` as a task the first time `key` is
+requested; callers that arrive with the same key while that task is running
+await the same task instead of starting their own. The key is forgotten as soon
+as the task finishes, so later calls start fresh work (results meant to outlive
+the flight belong in a cache).
+
+Each caller awaits the task through `asyncio.shield`: a caller that is cancelled
+(e.g. its client disconnected) stops waiting, but the shared task keeps running
+for the others, and to completion even if every caller left, so its side
+effects (cache writes) are not lost.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.config import logger
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Shares one in-flight task among concurrent callers with the same key."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._counters = {"started": 0, "coalesced": 0}
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Retrieve the outcome so an error nobody awaited any more is not reported as "never retrieved"
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"{self.name}: shared task for {key!r} failed: {task.exception()!r}")
+
+    async def do(self, key: Hashable, start: Callable[[], Awaitable[T]]) -> T:
+        """
+        Awaits the in-flight task for `key`, or starts one with `start()` if there
+        is none. `start` is only called by the caller that starts the task.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(start())
+            self._tasks[key] = task
+            task.add_done_callback(lambda finished: self._forget(key, finished))
+            self._counters["started"] += 1
+        else:
+            self._counters["coalesced"] += 1
+            logger.info(f"{self.name}: joined the in-flight task for {key!r}.")
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._tasks), **self._counters}
@@ -0,0 +1,169 @@
+# backend/app/utils/upload_ingest.py
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings, logger
+
+
+class UploadTooLargeError(HTTPException):
+    """Raised while streaming an upload that exceeds the per-file or per-request byte limit."""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+@dataclass(frozen=True)
+class SpooledUpload:
+    """An upload copied to a temporary file on disk, hashed during the copy."""
+    filename: str
+    path: str
+    size: int
+    sha256: str
+
+
+class UploadBudget:
+    """
+    Byte budget shared by all files of a single request.
+    Thread-safe, since each file is copied in a worker thread.
+    """
+
+    def __init__(self, max_request_bytes: Optional[int] = None):
+        self.max_request_bytes = max_request_bytes if max_request_bytes is not None else settings.PDF_UPLOAD_MAX_REQUEST_BYTES
+        self.consumed = 0
+        self._lock = threading.Lock()
+
+    def consume(self, n_bytes: int) -> None:
+        with self._lock:
+            self.consumed += n_bytes
+            if self.consumed > self.max_request_bytes:
+                limit_mb = self.max_request_bytes // (1024 * 1024)
+                raise UploadTooLargeError(f"O total dos arquivos enviados excede o limite de {limit_mb} MB por requisição.")
+
+
+def _copy_to_disk(
+    source: BinaryIO,
+    filename: str,
+    chunk_size: int,
+    max_file_bytes: int,
+    budget: UploadBudget,
+    tmp_dir: Optional[str],
+    abort: threading.Event,
+) -> Optional[SpooledUpload]:
+    """
+    Copies `source` to a new temporary file in `chunk_size` blocks (blocking; run in a thread).
+    Only one chunk is held in memory at a time. Returns None for empty uploads.
+    Stops and removes the partial file as soon as `abort` is set.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as target:
+            while True:
+                if abort.is_set():
+                    raise _CopyAborted()
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_file_bytes:
+                    limit_mb = max_file_bytes // (1024 * 1024)
+                    raise UploadTooLargeError(f"O arquivo '{filename}' excede o limite de {limit_mb} MB.")
+                budget.consume(len(chunk))
+                digest.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        _remove_quietly(path)
+        raise
+
+    if size == 0:
+        _remove_quietly(path)
+        return None
+    return SpooledUpload(filename=filename, path=path, size=size, sha256=digest.hexdigest())
+
+
+class _CopyAborted(Exception):
+    pass
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error(f"Error deleting temporary file {path}: {e}")
+
+
+async def spool_upload_to_disk(
+    file: UploadFile,
+    budget: Optional[UploadBudget] = None,
+    chunk_size: Optional[int] = None,
+    max_file_bytes: Optional[int] = None,
+) -> Optional[SpooledUpload]:
+    """
+    Streams an UploadFile to a temporary file without loading it into memory.
+
+    The copy runs off the event loop, enforces the per-file limit and the shared
+    request `budget` while streaming, and computes the SHA-256 in the same pass.
+    Returns None if the upload is empty. The caller owns (and must delete) the file.
+    """
+    budget = budget or UploadBudget()
+    abort = threading.Event()
+    copy = asyncio.ensure_future(run_in_threadpool(
+        _copy_to_disk,
+        file.file,
+        file.filename or "upload.pdf",
+        chunk_size or settings.PDF_UPLOAD_CHUNK_SIZE_BYTES,
+        max_file_bytes if max_file_bytes is not None else settings.PDF_UPLOAD_MAX_FILE_BYTES,
+        budget,
+        settings.PDF_UPLOAD_TMP_DIR,
+        abort,
+    ))
+    try:
+        spooled = await asyncio.shield(copy)
+    except asyncio.CancelledError:
+        # The copy thread cannot be interrupted: tell it to stop and wait for it,
+        # so no temporary file outlives a cancelled request
+        abort.set()
+        try:
+            discard_spooled_upload(await copy)
+        except Exception:
+            pass
+        raise
+    if spooled:
+        logger.debug(f"Upload {spooled.filename} spooled to {spooled.path} ({spooled.size} bytes, sha256={spooled.sha256[:12]}...)")
+    return spooled
+
+
+def link_spooled_upload(spooled: SpooledUpload) -> SpooledUpload:
+    """
+    A second name for the temporary file of `spooled` (a hard link, or a copy when
+    links are not supported), so another owner can keep using the content after the
+    original is discarded. The caller owns (and must delete) the new file.
+    """
+    directory, name = os.path.split(spooled.path)
+    fd, path = tempfile.mkstemp(suffix=".pdf", prefix=f"{os.path.splitext(name)[0]}-", dir=directory)
+    os.close(fd)
+    os.remove(path)
+    try:
+        os.link(spooled.path, path)
+    except OSError:
+        shutil.copyfile(spooled.path, path)
+    return SpooledUpload(filename=spooled.filename, path=path, size=spooled.size, sha256=spooled.sha256)
+
+
+def discard_spooled_upload(spooled: Optional[SpooledUpload]) -> None:
+    """Deletes the temporary file behind a SpooledUpload, if any."""
+    if spooled:
+        _remove_quietly(spooled.path)
+        logger.debug(f"Deleted temporary file: {spooled.path}")
@@ -0,0 +1,72 @@
+# backend/tests/conftest.py
+from typing import List, Optional
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+
+from app.core import database
+
+
+def build_pdf(pages: List[Optional[str]]) -> bytes:
+    """
+    Builds a minimal PDF with one page per entry of `pages`: a string becomes a
+    born-digital page with that text (Helvetica), None a page without a text layer
+    (like a scanned page, as far as the text-layer classifier is concerned).
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_refs = []
+    for text in pages:
+        if text is None:
+            stream = b""
+        else:
+            escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            stream = b"BT /F1 12 Tf 72 720 Td (" + escaped.encode("latin-1") + b") Tj ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(page_refs) + b"] /Count %d >>" % len(pages)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Writes a PDF built by build_pdf to a temporary file and returns its path."""
+    def _make_pdf(pages: List[Optional[str]], name: str = "sample.pdf") -> str:
+        path = tmp_path / name
+        path.write_bytes(build_pdf(pages))
+        return str(path)
+    return _make_pdf
+
+
+@pytest_asyncio.fixture
+async def db_session():
+    """
+    Session on the configured database (ASYNC_DATABASE_URL) for the tests that
+    need a real one; they are skipped when it is not configured or not reachable.
+    """
+    if database.async_session_local is None:
+        pytest.skip("ASYNC_DATABASE_URL is not configured.")
+    async with database.async_session_local() as session:
+        try:
+            await session.execute(text("SELECT 1"))
+        except Exception as e:
+            pytest.skip(f"Database not reachable: {e}")
+        yield session
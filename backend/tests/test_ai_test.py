@@ -5,21 +5,21 @@ import sys
 from pathlib import Path
 import pytest
 
-# Add application root directory to path
-app_root_dir = str(Path(__file__).parent.parent)
-if app_root_dir not in sys.path:
-    sys.path.insert(0, app_root_dir)
+# Add backend directory to path
+backend_dir = str(Path(__file__).parent.parent)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
 
 # Import app and settings
-from main import app
-from core.config import settings
-from modules.ai_test.v1.schemas import TextInput, AIResponse
+from app.main import app
+from app.core.config import settings
+from app.modules.ai_test.v1.schemas import TextInput, AIResponse
 
 # Create Test Client
 client = TestClient(app)
 
 # Define the target for mocking
-LLM_MOCK_TARGET = "modules.ai_test.v1.endpoints.llm"
+LLM_MOCK_TARGET = "app.modules.ai_test.v1.endpoints.llm"
 
 # Helper function to create mock AI message
 def create_mock_ai_message(content: str):
@@ -79,4 +79,20 @@ def test_ping_ai_model_llm_error(mock_llm):
     response = client.post(ping_url, json=test_payload.model_dump())
 
     assert response.status_code == 500
-    assert "An error occurred while processing" in response.json().get("detail", "")
\ No newline at end of file
+    assert "An error occurred while processing" in response.json().get("detail", "")
+
+# Test case for when the provider rejects the call with a 429
+@patch(LLM_MOCK_TARGET)
+def test_ping_ai_model_rate_limited(mock_llm):
+    """ A 429 from the provider is returned as 503 with Retry-After. """
+    from google.api_core.exceptions import ResourceExhausted
+
+    async def mock_ainvoke_429(*args, **kwargs):
+        raise ResourceExhausted("Resource has been exhausted (e.g. check quota).")
+    mock_llm.ainvoke = mock_ainvoke_429
+
+    ping_url = f"{settings.API_PREFIX}/ai_test/v1/ping"
+    response = client.post(ping_url, json=TextInput(text="Test ping").model_dump())
+
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
@@ -1,4 +1,5 @@
 import pytest
+import pytest_asyncio
 from httpx import AsyncClient
 from fastapi import status
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,7 +13,7 @@ from app.models import user as user_model
 from app.core.security import hash_password # For creating test users directly
 from app.models.enums import UserRole
 
-@pytest.fixture(scope="function") # function scope for db interactions
+@pytest_asyncio.fixture(scope="function") # function scope for db interactions
 async def async_client() -> AsyncClient:
     async with AsyncClient(app=app, base_url="http://test") as client:
         yield client
@@ -144,4 +145,3 @@ async def test_list_users_by_admin_pagination(async_client: AsyncClient, db_sess
     # Then get page 2 (skip=2, limit=2) and check items.
     # TODO: Add test for listing attempt by non-admin (403)
     # TODO: Add test for invalid pagination params (e.g. limit > 100, negative skip)
-```
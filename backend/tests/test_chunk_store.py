@@ -0,0 +1,47 @@
+# backend/tests/test_chunk_store.py
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.utils.chunk_store import copy_chunk_rows, chunk_records, CHUNK_COLUMNS
+from app.utils.chunking import TextChunk
+
+DRIVER_MOCK_TARGET = "app.utils.chunk_store._driver_connection"
+
+
+def make_records(n):
+    chunks = [TextChunk(i, 1, i * 10, i * 10 + 9, 3, f"chunk {i}") for i in range(n)]
+    return chunk_records("f" * 64, "docling-test", "v1-t8-o2", chunks)
+
+
+def test_chunk_records_follow_column_order():
+    record = make_records(1)[0]
+    assert len(record) == len(CHUNK_COLUMNS)
+    assert dict(zip(CHUNK_COLUMNS, record))["content"] == "chunk 0"
+
+
+@pytest.mark.asyncio
+async def test_copy_chunk_rows_uses_copy_in_batches():
+    """ With asyncpg, rows are written with COPY, one call per batch. """
+    driver = MagicMock()
+    driver.copy_records_to_table = AsyncMock()
+    session = MagicMock()
+    session.execute = AsyncMock()
+    with patch(DRIVER_MOCK_TARGET, new_callable=AsyncMock, return_value=driver):
+        used_copy = await copy_chunk_rows(session, make_records(25), batch_size=10)
+    assert used_copy is True
+    batches = [call.kwargs["records"] for call in driver.copy_records_to_table.await_args_list]
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert driver.copy_records_to_table.await_args.args == ("document_chunks",)
+    assert driver.copy_records_to_table.await_args.kwargs["columns"] == CHUNK_COLUMNS
+    session.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_copy_chunk_rows_falls_back_to_multi_row_insert():
+    """ Other drivers get one multi-row INSERT per batch. """
+    session = MagicMock()
+    session.execute = AsyncMock()
+    with patch(DRIVER_MOCK_TARGET, new_callable=AsyncMock, return_value=object()):
+        used_copy = await copy_chunk_rows(session, make_records(25), batch_size=10)
+    assert used_copy is False
+    assert session.execute.await_count == 3
@@ -0,0 +1,67 @@
+# backend/tests/test_chunking.py
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.module_config import ModuleChunkingConfig
+from app.utils.chunking import chunk_document, chunker_key, get_module_chunking, SECTION_SEPARATOR
+from app.utils.tokenizer import count_tokens, token_spans
+
+PARAGRAPH = "O periciando apresenta lombalgia crônica. Refere dor irradiada para o membro inferior esquerdo."
+
+
+def test_count_tokens_splits_long_words_and_punctuation():
+    assert count_tokens("") == 0
+    assert count_tokens("dor lombar.") == 3
+    # 'incapacidade' has 12 word characters: two pieces
+    assert count_tokens("incapacidade") == 2
+    assert token_spans("a, b") == [(0, 1), (1, 2), (3, 4)]
+
+
+def test_chunks_are_token_bounded_and_overlap():
+    sections = [(page, f"Página {page}. {PARAGRAPH}") for page in range(1, 21)]
+    config = ModuleChunkingConfig(max_tokens=50, overlap_tokens=10)
+    chunks = chunk_document(sections, config)
+    assert len(chunks) > 1
+    assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.token_count <= 50
+        # Consecutive chunks overlap, and always move forward
+        assert previous.char_start < chunk.char_start < previous.char_end
+
+
+def test_chunk_offsets_reassemble_document():
+    sections = [(1, PARAGRAPH), (2, ""), (3, PARAGRAPH.upper())]
+    document = SECTION_SEPARATOR.join(text for _, text in sections if text)
+    chunks = chunk_document(sections, ModuleChunkingConfig(max_tokens=12, overlap_tokens=3))
+    for chunk in chunks:
+        assert document[chunk.char_start:chunk.char_end] == chunk.text
+        assert count_tokens(chunk.text) == chunk.token_count
+    assert chunks[0].char_start == 0
+    assert chunks[-1].char_end == len(document)
+    # Each chunk records the page it starts on
+    assert chunks[0].page_number == 1
+    assert chunks[-1].page_number == 3
+
+
+def test_chunks_prefer_sentence_boundaries():
+    chunks = chunk_document([(1, PARAGRAPH * 4)], ModuleChunkingConfig(max_tokens=20, overlap_tokens=0))
+    assert all(chunk.text.endswith(".") for chunk in chunks)
+
+
+def test_empty_document_has_no_chunks():
+    assert chunk_document([(1, ""), (2, "   ")], ModuleChunkingConfig(max_tokens=10)) == []
+
+
+def test_chunking_config_validation():
+    with pytest.raises(ValidationError):
+        ModuleChunkingConfig(max_tokens=10, overlap_tokens=10)
+    assert chunker_key(ModuleChunkingConfig(max_tokens=512, overlap_tokens=64)).endswith("-t512-o64")
+
+
+def test_get_module_chunking_reads_modules_yaml():
+    config = get_module_chunking("gerador_quesitos")
+    assert (config.max_tokens, config.overlap_tokens) == (512, 64)
+    # Modules without a `chunking` key use the defaults from the settings
+    from app.core.config import settings
+    default = get_module_chunking("info")
+    assert (default.max_tokens, default.overlap_tokens) == (settings.CHUNK_MAX_TOKENS, settings.CHUNK_OVERLAP_TOKENS)
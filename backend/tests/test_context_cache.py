@@ -0,0 +1,147 @@
+# backend/tests/test_context_cache.py
+import asyncio
+
+import pytest
+
+from app.core.context_cache import ContextCache, ContextCacheProvider, LocalContextCacheProvider
+
+PREFIXO = "Instruções fixas do prompt. " * 50
+
+
+class Relogio:
+    """Controllable clock shared by the cache and the stub provider."""
+    def __init__(self):
+        self.agora = 1_000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+class ProvedorContado(LocalContextCacheProvider):
+    """Stub provider that counts calls and can be made to fail."""
+    def __init__(self, clock):
+        super().__init__(clock)
+        self.criados = 0
+        self.renovados = 0
+        self.falhar = False
+
+    async def create(self, model, prefix, ttl_seconds):
+        if self.falhar:
+            raise RuntimeError("provider unavailable")
+        self.criados += 1
+        await asyncio.sleep(0.01)
+        return await super().create(model, prefix, ttl_seconds)
+
+    async def refresh(self, name, ttl_seconds):
+        self.renovados += 1
+        return await super().refresh(name, ttl_seconds)
+
+
+@pytest.fixture
+def relogio():
+    return Relogio()
+
+
+@pytest.fixture
+def provedor(relogio):
+    return ProvedorContado(relogio)
+
+
+def novo_cache(provedor, relogio, **opcoes):
+    return ContextCache(provedor, **{"ttl_seconds": 600, "refresh_margin_seconds": 60, "min_tokens": 10, "clock": relogio, **opcoes})
+
+
+@pytest.mark.asyncio
+async def test_handle_is_created_lazily_and_reused(provedor, relogio):
+    cache = novo_cache(provedor, relogio)
+    assert provedor.entries == {}
+
+    primeiro = await cache.handle("modelo", PREFIXO)
+    segundo = await cache.handle("modelo", PREFIXO)
+    assert primeiro == segundo
+    assert provedor.resolve(primeiro) == PREFIXO
+    assert provedor.criados == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    # Another model or prefix is another cache entry
+    assert await cache.handle("outro-modelo", PREFIXO) != primeiro
+    assert await cache.handle("modelo", PREFIXO + "v2") != primeiro
+    assert provedor.criados == 3
+
+
+@pytest.mark.asyncio
+async def test_handle_is_refreshed_before_it_expires(provedor, relogio):
+    cache = novo_cache(provedor, relogio)
+    nome = await cache.handle("modelo", PREFIXO)
+
+    # Inside the refresh margin: same handle, TTL extended at the provider
+    relogio.agora += 600 - 30
+    assert await cache.handle("modelo", PREFIXO) == nome
+    assert provedor.renovados == 1 and provedor.criados == 1
+
+    relogio.agora += 500
+    assert await cache.handle("modelo", PREFIXO) == nome
+    assert provedor.renovados == 1
+    assert provedor.resolve(nome) == PREFIXO
+
+
+@pytest.mark.asyncio
+async def test_expired_or_invalidated_handle_is_recreated(provedor, relogio):
+    cache = novo_cache(provedor, relogio)
+    nome = await cache.handle("modelo", PREFIXO)
+
+    relogio.agora += 601
+    novo = await cache.handle("modelo", PREFIXO)
+    assert novo != nome and provedor.criados == 2
+
+    cache.invalidate(novo)
+    assert await cache.handle("modelo", PREFIXO) not in (nome, novo)
+    assert provedor.criados == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_requests_create_one_entry(provedor, relogio):
+    cache = novo_cache(provedor, relogio)
+    nomes = await asyncio.gather(*(cache.handle("modelo", PREFIXO) for _ in range(5)))
+    assert len(set(nomes)) == 1
+    assert provedor.criados == 1
+
+
+@pytest.mark.asyncio
+async def test_short_prefixes_and_provider_errors_are_sent_uncached(provedor, relogio):
+    cache = novo_cache(provedor, relogio, min_tokens=10_000)
+    assert await cache.handle("modelo", PREFIXO) is None
+    assert await cache.handle("modelo", "") is None
+    assert provedor.criados == 0
+
+    provedor.falhar = True
+    cache = novo_cache(provedor, relogio)
+    assert await cache.handle("modelo", PREFIXO) is None
+    assert cache.stats()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_creation_is_not_retried_until_the_backoff_ends(provedor, relogio):
+    provedor.falhar = True
+    cache = novo_cache(provedor, relogio, failure_backoff_seconds=300)
+    for _ in range(3):
+        assert await cache.handle("modelo", PREFIXO) is None
+    assert cache.stats()["errors"] == 1 and cache.stats()["skipped"] == 2
+
+    # Other models are tried on their own
+    assert await cache.handle("outro-modelo", PREFIXO) is None
+    assert cache.stats()["errors"] == 2
+
+    provedor.falhar = False
+    relogio.agora += 301
+    assert await cache.handle("modelo", PREFIXO) is not None
+    assert provedor.criados == 1
+
+
+def test_providers_must_implement_create_and_refresh():
+    class SemRefresh(ContextCacheProvider):
+        async def create(self, model, prefix, ttl_seconds):
+            raise RuntimeError
+
+    with pytest.raises(TypeError):
+        SemRefresh()
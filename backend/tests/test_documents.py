@@ -0,0 +1,81 @@
+# backend/tests/test_documents.py
+from fastapi.testclient import TestClient
+from unittest.mock import patch, AsyncMock, MagicMock
+import pytest
+
+from app.main import app
+from app.core.config import settings
+from app.core.dependencies import get_current_active_principal
+from app.utils.pdf_processor import EXTRACTOR_VERSION
+
+client = TestClient(app)
+
+LOOKUP_MOCK_TARGET = "app.modules.documents.v1.endpoints.lookup_extraction"
+FILE_HASH = "a" * 64
+
+@pytest.fixture
+def authenticated_user():
+    app.dependency_overrides[get_current_active_principal] = lambda: MagicMock(is_active=True)
+    yield
+    app.dependency_overrides.pop(get_current_active_principal, None)
+
+@patch(LOOKUP_MOCK_TARGET, new_callable=AsyncMock)
+def test_get_extracted_document_hit(mock_lookup, authenticated_user):
+    """ Stored sections are returned for a known hash. """
+    mock_lookup.return_value = [(1, "Seção 1."), (None, "Seção 2.")]
+    response = client.get(f"{settings.API_PREFIX}/documents/v1/{FILE_HASH}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sections"] == [{"page_number": 1, "text": "Seção 1."}, {"page_number": None, "text": "Seção 2."}]
+    assert data["extractor_version"] == EXTRACTOR_VERSION
+    mock_lookup.assert_awaited_once_with(FILE_HASH, EXTRACTOR_VERSION)
+
+@patch(LOOKUP_MOCK_TARGET, new_callable=AsyncMock, return_value=None)
+def test_get_extracted_document_miss(mock_lookup, authenticated_user):
+    """ Unknown hashes return 404. """
+    response = client.get(f"{settings.API_PREFIX}/documents/v1/{FILE_HASH}")
+    assert response.status_code == 404
+
+def test_get_extracted_document_invalid_hash(authenticated_user):
+    """ Hashes that are not 64 hex characters are rejected. """
+    response = client.get(f"{settings.API_PREFIX}/documents/v1/not-a-hash")
+    assert response.status_code == 422
+
+def test_get_extracted_document_requires_auth():
+    """ The endpoint requires a bearer token. """
+    response = client.get(f"{settings.API_PREFIX}/documents/v1/{FILE_HASH}")
+    assert response.status_code == 401
+
+PROGRESS_MOCK_TARGET = "app.modules.documents.v1.endpoints.get_extraction_progress"
+EXISTS_MOCK_TARGET = "app.modules.documents.v1.endpoints.has_extraction"
+
+@patch(EXISTS_MOCK_TARGET, new_callable=AsyncMock, return_value=False)
+@patch(PROGRESS_MOCK_TARGET, new_callable=AsyncMock, return_value=(120, 600))
+def test_get_extraction_status_in_progress(mock_progress, mock_lookup, authenticated_user):
+    """ An interrupted extraction reports its checkpointed pages. """
+    response = client.get(f"{settings.API_PREFIX}/documents/v1/{FILE_HASH}/status")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["complete"] is False
+    assert (data["pages_done"], data["pages_total"]) == (120, 600)
+    mock_progress.assert_awaited_once_with(FILE_HASH, EXTRACTOR_VERSION)
+
+@patch(LOOKUP_MOCK_TARGET, new_callable=AsyncMock)
+@patch(EXISTS_MOCK_TARGET, new_callable=AsyncMock, return_value=True)
+@patch(PROGRESS_MOCK_TARGET, new_callable=AsyncMock, return_value=(3, 3))
+def test_get_extraction_status_complete(mock_progress, mock_exists, mock_lookup, authenticated_user):
+    """ Completion is checked without loading the stored text. """
+    response = client.get(f"{settings.API_PREFIX}/documents/v1/{FILE_HASH}/status")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["complete"] is True
+    assert (data["pages_done"], data["pages_total"]) == (3, 3)
+    mock_exists.assert_awaited_once_with(FILE_HASH, EXTRACTOR_VERSION)
+    mock_lookup.assert_not_awaited()
+
+@patch(EXISTS_MOCK_TARGET, new_callable=AsyncMock, return_value=False)
+@patch(PROGRESS_MOCK_TARGET, new_callable=AsyncMock, return_value=None)
+def test_get_extraction_status_unknown(mock_progress, mock_lookup, authenticated_user):
+    """ Hashes never extracted return 404. """
+    response = client.get(f"{settings.API_PREFIX}/documents/v1/{FILE_HASH}/status")
+    assert response.status_code == 404
@@ -0,0 +1,57 @@
+# backend/tests/test_embeddings.py
+import math
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.utils.embeddings import HashingEmbedder, EMBEDDING_DIMENSIONS
+from app.utils.chunk_search import ChunkFilters, similar_chunks_query
+
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+@pytest.mark.asyncio
+async def test_hashing_embedder_is_deterministic_and_normalised():
+    embedder = HashingEmbedder()
+    first, second = await embedder.embed_documents(["Lombalgia crônica com irradiação.", "Lombalgia crônica com irradiação."])
+    assert first == second
+    assert len(first) == EMBEDDING_DIMENSIONS
+    assert math.isclose(math.sqrt(sum(x * x for x in first)), 1.0)
+    assert await HashingEmbedder().embed_query("Lombalgia crônica com irradiação.") == first
+
+
+@pytest.mark.asyncio
+async def test_hashing_embedder_ranks_related_text_higher():
+    embedder = HashingEmbedder()
+    query = await embedder.embed_query("dor lombar crônica")
+    related, unrelated = await embedder.embed_documents([
+        "O autor apresenta dor lombar crônica há cinco anos.",
+        "Perda auditiva bilateral induzida por ruído ocupacional.",
+    ])
+    assert cosine(query, related) > cosine(query, unrelated)
+
+
+@pytest.mark.asyncio
+async def test_hashing_embedder_empty_text():
+    assert await HashingEmbedder(dimensions=8).embed_query("") == [0.0] * 8
+
+
+def test_similar_chunks_query_uses_cosine_distance_and_filters():
+    query = similar_chunks_query([0.1] * EMBEDDING_DIMENSIONS, 5, "hashing-768", ChunkFilters(file_hashes=["a" * 64], chunker="v1-t512-o64"))
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert "<=>" in sql
+    assert "document_chunks.file_hash IN" in sql
+    assert "document_chunks.chunker =" in sql
+    # Restricted to some files: exact ranking of their chunks, not a post-filtered index scan
+    assert "candidates AS MATERIALIZED" in sql
+    assert "ORDER BY candidates.distance" in sql
+    assert "LIMIT" in sql
+
+
+def test_similar_chunks_query_without_file_filter_uses_the_index_ordering():
+    query = similar_chunks_query([0.1] * EMBEDDING_DIMENSIONS, 5, "hashing-768", ChunkFilters(chunker="v1-t512-o64"))
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert "MATERIALIZED" not in sql
+    assert "ORDER BY distance" in sql
+    assert "LIMIT" in sql
@@ -0,0 +1,45 @@
+# backend/tests/test_extraction_cache.py
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.utils import extraction_cache
+
+
+@pytest.mark.asyncio
+async def test_large_extractions_are_stored_in_batches():
+    """ Each INSERT stays under the bind parameter limit; all batches share one transaction. """
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    sections = [(index // 10 + 1, f"Seção {index}") for index in range(2 * extraction_cache.STORE_BATCH_ROWS + 5)]
+    with patch("app.utils.extraction_cache.get_db_contextmanager", session):
+        await extraction_cache.store_extraction("a" * 64, "v1", sections)
+
+    sizes = [len(call.args[0].compile().params) for call in db.execute.await_args_list]
+    assert len(sizes) == 3
+    assert max(sizes) <= 5 * extraction_cache.STORE_BATCH_ROWS < 32767
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_has_extraction_does_not_load_the_text():
+    result = MagicMock()
+    result.first.return_value = (1,)
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    with patch("app.utils.extraction_cache.get_db_contextmanager", session):
+        assert await extraction_cache.has_extraction("a" * 64, "v1") is True
+    sql = str(db.execute.await_args.args[0])
+    assert "content" not in sql and "LIMIT" in sql
@@ -0,0 +1,31 @@
+# backend/tests/test_extraction_checkpoints.py
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.utils import extraction_checkpoints
+
+
+@pytest.mark.asyncio
+async def test_many_pages_are_checkpointed_in_batches():
+    """ Each INSERT stays under the bind parameter limit; all batches share one transaction. """
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    page_count = extraction_checkpoints.STORE_BATCH_ROWS + 1
+    pages = {page_number: [f"Página {page_number}"] for page_number in range(1, page_count + 1)}
+    with patch("app.utils.extraction_checkpoints.get_db_contextmanager", session):
+        await extraction_checkpoints.store_page_checkpoints(
+            "a" * 64, "v1", page_count, extraction_checkpoints.METHOD_OCR, pages
+        )
+
+    sizes = [len(call.args[0].compile().params) for call in db.execute.await_args_list]
+    assert len(sizes) == 2
+    assert max(sizes) <= 6 * extraction_checkpoints.STORE_BATCH_ROWS < 32767
+    db.commit.assert_awaited_once()
@@ -0,0 +1,96 @@
+# backend/tests/test_extraction_executor.py
+import asyncio
+import os
+import time
+import pytest
+
+from app.utils.extraction_executor import (
+    ExtractionExecutor,
+    ExtractionQueueFullError,
+    ExtractionTimeoutError,
+)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A killed child may linger as a zombie until reaped
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split()[2] != "Z"
+    except FileNotFoundError:
+        return False
+
+@pytest.mark.asyncio
+async def test_run_returns_result_from_worker_process():
+    """ Jobs run in a separate process and the result comes back to the loop. """
+    executor = ExtractionExecutor(max_workers=1, max_queue=1, job_timeout=30)
+    try:
+        worker_pid = await executor.run(os.getpid)
+        assert worker_pid != os.getpid()
+        stats = executor.stats()
+        assert stats["completed"] == 1
+        assert stats["busy_workers"] == 0
+    finally:
+        executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_job():
+    """ A long job does not block other coroutines. """
+    executor = ExtractionExecutor(max_workers=1, max_queue=1, job_timeout=30)
+    try:
+        job = asyncio.create_task(executor.run(time.sleep, 1.0))
+        started = time.monotonic()
+        await asyncio.sleep(0.05)
+        assert time.monotonic() - started < 0.5
+        assert executor.stats()["busy_workers"] == 1
+        await job
+    finally:
+        executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_queue_full_rejects_with_retry_after():
+    """ Once workers and queue are full, new jobs get 503 with Retry-After. """
+    executor = ExtractionExecutor(max_workers=1, max_queue=1, job_timeout=30, retry_after=12)
+    try:
+        running = asyncio.create_task(executor.run(time.sleep, 0.5))
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(executor.run(time.sleep, 0))
+        await asyncio.sleep(0)
+        assert executor.stats()["queued_jobs"] == 1
+
+        with pytest.raises(ExtractionQueueFullError) as exc_info:
+            await executor.run(time.sleep, 0)
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers["Retry-After"] == "12"
+
+        await asyncio.gather(running, waiting)
+        stats = executor.stats()
+        assert stats["rejected"] == 1
+        assert stats["completed"] == 2
+    finally:
+        executor.shutdown()
+
+@pytest.mark.asyncio
+async def test_timeout_kills_stuck_worker_and_slot_recovers():
+    """ A job over its timeout is killed and the slot works again afterwards. """
+    executor = ExtractionExecutor(max_workers=1, max_queue=1, job_timeout=30)
+    try:
+        stuck_pid = await executor.run(os.getpid)
+        with pytest.raises(ExtractionTimeoutError):
+            await executor.run(time.sleep, 30, timeout=0.3)
+
+        for _ in range(50):
+            if not _pid_alive(stuck_pid):
+                break
+            await asyncio.sleep(0.05)
+        assert not _pid_alive(stuck_pid)
+
+        new_pid = await executor.run(os.getpid)
+        assert new_pid != stuck_pid
+        stats = executor.stats()
+        assert stats["timed_out"] == 1
+        assert stats["workers_killed"] == 1
+    finally:
+        executor.shutdown()
@@ -4,7 +4,12 @@ from unittest.mock import patch, MagicMock, AsyncMock
 import sys
 from pathlib import Path
 import pytest
+import asyncio
+import json
+import httpx
 from io import BytesIO
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
 
 # Add application root directory to path
 app_root_dir = str(Path(__file__).parent.parent / "app")
@@ -15,15 +20,19 @@ if app_root_dir not in sys.path:
 from main import app
 from core.config import settings
 from modules.gerador_quesitos.v1.esquemas import RespostaQuesitos
+from app.utils.pdf_processor import ExtractedSection
+from app.core.llm_clients import get_chat_client_registry
 
 # Create Test Client
 client = TestClient(app)
 
 # Define mock targets
-DEFAULT_LLM_MOCK_TARGET = "modules.gerador_quesitos.v1.endpoints.default_llm"
-PROCESSOR_MOCK_TARGET = "modules.gerador_quesitos.v1.endpoints.processar_pdfs_upload"
-PROMPT_LOAD_TARGET = "modules.gerador_quesitos.v1.endpoints.prompt_template_string"
-DYNAMIC_LLM_INIT_TARGET = "modules.gerador_quesitos.v1.endpoints.ChatGoogleGenerativeAI"
+DEFAULT_LLM_MOCK_TARGET = "app.modules.gerador_quesitos.v1.endpoints.default_llm"
+PROCESSOR_MOCK_TARGET = "app.modules.gerador_quesitos.v1.endpoints.iter_extracted_sections"
+COUNT_MOCK_TARGET = "app.modules.gerador_quesitos.v1.contexto.count_embedded_chunks"
+RESULT_CACHE_MODULE = "app.modules.gerador_quesitos.v1.resultado_cache"
+PROMPT_LOAD_TARGET = "app.modules.gerador_quesitos.v1.endpoints.prompt_template_string"
+DYNAMIC_LLM_INIT_TARGET = "app.core.llm_clients.ChatGoogleGenerativeAI"
 
 # Helper function to create mock AI message
 def create_mock_ai_message(content: str):
@@ -31,6 +40,40 @@ def create_mock_ai_message(content: str):
     mock_msg.content = content
     return mock_msg
 
+# Makes the mocked extraction stream yield `text` as the single section of test.pdf
+def set_extracted_text(mock_iter_sections, text: str):
+    async def stream(files, chunking=None):
+        if text:
+            yield ExtractedSection("test.pdf", 1, text, "a" * 64)
+    mock_iter_sections.side_effect = stream
+
+# No database in the tests: the stored-chunk search fails and chunks are ranked in memory
+@pytest.fixture(autouse=True)
+def no_chunk_store():
+    with patch(COUNT_MOCK_TARGET, new_callable=AsyncMock, side_effect=RuntimeError("database unavailable")) as mock_count:
+        yield mock_count
+
+# In-memory replacement for the quesitos result cache, empty at the start of every test
+@pytest.fixture(autouse=True)
+def result_cache():
+    entradas = {}
+
+    async def lookup(namespace, keys):
+        return {key: entradas[key] for key in keys if key in entradas}
+
+    async def store(namespace, model, responses, ttl_seconds=None):
+        entradas.update(responses)
+
+    with patch(f"{RESULT_CACHE_MODULE}.lookup_llm_responses", side_effect=lookup), patch(f"{RESULT_CACHE_MODULE}.store_llm_responses", side_effect=store) as mock_store:
+        yield mock_store
+
+# Every test starts with an empty chat client registry
+@pytest.fixture(autouse=True)
+def empty_client_registry():
+    get_chat_client_registry().clear()
+    yield
+    get_chat_client_registry().clear()
+
 # --- Test Cases ---
 
 @patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
@@ -40,7 +83,7 @@ def test_gerar_quesitos_success_default_model(mock_llm, mock_processar_pdfs):
     """ Test successful generation using the default model setting. """
     if mock_llm is None: pytest.skip("Skipping test: Default LLM mock target None"); return
     mock_extracted_text = "Texto extraído mockado."
-    mock_processar_pdfs.return_value = mock_extracted_text
+    set_extracted_text(mock_processar_pdfs, mock_extracted_text)
     mock_response_content = "1. Quesito Gerado A?"
     mock_llm.ainvoke = AsyncMock(return_value=create_mock_ai_message(mock_response_content))
     url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar"
@@ -60,7 +103,7 @@ def test_gerar_quesitos_success_default_model(mock_llm, mock_processar_pdfs):
 def test_gerar_quesitos_success_specific_model(mock_default_llm, mock_processar_pdfs, mock_dynamic_llm_init):
     """ Test successful generation requesting a specific model. """
     mock_extracted_text = "Texto extraído mockado."
-    mock_processar_pdfs.return_value = mock_extracted_text
+    set_extracted_text(mock_processar_pdfs, mock_extracted_text)
     mock_response_content = "1. Quesito Gerado B?"
     mock_dynamic_instance = MagicMock()
     mock_dynamic_instance.ainvoke = AsyncMock(return_value=create_mock_ai_message(mock_response_content))
@@ -94,7 +137,7 @@ def test_gerar_quesitos_no_default_llm():
 def test_gerar_quesitos_llm_error(mock_llm, mock_processar_pdfs):
     """ Test endpoint when the default LLM call raises an exception. """
     if mock_llm is None: pytest.skip("Skipping test: Default LLM mock target None"); return
-    mock_processar_pdfs.return_value = "Texto extraído."
+    set_extracted_text(mock_processar_pdfs, "Texto extraído.")
     mock_llm.ainvoke = AsyncMock(side_effect=Exception("Simulated Google API Error"))
     url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar"
     form_data = {"beneficio": "BPC", "profissao": "Do Lar", "modelo_nome": "<Modelo Padrão>"}
@@ -121,7 +164,7 @@ def test_gerar_quesitos_processor_error(mock_llm, mock_processar_pdfs):
 @patch(DEFAULT_LLM_MOCK_TARGET)
 def test_gerar_quesitos_processor_returns_empty(mock_llm, mock_processar_pdfs):
     """ Test endpoint when the PDF processor returns empty text. """
-    mock_processar_pdfs.return_value = ""
+    set_extracted_text(mock_processar_pdfs, "")
     url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar"
     form_data = {"beneficio": "BPC", "profissao": "Do Lar", "modelo_nome": "<Modelo Padrão>"}
     files = {'files': ('test.pdf', BytesIO(b'pdf'), 'application/pdf')}
@@ -142,4 +185,210 @@ def test_gerar_quesitos_missing_form_data():
     files = {'files': ('test.pdf', BytesIO(b'pdf'), 'application/pdf')}
     # Missing beneficio, profissao, but including model_nome
     response = client.post(url, files=files, data={"modelo_nome": "<Modelo Padrão>"})
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+@patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+def test_gerar_quesitos_retrieval_mode_reports_chunks(mock_llm, mock_processar_pdfs):
+    """ By default only the most relevant chunks go into the prompt, and the response lists them. """
+    paragrafos = [
+        "Laudo ortopédico: lombalgia crônica com limitação para carregar peso, incompatível com o trabalho de pedreiro.",
+        "Certidão de casamento registrada no cartório da comarca em 1998.",
+        "Ressonância magnética mostra hérnia discal L4-L5 com compressão radicular.",
+    ] * 300
+    async def stream(files, chunking=None):
+        for pagina, texto in enumerate(paragrafos, start=1):
+            yield ExtractedSection("processo.pdf", pagina, texto, "b" * 64)
+    mock_processar_pdfs.side_effect = stream
+    mock_llm.ainvoke = AsyncMock(return_value=create_mock_ai_message("1. Quesito?"))
+    url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar"
+    form_data = {"beneficio": "Auxílio-Doença", "profissao": "Pedreiro", "modelo_nome": "<Modelo Padrão>", "top_k": "3"}
+    files = {'files': ('processo.pdf', BytesIO(b'pdf'), 'application/pdf')}
+    response = client.post(url, files=files, data=form_data)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["modo_contexto"] == "recuperacao"
+    assert 1 <= len(data["trechos_utilizados"]) <= 3
+    assert all(trecho["arquivo"] == "processo.pdf" and trecho["file_hash"] == "b" * 64 for trecho in data["trechos_utilizados"])
+    prompt = mock_llm.ainvoke.call_args.args[0][0].content
+    assert "--- TRECHO 1 | ARQUIVO: processo.pdf" in prompt
+    assert len(prompt) < len("\n\n".join(paragrafos))
+
+@patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+def test_gerar_quesitos_full_document_opt_in(mock_llm, mock_processar_pdfs):
+    """ modo_contexto=documento_completo sends the whole text and uses no chunks. """
+    set_extracted_text(mock_processar_pdfs, "Texto integral do processo.")
+    mock_llm.ainvoke = AsyncMock(return_value=create_mock_ai_message("1. Quesito?"))
+    url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar"
+    form_data = {"beneficio": "BPC", "profissao": "Do Lar", "modelo_nome": "<Modelo Padrão>", "modo_contexto": "documento_completo"}
+    files = {'files': ('test.pdf', BytesIO(b'pdf'), 'application/pdf')}
+    response = client.post(url, files=files, data=form_data)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["modo_contexto"] == "documento_completo"
+    assert data["trechos_utilizados"] == []
+    prompt = mock_llm.ainvoke.call_args.args[0][0].content
+    assert "--- CONTEÚDO DO ARQUIVO: test.pdf ---\n\nTexto integral do processo." in prompt
+
+def test_gerar_quesitos_invalid_context_mode():
+    url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar"
+    form_data = {"beneficio": "BPC", "profissao": "Do Lar", "modelo_nome": "<Modelo Padrão>", "modo_contexto": "tudo"}
+    files = {'files': ('test.pdf', BytesIO(b'pdf'), 'application/pdf')}
+    response = client.post(url, files=files, data=form_data)
+    assert response.status_code == 422
+
+# --- Streaming (SSE) ---
+
+def parse_sse(body: str):
+    """[(event, data)] of a text/event-stream body."""
+    eventos = []
+    for bloco in body.strip().split("\n\n"):
+        linhas = dict(linha.split(": ", 1) for linha in bloco.splitlines())
+        eventos.append((linhas["event"], json.loads(linhas["data"])))
+    return eventos
+
+@patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
+@patch(PROCESSOR_MOCK_TARGET)
+def test_gerar_quesitos_stream_emits_progress_tokens_and_response(mock_processar_pdfs):
+    """ The stream reports each stage, the tokens as generated and the final RespostaQuesitos. """
+    async def stream(files, chunking=None):
+        # The uploads must still be readable while the response is streamed
+        conteudo = (await files[0].read()).decode()
+        yield ExtractedSection("test.pdf", 1, conteudo, "a" * 64)
+    mock_processar_pdfs.side_effect = stream
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="1. Quesito A?\n2. Quesito B?")]))
+    url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar/stream"
+    form_data = {"beneficio": "BPC", "profissao": "Do Lar", "modelo_nome": "<Modelo Padrão>", "modo_contexto": "documento_completo"}
+    files = {'files': ('test.pdf', BytesIO('Laudo com CID M54.5.'.encode()), 'application/pdf')}
+    with patch(DEFAULT_LLM_MOCK_TARGET, llm):
+        response = client.post(url, files=files, data=form_data)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    eventos = parse_sse(response.text)
+    etapas = [dados["etapa"] for evento, dados in eventos if evento == "progresso"]
+    assert etapas == ["extracao", "extracao", "contexto", "contexto_concluido", "geracao"]
+    tokens = [dados["texto"] for evento, dados in eventos if evento == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == "1. Quesito A?\n2. Quesito B?"
+    evento_final, resposta = eventos[-1]
+    assert evento_final == "resposta"
+    assert RespostaQuesitos(**resposta).quesitos_texto == "1. Quesito A?\n2. Quesito B?"
+    assert resposta["modo_contexto"] == "documento_completo"
+
+@patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+def test_gerar_quesitos_stream_reports_errors_as_events(mock_llm, mock_processar_pdfs):
+    """ Failures after the stream started are sent as an 'erro' event with the HTTP status. """
+    set_extracted_text(mock_processar_pdfs, "")
+    url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar/stream"
+    form_data = {"beneficio": "BPC", "profissao": "Do Lar", "modelo_nome": "<Modelo Padrão>"}
+    files = {'files': ('test.pdf', BytesIO(b'pdf'), 'application/pdf')}
+    response = client.post(url, files=files, data=form_data)
+    assert response.status_code == 200
+    evento_final, dados = parse_sse(response.text)[-1]
+    assert evento_final == "erro"
+    assert dados["status"] == 422
+    mock_llm.astream.assert_not_called()
+
+@patch(DEFAULT_LLM_MOCK_TARGET, None)
+def test_gerar_quesitos_stream_no_default_llm():
+    """ An unavailable model is reported before the stream starts. """
+    url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar/stream"
+    form_data = {"beneficio": "BPC", "profissao": "Do Lar", "modelo_nome": "<Modelo Padrão>"}
+    files = {'files': ('test.pdf', BytesIO(b'pdf'), 'application/pdf')}
+    response = client.post(url, files=files, data=form_data)
+    assert response.status_code == 503
+
+# --- Result cache ---
+
+def post_gerar(beneficio="Auxílio-Doença", profissao="Pedreiro", **extra):
+    url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar"
+    form_data = {"beneficio": beneficio, "profissao": profissao, "modelo_nome": "<Modelo Padrão>", **extra}
+    files = {'files': ('test.pdf', BytesIO(b'pdf'), 'application/pdf')}
+    return client.post(url, files=files, data=form_data)
+
+@patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+def test_gerar_quesitos_repeat_request_served_from_cache(mock_llm, mock_processar_pdfs, result_cache):
+    """ The same case (normalised fields) is generated once, then answered from the cache. """
+    set_extracted_text(mock_processar_pdfs, "Laudo com CID M54.5.")
+    mock_llm.ainvoke = AsyncMock(return_value=create_mock_ai_message("1. Quesito?"))
+    primeira = post_gerar()
+    assert primeira.status_code == 200
+    assert primeira.json()["em_cache"] is False
+    assert result_cache.call_args.kwargs["ttl_seconds"] == settings.GERADOR_QUESITOS_RESULT_CACHE_TTL_SECONDS
+
+    repetida = post_gerar(beneficio="  auxílio-doença ", profissao="PEDREIRO")
+    assert repetida.status_code == 200
+    assert repetida.json()["em_cache"] is True
+    assert repetida.json()["quesitos_texto"] == "1. Quesito?"
+    assert repetida.json()["trechos_utilizados"] == primeira.json()["trechos_utilizados"]
+    mock_llm.ainvoke.assert_called_once()
+
+@patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+def test_gerar_quesitos_cache_bypass_and_key_fields(mock_llm, mock_processar_pdfs):
+    """ ignorar_cache regenerates; a different profissão or context mode is a different case. """
+    set_extracted_text(mock_processar_pdfs, "Laudo com CID M54.5.")
+    mock_llm.ainvoke = AsyncMock(side_effect=[create_mock_ai_message(f"Versão {n}") for n in range(1, 6)])
+    assert post_gerar().json()["quesitos_texto"] == "Versão 1"
+    assert post_gerar(ignorar_cache="true").json()["quesitos_texto"] == "Versão 2"
+    # The regenerated result replaced the cached one
+    assert post_gerar().json()["quesitos_texto"] == "Versão 2"
+    assert post_gerar(profissao="Costureira").json()["quesitos_texto"] == "Versão 3"
+    assert post_gerar(modo_contexto="documento_completo").json()["quesitos_texto"] == "Versão 4"
+    assert mock_llm.ainvoke.call_count == 4
+
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+def test_gerar_quesitos_cache_invalidated_by_prompt_change(mock_llm, mock_processar_pdfs):
+    """ Editing the prompt template makes every cached result a miss. """
+    set_extracted_text(mock_processar_pdfs, "Laudo com CID M54.5.")
+    mock_llm.ainvoke = AsyncMock(side_effect=[create_mock_ai_message("Antigo"), create_mock_ai_message("Novo")])
+    with patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}"):
+        assert post_gerar().json()["quesitos_texto"] == "Antigo"
+    with patch(PROMPT_LOAD_TARGET, "Prompt revisado: {pdf_content}, Ben: {beneficio}, Prof: {profissao}"):
+        resposta = post_gerar().json()
+    assert resposta["quesitos_texto"] == "Novo"
+    assert resposta["em_cache"] is False
+
+@patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+def test_gerar_quesitos_cache_disabled_with_zero_ttl(mock_llm, mock_processar_pdfs, result_cache):
+    set_extracted_text(mock_processar_pdfs, "Laudo com CID M54.5.")
+    mock_llm.ainvoke = AsyncMock(return_value=create_mock_ai_message("1. Quesito?"))
+    with patch("app.core.config.settings.GERADOR_QUESITOS_RESULT_CACHE_TTL_SECONDS", 0):
+        post_gerar()
+        assert post_gerar().json()["em_cache"] is False
+    assert mock_llm.ainvoke.call_count == 2
+    result_cache.assert_not_called()
+
+# --- Request coalescing ---
+
+@pytest.mark.asyncio
+@patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+async def test_gerar_quesitos_concurrent_identical_requests_share_one_generation(mock_llm, mock_processar_pdfs):
+    """ N identical requests in flight at the same time produce exactly one LLM call. """
+    set_extracted_text(mock_processar_pdfs, "Laudo com CID M54.5.")
+    async def slow_answer(messages):
+        await asyncio.sleep(0.2)
+        return create_mock_ai_message("1. Quesito?")
+    mock_llm.ainvoke = AsyncMock(side_effect=slow_answer)
+    url = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar"
+    form_data = {"beneficio": "BPC", "profissao": "Do Lar", "modelo_nome": "<Modelo Padrão>"}
+    async with httpx.AsyncClient(app=app, base_url="http://test") as async_client:
+        responses = await asyncio.gather(*(
+            async_client.post(url, files={'files': ('test.pdf', BytesIO(b'pdf'), 'application/pdf')}, data=form_data)
+            for _ in range(5)
+        ))
+    assert [response.status_code for response in responses] == [200] * 5
+    assert all(response.json()["quesitos_texto"] == "1. Quesito?" for response in responses)
+    mock_llm.ainvoke.assert_called_once()
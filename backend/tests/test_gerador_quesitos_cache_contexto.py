@@ -0,0 +1,151 @@
+# backend/tests/test_gerador_quesitos_cache_contexto.py
+from io import BytesIO
+from typing import List, Optional, Tuple
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict, Field
+
+from app.core.config import settings
+from app.core.context_cache import ContextCache, LocalContextCacheProvider
+from app.main import app
+from app.modules.gerador_quesitos.v1 import endpoints
+from app.modules.gerador_quesitos.v1.cache_contexto import prefixo_template
+from app.utils.pdf_processor import ExtractedSection
+
+PROCESSOR_MOCK_TARGET = "app.modules.gerador_quesitos.v1.endpoints.iter_extracted_sections"
+DEFAULT_LLM_MOCK_TARGET = "app.modules.gerador_quesitos.v1.endpoints.default_llm"
+CONTEXT_CACHE_TARGET = "app.modules.gerador_quesitos.v1.cache_contexto.get_context_cache"
+RESULT_CACHE_MODULE = "app.modules.gerador_quesitos.v1.resultado_cache"
+
+client = TestClient(app)
+
+
+class ModeloComCache(BaseChatModel):
+    """Local chat model that, like the provider, prepends the cached prefix named in `cached_content`."""
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    provedor: LocalContextCacheProvider
+    chamadas: List[Tuple[str, Optional[str]]] = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-context-cache-model"
+
+    def _prompt(self, messages, cached_content):
+        self.chamadas.append((messages[-1].content, cached_content))
+        prefixo = self.provedor.resolve(cached_content) if cached_content else ""
+        return prefixo + messages[-1].content
+
+    def _generate(self, messages, stop=None, run_manager=None, cached_content=None, **kwargs):
+        prompt = self._prompt(messages, cached_content)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"1. Quesito? ({len(prompt)})"))])
+
+    def _stream(self, messages, stop=None, run_manager=None, cached_content=None, **kwargs):
+        prompt = self._prompt(messages, cached_content)
+        for parte in ["1. Quesito? ", f"({len(prompt)})"]:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=parte))
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache():
+    with patch(f"{RESULT_CACHE_MODULE}.lookup_llm_responses", new_callable=AsyncMock, return_value={}), \
+         patch(f"{RESULT_CACHE_MODULE}.store_llm_responses", new_callable=AsyncMock):
+        yield
+
+
+@pytest.fixture
+def provedor():
+    return LocalContextCacheProvider()
+
+
+@pytest.fixture
+def cache(provedor):
+    cache = ContextCache(provedor, ttl_seconds=600, refresh_margin_seconds=60, min_tokens=1024)
+    with patch(CONTEXT_CACHE_TARGET, return_value=cache):
+        yield cache
+
+
+@pytest.fixture
+def llm(provedor):
+    llm = ModeloComCache(provedor=provedor)
+    with patch(DEFAULT_LLM_MOCK_TARGET, llm):
+        yield llm
+
+
+@pytest.fixture(autouse=True)
+def extracted_text():
+    async def stream(files, chunking=None):
+        yield ExtractedSection("test.pdf", 1, "Laudo com CID M54.5, lombalgia crônica.", "a" * 64)
+    with patch(PROCESSOR_MOCK_TARGET, side_effect=stream):
+        yield
+
+
+def post(path="/gerar", profissao="Pedreiro"):
+    return client.post(
+        f"{settings.API_PREFIX}/gerador_quesitos/v1{path}",
+        files={'files': ('test.pdf', BytesIO(b'pdf'), 'application/pdf')},
+        data={"beneficio": "BPC", "profissao": profissao, "modelo_nome": "<Modelo Padrão>", "modo_contexto": "documento_completo", "ignorar_cache": "true"},
+    )
+
+
+def test_template_prefix_holds_the_static_instructions():
+    template = endpoints.prompt_template_string
+    prefixo = prefixo_template(template)
+    assert "{" not in prefixo
+    assert len(prefixo) > 0.9 * len(template)
+    assert prefixo_template("Instruções\nDados: {beneficio}\n{pdf_content}") == "Instruções\n"
+
+
+def test_only_the_case_suffix_is_sent_with_the_cached_prefix(cache, provedor, llm):
+    primeira = post()
+    segunda = post(profissao="Costureira")
+    assert primeira.status_code == segunda.status_code == 200
+
+    (sufixo_1, nome_1), (sufixo_2, nome_2) = llm.chamadas
+    assert nome_1 == nome_2 is not None
+    assert sufixo_1.startswith("- Benefício pretendido: BPC")
+    assert "Profissão informada: Costureira" in sufixo_2
+    assert len(provedor.entries) == 1
+    assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+
+    # The model saw the same prompt as without the cache
+    tokens = primeira.json()["tokens"]
+    assert tokens["prefixo_em_cache"] > 1024
+    assert primeira.json()["quesitos_texto"] == f"1. Quesito? ({len(prefixo_template(endpoints.prompt_template_string)) + len(sufixo_1)})"
+
+
+def test_stream_uses_the_cached_prefix(cache, provedor, llm):
+    response = post("/gerar/stream")
+    assert response.status_code == 200
+    assert "event: resposta" in response.text
+    assert llm.chamadas[0][1] in provedor.entries
+
+
+def test_rejected_handle_falls_back_to_the_full_prompt(cache, provedor, llm):
+    assert post().status_code == 200
+    # The provider dropped the entry before its TTL
+    provedor.entries.clear()
+
+    response = post()
+    assert response.status_code == 200
+    assert response.json()["tokens"]["prefixo_em_cache"] == 0
+    prompt_completo, sem_cache = llm.chamadas[-1]
+    assert sem_cache is None
+    assert prompt_completo.startswith("# DESCRIÇÃO")
+
+    # The next request creates a new entry
+    assert post().status_code == 200
+    assert llm.chamadas[-1][1] in provedor.entries
+    assert cache.stats()["misses"] == 2
+
+
+def test_no_context_cache_sends_the_full_prompt(provedor, llm):
+    with patch(CONTEXT_CACHE_TARGET, return_value=None):
+        response = post()
+    assert response.status_code == 200
+    assert response.json()["tokens"]["prefixo_em_cache"] == 0
+    assert llm.chamadas[0][1] is None
@@ -0,0 +1,102 @@
+# backend/tests/test_gerador_quesitos_contexto.py
+import pytest
+from unittest.mock import patch, AsyncMock
+
+from app.modules.gerador_quesitos.v1 import contexto
+from app.modules.gerador_quesitos.v1.contexto import blocos_documento_completo, blocos_trechos, selecionar_trechos
+from app.schemas.module_config import ModuleChunkingConfig
+from app.utils.chunk_search import ChunkMatch
+from app.utils.chunking import chunker_key
+from app.utils.pdf_processor import ExtractedSection, EXTRACTOR_VERSION
+
+SEARCH_MOCK_TARGET = "app.modules.gerador_quesitos.v1.contexto.search_similar_chunks"
+COUNT_MOCK_TARGET = "app.modules.gerador_quesitos.v1.contexto.count_embedded_chunks"
+RANK_MOCK_TARGET = "app.modules.gerador_quesitos.v1.contexto._ranquear_em_memoria"
+CHUNKING = ModuleChunkingConfig(max_tokens=64, overlap_tokens=8)
+HASH_A, HASH_B = "a" * 64, "b" * 64
+SECOES = [ExtractedSection("a.pdf", 1, "Texto A.", HASH_A), ExtractedSection("b.pdf", 1, "Texto B.", HASH_B)]
+
+
+@pytest.mark.asyncio
+async def test_selecionar_trechos_uses_stored_chunks_in_document_order():
+    """ Stored chunks are filtered to the uploaded files and returned in reading order. """
+    matches = [
+        ChunkMatch(HASH_B, 4, 3, 900, 950, "lombalgia crônica", 0.9),
+        ChunkMatch(HASH_A, 7, 5, 400, 450, "hérnia de disco", 0.8),
+        ChunkMatch(HASH_A, 1, 1, 10, 60, "dor lombar", 0.7),
+    ]
+    with patch(COUNT_MOCK_TARGET, new_callable=AsyncMock, return_value={HASH_A: 8, HASH_B: 5}), \
+         patch(SEARCH_MOCK_TARGET, new_callable=AsyncMock, return_value=matches) as mock_search:
+        trechos = await selecionar_trechos(SECOES, "Auxílio-Doença", "Pedreiro", CHUNKING, top_k=3, orcamento_tokens=1000)
+    filtros = mock_search.await_args.kwargs["filters"]
+    assert filtros.file_hashes == [HASH_A, HASH_B]
+    assert filtros.extractor_version == EXTRACTOR_VERSION
+    assert filtros.chunker == chunker_key(CHUNKING)
+    assert mock_search.await_args.kwargs["k"] == 3
+    assert [(t.arquivo, t.chunk_index) for t in trechos] == [("a.pdf", 1), ("a.pdf", 7), ("b.pdf", 4)]
+
+
+@pytest.mark.asyncio
+async def test_selecionar_trechos_respects_token_budget():
+    """ Chunks that do not fit in the budget are dropped, most relevant first. """
+    matches = [ChunkMatch(HASH_A, i, 1, i * 100, i * 100 + 50, "palavra " * 30, 1.0 - i / 10) for i in range(5)]
+    with patch(COUNT_MOCK_TARGET, new_callable=AsyncMock, return_value={HASH_A: 5, HASH_B: 1}), \
+         patch(SEARCH_MOCK_TARGET, new_callable=AsyncMock, return_value=matches):
+        trechos = await selecionar_trechos(SECOES, "BPC", "Do Lar", CHUNKING, top_k=5, orcamento_tokens=70)
+    assert [t.chunk_index for t in trechos] == [0, 1]
+    assert sum(t.tokens for t in trechos) <= 70
+
+
+@pytest.mark.asyncio
+async def test_selecionar_trechos_falls_back_to_in_memory_ranking():
+    """ Without the chunk store, the uploaded text is chunked and ranked locally. """
+    secoes = [
+        ExtractedSection("a.pdf", 1, "Certidão de casamento do autor lavrada em cartório.", HASH_A),
+        ExtractedSection("a.pdf", 2, "Doença com incapacidade para o trabalho de pedreiro, conforme exames e tratamento.", HASH_A),
+    ]
+    config = ModuleChunkingConfig(max_tokens=12, overlap_tokens=0)
+    with patch(COUNT_MOCK_TARGET, new_callable=AsyncMock, side_effect=RuntimeError("no database")):
+        trechos = await selecionar_trechos(secoes, "Auxílio-Doença", "Pedreiro", config, top_k=1, orcamento_tokens=1000)
+    assert len(trechos) == 1
+    assert "pedreiro" in trechos[0].texto
+    assert trechos[0].pagina == 2
+
+
+@pytest.mark.asyncio
+async def test_selecionar_trechos_ranks_only_files_without_embeddings_in_memory():
+    """ Files with stored embeddings are searched in the database; only the others are embedded locally. """
+    secoes = [
+        ExtractedSection("a.pdf", 1, "Doença com incapacidade para o trabalho de pedreiro, conforme exames.", HASH_A),
+        ExtractedSection("b.pdf", 1, "Laudo de tratamento ortopédico do pedreiro por hérnia de disco.", HASH_B),
+    ]
+    config = ModuleChunkingConfig(max_tokens=64, overlap_tokens=0)
+    armazenado = ChunkMatch(HASH_A, 0, 1, 0, 70, secoes[0].text, 0.99)
+    with patch(COUNT_MOCK_TARGET, new_callable=AsyncMock, return_value={HASH_A: 1}), \
+         patch(SEARCH_MOCK_TARGET, new_callable=AsyncMock, return_value=[armazenado]) as mock_search, \
+         patch(RANK_MOCK_TARGET, wraps=contexto._ranquear_em_memoria) as mock_rank:
+        trechos = await selecionar_trechos(secoes, "Auxílio-Doença", "Pedreiro", config, top_k=3, orcamento_tokens=1000)
+    assert mock_search.await_args.kwargs["filters"].file_hashes == [HASH_A]
+    assert [s.file_hash for s in mock_rank.await_args.args[0]] == [HASH_B]
+    assert [(t.arquivo, t.chunk_index) for t in trechos] == [("a.pdf", 0), ("b.pdf", 0)]
+    assert trechos[0].score == 0.99
+
+
+@pytest.mark.asyncio
+async def test_selecionar_trechos_does_not_re_embed_stored_files_with_few_matches():
+    """ Fewer matches than top_k from stored files is not a reason to embed them again. """
+    armazenado = ChunkMatch(HASH_A, 0, 1, 0, 8, "Texto A.", 0.5)
+    with patch(COUNT_MOCK_TARGET, new_callable=AsyncMock, return_value={HASH_A: 1, HASH_B: 1}), \
+         patch(SEARCH_MOCK_TARGET, new_callable=AsyncMock, return_value=[armazenado]), \
+         patch(RANK_MOCK_TARGET, new_callable=AsyncMock) as mock_rank:
+        trechos = await selecionar_trechos(SECOES, "BPC", "Do Lar", CHUNKING, top_k=5, orcamento_tokens=1000)
+    mock_rank.assert_not_awaited()
+    assert [t.chunk_index for t in trechos] == [0]
+
+
+def test_blocos_trechos_and_documento_completo():
+    assert blocos_documento_completo(SECOES + [ExtractedSection("b.pdf", 2, "Mais B.", HASH_B)]) == [
+        "--- CONTEÚDO DO ARQUIVO: a.pdf ---\n\nTexto A.",
+        "--- CONTEÚDO DO ARQUIVO: b.pdf ---\n\nTexto B.",
+        "Mais B.",
+    ]
+    assert blocos_trechos([]) == []
@@ -0,0 +1,196 @@
+# backend/tests/test_gerador_quesitos_lote.py
+import asyncio
+import hashlib
+import json
+from io import BytesIO
+from typing import List
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+from app.core.config import settings
+from app.main import app
+from app.utils.pdf_processor import ExtractedSection
+
+LOTE_MODULE = "app.modules.gerador_quesitos.v1.lote"
+DEFAULT_LLM_MOCK_TARGET = "app.modules.gerador_quesitos.v1.endpoints.default_llm"
+PROMPT_LOAD_TARGET = "app.modules.gerador_quesitos.v1.endpoints.prompt_template_string"
+COUNT_MOCK_TARGET = "app.modules.gerador_quesitos.v1.contexto.count_embedded_chunks"
+RESULT_CACHE_MODULE = "app.modules.gerador_quesitos.v1.resultado_cache"
+URL = f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar/lote"
+
+client = TestClient(app)
+
+PDF_ENVIADO = b"%PDF enviado no lote"
+HASH_ENVIADO = hashlib.sha256(PDF_ENVIADO).hexdigest()
+HASH_A, HASH_B, HASH_C = ("a" * 64, "b" * 64, "c" * 64)
+ARMAZENADOS = {
+    HASH_A: [(1, "Laudo A: lombalgia crônica, CID M54.5.")],
+    HASH_B: [(1, "Laudo B: esclerose múltipla, CID G35."), (2, "Relatório B: fadiga incapacitante.")],
+    HASH_C: [(1, "Laudo C: depressão grave, CID F32.2.")],
+}
+
+
+class ModeloLento(BaseChatModel):
+    """Local chat model that takes a while to answer and records the prompts and the peak concurrency."""
+    prompts: List[str] = Field(default_factory=list)
+    ativas: int = 0
+    pico: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-slow-model"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError("ModeloLento is async only")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(messages[-1].content)
+        self.ativas += 1
+        self.pico = max(self.pico, self.ativas)
+        await asyncio.sleep(0.05)
+        self.ativas -= 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"1. Quesito? ({len(self.prompts)})"))])
+
+
+@pytest.fixture(autouse=True)
+def ambiente():
+    """Short template, no chunk store, in-memory result cache."""
+    entradas = {}
+
+    async def lookup(namespace, keys):
+        return {key: entradas[key] for key in keys if key in entradas}
+
+    async def store(namespace, model, responses, ttl_seconds=None):
+        entradas.update(responses)
+
+    with patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}"), \
+         patch(COUNT_MOCK_TARGET, new_callable=AsyncMock, side_effect=RuntimeError("database unavailable")), \
+         patch(f"{RESULT_CACHE_MODULE}.lookup_llm_responses", side_effect=lookup), \
+         patch(f"{RESULT_CACHE_MODULE}.store_llm_responses", side_effect=store):
+        yield
+
+
+@pytest.fixture
+def extracoes_armazenadas():
+    async def lookup(file_hash, extractor_version):
+        return ARMAZENADOS.get(file_hash)
+    with patch(f"{LOTE_MODULE}.lookup_extraction", side_effect=lookup) as mock_lookup:
+        yield mock_lookup
+
+
+@pytest.fixture
+def llm():
+    llm = ModeloLento()
+    with patch(DEFAULT_LLM_MOCK_TARGET, llm):
+        yield llm
+
+
+def parse_sse(body: str):
+    eventos = []
+    for bloco in body.strip().split("\n\n"):
+        linhas = dict(linha.split(": ", 1) for linha in bloco.splitlines())
+        eventos.append((linhas["event"], json.loads(linhas["data"])))
+    return eventos
+
+
+def caso(id, *file_hashes, beneficio="BPC", profissao="Pedreiro", **extra):
+    return {"id": id, "file_hashes": list(file_hashes), "beneficio": beneficio, "profissao": profissao, **extra}
+
+
+def post_lote(casos, files=None, **extra):
+    data = {"casos": json.dumps(casos), "modelo_nome": "<Modelo Padrão>", **extra}
+    return client.post(URL, data=data, files=files or [])
+
+
+def test_batch_loads_shared_documents_once_and_streams_every_case(extracoes_armazenadas, llm):
+    casos = [
+        caso("c1", HASH_A, HASH_B),
+        caso("c2", HASH_B, profissao="Costureira"),
+        caso("c3", HASH_A, HASH_C, beneficio="Auxílio-Doença", modo_contexto="documento_completo"),
+    ]
+    response = post_lote(casos)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    eventos = parse_sse(response.text)
+
+    assert eventos[0] == ("documentos", {"documentos": 3, "enviados": 0, "armazenados": 3, "referencias": 5})
+    assert sorted(call.args[0] for call in extracoes_armazenadas.call_args_list) == [HASH_A, HASH_B, HASH_C]
+
+    resultados = {dados["id"]: dados["resposta"] for evento, dados in eventos if evento == "resultado"}
+    assert set(resultados) == {"c1", "c2", "c3"}
+    assert resultados["c3"]["modo_contexto"] == "documento_completo"
+    assert len(llm.prompts) == 3
+    assert any("Laudo A" in prompt and "Laudo B" in prompt for prompt in llm.prompts)
+    assert eventos[-1][0] == "fim"
+    assert eventos[-1][1]["concluidos"] == 3 and eventos[-1][1]["falhas"] == 0
+
+
+def test_batch_respects_the_shared_concurrency_budget(extracoes_armazenadas, llm):
+    casos = [caso(f"c{numero}", HASH_A, profissao=f"Profissão {numero}") for numero in range(6)]
+    response = post_lote(casos, concorrencia="2")
+    assert response.status_code == 200
+    assert sum(1 for evento, _ in parse_sse(response.text) if evento == "resultado") == 6
+    assert llm.pico == 2
+
+
+def test_batch_identical_cases_share_one_generation(extracoes_armazenadas, llm):
+    casos = [caso("c1", HASH_A), caso("c2", HASH_A, beneficio=" bpc ")]
+    eventos = parse_sse(post_lote(casos).text)
+    resultados = [dados for evento, dados in eventos if evento == "resultado"]
+    assert len(resultados) == 2
+    assert len(llm.prompts) == 1
+    assert resultados[0]["resposta"]["quesitos_texto"] == resultados[1]["resposta"]["quesitos_texto"]
+
+
+def test_batch_reports_failed_cases_and_continues(extracoes_armazenadas, llm):
+    desconhecido = "d" * 64
+    eventos = parse_sse(post_lote([caso("ok", HASH_A), caso("faltando", HASH_A, desconhecido)]).text)
+    erros = [dados for evento, dados in eventos if evento == "erro"]
+    assert len(erros) == 1
+    assert erros[0]["id"] == "faltando"
+    assert erros[0]["status"] == 404
+    assert desconhecido in erros[0]["detail"]
+    assert [dados["id"] for evento, dados in eventos if evento == "resultado"] == ["ok"]
+    assert eventos[-1][1]["falhas"] == 1
+
+
+def test_batch_extracts_uploaded_pdfs_once(extracoes_armazenadas, llm):
+    async def stream(files, chunking=None, distinct=False):
+        vistos = set()
+        for file in files:
+            file_hash = hashlib.sha256(await file.read()).hexdigest()
+            if distinct and file_hash in vistos:
+                continue
+            vistos.add(file_hash)
+            yield ExtractedSection(file.filename, 1, "Laudo enviado: hérnia de disco.", file_hash)
+    arquivos = [
+        ("files", ("processo.pdf", BytesIO(PDF_ENVIADO), "application/pdf")),
+        ("files", ("processo.pdf", BytesIO(PDF_ENVIADO), "application/pdf")),
+    ]
+    with patch(f"{LOTE_MODULE}.iter_extracted_sections", side_effect=stream) as mock_extracao:
+        response = post_lote([caso("c1", HASH_ENVIADO, HASH_A), caso("c2", HASH_ENVIADO)], files=arquivos)
+    eventos = parse_sse(response.text)
+    assert mock_extracao.call_count == 1
+    assert len(mock_extracao.call_args.args[0]) == 2 and mock_extracao.call_args.kwargs["distinct"] is True
+    assert eventos[0][1] == {"documentos": 2, "enviados": 1, "armazenados": 1, "referencias": 3}
+    assert [call.args[0] for call in extracoes_armazenadas.call_args_list] == [HASH_A]
+    # The duplicated upload does not duplicate the document text in the prompt
+    assert all(prompt.count("Laudo enviado") == 1 for prompt in llm.prompts)
+
+
+@pytest.mark.parametrize("casos", [
+    "não é json",
+    json.dumps([]),
+    json.dumps([caso("c1", "xyz")]),
+    json.dumps([caso("c1", HASH_A), caso("c1", HASH_B)]),
+])
+def test_batch_rejects_invalid_cases(casos, llm):
+    response = client.post(URL, data={"casos": casos, "modelo_nome": "<Modelo Padrão>"})
+    assert response.status_code == 422
+    assert llm.prompts == []
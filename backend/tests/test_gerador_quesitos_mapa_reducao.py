@@ -0,0 +1,160 @@
+# backend/tests/test_gerador_quesitos_mapa_reducao.py
+import asyncio
+import hashlib
+from io import BytesIO
+from typing import List
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+from app.core.config import settings
+from app.main import app
+from app.modules.gerador_quesitos.v1.mapa_reducao import resumir_mapa_reducao
+from app.utils.llm_cache import llm_cache_key
+from app.utils.pdf_processor import ExtractedSection
+
+MODULE = "app.modules.gerador_quesitos.v1.mapa_reducao"
+PROCESSOR_MOCK_TARGET = "app.modules.gerador_quesitos.v1.endpoints.iter_extracted_sections"
+DEFAULT_LLM_MOCK_TARGET = "app.modules.gerador_quesitos.v1.endpoints.default_llm"
+PROMPT_LOAD_TARGET = "app.modules.gerador_quesitos.v1.endpoints.prompt_template_string"
+
+
+class FakeChatModel(BaseChatModel):
+    """Local chat model: answers each prompt with a deterministic summary and records the calls."""
+    prompts: List[str] = Field(default_factory=list)
+    ativas: int = 0
+    pico: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError("FakeChatModel is async only")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = messages[-1].content
+        self.prompts.append(prompt)
+        self.ativas += 1
+        self.pico = max(self.pico, self.ativas)
+        await asyncio.sleep(0.01)
+        self.ativas -= 1
+        if prompt.startswith("Prompt:"):
+            resposta = "1. Quesito?"
+        else:
+            resposta = f"RESUMO {hashlib.sha256(prompt.encode()).hexdigest()[:12]}"
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=resposta))])
+
+
+@pytest.fixture
+def llm_cache():
+    """In-memory replacement for the llm_cache_entries table."""
+    entradas = {}
+
+    async def lookup(namespace, keys):
+        return {key: entradas[(namespace, key)] for key in keys if (namespace, key) in entradas}
+
+    async def store(namespace, model, responses):
+        entradas.update({(namespace, key): response for key, response in responses.items()})
+
+    with patch(f"{MODULE}.lookup_llm_responses", side_effect=lookup), patch(f"{MODULE}.store_llm_responses", side_effect=store):
+        yield entradas
+
+
+def secoes_de(textos: List[str]) -> List[ExtractedSection]:
+    """One single-page file per text."""
+    return [
+        ExtractedSection(f"doc{numero}.pdf", 1, texto, hashlib.sha256(texto.encode()).hexdigest())
+        for numero, texto in enumerate(textos)
+    ]
+
+
+TEXTOS = [f"Documento {numero}: laudo com CID M54.5 e lombalgia crônica, exame número {numero}." for numero in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_summarises_in_parallel_under_the_cap(llm_cache):
+    llm = FakeChatModel()
+    resultado = await resumir_mapa_reducao(secoes_de(TEXTOS), "BPC", "Pedreiro", llm, "fake", tokens_por_chunk=64, concorrencia=3, fan_in=4)
+
+    # 10 chunk summaries, then 10 -> 3 -> 1
+    assert resultado.chunks == 10
+    assert resultado.niveis == 3
+    assert resultado.chamadas_llm == len(llm.prompts) == 14
+    assert resultado.respostas_em_cache == 0
+    assert resultado.resumo.startswith("RESUMO ")
+    assert llm.pico == 3
+    assert "[doc0.pdf, página 1]" in llm.prompts[0]
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_rerun_only_pays_for_changed_chunks(llm_cache):
+    argumentos = dict(tokens_por_chunk=64, concorrencia=3, fan_in=4)
+    primeiro = await resumir_mapa_reducao(secoes_de(TEXTOS), "BPC", "Pedreiro", FakeChatModel(), "fake", **argumentos)
+
+    llm = FakeChatModel()
+    repetido = await resumir_mapa_reducao(secoes_de(TEXTOS), "BPC", "Pedreiro", llm, "fake", **argumentos)
+    assert llm.prompts == []
+    assert repetido.respostas_em_cache == 14
+    assert repetido.resumo == primeiro.resumo
+
+    # One changed document: its chunk, its reduce group and the root
+    alterados = TEXTOS[:5] + ["Documento 5: novo laudo com CID G35 e esclerose múltipla."] + TEXTOS[6:]
+    llm = FakeChatModel()
+    alterado = await resumir_mapa_reducao(secoes_de(alterados), "BPC", "Pedreiro", llm, "fake", **argumentos)
+    assert alterado.chamadas_llm == len(llm.prompts) == 3
+    assert alterado.respostas_em_cache == 11
+    assert alterado.resumo != primeiro.resumo
+
+
+@pytest.mark.asyncio
+async def test_map_reduce_caches_finished_summaries_when_a_call_fails(llm_cache):
+    class FalhaNoDocumento3(FakeChatModel):
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            if "Documento 3:" in messages[-1].content:
+                raise RuntimeError("quota exceeded")
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+    with pytest.raises(RuntimeError, match="quota exceeded"):
+        await resumir_mapa_reducao(secoes_de(TEXTOS), "BPC", "Pedreiro", FalhaNoDocumento3(), "fake", tokens_por_chunk=64, fan_in=4)
+    assert len(llm_cache) == 9
+
+    llm = FakeChatModel()
+    resultado = await resumir_mapa_reducao(secoes_de(TEXTOS), "BPC", "Pedreiro", llm, "fake", tokens_por_chunk=64, fan_in=4)
+    assert resultado.respostas_em_cache == 9
+    assert resultado.chamadas_llm == 1 + 3 + 1
+
+
+def test_llm_cache_key_separates_parts():
+    assert llm_cache_key("ab", "c") != llm_cache_key("a", "bc")
+    assert llm_cache_key("modelo", "prompt") == llm_cache_key("modelo", "prompt")
+
+
+@patch(PROMPT_LOAD_TARGET, "Prompt: {pdf_content}, Ben: {beneficio}, Prof: {profissao}")
+@patch(PROCESSOR_MOCK_TARGET)
+def test_gerar_quesitos_map_reduce_mode(mock_iter_sections, llm_cache):
+    async def stream(files, chunking=None):
+        for secao in secoes_de(TEXTOS[:3]):
+            yield secao
+    mock_iter_sections.side_effect = stream
+    llm = FakeChatModel()
+    with patch(DEFAULT_LLM_MOCK_TARGET, llm), patch.object(settings, "GERADOR_QUESITOS_MAP_CHUNK_TOKENS", 64):
+        response = TestClient(app).post(
+            f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar",
+            files={'files': ('processo.pdf', BytesIO(b'pdf'), 'application/pdf')},
+            data={"beneficio": "BPC", "profissao": "Pedreiro", "modelo_nome": "<Modelo Padrão>", "modo_contexto": "mapa_reducao"},
+        )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["quesitos_texto"] == "1. Quesito?"
+    assert data["modo_contexto"] == "mapa_reducao"
+    assert data["mapa_reducao"] == {"chunks": 3, "niveis": 2, "chamadas_llm": 4, "respostas_em_cache": 0}
+    # The final prompt carries the evidence summary, not the documents
+    prompt_final = llm.prompts[-1]
+    assert prompt_final.startswith("Prompt: RESUMO ")
+    assert "Documento 0" not in prompt_final
@@ -0,0 +1,165 @@
+# backend/tests/test_gerador_quesitos_orcamento.py
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.main import app
+from app.modules.gerador_quesitos.v1.orcamento import (
+    BlocoPrompt,
+    compactar_conteudo,
+    custo_template,
+    estimar_tokens_prompt,
+    orcamento_conteudo,
+)
+from app.utils.pdf_processor import ExtractedSection
+from app.utils.tokenizer import count_tokens
+
+MODULE = "app.modules.gerador_quesitos.v1.orcamento"
+PROCESSOR_MOCK_TARGET = "app.modules.gerador_quesitos.v1.endpoints.iter_extracted_sections"
+DEFAULT_LLM_MOCK_TARGET = "app.modules.gerador_quesitos.v1.endpoints.default_llm"
+PROMPT_LOAD_TARGET = "app.modules.gerador_quesitos.v1.endpoints.prompt_template_string"
+RESULT_CACHE_MODULE = "app.modules.gerador_quesitos.v1.resultado_cache"
+
+TEMPLATE = "Instruções fixas do perito. Benefício: {beneficio}. Profissão: {profissao}.\n{pdf_content}"
+
+
+@pytest.fixture(autouse=True)
+def no_result_cache():
+    with patch(f"{RESULT_CACHE_MODULE}.lookup_llm_responses", new_callable=AsyncMock, return_value={}), \
+         patch(f"{RESULT_CACHE_MODULE}.store_llm_responses", new_callable=AsyncMock):
+        yield
+
+
+def test_template_cost_is_counted_once():
+    template = "Template exclusivo deste teste: {pdf_content} e {pdf_content}, {beneficio}."
+    with patch(f"{MODULE}.count_tokens", wraps=count_tokens) as contador:
+        primeiro = custo_template(template)
+        segundo = custo_template(template)
+    assert primeiro is segundo
+    assert contador.call_count == 1
+    assert primeiro.ocorrencias == {"pdf_content": 2, "beneficio": 1}
+    assert primeiro.tokens_fixos == count_tokens("Template exclusivo deste teste:  e , .")
+
+
+def test_prompt_estimate_matches_the_filled_template():
+    valores = dict(beneficio="BPC", profissao="Pedreiro", pdf_content="Laudo médico com CID M54.5.")
+    assert estimar_tokens_prompt(TEMPLATE, **valores) == count_tokens(TEMPLATE.format(**valores))
+
+
+def test_content_budget_is_split_among_occurrences():
+    template = "X {pdf_content} Y {pdf_content}"
+    with patch.object(settings, "GERADOR_QUESITOS_MAX_INPUT_TOKENS", 1000), patch.object(settings, "GERADOR_QUESITOS_OUTPUT_RESERVE_TOKENS", 100):
+        assert orcamento_conteudo(template, "", "") == (1000 - 100 - 2) // 2
+
+
+def test_oversized_fields_are_rejected_with_413():
+    with patch.object(settings, "GERADOR_QUESITOS_MAX_INPUT_TOKENS", 200), patch.object(settings, "GERADOR_QUESITOS_OUTPUT_RESERVE_TOKENS", 50):
+        with pytest.raises(HTTPException) as erro:
+            orcamento_conteudo(TEMPLATE, "benefício " * 200, "Pedreiro")
+    assert erro.value.status_code == 413
+
+
+def test_compaction_drops_whitespace_pagination_and_repeated_headers():
+    paginas = [
+        f"TRIBUNAL REGIONAL FEDERAL\n\n\n\nLaudo   da página {numero}:\tlombalgia   crônica.\nPágina {numero} de 4"
+        for numero in range(1, 5)
+    ]
+    resultado = compactar_conteudo([BlocoPrompt(pagina) for pagina in paginas], limite_tokens=40)
+
+    # The first header is kept, its repetitions and the page numbers are not
+    assert resultado.texto.count("TRIBUNAL REGIONAL FEDERAL") == 1
+    assert "Página" not in resultado.texto
+    assert "Laudo da página 3: lombalgia crônica." in resultado.texto
+    assert "\n\n\n" not in resultado.texto
+    assert resultado.tokens_depois < resultado.tokens_antes
+    assert resultado.blocos_removidos == 0 and not resultado.truncado
+
+
+def test_content_that_fits_is_left_untouched():
+    texto = "Glicemia em jejum:\n140\nAno do diagnóstico:\n2019\nCID: M54.5\nCID: M54.5\nCID: M54.5\n3"
+    resultado = compactar_conteudo([BlocoPrompt(texto)], limite_tokens=100_000)
+    assert resultado.texto == texto
+    assert resultado.tokens_depois == resultado.tokens_antes
+
+
+def test_compaction_never_drops_data_lines():
+    """ Over the limit, repeated data lines and numbers in the body (or after a label) are kept. """
+    paginas = [
+        f"CABEÇALHO DO PROCESSO\nGlicemia em jejum:\n140\nCID: M54.5\nAno do diagnóstico:\n2019\n{numero}"
+        for numero in range(1, 5)
+    ] + ["Exame   físico:   " + "normal " * 40 + "\nValor:\n7"]
+    resultado = compactar_conteudo([BlocoPrompt(pagina) for pagina in paginas], limite_tokens=120)
+    assert resultado.texto.count("CABEÇALHO DO PROCESSO") == 1
+    assert resultado.texto.count("CID: M54.5") == 4
+    assert resultado.texto.count("\n140\n") == 4
+    assert resultado.texto.count("2019") == 4
+    assert resultado.texto.endswith("Valor:\n7")
+    assert not resultado.truncado
+
+
+def test_compaction_keeps_own_file_and_trecho_headers():
+    blocos = [BlocoPrompt(f"--- CONTEÚDO DO ARQUIVO: a.pdf ---\n\nTexto {numero}.") for numero in range(4)]
+    resultado = compactar_conteudo(blocos, limite_tokens=10_000)
+    assert resultado.texto.count("--- CONTEÚDO DO ARQUIVO: a.pdf ---") == 4
+
+
+def test_compaction_keeps_the_highest_priority_blocks_in_original_order():
+    blocos = [
+        BlocoPrompt("baixa " * 50, prioridade=0.1),
+        BlocoPrompt("alta " * 50, prioridade=0.9),
+        BlocoPrompt("média " * 50, prioridade=0.5),
+    ]
+    resultado = compactar_conteudo(blocos, limite_tokens=90)
+
+    # "alta" fits, "média" is truncated into the remaining 40 tokens, "baixa" is dropped
+    assert resultado.texto.startswith("alta ")
+    assert "baixa" not in resultado.texto
+    assert resultado.texto.endswith(" [...]")
+    assert resultado.blocos_removidos == 1
+    assert resultado.truncado
+    assert resultado.tokens_depois <= 90
+
+
+@patch(PROMPT_LOAD_TARGET, TEMPLATE)
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+def test_gerar_quesitos_reports_tokens_and_fits_the_limit(mock_llm, mock_iter_sections):
+    async def stream(files, chunking=None):
+        for pagina in range(1, 21):
+            yield ExtractedSection("processo.pdf", pagina, f"CABEÇALHO DO PROCESSO\nPerícia {pagina}: " + "dor lombar crônica. " * 40, "a" * 64)
+    mock_iter_sections.side_effect = stream
+    mock_llm.ainvoke = AsyncMock(return_value=type("Mensagem", (), {"content": "1. Quesito?"})())
+
+    with patch.object(settings, "GERADOR_QUESITOS_MAX_INPUT_TOKENS", 2000), patch.object(settings, "GERADOR_QUESITOS_OUTPUT_RESERVE_TOKENS", 500):
+        response = TestClient(app).post(
+            f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar",
+            files={'files': ('processo.pdf', BytesIO(b'pdf'), 'application/pdf')},
+            data={"beneficio": "BPC", "profissao": "Pedreiro", "modelo_nome": "<Modelo Padrão>", "modo_contexto": "documento_completo"},
+        )
+    assert response.status_code == 200
+    tokens = response.json()["tokens"]
+    assert tokens["conteudo_antes"] > tokens["limite_conteudo"] >= tokens["conteudo_depois"]
+    assert tokens["prompt_depois"] <= 2000 - 500
+    assert tokens["blocos_removidos"] > 0
+    prompt = mock_llm.ainvoke.call_args[0][0][0].content
+    assert count_tokens(prompt) == tokens["prompt_depois"]
+    assert prompt.count("CABEÇALHO DO PROCESSO") == 1
+
+
+@patch(PROMPT_LOAD_TARGET, TEMPLATE)
+@patch(PROCESSOR_MOCK_TARGET)
+@patch(DEFAULT_LLM_MOCK_TARGET)
+def test_gerar_quesitos_rejects_oversized_fields_before_extraction(mock_llm, mock_iter_sections):
+    with patch.object(settings, "GERADOR_QUESITOS_MAX_INPUT_TOKENS", 200), patch.object(settings, "GERADOR_QUESITOS_OUTPUT_RESERVE_TOKENS", 50):
+        response = TestClient(app).post(
+            f"{settings.API_PREFIX}/gerador_quesitos/v1/gerar",
+            files={'files': ('processo.pdf', BytesIO(b'pdf'), 'application/pdf')},
+            data={"beneficio": "benefício " * 200, "profissao": "Pedreiro", "modelo_nome": "<Modelo Padrão>"},
+        )
+    assert response.status_code == 413
+    mock_iter_sections.assert_not_called()
+    mock_llm.ainvoke.assert_not_called()
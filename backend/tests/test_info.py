@@ -35,4 +35,76 @@ def test_get_system_status_v1():
     # Basic check for datetime format (will be string in JSON)
     assert isinstance(data["server_time_utc"], str)
     assert "api_prefix" in data
-    assert data["api_prefix"] == settings.API_PREFIX
\ No newline at end of file
+    assert data["api_prefix"] == settings.API_PREFIX
+def test_get_extraction_pool_status_v1():
+    """
+    Test the GET /api/info/v1/extraction-pool endpoint.
+    """
+    url = f"{settings.API_PREFIX}/info/v1/extraction-pool"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["max_workers"] == settings.PDF_EXTRACTION_WORKERS
+    assert data["max_queue"] == settings.PDF_EXTRACTION_QUEUE_LIMIT
+    assert data["busy_workers"] == 0
+    assert data["text_layer_pages"] >= 0
+    assert data["ocr_pages"] >= 0
+
+def test_get_llm_clients_status_v1():
+    """
+    Test the GET /api/info/v1/llm-clients endpoint.
+    """
+    url = f"{settings.API_PREFIX}/info/v1/llm-clients"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["max_size"] == settings.LLM_CLIENT_CACHE_SIZE
+    assert data["size"] <= data["max_size"]
+    assert 0.0 <= data["hit_rate"] <= 1.0
+
+def test_get_context_cache_status_v1():
+    """
+    Test the GET /api/info/v1/context-cache endpoint.
+    """
+    url = f"{settings.API_PREFIX}/info/v1/context-cache"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert isinstance(data["enabled"], bool)
+    assert data["hits"] >= 0 and data["misses"] >= 0
+
+def test_get_llm_limiter_status_v1():
+    """
+    Test the GET /api/info/v1/llm-limiter endpoint.
+    """
+    url = f"{settings.API_PREFIX}/info/v1/llm-limiter"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert isinstance(data["limiters"], list)
+    for limiter in data["limiters"]:
+        assert limiter["limit"] >= 1
+        assert limiter["queue_depth"] >= 0
+
+def test_get_principal_cache_status_v1():
+    """
+    Test the GET /api/info/v1/principal-cache endpoint.
+    """
+    url = f"{settings.API_PREFIX}/info/v1/principal-cache"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["size"] <= data["max_size"]
+    assert 0.0 <= data["hit_rate"] <= 1.0
+
+def test_get_token_cache_status_v1():
+    """
+    Test the GET /api/info/v1/token-cache endpoint.
+    """
+    url = f"{settings.API_PREFIX}/info/v1/token-cache"
+    response = client.get(url)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["size"] <= data["max_entries"]
+    assert data["bytes"] <= data["max_bytes"]
+    assert 0.0 <= data["hit_rate"] <= 1.0
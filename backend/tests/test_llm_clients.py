@@ -0,0 +1,51 @@
+# backend/tests/test_llm_clients.py
+from unittest.mock import MagicMock
+
+from app.core.llm_clients import ChatClientRegistry
+
+
+def make_registry(max_size=2):
+    factory = MagicMock(side_effect=lambda model, **params: MagicMock(name=f"client-{model}"))
+    return ChatClientRegistry(max_size=max_size, factory=factory), factory
+
+
+def test_registry_reuses_clients_and_counts_hits():
+    registry, factory = make_registry()
+    first = registry.get("gemini-a")
+    assert registry.get("gemini-a") is first
+    assert factory.call_count == 1
+    stats = registry.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_registry_keys_include_generation_params():
+    registry, factory = make_registry(max_size=4)
+    default = registry.get("gemini-a")
+    cold = registry.get("gemini-a", temperature=0.0)
+    assert cold is not default
+    assert registry.get("gemini-a", temperature=0.0) is cold
+    factory.assert_called_with("gemini-a", temperature=0.0)
+
+
+def test_registry_evicts_least_recently_used():
+    registry, factory = make_registry(max_size=2)
+    a = registry.get("gemini-a")
+    registry.get("gemini-b")
+    registry.get("gemini-a")  # b becomes the least recently used
+    registry.get("gemini-c")
+    assert registry.stats()["models"] == ["gemini-a", "gemini-c"]
+    assert registry.stats()["evictions"] == 1
+    assert registry.get("gemini-a") is a
+    registry.get("gemini-b")
+    assert factory.call_count == 4
+
+
+def test_warm_up_skips_models_that_fail():
+    def factory(model, **params):
+        if model == "broken":
+            raise ValueError("unknown model")
+        return MagicMock()
+    registry = ChatClientRegistry(max_size=4, factory=factory)
+    assert registry.warm_up(["gemini-a", "broken", "gemini-a", ""]) == 1
+    assert registry.stats()["models"] == ["gemini-a"]
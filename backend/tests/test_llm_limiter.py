@@ -0,0 +1,192 @@
+# backend/tests/test_llm_limiter.py
+import asyncio
+import time
+
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+
+from app.core.llm_limiter import LlmLimiter, LlmOverloadedError, is_rate_limit_error, limited_ainvoke
+
+MODELO = "modelo-teste"
+
+
+class Relogio:
+    """Controllable clock for the latency and cooldown rules (buckets disabled)."""
+    def __init__(self):
+        self.agora = 1_000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+class ProvedorLimitado:
+    """Simulated provider: answers 429 when more than `capacidade` calls are in flight."""
+    def __init__(self, capacidade: int, latencia: float = 0.02):
+        self.capacidade = capacidade
+        self.latencia = latencia
+        self.ativas = 0
+        self.pico = 0
+        self.respondidas = 0
+        self.recusadas = 0
+
+    async def ainvoke(self, mensagens, **kwargs):
+        if self.ativas >= self.capacidade:
+            self.recusadas += 1
+            raise ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")
+        self.ativas += 1
+        self.pico = max(self.pico, self.ativas)
+        try:
+            await asyncio.sleep(self.latencia)
+        finally:
+            self.ativas -= 1
+        self.respondidas += 1
+        return mensagens
+
+
+@pytest.fixture
+def limitadores(monkeypatch):
+    """Limiters built by the test instead of the process-wide ones."""
+    registro = {}
+    monkeypatch.setattr("app.core.llm_limiter._limiters", registro)
+    return registro
+
+
+async def rajada(llm, chamadas: int):
+    resultados = await asyncio.gather(*(limited_ainvoke(llm, MODELO, f"prompt {n}") for n in range(chamadas)), return_exceptions=True)
+    return [resultado for resultado in resultados if isinstance(resultado, BaseException)]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_provider_shrinks_the_limit(limitadores):
+    limitador = limitadores[MODELO] = LlmLimiter(MODELO, rpm=0, tpm=0, initial_limit=8, decrease_cooldown=0)
+    provedor = ProvedorLimitado(capacidade=2)
+
+    falhas_primeira = await rajada(provedor, 20)
+    assert len(falhas_primeira) >= 3
+    assert all(isinstance(falha, LlmOverloadedError) and falha.status_code == 503 for falha in falhas_primeira)
+    assert isinstance(falhas_primeira[0].__cause__, ResourceExhausted)
+    assert limitador.stats()["throttled"] == len(falhas_primeira)
+
+    # The limit learned from the 429s: the next burst is mostly paced instead of rejected
+    falhas_segunda = await rajada(provedor, 20)
+    assert len(falhas_segunda) < len(falhas_primeira)
+    assert provedor.respondidas == 40 - len(falhas_primeira) - len(falhas_segunda)
+    assert 1 <= limitador.limit <= 4
+    assert limitador.stats()["in_flight"] == 0 and limitador.stats()["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_is_respected(limitadores):
+    limitadores[MODELO] = LlmLimiter(MODELO, rpm=0, tpm=0, initial_limit=3, max_limit=3)
+    provedor = ProvedorLimitado(capacidade=100)
+    assert await rajada(provedor, 12) == []
+    assert provedor.pico == 3
+    stats = limitadores[MODELO].stats()
+    assert stats["admitted"] == stats["succeeded"] == 12
+    assert stats["max_queue_depth"] >= 9
+    assert stats["avg_wait_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_aimd_rules_with_cooldown():
+    relogio = Relogio()
+    limitador = LlmLimiter(MODELO, rpm=0, tpm=0, initial_limit=10, max_limit=20, latency_target=5, decrease_cooldown=10, clock=relogio)
+
+    async with limitador.slot():
+        relogio.agora += 6
+    assert limitador.limit == pytest.approx(9.0)
+    assert limitador.stats()["slow"] == 1
+
+    # A second decrease inside the cooldown is ignored
+    with pytest.raises(ResourceExhausted):
+        async with limitador.slot():
+            raise ResourceExhausted("429")
+    assert limitador.limit == pytest.approx(9.0)
+
+    relogio.agora += 11
+    with pytest.raises(ResourceExhausted):
+        async with limitador.slot():
+            raise ResourceExhausted("429")
+    assert limitador.limit == pytest.approx(4.5)
+
+    async with limitador.slot():
+        relogio.agora += 1
+    assert limitador.limit == pytest.approx(4.5 + 1 / 4.5)
+
+    # Other errors do not change the limit
+    with pytest.raises(ValueError):
+        async with limitador.slot():
+            raise ValueError("bad request")
+    assert limitador.limit == pytest.approx(4.5 + 1 / 4.5)
+    assert limitador.stats()["failed"] == 1 and limitador.stats()["throttled"] == 2
+
+
+@pytest.mark.asyncio
+async def test_request_bucket_paces_calls():
+    # 10 requests/s with room for a burst of 2
+    limitador = LlmLimiter(MODELO, rpm=600, tpm=0, initial_limit=10, burst_seconds=0.2)
+    inicio = time.monotonic()
+    for _ in range(6):
+        async with limitador.slot():
+            pass
+    assert time.monotonic() - inicio >= 0.3
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_admitted_in_fifo_order():
+    # 1000 tokens/s, bucket of 100 tokens
+    limitador = LlmLimiter(MODELO, rpm=0, tpm=60_000, initial_limit=10, burst_seconds=0.1)
+    ordem = []
+
+    async def chamar(nome, tokens):
+        async with limitador.slot(tokens):
+            ordem.append(nome)
+
+    await chamar("primeira", 100)
+    grande = asyncio.create_task(chamar("grande", 100))
+    await asyncio.sleep(0)
+    pequena = asyncio.create_task(chamar("pequena", 1))
+    await asyncio.gather(grande, pequena)
+    # The small call fit in the bucket first, but does not overtake the large one
+    assert ordem == ["primeira", "grande", "pequena"]
+
+
+@pytest.mark.asyncio
+async def test_waiter_gives_up_at_its_deadline():
+    limitador = LlmLimiter(MODELO, rpm=0, tpm=0, initial_limit=1, max_limit=1)
+    await limitador.acquire()
+
+    with pytest.raises(LlmOverloadedError) as excinfo:
+        await limitador.acquire(max_wait=0.05)
+    assert excinfo.value.status_code == 503
+    assert "Retry-After" in excinfo.value.headers
+    stats = limitador.stats()
+    assert stats["timeouts"] == 1 and stats["queue_depth"] == 0 and stats["in_flight"] == 1
+
+    limitador._release()
+    await asyncio.wait_for(limitador.acquire(max_wait=0), timeout=1)
+    assert limitador.stats()["in_flight"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    limitador = LlmLimiter(MODELO, rpm=0, tpm=0, initial_limit=1, max_limit=1)
+    await limitador.acquire()
+    espera = asyncio.create_task(limitador.acquire())
+    await asyncio.sleep(0.01)
+    assert limitador.stats()["queue_depth"] == 1
+
+    espera.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await espera
+    limitador._release()
+    assert limitador.stats()["queue_depth"] == 0 and limitador.stats()["in_flight"] == 0
+
+
+def test_rate_limit_errors_are_recognised():
+    class ErroHttp(Exception):
+        status_code = 429
+
+    assert is_rate_limit_error(ResourceExhausted("quota"))
+    assert is_rate_limit_error(ErroHttp())
+    assert not is_rate_limit_error(RuntimeError("boom"))
@@ -0,0 +1,97 @@
+# backend/tests/test_password_executor.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import security
+from app.core.password_executor import PasswordHashExecutor, PasswordHashQueueFullError
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_run_off_the_event_loop():
+    """ bcrypt runs in a pool thread and the async helpers agree with the sync ones. """
+    hashed = await security.hash_password_async("s3nh4-f0rte")
+    assert hashed.startswith("$2")
+    assert await security.verify_password_async("s3nh4-f0rte", hashed) is True
+    assert await security.verify_password_async("errada", hashed) is False
+    assert security.verify_password("s3nh4-f0rte", hashed) is True
+
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_hashing():
+    """ Other coroutines keep running while a slow hash is in progress. """
+    executor = PasswordHashExecutor(max_workers=1, max_queue=1)
+    try:
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        thread_name = await executor.run(lambda: (time.sleep(0.3), threading.current_thread().name)[1])
+        task.cancel()
+        assert thread_name.startswith("password-hash")
+        assert ticks >= 10
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_503():
+    """ Once every thread is busy and the queue is full, new calls are shed. """
+    executor = PasswordHashExecutor(max_workers=1, max_queue=1, retry_after=7)
+    try:
+        running = asyncio.create_task(executor.run(time.sleep, 0.2))
+        queued = asyncio.create_task(executor.run(time.sleep, 0.01))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["busy_workers"] == 1 and executor.stats()["queued_calls"] == 1
+
+        with pytest.raises(PasswordHashQueueFullError) as excinfo:
+            await executor.run(time.sleep, 0)
+        assert excinfo.value.status_code == 503
+        assert excinfo.value.headers["Retry-After"] == "7"
+
+        await asyncio.gather(running, queued)
+        stats = executor.stats()
+        assert stats["completed"] == 2 and stats["rejected"] == 1
+        assert stats["busy_workers"] == 0 and stats["queued_calls"] == 0
+        assert stats["max_wait_seconds"] >= 0.1
+        assert stats["max_hash_seconds"] >= 0.2
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_frees_the_thread_when_the_hash_finishes():
+    """ A thread cannot be interrupted: its slot stays busy until the call ends, then passes on. """
+    executor = PasswordHashExecutor(max_workers=1, max_queue=2)
+    try:
+        caller = asyncio.create_task(executor.run(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        assert executor.stats()["busy_workers"] == 1
+
+        started = time.monotonic()
+        assert await executor.run(lambda: "next") == "next"
+        assert time.monotonic() - started >= 0.1
+        assert executor.stats()["busy_workers"] == 0
+    finally:
+        executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_errors_are_raised_to_the_caller():
+    executor = PasswordHashExecutor(max_workers=1, max_queue=1)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(lambda: 1 / 0)
+        assert executor.stats()["failed"] == 1 and executor.stats()["busy_workers"] == 0
+    finally:
+        executor.shutdown()
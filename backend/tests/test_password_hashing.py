@@ -0,0 +1,208 @@
+# backend/tests/test_password_hashing.py
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import password_cost, security
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.dependencies import require_admin_user
+from app.main import app
+from app.models.enums import UserRole
+
+AUTH_URL = f"{settings.API_PREFIX}/auth/v1"
+ENDPOINTS_MODULE = "app.core_modules.auth.v1.endpoints"
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def restore_context():
+    """Tests change the bcrypt cost of the shared context; put the original back."""
+    saved = security.pwd_context.to_dict()
+    yield
+    security.pwd_context.load(saved)
+    app.dependency_overrides.clear()
+
+
+def fake_db(rows=None, user=None):
+    result = MagicMock()
+    result.scalars.return_value.first.return_value = user
+    result.all.return_value = rows or []
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+    db.commit = AsyncMock()
+    app.dependency_overrides[get_db] = lambda: db
+    return db
+
+
+def test_calibration_picks_the_highest_cost_within_the_target():
+    with patch("app.core.security.time.perf_counter", side_effect=[0.0, 0.05]):
+        calibration = security.calibrate_bcrypt_rounds(target_seconds=0.25, min_rounds=4, max_rounds=15, samples=1)
+    # 50 ms at cost 4; 100, 200 ms at costs 5, 6; 400 ms at 7 is over the target
+    assert calibration.rounds == 6
+    assert calibration.estimated_seconds == pytest.approx(0.2)
+
+    with patch("app.core.security.time.perf_counter", side_effect=[0.0, 0.001]):
+        assert security.calibrate_bcrypt_rounds(target_seconds=10, min_rounds=4, max_rounds=8, samples=1).rounds == 8
+    with patch("app.core.security.time.perf_counter", side_effect=[0.0, 1.0]):
+        assert security.calibrate_bcrypt_rounds(target_seconds=0.25, min_rounds=4, max_rounds=8, samples=1).rounds == 4
+
+
+def test_calibration_uses_the_median_of_several_samples():
+    # One run slowed down by a noisy neighbour does not lower the cost
+    with patch("app.core.security.time.perf_counter", side_effect=[0.0, 0.05, 0.0, 1.0, 0.0, 0.05]):
+        calibration = security.calibrate_bcrypt_rounds(target_seconds=0.25, min_rounds=4, max_rounds=15, samples=3)
+    assert calibration.rounds == 6 and calibration.samples == 3
+    assert calibration.probe_seconds == pytest.approx(0.05)
+
+
+@pytest.mark.asyncio
+async def test_calibration_applies_the_cost_to_new_hashes():
+    with patch.object(settings, "BCRYPT_MIN_ROUNDS", 4), patch.object(settings, "BCRYPT_MAX_ROUNDS", 5), \
+         patch.object(settings, "BCRYPT_TARGET_VERIFY_SECONDS", 10.0):
+        calibration = await security.calibrate_password_hashing()
+    assert calibration.rounds == 5
+    assert security.bcrypt_rounds() == 5
+    assert (await security.hash_password_async("s3nh4-f0rte")).startswith("$2b$05$")
+
+
+def test_only_hashes_below_the_floor_need_a_rehash():
+    security.set_bcrypt_rounds(4, min_rounds=4)
+    old_hash = security.hash_password("s3nh4-f0rte")
+    assert not security.password_needs_rehash(old_hash)
+    security.set_bcrypt_rounds(5, min_rounds=5)
+    assert security.password_needs_rehash(old_hash)
+    assert security.verify_password("s3nh4-f0rte", old_hash)
+    assert not security.password_needs_rehash("not-a-hash")
+
+    # A worker with a lower cost does not rehash the stronger hashes of another one
+    strong_hash = security.hash_password("s3nh4-f0rte")
+    security.set_bcrypt_rounds(4, min_rounds=4)
+    assert not security.password_needs_rehash(strong_hash)
+    # Above the floor, a hash with a lower cost than the current one is kept too
+    security.set_bcrypt_rounds(6, min_rounds=4)
+    assert security.bcrypt_min_rounds() == 4
+    assert not security.password_needs_rehash(old_hash)
+
+
+def test_login_rehashes_an_outdated_hash_in_the_background():
+    security.set_bcrypt_rounds(4, min_rounds=4)
+    old_hash = security.hash_password("s3nh4-f0rte")
+    security.set_bcrypt_rounds(5, min_rounds=5)
+    user = SimpleNamespace(id=7, email="perito@example.com", hashed_password=old_hash, is_active=True, role=UserRole.USER, token_version=0)
+    fake_db(user=user)
+    background_db = MagicMock()
+    background_db.execute = AsyncMock()
+    background_db.commit = AsyncMock()
+
+    @asynccontextmanager
+    async def background_session():
+        yield background_db
+
+    with patch(f"{ENDPOINTS_MODULE}.get_db_contextmanager", background_session):
+        response = client.post(f"{AUTH_URL}/login", data={"username": user.email, "password": "s3nh4-f0rte"})
+    assert response.status_code == 200
+    assert "access_token" in response.json()
+
+    statement = background_db.execute.await_args.args[0]
+    new_hash = statement.compile().params["hashed_password"]
+    assert new_hash.startswith("$2b$05$")
+    assert security.verify_password("s3nh4-f0rte", new_hash)
+    # Only replaces the hash that was verified
+    assert old_hash in statement.compile().params.values()
+    background_db.commit.assert_awaited_once()
+
+
+def test_login_with_a_current_hash_does_not_rehash():
+    security.set_bcrypt_rounds(4)
+    user = SimpleNamespace(id=7, email="perito@example.com", hashed_password=security.hash_password("s3nh4-f0rte"), is_active=True, role=UserRole.USER, token_version=0)
+    fake_db(user=user)
+    with patch(f"{ENDPOINTS_MODULE}.rehash_password", new_callable=AsyncMock) as rehash:
+        response = client.post(f"{AUTH_URL}/login", data={"username": user.email, "password": "s3nh4-f0rte"})
+    assert response.status_code == 200
+    rehash.assert_not_awaited()
+
+
+def test_password_hash_report():
+    security.set_bcrypt_rounds(12, min_rounds=11)
+    fake_db(rows=[("$2b$10$", 3), ("$2b$11$", 5), ("$2b$12$", 40), ("$2a$12$", 2), ("pbkdf2_", 1)])
+    app.dependency_overrides[require_admin_user] = lambda: SimpleNamespace(role=UserRole.ADMIN)
+
+    response = client.get(f"{AUTH_URL}/admin/password-hashing")
+    assert response.status_code == 200
+    assert response.json() == {
+        "current_rounds": 12,
+        "min_rounds": 11,
+        "total": 51,
+        "costs": [{"rounds": 10, "users": 3}, {"rounds": 11, "users": 5}, {"rounds": 12, "users": 42}],
+        "unknown": 1,
+        "needs_rehash": 4,
+    }
+
+
+def shared_settings_db(stored=None):
+    """Session standing in for the app_settings table: `stored` is the saved bcrypt cost."""
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = None if stored is None else str(stored)
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+    db.commit = AsyncMock()
+
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    return db, patch("app.core.password_cost.get_db_contextmanager", session)
+
+
+def stored_rounds(db):
+    """Cost written by the upsert, if any."""
+    for call in db.execute.await_args_list:
+        params = call.args[0].compile().params
+        if params.get("key") == password_cost.BCRYPT_ROUNDS_KEY:
+            return int(params["value"])
+    return None
+
+
+@pytest.mark.asyncio
+async def test_workers_apply_the_stored_cost_without_calibrating():
+    db, session = shared_settings_db(stored=5)
+    with session, patch("app.core.security.calibrate_password_hashing", new_callable=AsyncMock) as calibrate:
+        assert await password_cost.apply_shared_bcrypt_rounds() == 5
+    calibrate.assert_not_awaited()
+    assert security.bcrypt_rounds() == 5
+    assert stored_rounds(db) is None
+    # The read happens under the advisory lock of the first calibration
+    assert "pg_advisory_xact_lock" in str(db.execute.await_args_list[0].args[0])
+
+
+@pytest.mark.asyncio
+async def test_first_worker_calibrates_and_stores_the_cost():
+    db, session = shared_settings_db(stored=None)
+    with session, patch.object(settings, "BCRYPT_MIN_ROUNDS", 4), patch.object(settings, "BCRYPT_MAX_ROUNDS", 5), \
+         patch.object(settings, "BCRYPT_TARGET_VERIFY_SECONDS", 10.0), patch.object(settings, "BCRYPT_CALIBRATION_SAMPLES", 2):
+        assert await password_cost.apply_shared_bcrypt_rounds() == 5
+    assert stored_rounds(db) == 5
+    db.commit.assert_awaited_once()
+
+
+def test_calibrate_endpoint_requires_admin_and_reports_the_change():
+    security.set_bcrypt_rounds(4)
+    app.dependency_overrides[require_admin_user] = lambda: SimpleNamespace(role=UserRole.ADMIN)
+    db, session = shared_settings_db()
+    with session, patch.object(settings, "BCRYPT_MIN_ROUNDS", 4), patch.object(settings, "BCRYPT_MAX_ROUNDS", 5), \
+         patch.object(settings, "BCRYPT_TARGET_VERIFY_SECONDS", 10.0), patch.object(settings, "BCRYPT_CALIBRATION_SAMPLES", 2):
+        response = client.post(f"{AUTH_URL}/admin/password-hashing/calibrate")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["previous_rounds"] == 4 and data["rounds"] == 5 and data["samples"] == 2
+    assert security.bcrypt_rounds() == 5
+    # Stored as the cost of the other workers
+    assert stored_rounds(db) == 5
+
+    app.dependency_overrides.clear()
+    assert client.post(f"{AUTH_URL}/admin/password-hashing/calibrate").status_code == 401
@@ -1,8 +1,13 @@
 # backend/tests/test_pdf_processor.py
+import asyncio
+import hashlib
+import threading
+import time
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi import UploadFile as FastAPIUploadFile # Keep for type hints
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 import sys
 from pathlib import Path
 
@@ -12,18 +17,61 @@ if app_root_dir not in sys.path:
     sys.path.insert(0, app_root_dir)
 
 # Import the function to test
-from utils.pdf_processor import processar_pdfs_upload
+from app.utils.pdf_processor import processar_pdfs_upload, iter_extracted_sections, ExtractedSection, EXTRACTOR_VERSION, get_page_path_stats
+from app.utils import pdf_processor
+from conftest import build_pdf
+from app.utils.upload_ingest import UploadTooLargeError
+from app.utils.extraction_executor import ExtractionExecutor
+from app.utils.chunking import chunker_key
+from app.schemas.module_config import ModuleChunkingConfig
 
 # Define mock target for DoclingLoader within the utility module
-LOADER_MOCK_TARGET = "utils.pdf_processor.DoclingLoader"
-TEMPFILE_MOCK_TARGET = "utils.pdf_processor.tempfile.NamedTemporaryFile"
-OS_REMOVE_MOCK_TARGET = "utils.pdf_processor.os.remove"
-OS_PATH_EXISTS_MOCK_TARGET = "utils.pdf_processor.os.path.exists"
+LOADER_MOCK_TARGET = "app.utils.pdf_processor.DoclingLoader"
+TMP_DIR_SETTING_TARGET = "app.utils.upload_ingest.settings.PDF_UPLOAD_TMP_DIR"
+MAX_REQUEST_SETTING_TARGET = "app.utils.upload_ingest.settings.PDF_UPLOAD_MAX_REQUEST_BYTES"
+EXECUTOR_MOCK_TARGET = "app.utils.pdf_processor.get_extraction_executor"
+CACHE_LOOKUP_MOCK_TARGET = "app.utils.pdf_processor.lookup_extraction"
+CACHE_STORE_MOCK_TARGET = "app.utils.pdf_processor.store_extraction"
+CHUNKS_EXIST_MOCK_TARGET = "app.utils.pdf_processor.has_document_chunks"
+CHUNKS_STORE_MOCK_TARGET = "app.utils.pdf_processor.store_document_chunks"
+CHUNKS_EMBED_MOCK_TARGET = "app.utils.pdf_processor.embed_document_chunks"
+CHECKPOINT_LOAD_MOCK_TARGET = "app.utils.pdf_processor.load_page_checkpoints"
+CHECKPOINT_STORE_MOCK_TARGET = "app.utils.pdf_processor.store_page_checkpoints"
+
+# Run extraction jobs in a thread instead of a worker process, so the
+# DoclingLoader mocks patched in this process are visible to the jobs.
+@pytest.fixture(autouse=True)
+def inline_extraction_executor():
+    executor = ExtractionExecutor(max_workers=1, max_queue=4, pool_factory=lambda: ThreadPoolExecutor(max_workers=1))
+    with patch(EXECUTOR_MOCK_TARGET, return_value=executor):
+        yield executor
+    executor.shutdown()
+
+# Keep the extraction cache empty unless a test says otherwise
+@pytest.fixture(autouse=True)
+def extraction_cache():
+    with patch(CACHE_LOOKUP_MOCK_TARGET, new_callable=AsyncMock, return_value=None) as mock_lookup, \
+         patch(CACHE_STORE_MOCK_TARGET, new_callable=AsyncMock) as mock_store:
+        yield mock_lookup, mock_store
+
+# Page checkpoints kept in memory: {file_hash: {page_number: sections}}
+@pytest.fixture(autouse=True)
+def page_checkpoints():
+    store = {}
+    async def load(file_hash, extractor_version):
+        return dict(store.get(file_hash, {}))
+    async def save(file_hash, extractor_version, page_count, method, pages):
+        for page_number, sections in pages.items():
+            store.setdefault(file_hash, {}).setdefault(page_number, sections)
+    with patch(CHECKPOINT_LOAD_MOCK_TARGET, side_effect=load), \
+         patch(CHECKPOINT_STORE_MOCK_TARGET, side_effect=save):
+        yield store
 
 # Helper function to create mock Langchain Document
-def create_mock_langchain_doc(page_content: str):
+def create_mock_langchain_doc(page_content: str, page_no: int = None):
     mock_doc = MagicMock()
     mock_doc.page_content = page_content
+    mock_doc.metadata = {"dl_meta": {"doc_items": [{"prov": [{"page_no": page_no}]}]}} if page_no else {}
     return mock_doc
 
 # Helper function to create mock UploadFile using MagicMock
@@ -51,112 +99,518 @@ def create_mock_upload_file(filename: str, content_type: str, content: bytes) ->
 
     return mock_file_object
 
+# Helper that picks the loader behaviour from the bytes spooled to disk, since
+# files are extracted concurrently and the call order is not deterministic
+def create_mock_loader_by_content(texts_by_content: dict, seen_contents: list):
+    def factory(file_path, **kwargs):
+        with open(file_path, "rb") as f:
+            content = f.read()
+        seen_contents.append(content)
+        instance = MagicMock()
+        result = texts_by_content[content]
+        if isinstance(result, Exception):
+            instance.load = MagicMock(side_effect=result)
+        else:
+            instance.load = MagicMock(return_value=[create_mock_langchain_doc(result)])
+        return instance
+    return factory
+
+# Helper that makes a mock loader return `text` and records the bytes spooled to disk
+def create_mock_loader(text: str, seen_contents: list):
+    def factory(file_path, **kwargs):
+        with open(file_path, "rb") as f:
+            seen_contents.append(f.read())
+        instance = MagicMock()
+        instance.load = MagicMock(return_value=[create_mock_langchain_doc(text)])
+        return instance
+    return factory
+
+# Waits until no extraction shared between requests is still running
+async def wait_for_shared_extractions(timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while pdf_processor._extraction_flights.stats()["in_flight"]:
+        assert time.monotonic() < deadline, "shared extraction did not finish"
+        await asyncio.sleep(0.01)
+
 # --- Test Cases ---
 
 @pytest.mark.asyncio
-@patch(OS_PATH_EXISTS_MOCK_TARGET, return_value=False)
-@patch(OS_REMOVE_MOCK_TARGET)
-@patch(TEMPFILE_MOCK_TARGET)
 @patch(LOADER_MOCK_TARGET)
-async def test_processar_pdfs_success_single(mock_DoclingLoader, mock_NamedTemporaryFile, mock_os_remove, mock_os_path_exists):
+async def test_processar_pdfs_success_single(mock_DoclingLoader, tmp_path):
     """ Test processing a single valid PDF successfully. """
-    mock_loader_instance = MagicMock()
-    mock_loader_instance.load = MagicMock(return_value=[create_mock_langchain_doc("Texto do PDF 1.")])
-    mock_DoclingLoader.return_value = mock_loader_instance
-    mock_temp_file = MagicMock()
-    mock_temp_file.__enter__.return_value.name = "/tmp/fake1.pdf"
-    mock_NamedTemporaryFile.return_value = mock_temp_file
+    seen = []
+    mock_DoclingLoader.side_effect = create_mock_loader("Texto do PDF 1.", seen)
     dummy_file = create_mock_upload_file("doc1.pdf", "application/pdf", b"pdf1_content")
-    result_text = await processar_pdfs_upload([dummy_file])
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        result_text = await processar_pdfs_upload([dummy_file])
     expected_text = "--- CONTEÚDO DO ARQUIVO: doc1.pdf ---\n\nTexto do PDF 1."
     assert result_text == expected_text
-    mock_DoclingLoader.assert_called_once_with(file_path="/tmp/fake1.pdf")
-    mock_loader_instance.load.assert_called_once()
+    mock_DoclingLoader.assert_called_once()
+    assert seen == [b"pdf1_content"]
+    # Temporary files are removed after processing
+    assert list(tmp_path.iterdir()) == []
     # Check if close was awaited on the mock
     dummy_file.close.assert_awaited_once()
 
 @pytest.mark.asyncio
-@patch(OS_PATH_EXISTS_MOCK_TARGET, return_value=False)
-@patch(OS_REMOVE_MOCK_TARGET)
-@patch(TEMPFILE_MOCK_TARGET)
 @patch(LOADER_MOCK_TARGET)
-async def test_processar_pdfs_success_multiple(mock_DoclingLoader, mock_NamedTemporaryFile, mock_os_remove, mock_os_path_exists):
+async def test_processar_pdfs_success_multiple(mock_DoclingLoader, tmp_path):
     """ Test processing multiple valid PDFs successfully. """
-    mock_loader_instance1 = MagicMock()
-    mock_loader_instance1.load = MagicMock(return_value=[create_mock_langchain_doc("Texto PDF 1.")])
-    mock_loader_instance2 = MagicMock()
-    mock_loader_instance2.load = MagicMock(return_value=[create_mock_langchain_doc("Texto PDF 2.")])
-    mock_DoclingLoader.side_effect = [mock_loader_instance1, mock_loader_instance2]
-    mock_temp_file1 = MagicMock()
-    mock_temp_file1.__enter__.return_value.name = "/tmp/fake1.pdf"
-    mock_temp_file2 = MagicMock()
-    mock_temp_file2.__enter__.return_value.name = "/tmp/fake2.pdf"
-    mock_NamedTemporaryFile.side_effect = [mock_temp_file1, mock_temp_file2]
+    seen = []
+    mock_DoclingLoader.side_effect = create_mock_loader_by_content({b"pdf1": "Texto PDF 1.", b"pdf2": "Texto PDF 2."}, seen)
     file1 = create_mock_upload_file("doc1.pdf", "application/pdf", b"pdf1")
     file2 = create_mock_upload_file("doc2.pdf", "application/pdf", b"pdf2")
-    result_text = await processar_pdfs_upload([file1, file2])
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        result_text = await processar_pdfs_upload([file1, file2])
     expected_text = "--- CONTEÚDO DO ARQUIVO: doc1.pdf ---\n\nTexto PDF 1.\n\n--- CONTEÚDO DO ARQUIVO: doc2.pdf ---\n\nTexto PDF 2."
     assert result_text == expected_text
     assert mock_DoclingLoader.call_count == 2
-    mock_loader_instance1.load.assert_called_once()
-    mock_loader_instance2.load.assert_called_once()
+    assert sorted(seen) == [b"pdf1", b"pdf2"]
     file1.close.assert_awaited_once()
     file2.close.assert_awaited_once()
 
 
 @pytest.mark.asyncio
-@patch(OS_PATH_EXISTS_MOCK_TARGET, return_value=False)
-@patch(OS_REMOVE_MOCK_TARGET)
-@patch(TEMPFILE_MOCK_TARGET)
 @patch(LOADER_MOCK_TARGET)
-async def test_processar_pdfs_skip_non_pdf(mock_DoclingLoader, mock_NamedTemporaryFile, mock_os_remove, mock_os_path_exists):
+async def test_processar_pdfs_skip_non_pdf(mock_DoclingLoader, tmp_path):
     """ Test skipping non-PDF files. """
-    mock_loader_instance = MagicMock()
-    mock_loader_instance.load = MagicMock(return_value=[create_mock_langchain_doc("Texto PDF valido.")])
-    mock_DoclingLoader.return_value = mock_loader_instance
-    mock_temp_file = MagicMock()
-    mock_temp_file.__enter__.return_value.name = "/tmp/fake_valid.pdf"
-    mock_NamedTemporaryFile.return_value = mock_temp_file
+    seen = []
+    mock_DoclingLoader.side_effect = create_mock_loader("Texto PDF valido.", seen)
     file_pdf = create_mock_upload_file("doc_ok.pdf", "application/pdf", b"pdf")
     file_txt = create_mock_upload_file("doc_bad.txt", "text/plain", b"txt") # Non-PDF
-    result_text = await processar_pdfs_upload([file_pdf, file_txt])
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        result_text = await processar_pdfs_upload([file_pdf, file_txt])
     expected_text = "--- CONTEÚDO DO ARQUIVO: doc_ok.pdf ---\n\nTexto PDF valido."
     assert result_text == expected_text
-    mock_DoclingLoader.assert_called_once_with(file_path="/tmp/fake_valid.pdf")
+    mock_DoclingLoader.assert_called_once()
+    assert seen == [b"pdf"]
     # Ensure close was called even for the skipped file
     file_pdf.close.assert_awaited_once()
     file_txt.close.assert_awaited_once()
 
 
 @pytest.mark.asyncio
-@patch(OS_PATH_EXISTS_MOCK_TARGET, return_value=False)
-@patch(OS_REMOVE_MOCK_TARGET)
-@patch(TEMPFILE_MOCK_TARGET)
 @patch(LOADER_MOCK_TARGET)
-async def test_processar_pdfs_loader_error_continues(mock_DoclingLoader, mock_NamedTemporaryFile, mock_os_remove, mock_os_path_exists):
+async def test_processar_pdfs_loader_error_continues(mock_DoclingLoader, tmp_path):
     """ Test that processing continues if one file fails to load. """
-    mock_loader_instance1 = MagicMock()
-    mock_loader_instance1.load = MagicMock(return_value=[create_mock_langchain_doc("Texto PDF 1.")])
-    mock_loader_instance2 = MagicMock()
-    mock_loader_instance2.load = MagicMock(side_effect=Exception("Docling Load Error"))
-    mock_DoclingLoader.side_effect = [mock_loader_instance1, mock_loader_instance2]
-    mock_temp_file1 = MagicMock()
-    mock_temp_file1.__enter__.return_value.name = "/tmp/fake1.pdf"
-    mock_temp_file2 = MagicMock()
-    mock_temp_file2.__enter__.return_value.name = "/tmp/fake2.pdf"
-    mock_NamedTemporaryFile.side_effect = [mock_temp_file1, mock_temp_file2]
+    seen = []
+    mock_DoclingLoader.side_effect = create_mock_loader_by_content({b"pdf1": "Texto PDF 1.", b"pdf2": Exception("Docling Load Error")}, seen)
     file1 = create_mock_upload_file("doc1.pdf", "application/pdf", b"pdf1")
     file2 = create_mock_upload_file("doc2_fails.pdf", "application/pdf", b"pdf2")
-    result_text = await processar_pdfs_upload([file1, file2])
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        result_text = await processar_pdfs_upload([file1, file2])
     expected_text = "--- CONTEÚDO DO ARQUIVO: doc1.pdf ---\n\nTexto PDF 1."
     assert result_text == expected_text
     assert mock_DoclingLoader.call_count == 2
+    assert list(tmp_path.iterdir()) == []
+    file1.close.assert_awaited_once()
+    file2.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_skip_empty_file(mock_DoclingLoader, tmp_path):
+    """ Test that empty uploads are skipped without calling the loader. """
+    empty_file = create_mock_upload_file("vazio.pdf", "application/pdf", b"")
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        result_text = await processar_pdfs_upload([empty_file])
+    assert result_text == ""
+    mock_DoclingLoader.assert_not_called()
+    assert list(tmp_path.iterdir()) == []
+    empty_file.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_request_limit_aborts(mock_DoclingLoader, tmp_path):
+    """ Test that exceeding the per-request byte limit raises 413 and cleans up. """
+    seen = []
+    mock_DoclingLoader.side_effect = create_mock_loader("Texto.", seen)
+    file1 = create_mock_upload_file("doc1.pdf", "application/pdf", b"a" * 6)
+    file2 = create_mock_upload_file("doc2.pdf", "application/pdf", b"b" * 6)
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)), patch(MAX_REQUEST_SETTING_TARGET, 10):
+        with pytest.raises(UploadTooLargeError) as exc_info:
+            await processar_pdfs_upload([file1, file2])
+    assert exc_info.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
     file1.close.assert_awaited_once()
     file2.close.assert_awaited_once()
 
 
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_cache_miss_stores_sections(mock_DoclingLoader, extraction_cache, tmp_path):
+    """ A cache miss runs Docling and stores the sections under the file hash. """
+    mock_lookup, mock_store = extraction_cache
+    seen = []
+    mock_DoclingLoader.side_effect = create_mock_loader("Texto novo.", seen)
+    file1 = create_mock_upload_file("doc1.pdf", "application/pdf", b"pdf1")
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        await processar_pdfs_upload([file1])
+    file_hash = hashlib.sha256(b"pdf1").hexdigest()
+    mock_lookup.assert_awaited_once_with(file_hash, EXTRACTOR_VERSION)
+    mock_store.assert_awaited_once_with(file_hash, EXTRACTOR_VERSION, [(None, "Texto novo.")])
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_cache_hit_skips_docling(mock_DoclingLoader, extraction_cache, tmp_path):
+    """ A cache hit returns the stored text without touching Docling. """
+    mock_lookup, mock_store = extraction_cache
+    mock_lookup.return_value = [(1, "Seção 1."), (2, "Seção 2.")]
+    file1 = create_mock_upload_file("doc1.pdf", "application/pdf", b"pdf1")
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        result_text = await processar_pdfs_upload([file1])
+    assert result_text == "--- CONTEÚDO DO ARQUIVO: doc1.pdf ---\n\nSeção 1.\n\nSeção 2."
+    mock_DoclingLoader.assert_not_called()
+    mock_store.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_concurrent_keeps_upload_order(mock_DoclingLoader, tmp_path):
+    """ Files are extracted concurrently, but the text keeps the upload order. """
+    in_flight = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    delays = {b"pdf1": 0.3, b"pdf2": 0.1, b"pdf3": 0.0}
+
+    def slow_loader(file_path):
+        with open(file_path, "rb") as f:
+            content = f.read()
+        def load():
+            with lock:
+                in_flight["now"] += 1
+                in_flight["max"] = max(in_flight["max"], in_flight["now"])
+            time.sleep(delays[content])
+            with lock:
+                in_flight["now"] -= 1
+            return [create_mock_langchain_doc(f"Texto {content.decode()}.")]
+        instance = MagicMock()
+        instance.load = MagicMock(side_effect=load)
+        return instance
+    mock_DoclingLoader.side_effect = slow_loader
+
+    executor = ExtractionExecutor(max_workers=3, max_queue=4, pool_factory=lambda: ThreadPoolExecutor(max_workers=1))
+    files = [create_mock_upload_file(f"doc{i}.pdf", "application/pdf", f"pdf{i}".encode()) for i in (1, 2, 3)]
+    try:
+        with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)), patch(EXECUTOR_MOCK_TARGET, return_value=executor):
+            result_text = await processar_pdfs_upload(files)
+    finally:
+        executor.shutdown()
+
+    assert result_text == (
+        "--- CONTEÚDO DO ARQUIVO: doc1.pdf ---\n\nTexto pdf1.\n\n"
+        "--- CONTEÚDO DO ARQUIVO: doc2.pdf ---\n\nTexto pdf2.\n\n"
+        "--- CONTEÚDO DO ARQUIVO: doc3.pdf ---\n\nTexto pdf3."
+    )
+    assert in_flight["max"] > 1
+    for file in files:
+        file.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_iter_extracted_sections_streams_records(mock_DoclingLoader, tmp_path):
+    """ The stream yields (filename, page_no, text, file_hash) records per section, in upload order. """
+    def loader(file_path):
+        with open(file_path, "rb") as f:
+            content = f.read()
+        instance = MagicMock()
+        if content == b"pdf1":
+            instance.load = MagicMock(return_value=[create_mock_langchain_doc("P1", 1), create_mock_langchain_doc("P2", 2)])
+        else:
+            instance.load = MagicMock(return_value=[create_mock_langchain_doc("Outro", 1), create_mock_langchain_doc("", 2)])
+        return instance
+    mock_DoclingLoader.side_effect = loader
+    files = [
+        create_mock_upload_file("doc1.pdf", "application/pdf", b"pdf1"),
+        create_mock_upload_file("doc2.pdf", "application/pdf", b"pdf2"),
+    ]
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        records = [record async for record in iter_extracted_sections(files)]
+    hash1, hash2 = hashlib.sha256(b"pdf1").hexdigest(), hashlib.sha256(b"pdf2").hexdigest()
+    assert records == [
+        ExtractedSection("doc1.pdf", 1, "P1", hash1),
+        ExtractedSection("doc1.pdf", 2, "P2", hash1),
+        ExtractedSection("doc2.pdf", 1, "Outro", hash2),
+    ]
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_iter_extracted_sections_distinct_skips_copies(mock_DoclingLoader, tmp_path):
+    """ With distinct=True, copies of an upload are deduplicated by the hash computed while spooling. """
+    mock_DoclingLoader.return_value.load = MagicMock(return_value=[create_mock_langchain_doc("Laudo", 1)])
+    files = [
+        create_mock_upload_file("laudo.pdf", "application/pdf", b"mesmo pdf"),
+        create_mock_upload_file("copia.pdf", "application/pdf", b"mesmo pdf"),
+    ]
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        records = [record async for record in iter_extracted_sections(files, distinct=True)]
+    assert records == [ExtractedSection("laudo.pdf", 1, "Laudo", hashlib.sha256(b"mesmo pdf").hexdigest())]
+    for file in files:
+        file.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_iter_extracted_sections_early_stop_cleans_up(mock_DoclingLoader, tmp_path):
+    """ Stopping the stream early cancels pending work and still closes every upload. """
+    mock_DoclingLoader.side_effect = create_mock_loader("Texto.", [])
+    files = [create_mock_upload_file(f"doc{i}.pdf", "application/pdf", f"pdf{i}".encode()) for i in range(3)]
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        stream = iter_extracted_sections(files)
+        first = await stream.__anext__()
+        await stream.aclose()
+        # Extractions already running are shared work: they finish, then drop their temp file
+        await wait_for_shared_extractions()
+    assert first.filename == "doc0.pdf"
+    assert list(tmp_path.iterdir()) == []
+    for file in files:
+        file.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_iter_extracted_sections_waits_for_the_consumer(mock_DoclingLoader, tmp_path):
+    """ Only a window of files is extracted ahead of the consumer; unstarted uploads are closed on early stop. """
+    seen = []
+    mock_DoclingLoader.side_effect = create_mock_loader("Texto.", seen)
+    files = [create_mock_upload_file(f"doc{i}.pdf", "application/pdf", f"pdf{i}".encode()) for i in range(4)]
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)), patch.object(pdf_processor.settings, "PDF_EXTRACTION_FILE_CONCURRENCY", 1):
+        stream = iter_extracted_sections(files)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.2)
+        # doc1 started once the consumer reached doc0; doc2 and doc3 wait for the consumer
+        assert first.filename == "doc0.pdf"
+        assert seen == [b"pdf0", b"pdf1"]
+        await stream.aclose()
+        await wait_for_shared_extractions()
+    assert list(tmp_path.iterdir()) == []
+    for file in files:
+        file.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_text_layer_skips_ocr(mock_DoclingLoader, tmp_path):
+    """ Born-digital pages are read from the text layer; only image-only page runs go to Docling. """
+    pytest.importorskip("pypdfium2")
+    def ocr_factory(file_path, convert_kwargs=None):
+        first, last = convert_kwargs["page_range"]
+        instance = MagicMock()
+        instance.load = MagicMock(return_value=[create_mock_langchain_doc(f"OCR pagina {page}.", page) for page in range(first, last + 1)])
+        return instance
+    mock_DoclingLoader.side_effect = ocr_factory
+    pages = ["Primeira pagina com camada de texto embutida.", None, None, "Quarta pagina tambem nasceu digital.", None]
+    dummy_file = create_mock_upload_file("misto.pdf", "application/pdf", build_pdf(pages))
+    before = get_page_path_stats()
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)), patch("app.utils.pdf_processor.settings.PDF_TEXT_LAYER_MIN_CHARS", 16):
+        sections = [section async for section in iter_extracted_sections([dummy_file])]
+    assert [(s.page_no, s.text) for s in sections] == [
+        (1, "Primeira pagina com camada de texto embutida."),
+        (2, "OCR pagina 2."),
+        (3, "OCR pagina 3."),
+        (4, "Quarta pagina tambem nasceu digital."),
+        (5, "OCR pagina 5."),
+    ]
+    ranges = [call.kwargs["convert_kwargs"]["page_range"] for call in mock_DoclingLoader.call_args_list]
+    assert ranges == [(2, 3), (5, 5)]
+    after = get_page_path_stats()
+    assert after["text_layer_pages"] - before["text_layer_pages"] == 2
+    assert after["ocr_pages"] - before["ocr_pages"] == 3
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_born_digital_never_calls_docling(mock_DoclingLoader, tmp_path):
+    """ A PDF whose every page has a text layer is extracted without OCR. """
+    pytest.importorskip("pypdfium2")
+    dummy_file = create_mock_upload_file("digital.pdf", "application/pdf", build_pdf(["Conteudo digital da pagina um.", "Conteudo digital da pagina dois."]))
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)), patch("app.utils.pdf_processor.settings.PDF_TEXT_LAYER_MIN_CHARS", 16):
+        result_text = await processar_pdfs_upload([dummy_file])
+    assert result_text == "--- CONTEÚDO DO ARQUIVO: digital.pdf ---\n\nConteudo digital da pagina um.\n\nConteudo digital da pagina dois."
+    mock_DoclingLoader.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_shards_large_scanned_pdf(mock_DoclingLoader, tmp_path):
+    """ A large scanned PDF is OCRed in page-range shards that run in parallel and are stitched in page order. """
+    pytest.importorskip("pypdfium2")
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+    def ocr_factory(file_path, convert_kwargs=None):
+        first, last = convert_kwargs["page_range"]
+        def load():
+            with lock:
+                running["now"] += 1
+                running["max"] = max(running["max"], running["now"])
+            time.sleep(0.05)
+            with lock:
+                running["now"] -= 1
+            return [create_mock_langchain_doc(f"OCR pagina {page}.", page) for page in range(first, last + 1)]
+        instance = MagicMock()
+        instance.load = MagicMock(side_effect=load)
+        return instance
+    mock_DoclingLoader.side_effect = ocr_factory
+
+    executor = ExtractionExecutor(max_workers=4, max_queue=8, pool_factory=lambda: ThreadPoolExecutor(max_workers=1))
+    dummy_file = create_mock_upload_file("inss.pdf", "application/pdf", build_pdf([None] * 10))
+    try:
+        with patch(EXECUTOR_MOCK_TARGET, return_value=executor), \
+             patch(TMP_DIR_SETTING_TARGET, str(tmp_path)), \
+             patch("app.utils.pdf_processor.settings.PDF_EXTRACTION_SHARD_PAGES", 3), \
+             patch("app.utils.pdf_processor.settings.PDF_EXTRACTION_MAX_SHARDS_PER_REQUEST", 2):
+            sections = [section async for section in iter_extracted_sections([dummy_file])]
+    finally:
+        executor.shutdown()
+
+    assert [s.page_no for s in sections] == list(range(1, 11))
+    assert [s.text for s in sections] == [f"OCR pagina {page}." for page in range(1, 11)]
+    ranges = sorted(call.kwargs["convert_kwargs"]["page_range"] for call in mock_DoclingLoader.call_args_list)
+    assert ranges == [(1, 3), (4, 6), (7, 9), (10, 10)]
+    # Shards ran in parallel, but never more than the per-request cap
+    assert running["max"] == 2
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_extraction_resumes_from_checkpoints_after_crash(mock_DoclingLoader, tmp_path, page_checkpoints):
+    """ Pages checkpointed before a crash are reused; a retry OCRs only the missing pages. """
+    pytest.importorskip("pypdfium2")
+    crash = {"at_page": 8}
+    def ocr_factory(file_path, convert_kwargs=None):
+        first, last = convert_kwargs["page_range"]
+        instance = MagicMock()
+        if crash["at_page"] is not None and first <= crash["at_page"] <= last:
+            instance.load = MagicMock(side_effect=RuntimeError("worker died"))
+        else:
+            instance.load = MagicMock(return_value=[create_mock_langchain_doc(f"OCR pagina {page}.", page) for page in range(first, last + 1)])
+        return instance
+    mock_DoclingLoader.side_effect = ocr_factory
+    pdf_bytes = build_pdf(["Capa do processo administrativo, com texto digital."] + [None] * 8)
+    file_hash = hashlib.sha256(pdf_bytes).hexdigest()
+    settings_patches = (
+        patch(TMP_DIR_SETTING_TARGET, str(tmp_path)),
+        patch("app.utils.pdf_processor.settings.PDF_TEXT_LAYER_MIN_CHARS", 16),
+        patch("app.utils.pdf_processor.settings.PDF_EXTRACTION_SHARD_PAGES", 3),
+        patch("app.utils.pdf_processor.settings.PDF_EXTRACTION_MAX_SHARDS_PER_REQUEST", 1),
+    )
+    for settings_patch in settings_patches:
+        settings_patch.start()
+    try:
+        # First attempt: the last shard (pages 8-9) crashes, the file yields nothing
+        first_attempt = await processar_pdfs_upload([create_mock_upload_file("inss.pdf", "application/pdf", pdf_bytes)])
+        assert first_attempt == ""
+        assert sorted(page_checkpoints[file_hash]) == [1, 2, 3, 4, 5, 6, 7]
+
+        # Retry: only the pages after the crash are OCRed again
+        crash["at_page"] = None
+        mock_DoclingLoader.reset_mock()
+        sections = [section async for section in iter_extracted_sections([create_mock_upload_file("inss.pdf", "application/pdf", pdf_bytes)])]
+    finally:
+        for settings_patch in settings_patches:
+            settings_patch.stop()
+
+    ranges = [call.kwargs["convert_kwargs"]["page_range"] for call in mock_DoclingLoader.call_args_list]
+    assert ranges == [(8, 9)]
+    assert [s.page_no for s in sections] == list(range(1, 10))
+    assert sections[0].text == "Capa do processo administrativo, com texto digital."
+    assert sections[-1].text == "OCR pagina 9."
+
+
+@pytest.mark.asyncio
+@patch(CHUNKS_EMBED_MOCK_TARGET, new_callable=AsyncMock)
+@patch(CHUNKS_STORE_MOCK_TARGET, new_callable=AsyncMock)
+@patch(CHUNKS_EXIST_MOCK_TARGET, new_callable=AsyncMock, return_value=False)
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_chunks_and_stores(mock_DoclingLoader, mock_exists, mock_store, mock_embed, tmp_path):
+    """ With a chunking config, each extracted document is chunked, bulk-stored once and embedded. """
+    mock_DoclingLoader.side_effect = create_mock_loader("Texto do laudo. " * 50, [])
+    dummy_file = create_mock_upload_file("doc1.pdf", "application/pdf", b"pdf1_content")
+    chunking = ModuleChunkingConfig(max_tokens=40, overlap_tokens=8)
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        result_text = await processar_pdfs_upload([dummy_file], chunking=chunking)
+    assert result_text.startswith("--- CONTEÚDO DO ARQUIVO: doc1.pdf ---")
+    mock_store.assert_awaited_once()
+    file_hash, extractor_version, chunker, chunks = mock_store.await_args.args
+    assert file_hash == hashlib.sha256(b"pdf1_content").hexdigest()
+    assert extractor_version == EXTRACTOR_VERSION
+    assert chunker == chunker_key(chunking)
+    assert len(chunks) > 1 and all(chunk.token_count <= 40 for chunk in chunks)
+    mock_embed.assert_awaited_once_with(file_hash, EXTRACTOR_VERSION, chunker)
+
+
+@pytest.mark.asyncio
+@patch(CHUNKS_STORE_MOCK_TARGET, new_callable=AsyncMock)
+@patch(CHUNKS_EXIST_MOCK_TARGET, new_callable=AsyncMock, side_effect=RuntimeError("db down"))
+@patch(LOADER_MOCK_TARGET)
+async def test_processar_pdfs_chunk_storage_error_is_not_fatal(mock_DoclingLoader, mock_exists, mock_store, tmp_path):
+    mock_DoclingLoader.side_effect = create_mock_loader("Texto.", [])
+    dummy_file = create_mock_upload_file("doc1.pdf", "application/pdf", b"pdf1_content")
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        result_text = await processar_pdfs_upload([dummy_file], chunking=ModuleChunkingConfig(max_tokens=40))
+    assert result_text == "--- CONTEÚDO DO ARQUIVO: doc1.pdf ---\n\nTexto."
+    mock_store.assert_not_awaited()
+
+
 @pytest.mark.asyncio
 async def test_processar_pdfs_empty_list():
     """ Test processing an empty list of files. """
     result_text = await processar_pdfs_upload([])
-    assert result_text == ""
\ No newline at end of file
+    assert result_text == ""
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_concurrent_identical_uploads_share_one_extraction(mock_DoclingLoader, tmp_path):
+    """ N requests uploading the same PDF at the same time run the extraction once. """
+    seen_contents = []
+    def slow_factory(file_path, **kwargs):
+        with open(file_path, "rb") as f:
+            seen_contents.append(f.read())
+        instance = MagicMock()
+        instance.load = MagicMock(side_effect=lambda: time.sleep(0.2) or [create_mock_langchain_doc("Texto compartilhado.")])
+        return instance
+    mock_DoclingLoader.side_effect = slow_factory
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        results = await asyncio.gather(*(
+            processar_pdfs_upload([create_mock_upload_file(f"copia{i}.pdf", "application/pdf", b"mesmo pdf")])
+            for i in range(5)
+        ))
+    assert seen_contents == [b"mesmo pdf"]
+    assert all("Texto compartilhado." in result for result in results)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+@patch(LOADER_MOCK_TARGET)
+async def test_shared_extraction_survives_cancelled_requester(mock_DoclingLoader, tmp_path):
+    """ The request that started a shared extraction can disconnect without cancelling it for the others. """
+    started, release = threading.Event(), threading.Event()
+    def blocking_factory(file_path, **kwargs):
+        with open(file_path, "rb") as f:
+            content = f.read()
+        instance = MagicMock()
+        def load():
+            started.set()
+            release.wait(5)
+            return [create_mock_langchain_doc(content.decode())]
+        instance.load = MagicMock(side_effect=load)
+        return instance
+    mock_DoclingLoader.side_effect = blocking_factory
+    with patch(TMP_DIR_SETTING_TARGET, str(tmp_path)):
+        leader = asyncio.create_task(processar_pdfs_upload([create_mock_upload_file("a.pdf", "application/pdf", b"conteudo do laudo")]))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        follower = asyncio.create_task(processar_pdfs_upload([create_mock_upload_file("b.pdf", "application/pdf", b"conteudo do laudo")]))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        release.set()
+        result = await follower
+    assert "conteudo do laudo" in result
+    assert mock_DoclingLoader.call_count == 1
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,51 @@
+# backend/tests/test_pdf_text_layer.py
+import pytest
+
+pdfium = pytest.importorskip("pypdfium2")
+
+from app.utils.pdf_text_layer import read_text_layer, is_usable_text, page_runs, plan_ocr_shards
+
+BORN_DIGITAL = "Laudo pericial do processo 0001234-56.2024 com texto embutido."
+
+
+def test_read_text_layer_classifies_pages(make_pdf):
+    """ Pages with embedded text are read directly; pages without it are left for OCR. """
+    path = make_pdf([BORN_DIGITAL, None, "Pagina 3 tambem nasceu digital, sem digitalizacao.", None, None])
+    layer = read_text_layer(path, min_chars=16)
+    assert layer.page_count == 5
+    assert sorted(layer.pages) == [1, 3]
+    assert "0001234-56.2024" in layer.pages[1]
+    assert layer.ocr_pages == [2, 4, 5]
+
+
+def test_read_text_layer_short_text_needs_ocr(make_pdf):
+    """ A page whose only text is a stamp (e.g. a page number) is treated as image-only. """
+    path = make_pdf(["12", BORN_DIGITAL])
+    layer = read_text_layer(path, min_chars=16)
+    assert layer.ocr_pages == [1]
+
+
+def test_read_text_layer_rejects_non_pdf(tmp_path):
+    path = tmp_path / "not_a.pdf"
+    path.write_bytes(b"not a pdf at all")
+    with pytest.raises(pdfium.PdfiumError):
+        read_text_layer(str(path), min_chars=16)
+
+
+def test_is_usable_text_rejects_garbage():
+    assert is_usable_text(BORN_DIGITAL, min_chars=16)
+    assert not is_usable_text("   \n  ", min_chars=1)
+    # Fonts without a ToUnicode map come out as replacement characters
+    assert not is_usable_text("abcdefghijklmnopqrst" + "�" * 20, min_chars=16)
+
+
+def test_page_runs():
+    assert page_runs([]) == []
+    assert page_runs([2, 3, 4, 7, 9, 10]) == [(2, 4), (7, 7), (9, 10)]
+
+
+def test_plan_ocr_shards():
+    assert plan_ocr_shards([], 3) == []
+    assert plan_ocr_shards([1, 2, 3, 4, 5, 6, 7], 3) == [[(1, 3)], [(4, 6)], [(7, 7)]]
+    # Shards count OCR pages, skipping the born-digital pages in between
+    assert plan_ocr_shards([2, 3, 5, 8, 9], 4) == [[(2, 3), (5, 5), (8, 8)], [(9, 9)]]
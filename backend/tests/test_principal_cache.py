@@ -0,0 +1,221 @@
+# backend/tests/test_principal_cache.py
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import dependencies, principal_cache, security, token_revocation
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.principal_cache import PrincipalCache, handle_invalidation, notify_principal_changed
+from app.main import app
+from app.models.enums import UserRole
+from app.models.user import User
+
+AUTH_URL = f"{settings.API_PREFIX}/auth/v1"
+
+client = TestClient(app)
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1_000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+def make_user(user_id: int, email: str = None, role: UserRole = UserRole.USER, is_active: bool = True) -> User:
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return User(
+        id=user_id, email=email or f"user{user_id}@example.com", hashed_password="$2b$12$hash",
+        role=role, is_active=is_active, created_at=now, updated_at=now,
+    )
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = PrincipalCache(max_size=2, ttl_seconds=30, clock=Relogio())
+    monkeypatch.setattr(principal_cache, "_principal_cache", cache)
+    yield cache
+    app.dependency_overrides.clear()
+
+
+def fake_db(*users):
+    """Session whose queries return `users` in order, counting the queries."""
+    results = []
+    for user in users:
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = user
+        result.scalars.return_value.first.return_value = user
+        results.append(result)
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=results)
+    db.commit = AsyncMock()
+    db.refresh = AsyncMock()
+    app.dependency_overrides[get_db] = lambda: db
+    return db
+
+
+def auth_headers(user_id: int):
+    return {"Authorization": f"Bearer {security.create_access_token({'sub': str(user_id), 'role': 'user'})}"}
+
+
+def test_hits_return_detached_copies(cache):
+    cache.put(make_user(1))
+    first, second = cache.get(1), cache.get(1)
+    assert first.email == "user1@example.com" and first.role == UserRole.USER
+    assert first is not second
+    first.email = "changed@example.com"
+    assert cache.get(1).email == "user1@example.com"
+    assert cache.stats()["hits"] == 3
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(cache):
+    cache.put(make_user(1))
+    cache.put(make_user(2))
+    cache.get(1)
+    cache.put(make_user(3))
+    assert cache.get(2) is None
+    assert cache.get(1) is not None and cache.get(3) is not None
+    assert cache.stats()["evictions"] == 1
+
+    cache._clock.agora += 31
+    assert cache.get(1) is None
+    assert cache.stats()["size"] == 1
+
+
+def test_notifications_invalidate_one_user_or_all(cache):
+    cache.put(make_user(1))
+    cache.put(make_user(2))
+    handle_invalidation("1")
+    assert cache.get(1) is None and cache.get(2) is not None
+    handle_invalidation("not-an-id")
+    handle_invalidation("*")
+    assert cache.stats()["size"] == 0
+
+
+def test_rows_read_before_an_invalidation_are_not_cached(cache):
+    generation = cache.generation()
+    # update_user commits and invalidates while the lookup's SELECT is in flight
+    cache.invalidate(5)
+    cache.put(make_user(5, is_active=True), generation)
+    assert cache.get(5) is None
+    assert cache.stats()["stale_puts"] == 1
+
+    # Other users, and lookups started after the invalidation, are cached as usual
+    cache.put(make_user(6), generation)
+    cache.put(make_user(5, is_active=False), cache.generation())
+    assert cache.get(6) is not None and cache.get(5).is_active is False
+
+    generation = cache.generation()
+    cache.clear()
+    cache.put(make_user(6), generation)
+    assert cache.get(6) is None
+
+
+@pytest.mark.asyncio
+async def test_lookup_racing_an_update_does_not_revive_the_old_version(cache, monkeypatch):
+    """ The stale row read during an update is neither cached nor recorded in the revocation set. """
+    revocations = token_revocation.TokenRevocationSet(max_staleness_seconds=60)
+    monkeypatch.setattr(token_revocation, "_revocation_set", revocations)
+    antigo = make_user(5)
+    antigo.token_version = 0
+
+    async def select_concorrente(_statement):
+        # The admin's update commits (version 1) before the SELECT returns the old row
+        principal_cache.invalidate_principal(5)
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = antigo
+        return result
+
+    db = MagicMock()
+    db.execute = select_concorrente
+    await dependencies._load_user(5, {"ver": 0}, db)
+    assert cache.get(5) is None
+    revocations._loaded_at = revocations._clock()
+    assert revocations.check(5, 0) is None
+
+
+@pytest.mark.asyncio
+async def test_notify_runs_pg_notify_in_the_callers_transaction():
+    db = MagicMock()
+    db.execute = AsyncMock()
+    await notify_principal_changed(db, 42)
+    statement, params = db.execute.await_args.args
+    assert "pg_notify" in str(statement)
+    assert params == {"channel": settings.PRINCIPAL_CACHE_NOTIFY_CHANNEL, "payload": "42"}
+
+    db.execute.reset_mock()
+    with patch.object(settings, "PRINCIPAL_CACHE_NOTIFY_CHANNEL", ""):
+        await notify_principal_changed(db, 42)
+    db.execute.assert_not_awaited()
+
+
+def test_users_me_is_served_from_the_cache_on_a_hit(cache):
+    db = fake_db(make_user(5))
+    for _ in range(3):
+        response = client.get(f"{AUTH_URL}/users/me", headers=auth_headers(5))
+        assert response.status_code == 200
+        assert response.json()["email"] == "user5@example.com"
+    assert db.execute.await_count == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_update_user_invalidates_the_cached_principal(cache):
+    admin = make_user(1, role=UserRole.ADMIN)
+    target = make_user(5, is_active=True)
+    cache.put(admin)
+    cache.put(target)
+
+    # Lookup of the target, then the pg_notify
+    db = fake_db(target, None)
+    response = client.put(f"{AUTH_URL}/admin/users/5", json={"is_active": False}, headers=auth_headers(1))
+    assert response.status_code == 200
+    assert cache.get(5) is None
+    assert "pg_notify" in str(db.execute.await_args_list[-1].args[0])
+
+    # The next request of the deactivated user reads the row again
+    fake_db(make_user(5, is_active=False))
+    assert client.get(f"{AUTH_URL}/users/me", headers=auth_headers(5)).status_code == 400
+
+
+def test_delete_user_invalidates_the_cached_principal(cache):
+    cache.put(make_user(1, role=UserRole.ADMIN))
+    cache.put(make_user(5))
+    fake_db(make_user(5), None, None)
+    response = client.delete(f"{AUTH_URL}/admin/users/5", headers=auth_headers(1))
+    assert response.status_code == 204
+    assert cache.get(5) is None
+
+    fake_db(None)
+    assert client.get(f"{AUTH_URL}/users/me", headers=auth_headers(5)).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_listener_applies_notifications_and_clears_when_disconnected(cache):
+    connection = MagicMock()
+    connection.is_closed.return_value = False
+    connection.close = AsyncMock()
+    connection.add_listener = AsyncMock()
+    listener = principal_cache.PrincipalInvalidationListener("postgresql://db/test", "principal_invalidation", retry_seconds=0.01)
+
+    with patch("app.core.principal_cache.asyncpg.connect", new_callable=AsyncMock, return_value=connection):
+        listener.start()
+        await asyncio.sleep(0.01)
+        channel, callback = connection.add_listener.await_args.args
+        assert channel == "principal_invalidation"
+
+        cache.put(make_user(1))
+        cache.put(make_user(2))
+        callback(connection, 123, channel, "1")
+        assert cache.get(1) is None and cache.get(2) is not None
+
+        # Connection lost: notifications may have been missed, so nothing cached is trusted
+        on_terminate = connection.add_termination_listener.call_args.args[0]
+        on_terminate(connection)
+        await asyncio.sleep(0)
+        assert cache.stats()["size"] == 0
+        await listener.stop()
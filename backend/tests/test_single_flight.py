@@ -0,0 +1,77 @@
+# backend/tests/test_single_flight.py
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight
+
+
+def counting_work(result="feito", delay=0.05, error=None):
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return result
+    return work, calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_invocation():
+    flight = SingleFlight("test")
+    work, calls = counting_work()
+    results = await asyncio.gather(*(flight.do("caso", work) for _ in range(10)))
+    assert results == ["feito"] * 10
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 9}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_and_later_calls_run_separately():
+    flight = SingleFlight("test")
+    work, calls = counting_work()
+    await asyncio.gather(flight.do("a", work), flight.do("b", work))
+    await flight.do("a", work)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight("test")
+    work, calls = counting_work(delay=0.1)
+    first = asyncio.create_task(flight.do("caso", work))
+    second = asyncio.create_task(flight.do("caso", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await second == "feito"
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_work_finishes_when_every_caller_left():
+    flight = SingleFlight("test")
+    finished = asyncio.Event()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.set()
+    caller = asyncio.create_task(flight.do("caso", work))
+    await asyncio.sleep(0.01)
+    caller.cancel()
+    await asyncio.wait_for(finished.wait(), 1)
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_waiter_and_are_not_kept():
+    flight = SingleFlight("test")
+    work, calls = counting_work(error=ValueError("falhou"))
+    results = await asyncio.gather(*(flight.do("caso", work) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 1
+    with pytest.raises(ValueError):
+        await flight.do("caso", work)
+    assert len(calls) == 2
@@ -0,0 +1,104 @@
+# backend/tests/test_token_cache.py
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.core import security, token_cache
+from app.core.token_cache import VerifiedTokenCache, estimate_size
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1_000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+def claims(user_id: int, exp: float = 2_000.0) -> dict:
+    return {"sub": str(user_id), "role": "user", "active": True, "ver": 0, "exp": exp}
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = VerifiedTokenCache(max_entries=100, max_bytes=1_000_000)
+    monkeypatch.setattr(token_cache, "_token_cache", cache)
+    return cache
+
+
+def test_entries_expire_at_the_token_exp():
+    cache = VerifiedTokenCache(max_entries=10, max_bytes=100_000, clock=Relogio())
+    cache.put("token-1", claims(1, exp=1_010.0))
+    assert cache.get("token-1")["sub"] == "1"
+
+    cache._clock.agora = 1_010.0
+    assert cache.get("token-1") is None
+    stats = cache.stats()
+    assert stats["size"] == 0 and stats["bytes"] == 0
+    assert stats["expirations"] == 1 and stats["hits"] == 1 and stats["misses"] == 1
+
+    # Tokens already expired, or without exp, are never cached
+    cache.put("token-2", claims(2, exp=900.0))
+    cache.put("token-3", {"sub": "3"})
+    assert cache.stats()["size"] == 0
+
+
+def test_hits_return_copies():
+    cache = VerifiedTokenCache(max_entries=10, max_bytes=100_000, clock=Relogio())
+    cache.put("token-1", claims(1))
+    cache.get("token-1")["role"] = "admin"
+    assert cache.get("token-1")["role"] == "user"
+
+
+def test_entry_and_memory_caps_evict_the_least_recently_used():
+    cache = VerifiedTokenCache(max_entries=2, max_bytes=100_000, clock=Relogio())
+    cache.put("token-1", claims(1))
+    cache.put("token-2", claims(2))
+    cache.get("token-1")
+    cache.put("token-3", claims(3))
+    assert cache.get("token-2") is None
+    assert cache.get("token-1") is not None and cache.get("token-3") is not None
+
+    entry_size = estimate_size(claims(1))
+    cache = VerifiedTokenCache(max_entries=100, max_bytes=entry_size * 3, clock=Relogio())
+    for user_id in range(1, 6):
+        cache.put(f"token-{user_id}", claims(user_id))
+    stats = cache.stats()
+    assert stats["size"] == 3 and stats["evictions"] == 2
+    assert stats["bytes"] <= stats["max_bytes"]
+    assert cache.get("token-1") is None and cache.get("token-5") is not None
+
+
+def test_decode_token_verifies_each_token_once(cache):
+    token = security.create_access_token({"sub": "7", "role": "user"})
+    with patch("app.core.security.jwt.decode", wraps=security.jwt.decode) as decode:
+        for _ in range(3):
+            assert security.decode_token(token)["sub"] == "7"
+    assert decode.call_count == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_invalid_and_expired_tokens_are_not_cached(cache):
+    token = security.create_access_token({"sub": "7"})
+    assert security.decode_token(token[:-2] + "xx") is None
+    expired = security.create_access_token({"sub": "7"}, expires_delta=timedelta(seconds=-1))
+    assert security.decode_token(expired) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_cached_decode_is_faster_than_verification():
+    """ Microbenchmark: cached decoding must beat signature verification by a wide margin. """
+    tokens = [security.create_access_token({"sub": str(user_id), "role": "user"}) for user_id in range(200)]
+    timings = {}
+    for name, cache in (("cold", VerifiedTokenCache(max_entries=0)), ("cached", VerifiedTokenCache(max_entries=200))):
+        with patch("app.core.security.get_token_cache", return_value=cache):
+            for token in tokens:
+                security.decode_token(token)
+            started = time.perf_counter()
+            for _ in range(5):
+                for token in tokens:
+                    security.decode_token(token)
+            timings[name] = time.perf_counter() - started
+    assert timings["cached"] * 3 < timings["cold"]
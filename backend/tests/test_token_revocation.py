@@ -0,0 +1,170 @@
+# backend/tests/test_token_revocation.py
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core import principal_cache, security, token_revocation
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.dependencies import Principal, get_current_principal, require_admin_user
+from app.core.principal_cache import PrincipalCache, invalidate_principal
+from app.core.token_revocation import TokenRevocationSet
+from app.main import app
+from app.models.enums import UserRole
+from app.models.user import User
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1_000.0
+
+    def __call__(self) -> float:
+        return self.agora
+
+
+def make_user(user_id: int, role: UserRole = UserRole.USER, is_active: bool = True, token_version: int = 0) -> User:
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return User(
+        id=user_id, email=f"user{user_id}@example.com", hashed_password="$2b$12$hash",
+        role=role, is_active=is_active, token_version=token_version, created_at=now, updated_at=now,
+    )
+
+
+def make_token(user_id: int, role: UserRole = UserRole.USER, active: bool = True, ver: int = 0) -> str:
+    return security.create_access_token({"sub": str(user_id), "role": role.value, "active": active, "ver": ver})
+
+
+def fake_db(*users):
+    results = []
+    for user in users:
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = user
+        results.append(result)
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=results)
+    return db
+
+
+@pytest.fixture
+def revocations(monkeypatch):
+    revocations = TokenRevocationSet(max_staleness_seconds=60, clock=Relogio())
+    monkeypatch.setattr(token_revocation, "_revocation_set", revocations)
+    monkeypatch.setattr(principal_cache, "_principal_cache", PrincipalCache(max_size=0))
+    monkeypatch.setattr(settings, "AUTH_MODE", "claims")
+    return revocations
+
+
+def test_check_tells_current_revoked_and_unknown_versions(revocations):
+    assert revocations.check(1, 0) is None
+    revocations.replace({1: 2})
+    assert revocations.check(1, 2) is True
+    assert revocations.check(1, 1) is False
+    assert revocations.check(9, 0) is None
+
+    # Past the staleness bound nothing is trusted
+    revocations._clock.agora += 61
+    assert revocations.check(1, 2) is None
+    assert revocations.stats()["accepted"] == 1 and revocations.stats()["revoked"] == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_drops_users_changed_while_loading(revocations):
+    result = MagicMock()
+    result.all.return_value = [(1, 0), (2, 3)]
+
+    async def execute(_statement):
+        # Another request changes user 2 while the reload is running
+        invalidate_principal(2)
+        return result
+
+    db = MagicMock()
+    db.execute = execute
+
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    with patch("app.core.token_revocation.get_db_contextmanager", session):
+        await revocations.refresh()
+    assert revocations.check(1, 0) is True
+    assert revocations.check(2, 3) is None
+    assert revocations.stats()["refreshes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_claims_mode_authorizes_admins_without_a_query(revocations):
+    revocations.replace({1: 4})
+    db = fake_db()
+    principal = await get_current_principal(make_token(1, UserRole.ADMIN, ver=4), db)
+    assert principal == Principal(id=1, role=UserRole.ADMIN, is_active=True, token_version=4)
+    assert await require_admin_user(principal) is principal
+    db.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_claims_mode_rejects_revoked_tokens(revocations):
+    revocations.replace({1: 5})
+    with pytest.raises(HTTPException) as excinfo:
+        await get_current_principal(make_token(1, UserRole.ADMIN, ver=4), fake_db())
+    assert excinfo.value.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revocation_lag_is_bounded_by_the_next_reload(revocations):
+    """ A token revoked by another worker is accepted until the set learns the new version. """
+    revocations.replace({1: 0})
+    token = make_token(1, UserRole.ADMIN, ver=0)
+    assert (await get_current_principal(token, fake_db())).role == UserRole.ADMIN
+
+    revocations.replace({1: 1})
+    with pytest.raises(HTTPException):
+        await get_current_principal(token, fake_db())
+
+
+@pytest.mark.asyncio
+async def test_unknown_users_are_checked_against_the_database(revocations):
+    db = fake_db(make_user(7, role=UserRole.USER, token_version=2))
+    # The token still claims admin, but the row (version 2) says otherwise
+    with pytest.raises(HTTPException) as excinfo:
+        await get_current_principal(make_token(7, UserRole.ADMIN, ver=1), db)
+    assert excinfo.value.status_code == 401
+    assert db.execute.await_count == 1
+
+    # The version read from the database is remembered
+    revocations._loaded_at = revocations._clock()
+    assert revocations.check(7, 2) is True
+
+
+@pytest.mark.asyncio
+async def test_database_mode_always_loads_the_user(revocations, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_MODE", "database")
+    revocations.replace({1: 0})
+    db = fake_db(make_user(1, role=UserRole.USER))
+    principal = await get_current_principal(make_token(1, UserRole.ADMIN), db)
+    assert principal.role == UserRole.USER
+    assert db.execute.await_count == 1
+
+
+def test_deactivating_a_user_revokes_the_issued_tokens(revocations):
+    target = make_user(5, token_version=3)
+    revocations.replace({5: 3})
+    lookup = MagicMock()
+    lookup.scalars.return_value.first.return_value = target
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=[lookup, None])
+    db.commit = AsyncMock()
+    db.refresh = AsyncMock()
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[require_admin_user] = lambda: Principal(id=1, role=UserRole.ADMIN, is_active=True, token_version=0)
+    try:
+        response = TestClient(app).put(f"{settings.API_PREFIX}/auth/v1/admin/users/5", json={"is_active": False})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert target.token_version == 4
+    # Forgotten locally: the next request of user 5 goes to the database
+    assert revocations.check(5, 3) is None
@@ -0,0 +1,84 @@
+# backend/tests/test_upload_ingest.py
+import hashlib
+import os
+import pytest
+from unittest.mock import MagicMock
+from fastapi import UploadFile as FastAPIUploadFile
+from io import BytesIO
+
+from app.utils.upload_ingest import (
+    UploadBudget,
+    UploadTooLargeError,
+    discard_spooled_upload,
+    spool_upload_to_disk,
+)
+
+class CountingBytesIO(BytesIO):
+    """BytesIO that records the size of every read, to check the copy is chunked."""
+    def __init__(self, content: bytes):
+        super().__init__(content)
+        self.read_sizes = []
+
+    def read(self, size=-1):
+        self.read_sizes.append(size)
+        return super().read(size)
+
+def create_upload(filename: str, content: bytes) -> FastAPIUploadFile:
+    upload = MagicMock(spec=FastAPIUploadFile)
+    upload.filename = filename
+    upload.content_type = "application/pdf"
+    upload.file = CountingBytesIO(content)
+    return upload
+
+@pytest.mark.asyncio
+async def test_spool_copies_in_chunks_and_hashes(tmp_path, monkeypatch):
+    """ The copy is done in bounded reads and the SHA-256 matches the content. """
+    monkeypatch.setattr("app.utils.upload_ingest.settings.PDF_UPLOAD_TMP_DIR", str(tmp_path))
+    content = os.urandom(10_000)
+    upload = create_upload("grande.pdf", content)
+
+    spooled = await spool_upload_to_disk(upload, chunk_size=1024)
+
+    assert spooled.size == len(content)
+    assert spooled.sha256 == hashlib.sha256(content).hexdigest()
+    assert all(size == 1024 for size in upload.file.read_sizes)
+    with open(spooled.path, "rb") as f:
+        assert f.read() == content
+    discard_spooled_upload(spooled)
+    assert not os.path.exists(spooled.path)
+
+@pytest.mark.asyncio
+async def test_spool_empty_upload_returns_none(tmp_path, monkeypatch):
+    """ Empty uploads produce no temporary file. """
+    monkeypatch.setattr("app.utils.upload_ingest.settings.PDF_UPLOAD_TMP_DIR", str(tmp_path))
+    spooled = await spool_upload_to_disk(create_upload("vazio.pdf", b""))
+    assert spooled is None
+    assert list(tmp_path.iterdir()) == []
+
+@pytest.mark.asyncio
+async def test_spool_per_file_limit(tmp_path, monkeypatch):
+    """ A file over the per-file limit is rejected mid-stream and its partial copy removed. """
+    monkeypatch.setattr("app.utils.upload_ingest.settings.PDF_UPLOAD_TMP_DIR", str(tmp_path))
+    upload = create_upload("enorme.pdf", b"x" * 5000)
+
+    with pytest.raises(UploadTooLargeError) as exc_info:
+        await spool_upload_to_disk(upload, chunk_size=1000, max_file_bytes=2500)
+
+    assert exc_info.value.status_code == 413
+    # Streaming stopped at the chunk that crossed the limit
+    assert len(upload.file.read_sizes) == 3
+    assert list(tmp_path.iterdir()) == []
+
+@pytest.mark.asyncio
+async def test_spool_shared_request_budget(tmp_path, monkeypatch):
+    """ The request budget is shared across files. """
+    monkeypatch.setattr("app.utils.upload_ingest.settings.PDF_UPLOAD_TMP_DIR", str(tmp_path))
+    budget = UploadBudget(max_request_bytes=1500)
+
+    first = await spool_upload_to_disk(create_upload("a.pdf", b"a" * 1000), budget=budget)
+    with pytest.raises(UploadTooLargeError):
+        await spool_upload_to_disk(create_upload("b.pdf", b"b" * 1000), budget=budget)
+
+    assert budget.consumed > 1500
+    assert [p.name for p in tmp_path.iterdir()] == [os.path.basename(first.path)]
+    discard_spooled_upload(first)